@@ -50,6 +50,53 @@ class Settings(BaseSettings):
         default="webm,mp3,wav,m4a,ogg",
         description="Allowed file extensions as comma-separated string"
     )
+    upload_block_size: int = Field(
+        default=256 * 1024,  # 256KB
+        description="Block size used when streaming uploads to disk"
+    )
+    partial_upload_dir: Path = Field(
+        default=Path("./uploads_partial"),
+        description="Directory for incomplete resumable uploads"
+    )
+    resumable_upload_expiry_hours: int = Field(
+        default=24,
+        description="Hours after which incomplete resumable uploads are discarded"
+    )
+    content_addressed_storage: bool = Field(
+        default=True,
+        description="Store chunk files once per content hash in a sharded object directory"
+    )
+    object_store_dir: Path = Field(
+        default=Path("./uploads/objects"),
+        description="Root of the content-addressed object store (same volume as upload_dir)"
+    )
+    
+    # Object Storage Backend
+    storage_backend: str = Field(
+        default="local",
+        description="Where chunk blobs are stored: 'local' (object_store_dir) or 's3'"
+    )
+    s3_endpoint_url: Optional[str] = Field(
+        default=None,
+        description="S3-compatible endpoint, e.g. https://s3.us-east-1.amazonaws.com or http://localhost:9000 (MinIO)"
+    )
+    s3_bucket: str = Field(default="talentsync-media", description="Bucket holding chunk blobs")
+    s3_region: str = Field(default="us-east-1", description="Region used for request signing")
+    s3_access_key_id: Optional[str] = Field(default=None, description="S3 access key id")
+    s3_secret_access_key: Optional[str] = Field(default=None, description="S3 secret access key")
+    s3_key_prefix: str = Field(default="objects/", description="Key prefix of chunk blobs in the bucket")
+    s3_multipart_part_size: int = Field(
+        default=8 * 1024 * 1024,  # 8MB
+        description="Files larger than this are uploaded in parts of this size"
+    )
+    s3_multipart_concurrency: int = Field(
+        default=4,
+        description="Parts uploaded concurrently per multipart upload"
+    )
+    presigned_upload_expiry_seconds: int = Field(
+        default=900,
+        description="Validity of presigned direct-upload URLs in seconds"
+    )
     
     # Chunk Configuration
     default_overlap_seconds: float = Field(
@@ -61,6 +108,20 @@ class Settings(BaseSettings):
         description="Maximum chunk duration in seconds"
     )
     
+    # Voice Activity Detection
+    vad_enabled: bool = Field(
+        default=True,
+        description="Compute silence and quality metrics for uploaded chunks"
+    )
+    vad_energy_threshold_db: float = Field(
+        default=-40.0,
+        description="Frame energy (dBFS) below which audio is treated as silence"
+    )
+    ffmpeg_path: str = Field(
+        default="ffmpeg",
+        description="ffmpeg binary used to decode compressed audio for analysis"
+    )
+    
     # Redis Configuration (for Celery)
     redis_url: str = Field(
         default="redis://localhost:6379/0",
@@ -102,9 +163,47 @@ class Settings(BaseSettings):
         description="Resume service URL"
     )
     
+    # Event Outbox Configuration
+    event_dispatch_interval_seconds: float = Field(
+        default=0.5,
+        description="Polling interval of the outbox event dispatcher"
+    )
+    event_batch_size: int = Field(
+        default=100,
+        description="Maximum outbox events claimed per dispatch cycle"
+    )
+    event_dispatch_concurrency: int = Field(
+        default=10,
+        description="Concurrent event deliveries per destination"
+    )
+    event_delivery_timeout: float = Field(
+        default=10.0,
+        description="HTTP timeout for event delivery in seconds"
+    )
+    event_max_attempts: int = Field(
+        default=8,
+        description="Delivery attempts before an event is marked failed"
+    )
+    event_retry_base_delay: float = Field(
+        default=1.0,
+        description="Base delay in seconds for event retry backoff"
+    )
+    event_retry_max_delay: float = Field(
+        default=300.0,
+        description="Maximum event retry backoff delay in seconds"
+    )
+    event_outbox_retention_hours: int = Field(
+        default=72,
+        description="Hours delivered events are kept in the outbox"
+    )
+    
     # Monitoring
     enable_metrics: bool = Field(default=True, description="Enable Prometheus metrics")
     metrics_port: int = Field(default=9002, description="Metrics server port")
+    metrics_cache_seconds: float = Field(
+        default=15.0,
+        description="How long a database metrics snapshot is served before re-reading (match the scrape interval)"
+    )
     
     # Logging
     log_level: str = Field(default="INFO", description="Log level")
@@ -122,11 +221,25 @@ class Settings(BaseSettings):
         default=30,
         description="Maximum file age before cleanup in days"
     )
+    cleanup_batch_size: int = Field(
+        default=500,
+        description="Chunks removed per cleanup batch (one DELETE and commit per batch)"
+    )
+    cleanup_delete_workers: int = Field(
+        default=8,
+        description="Threads used to delete chunk files during cleanup"
+    )
+    stats_reconciliation_interval_minutes: int = Field(
+        default=60,
+        description="Interval for verifying session counters against chunks (0 disables)"
+    )
     
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        # Ensure upload directory exists
+        # Ensure upload directories exist
         self.upload_dir.mkdir(parents=True, exist_ok=True)
+        self.partial_upload_dir.mkdir(parents=True, exist_ok=True)
+        self.object_store_dir.mkdir(parents=True, exist_ok=True)
     
     @property
     def allowed_extensions(self) -> list[str]:
@@ -4,6 +4,7 @@ Database configuration and setup for Media Service.
 import logging
 from typing import AsyncGenerator
 
+from sqlalchemy import inspect, text
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
 
@@ -54,15 +55,56 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             await session.close()
 
 
+# Columns added to existing tables after their first release, with the
+# statements that fill them in for existing rows. create_all only creates
+# missing tables, so init_db adds these to databases created earlier.
+ADDED_COLUMNS = [
+    (
+        "media_sessions", "uploaded_chunks", "INTEGER DEFAULT 0",
+        [
+            "UPDATE media_sessions SET uploaded_chunks = "
+            "(SELECT COUNT(*) FROM media_chunks WHERE media_chunks.session_id = media_sessions.session_id)"
+        ]
+    ),
+    (
+        "media_sessions", "storage_bytes", "INTEGER DEFAULT 0",
+        [
+            "UPDATE media_sessions SET storage_bytes = "
+            "(SELECT COALESCE(SUM(file_size_bytes), 0) FROM media_chunks "
+            "WHERE media_chunks.session_id = media_sessions.session_id)"
+        ]
+    ),
+    (
+        "media_chunks", "content_hash", "VARCHAR(64)",
+        ["CREATE INDEX IF NOT EXISTS ix_media_chunks_content_hash ON media_chunks (content_hash)"]
+    ),
+]
+
+
+def _add_missing_columns(sync_conn) -> None:
+    """Add ADDED_COLUMNS that an existing database does not have yet."""
+    inspector = inspect(sync_conn)
+    for table, column, ddl, backfill in ADDED_COLUMNS:
+        if not inspector.has_table(table):
+            continue
+        if column in {existing["name"] for existing in inspector.get_columns(table)}:
+            continue
+        sync_conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+        for statement in backfill:
+            sync_conn.execute(text(statement))
+        logger.info(f"Added column {table}.{column}")
+
+
 async def init_db() -> None:
     """Initialize database tables."""
     try:
         async with engine.begin() as conn:
             # Import all models to ensure they are registered
-            from app.models.media import MediaChunk, MediaSession, MediaProcessingTask  # noqa
+            from app.models.media import ContentBlob, MediaChunk, MediaSession, MediaProcessingTask, MetricCounter, OutboxEvent, ResumableUpload  # noqa
             
             # Create all tables
             await conn.run_sync(Base.metadata.create_all)
+            await conn.run_sync(_add_missing_columns)
             logger.info("Database tables created successfully")
     except Exception as e:
         logger.error(f"Error initializing database: {e}")
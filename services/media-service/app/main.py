@@ -1,7 +1,9 @@
 """
 TalentSync Media Service - Main Application
 """
+import asyncio
 import logging
+import os
 import time
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
@@ -9,11 +11,16 @@ from typing import AsyncGenerator
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+from prometheus_client import multiprocess
 
 from app.core.config import get_settings
-from app.core.database import init_db, close_db
+from app.core.database import AsyncSessionLocal, init_db, close_db
 from app.core.logging import setup_logging
 from app.routers import media, monitoring
+from app.services.content_store import content_store
+from app.services.event_dispatcher import event_dispatcher
+from app.services.monitoring import metrics_service
+from app.workers.reconciliation import run_periodic_reconciliation
 
 # Setup logging
 setup_logging()
@@ -38,6 +45,9 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     try:
         # Initialize database
         await init_db()
+        async with AsyncSessionLocal() as db:
+            await metrics_service.ensure_counters(db)
+            await db.commit()
         logger.info("Database initialized successfully")
         
         # Create upload directory if it doesn't exist
@@ -47,6 +57,17 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
         # Initialize services
         logger.info("Services initialized successfully")
         
+        # Periodic session counter reconciliation
+        reconciliation_task = None
+        reconciliation_stop = asyncio.Event()
+        if settings.stats_reconciliation_interval_minutes > 0:
+            reconciliation_task = asyncio.create_task(
+                run_periodic_reconciliation(settings.stats_reconciliation_interval_minutes, reconciliation_stop)
+            )
+        
+        # Deliver queued events to other services
+        await event_dispatcher.start()
+        
         logger.info(f"TalentSync Media Service started successfully on {settings.host}:{settings.port}")
         
     except Exception as e:
@@ -57,7 +78,15 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     
     # Shutdown
     logger.info("Shutting down TalentSync Media Service...")
+    if reconciliation_task:
+        reconciliation_stop.set()
+        await reconciliation_task
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        # Drop this worker's live metric files from multiprocess aggregation
+        multiprocess.mark_process_dead(os.getpid())
     try:
+        await event_dispatcher.stop()
+        await content_store.backend.close()
         await close_db()
         logger.info("Database connections closed")
     except Exception as e:
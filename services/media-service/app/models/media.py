@@ -22,8 +22,10 @@ class MediaSession(Base):
     user_id = Column(String(255), index=True, nullable=True)
     
     # Session metadata
-    total_chunks = Column(Integer, default=0)
+    total_chunks = Column(Integer, default=0)  # Expected chunks, else uploaded_chunks
+    uploaded_chunks = Column(Integer, default=0)  # Maintained incrementally per upload
     total_duration_seconds = Column(Float, default=0.0)
+    storage_bytes = Column(Integer, default=0)  # Bytes of chunk files, maintained incrementally
     session_status = Column(String(50), default="active")  # active, completed, failed, abandoned
     
     # Timestamps
@@ -57,6 +59,7 @@ class MediaChunk(Base):
     file_name = Column(String(255), nullable=False)
     file_size_bytes = Column(Integer, nullable=True)
     file_extension = Column(String(10), nullable=True)
+    content_hash = Column(String(64), nullable=True, index=True)  # SHA-256 of file contents
     
     # Audio metadata
     duration_seconds = Column(Float, nullable=True)
@@ -96,6 +99,116 @@ class MediaChunk(Base):
         )
 
 
+class ResumableUpload(Base):
+    """
+    Resumable chunk upload tracking the bytes received so far.
+    """
+    __tablename__ = "resumable_uploads"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    upload_id = Column(String(64), unique=True, index=True, nullable=False)
+    session_id = Column(String(255), index=True, nullable=False)
+    question_id = Column(String(255), nullable=True)
+    
+    # Target chunk
+    sequence_index = Column(Integer, nullable=False)
+    total_chunks = Column(Integer, nullable=True)
+    overlap_seconds = Column(Float, default=2.0)
+    file_extension = Column(String(10), nullable=False)
+    
+    # Upload progress
+    upload_length = Column(Integer, nullable=False)  # Expected total bytes
+    upload_offset = Column(Integer, default=0)  # Bytes received
+    partial_path = Column(String(500), nullable=False)
+    upload_status = Column(String(50), default="in_progress")  # in_progress, completed, expired
+    chunk_id = Column(Integer, nullable=True)  # MediaChunk created on finalize
+    
+    # Timestamps
+    created_at = Column(DateTime, default=func.now(), nullable=False)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
+    
+    def __repr__(self) -> str:
+        return (
+            f"<ResumableUpload(upload_id='{self.upload_id}', "
+            f"offset={self.upload_offset}/{self.upload_length})>"
+        )
+
+
+class OutboxEvent(Base):
+    """
+    Outgoing inter-service event, written in the same transaction as the
+    change it describes and delivered by the background dispatcher.
+    """
+    __tablename__ = "event_outbox"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    event_type = Column(String(50), nullable=False)  # chunk_uploaded, session_completed
+    destination = Column(String(50), nullable=False)  # transcription, interview
+    session_id = Column(String(255), index=True, nullable=True)
+    payload = Column(Text, nullable=False)  # JSON event body
+    
+    # Delivery state
+    status = Column(String(50), default="pending")  # pending, dispatching, delivered, failed
+    attempts = Column(Integer, default=0)
+    next_attempt_at = Column(DateTime, default=func.now(), nullable=False)
+    claim_token = Column(String(64), nullable=True)
+    claimed_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    
+    # Timestamps
+    created_at = Column(DateTime, default=func.now(), nullable=False)
+    delivered_at = Column(DateTime, nullable=True)
+    
+    __table_args__ = (
+        Index('ix_event_outbox_status_next_attempt', 'status', 'next_attempt_at'),
+    )
+    
+    def __repr__(self) -> str:
+        return (
+            f"<OutboxEvent(id={self.id}, type='{self.event_type}', "
+            f"destination='{self.destination}', status='{self.status}')>"
+        )
+
+
+class ContentBlob(Base):
+    """
+    Chunk file stored once per content hash; chunks with identical bytes
+    point at the same blob and share it through the reference count.
+    """
+    __tablename__ = "content_blobs"
+    
+    content_hash = Column(String(64), primary_key=True)  # SHA-256 hex digest
+    storage_path = Column(String(500), nullable=False)
+    size_bytes = Column(Integer, nullable=False)
+    ref_count = Column(Integer, default=0, nullable=False)
+    
+    # Timestamps
+    created_at = Column(DateTime, default=func.now(), nullable=False)
+    released_at = Column(DateTime, nullable=True)  # When ref_count last dropped
+    
+    __table_args__ = (
+        Index('ix_content_blobs_ref_count', 'ref_count'),
+    )
+    
+    def __repr__(self) -> str:
+        return f"<ContentBlob(hash='{self.content_hash[:12]}', refs={self.ref_count})>"
+
+
+class MetricCounter(Base):
+    """
+    Materialized monitoring counter, adjusted incrementally as sessions and
+    chunks are written and periodically reconciled against the source tables.
+    """
+    __tablename__ = "media_metric_counters"
+    
+    name = Column(String(100), primary_key=True)
+    value = Column(Float, default=0.0, nullable=False)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
+    
+    def __repr__(self) -> str:
+        return f"<MetricCounter(name='{self.name}', value={self.value})>"
+
+
 class MediaProcessingTask(Base):
     """
     Model to track background processing tasks for media files.
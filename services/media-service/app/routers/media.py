@@ -5,7 +5,7 @@ import logging
 import time
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, BackgroundTasks
+from fastapi import APIRouter, Depends, File, Form, Header, HTTPException, Request, Response, UploadFile, BackgroundTasks
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
@@ -16,8 +16,14 @@ from app.schemas.media import (
     SessionSummaryResponse,
     MediaValidationResponse,
     DeviceEnumerationResponse,
+    ResumableUploadCreate,
+    ResumableUploadResponse,
+    DirectUploadRequest,
+    DirectUploadResponse,
 )
+from app.services.content_store import content_store
 from app.services.media_service import media_service
+from app.services.resumable_upload_service import resumable_upload_service
 from app.services.monitoring import metrics_service
 from app.services.device_service import device_service
 from app.services.event_service import event_service
@@ -130,6 +136,150 @@ async def upload_chunk(
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
 
+def _upload_state(upload) -> ResumableUploadResponse:
+    """Build the response describing a resumable upload."""
+    return ResumableUploadResponse(
+        upload_id=upload.upload_id,
+        session_id=upload.session_id,
+        sequence_index=upload.sequence_index,
+        upload_length=upload.upload_length,
+        upload_offset=upload.upload_offset,
+        upload_status=upload.upload_status
+    )
+
+
+@router.post("/uploads", response_model=ResumableUploadResponse, status_code=201)
+async def create_resumable_upload(
+    upload_data: ResumableUploadCreate,
+    response: Response,
+    db: AsyncSession = Depends(get_db)
+) -> ResumableUploadResponse:
+    """
+    Start a resumable chunk upload.
+    
+    Send the bytes with `PATCH /media/uploads/{upload_id}` and an
+    `Upload-Offset` header, then call `POST /media/uploads/{upload_id}/finalize`.
+    After an interruption, `HEAD` or `GET` the upload to learn the offset to
+    resume from.
+    """
+    upload = await resumable_upload_service.create_upload(db, upload_data)
+    response.headers["Location"] = f"{router.prefix}/uploads/{upload.upload_id}"
+    response.headers["Upload-Offset"] = "0"
+    return _upload_state(upload)
+
+
+@router.api_route("/uploads/{upload_id}", methods=["GET", "HEAD"], response_model=ResumableUploadResponse)
+async def get_resumable_upload(
+    upload_id: str,
+    response: Response,
+    db: AsyncSession = Depends(get_db)
+) -> ResumableUploadResponse:
+    """Get the current offset of a resumable upload."""
+    upload = await resumable_upload_service.get_upload(db, upload_id)
+    response.headers["Upload-Offset"] = str(upload.upload_offset)
+    response.headers["Upload-Length"] = str(upload.upload_length)
+    response.headers["Cache-Control"] = "no-store"
+    return _upload_state(upload)
+
+
+@router.patch("/uploads/{upload_id}", response_model=ResumableUploadResponse)
+async def append_resumable_upload(
+    upload_id: str,
+    request: Request,
+    response: Response,
+    upload_offset: int = Header(..., alias="Upload-Offset", ge=0),
+    db: AsyncSession = Depends(get_db)
+) -> ResumableUploadResponse:
+    """
+    Append bytes to a resumable upload.
+    
+    The request body is the raw chunk data starting at `Upload-Offset`,
+    which must match the server's offset (409 otherwise).
+    """
+    try:
+        upload = await resumable_upload_service.append(db, upload_id, upload_offset, request.stream())
+        response.headers["Upload-Offset"] = str(upload.upload_offset)
+        return _upload_state(upload)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error appending to upload {upload_id}: {e}")
+        raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
+
+
+@router.post("/uploads/{upload_id}/finalize", response_model=ChunkUploadResponse)
+async def finalize_resumable_upload(
+    upload_id: str,
+    db: AsyncSession = Depends(get_db)
+) -> ChunkUploadResponse:
+    """
+    Finalize a fully received resumable upload into a media chunk.
+    """
+    start_time = time.time()
+    session_id = None
+    
+    try:
+        upload = await resumable_upload_service.get_upload(db, upload_id)
+        session_id = upload.session_id
+        chunk_response = await resumable_upload_service.finalize(db, upload_id)
+        metrics_service.record_chunk_upload(session_id, "success", time.time() - start_time)
+        return chunk_response
+    except HTTPException:
+        if session_id:
+            metrics_service.record_chunk_upload(session_id, "failed", time.time() - start_time)
+        raise
+    except Exception as e:
+        if session_id:
+            metrics_service.record_chunk_upload(session_id, "failed", time.time() - start_time)
+        logger.error(f"Error finalizing upload {upload_id}: {e}")
+        raise HTTPException(status_code=500, detail=f"Finalize failed: {str(e)}")
+
+
+@router.post("/chunk-upload/direct", response_model=DirectUploadResponse)
+async def create_direct_upload(
+    upload_data: DirectUploadRequest,
+    db: AsyncSession = Depends(get_db)
+) -> DirectUploadResponse:
+    """
+    Presign a direct upload of a chunk to object storage.
+    
+    PUT the chunk to `upload_url` with the returned `headers` (the SHA-256
+    checksum is enforced by the storage service), then call
+    `POST /media/chunk-upload/direct/complete` with the same body. When
+    `already_stored` is true the content is known and the PUT is skipped.
+    """
+    try:
+        return await media_service.create_direct_upload(db, upload_data)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error presigning upload for session {upload_data.session_id}: {e}")
+        raise HTTPException(status_code=500, detail=f"Presign failed: {str(e)}")
+
+
+@router.post("/chunk-upload/direct/complete", response_model=ChunkUploadResponse)
+async def complete_direct_upload(
+    upload_data: DirectUploadRequest,
+    db: AsyncSession = Depends(get_db)
+) -> ChunkUploadResponse:
+    """
+    Register a chunk uploaded directly to object storage.
+    """
+    start_time = time.time()
+    
+    try:
+        chunk_response = await media_service.complete_direct_upload(db, upload_data)
+        metrics_service.record_chunk_upload(upload_data.session_id, "success", time.time() - start_time)
+        return chunk_response
+    except HTTPException:
+        metrics_service.record_chunk_upload(upload_data.session_id, "failed", time.time() - start_time)
+        raise
+    except Exception as e:
+        metrics_service.record_chunk_upload(upload_data.session_id, "failed", time.time() - start_time)
+        logger.error(f"Error completing direct upload for session {upload_data.session_id}: {e}")
+        raise HTTPException(status_code=500, detail=f"Complete failed: {str(e)}")
+
+
 @router.get("/session/{session_id}/summary", response_model=SessionSummaryResponse)
 async def get_session_summary(
     session_id: str,
@@ -224,23 +374,22 @@ async def delete_session(
         )
         chunks = result.scalars().all()
         
-        # Delete files
-        deleted_files = 0
-        for chunk in chunks:
-            try:
-                from pathlib import Path
-                file_path = Path(chunk.file_path)
-                if file_path.exists():
-                    file_path.unlink()
-                    deleted_files += 1
-            except Exception as e:
-                logger.warning(f"Failed to delete file {chunk.file_path}: {e}")
+        # Release stored blobs; legacy per-session files are removed after commit
+        legacy_paths = await media_service.release_chunk_files(db, chunks)
         
         # Delete database records
+        counter_deltas = metrics_service.counter_delta(metrics_service.session_counters(session), {})
         for chunk in chunks:
+            counter_deltas = metrics_service.counter_delta(metrics_service.chunk_counters(chunk), counter_deltas)
             await db.delete(chunk)
         
         await db.delete(session)
+        await metrics_service.adjust_counters(db, counter_deltas)
+        await db.commit()
+        
+        # Delete files
+        deleted_files = sum(1 for file_path in legacy_paths if media_service._unlink_file(file_path))
+        deleted_files += await content_store.collect_garbage(db)
         await db.commit()
         
         # Clean up empty session directory
@@ -49,6 +49,7 @@ class MediaChunk(MediaChunkBase):
     id: int
     file_path: str
     file_size_bytes: Optional[int] = None
+    content_hash: Optional[str] = None
     upload_status: str = "pending"
     transcription_status: str = "pending"
     audio_quality_score: Optional[float] = None
@@ -114,6 +115,48 @@ class ChunkUploadResponse(BaseModel):
     message: str = Field(..., description="Response message")
 
 
+class ResumableUploadCreate(BaseModel):
+    """Schema for starting a resumable chunk upload."""
+    session_id: str = Field(..., description="Session identifier")
+    sequence_index: int = Field(..., ge=0, description="Chunk sequence index")
+    upload_length: int = Field(..., ge=1, description="Total chunk size in bytes")
+    file_extension: str = Field(..., description="Audio file extension")
+    total_chunks: Optional[int] = Field(None, ge=1, description="Expected total chunks")
+    question_id: Optional[str] = Field(None, description="Question identifier")
+    overlap_seconds: float = Field(default=2.0, ge=0, description="Overlap duration")
+
+
+class ResumableUploadResponse(BaseModel):
+    """Schema for resumable upload state."""
+    upload_id: str = Field(..., description="Upload identifier")
+    session_id: str = Field(..., description="Session identifier")
+    sequence_index: int = Field(..., description="Chunk sequence index")
+    upload_length: int = Field(..., description="Total chunk size in bytes")
+    upload_offset: int = Field(..., description="Bytes received so far")
+    upload_status: str = Field(..., description="Upload status")
+
+
+class DirectUploadRequest(BaseModel):
+    """Schema for a chunk uploaded directly to object storage."""
+    session_id: str = Field(..., description="Session identifier")
+    sequence_index: int = Field(..., ge=0, description="Chunk sequence index")
+    file_extension: str = Field(..., description="Audio file extension")
+    file_size_bytes: int = Field(..., ge=1, description="Chunk size in bytes")
+    content_hash: str = Field(..., pattern="^[0-9a-f]{64}$", description="Hex SHA-256 of the chunk")
+    total_chunks: Optional[int] = Field(None, ge=1, description="Expected total chunks")
+    question_id: Optional[str] = Field(None, description="Question identifier")
+    overlap_seconds: float = Field(default=2.0, ge=0, description="Overlap duration")
+
+
+class DirectUploadResponse(BaseModel):
+    """Schema for a presigned direct upload."""
+    already_stored: bool = Field(..., description="Content is already stored; skip the upload")
+    upload_url: Optional[str] = Field(None, description="Presigned upload URL")
+    method: Optional[str] = Field(None, description="HTTP method for the upload")
+    headers: Dict[str, str] = Field(default={}, description="Headers the upload must send")
+    expires_in: Optional[int] = Field(None, description="Seconds the URL stays valid")
+
+
 class MediaValidationResponse(BaseModel):
     """Schema for media validation response."""
     is_valid: bool = Field(..., description="Validation result")
@@ -247,6 +290,8 @@ class ChunkUploadEvent(BaseModel):
     question_id: Optional[str] = Field(None, description="Question identifier")
     total_chunks: Optional[int] = Field(None, description="Expected total chunks")
     is_final_chunk: bool = Field(default=False, description="Whether this is the final chunk")
+    silence_percentage: Optional[float] = Field(None, description="Percentage of the chunk without speech")
+    audio_quality_score: Optional[float] = Field(None, description="Estimated audio quality (0.0 to 1.0)")
 
 
 class SessionCompleteEvent(BaseModel):
@@ -0,0 +1,274 @@
+"""
+Content-addressed chunk storage.
+
+Chunk files are stored once per SHA-256 under hash-sharded keys
+(ab/cd/<hash>.<ext>), so directories stay small and identical uploads
+(retries, overwrites with the same bytes) share one object. Objects are
+written through the configured storage backend (local object directory
+or an S3-compatible bucket). Each MediaChunk points at its blob through
+file_path; the content_blobs table holds reference counts, and blobs
+whose count drops to zero are removed by collect_garbage.
+"""
+import asyncio
+import logging
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import and_, case, delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.models.media import ContentBlob
+from app.services.monitoring import metrics_service
+from app.services.storage_backend import create_storage_backend
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class ContentStore:
+    """
+    Reference-counted, content-addressed object store.
+    
+    Blob rows are changed in the caller's transaction. Garbage collection
+    and new references to the same hash are serialized per hash within
+    the process; across processes, a blob row inserted concurrently for
+    the same hash gets a reference instead. On the local backend a
+    collected blob whose hash is re-added concurrently is restored before
+    its file is removed.
+    """
+    
+    def __init__(self):
+        self.root = settings.object_store_dir
+        self.staging_dir = self.root / "staging"
+        self.backend = create_storage_backend()
+        self._locks: Dict[str, asyncio.Lock] = {}
+    
+    @property
+    def enabled(self) -> bool:
+        """Whether new chunks go to the store (always for remote backends)."""
+        return settings.content_addressed_storage or self.backend.name != "local"
+    
+    def object_key(self, content_hash: str, file_extension: str) -> str:
+        """Sharded key of a blob."""
+        return f"{content_hash[:2]}/{content_hash[2:4]}/{content_hash}.{file_extension}"
+    
+    def staging_path(self, file_extension: str) -> Path:
+        """Temporary local path for a file being received."""
+        self.staging_dir.mkdir(parents=True, exist_ok=True)
+        return self.staging_dir / f"{uuid.uuid4().hex}.{file_extension}"
+    
+    def is_managed(self, file_path: Optional[str]) -> bool:
+        """Whether a chunk file lives in the store (rather than the legacy per-session layout)."""
+        return self.backend.key_for(file_path) is not None
+    
+    async def put(
+        self,
+        db: AsyncSession,
+        staged_path: Path,
+        content_hash: str,
+        size_bytes: int,
+        file_extension: str
+    ) -> str:
+        """
+        Add a reference to the blob with this content, storing it if new.
+        
+        If the blob already exists the staged file is discarded, so a
+        duplicate upload takes no additional space. Returns the blob URI.
+        """
+        async with self._lock(content_hash):
+            storage_path = await self._add_reference(db, content_hash)
+            
+            if storage_path is not None:
+                blob_key = self.backend.key_for(storage_path)
+                if await self.backend.head(blob_key) is not None:
+                    staged_path.unlink()
+                    logger.debug(f"Deduplicated upload of blob {content_hash[:12]}")
+                    return storage_path
+                logger.warning(f"Blob {content_hash[:12]} was missing from storage; restored from upload")
+            else:
+                storage_path = await self._add_blob(
+                    db, content_hash, self.object_key(content_hash, file_extension), size_bytes
+                )
+                # Another process may have added the blob first; its writer stores the same bytes
+                blob_key = self.backend.key_for(storage_path)
+            
+            await self.backend.put_file(staged_path, blob_key, content_hash)
+            return storage_path
+    
+    async def add_uploaded(
+        self,
+        db: AsyncSession,
+        content_hash: str,
+        size_bytes: int,
+        file_extension: str
+    ) -> str:
+        """
+        Add a reference to a blob the client uploaded directly to storage.
+        
+        The object must exist with the announced size; its content was
+        verified against content_hash by the storage service (see
+        presign_upload).
+        """
+        async with self._lock(content_hash):
+            storage_path = await self._add_reference(db, content_hash)
+            if storage_path is not None:
+                return storage_path
+            
+            blob_key = self.object_key(content_hash, file_extension)
+            stored_size = await self.backend.head(blob_key)
+            if stored_size is None:
+                raise HTTPException(status_code=409, detail="Chunk has not been uploaded to storage")
+            if stored_size != size_bytes:
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"Stored chunk is {stored_size} bytes, expected {size_bytes}"
+                )
+            return await self._add_blob(db, content_hash, blob_key, size_bytes)
+    
+    async def presign_upload(
+        self,
+        db: AsyncSession,
+        content_hash: str,
+        file_extension: str
+    ) -> Optional[Dict[str, object]]:
+        """
+        Presigned upload of a blob, or None if the content is already stored.
+        """
+        result = await db.execute(
+            select(ContentBlob.storage_path).where(ContentBlob.content_hash == content_hash)
+        )
+        if result.scalar_one_or_none() is not None:
+            return None
+        return self.backend.presign_upload(
+            self.object_key(content_hash, file_extension),
+            content_hash,
+            settings.presigned_upload_expiry_seconds
+        )
+    
+    async def release(self, db: AsyncSession, content_hashes: Iterable[str]) -> None:
+        """Drop one reference per occurrence of each hash, in a single UPDATE."""
+        counts: Dict[str, int] = {}
+        for content_hash in content_hashes:
+            counts[content_hash] = counts.get(content_hash, 0) + 1
+        if not counts:
+            return
+        await db.execute(
+            update(ContentBlob)
+            .where(ContentBlob.content_hash.in_(list(counts)))
+            .values(
+                ref_count=ContentBlob.ref_count - case(counts, value=ContentBlob.content_hash, else_=0),
+                released_at=datetime.utcnow()
+            )
+            .execution_options(synchronize_session=False)
+        )
+    
+    async def collect_garbage(self, db: AsyncSession, batch_size: int = 500) -> int:
+        """Delete unreferenced blobs and their objects; returns the number removed."""
+        removed = 0
+        while True:
+            result = await db.execute(
+                select(ContentBlob.content_hash)
+                .where(ContentBlob.ref_count <= 0)
+                .limit(batch_size)
+            )
+            candidates = result.scalars().all()
+            if not candidates:
+                break
+            
+            for content_hash in candidates:
+                async with self._lock(content_hash):
+                    deleted = await db.execute(
+                        delete(ContentBlob)
+                        .where(and_(ContentBlob.content_hash == content_hash, ContentBlob.ref_count <= 0))
+                        .returning(ContentBlob.storage_path, ContentBlob.size_bytes)
+                    )
+                    row = deleted.first()
+                    if row is None:
+                        continue
+                    await metrics_service.adjust_counters(db, {"objects": -1, "object_bytes": -row.size_bytes})
+                    await db.commit()
+                    
+                    async def is_referenced(content_hash=content_hash) -> bool:
+                        result = await db.execute(
+                            select(ContentBlob.content_hash).where(ContentBlob.content_hash == content_hash)
+                        )
+                        return result.scalar_one_or_none() is not None
+                    
+                    blob_key = self.backend.key_for(row.storage_path)
+                    if blob_key is not None:
+                        await self.backend.delete(blob_key, is_referenced)
+                    removed += 1
+            
+            if len(candidates) < batch_size:
+                break
+        
+        if removed:
+            logger.info(f"Removed {removed} unreferenced blobs")
+        return removed
+    
+    async def _add_reference(self, db: AsyncSession, content_hash: str) -> Optional[str]:
+        """Increment the reference count of an existing blob; returns its URI or None."""
+        result = await db.execute(
+            update(ContentBlob)
+            .where(ContentBlob.content_hash == content_hash)
+            .values(ref_count=ContentBlob.ref_count + 1)
+            .execution_options(synchronize_session=False)
+        )
+        if not result.rowcount:
+            return None
+        stored = await db.execute(
+            select(ContentBlob.storage_path).where(ContentBlob.content_hash == content_hash)
+        )
+        return stored.scalar_one()
+    
+    async def _add_blob(self, db: AsyncSession, content_hash: str, blob_key: str, size_bytes: int) -> str:
+        """
+        Insert the row of a new blob with one reference; returns its URI.
+        
+        The per-hash lock only covers this process, so another one may
+        insert the same blob first. The insert then does nothing and a
+        reference to that row is added instead of failing on the key.
+        """
+        dialect = db.get_bind().dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        storage_path = self.backend.uri(blob_key)
+        
+        for _ in range(3):
+            inserted = await db.execute(
+                insert(ContentBlob)
+                .values(
+                    content_hash=content_hash,
+                    storage_path=storage_path,
+                    size_bytes=size_bytes,
+                    ref_count=1
+                )
+                .on_conflict_do_nothing(index_elements=[ContentBlob.content_hash])
+                .returning(ContentBlob.content_hash)
+            )
+            if inserted.first() is not None:
+                await metrics_service.adjust_counters(db, {"objects": 1, "object_bytes": size_bytes})
+                return storage_path
+            existing_path = await self._add_reference(db, content_hash)
+            if existing_path is not None:
+                return existing_path
+            # Collected between the insert and the update; insert it again
+        raise RuntimeError(f"Could not add blob {content_hash[:12]}")
+    
+    def _lock(self, content_hash: str) -> asyncio.Lock:
+        lock = self._locks.get(content_hash)
+        if lock is None:
+            if len(self._locks) > 10000:
+                self._locks = {h: l for h, l in self._locks.items() if l.locked()}
+            lock = self._locks[content_hash] = asyncio.Lock()
+        return lock
+
+
+# Global content store instance
+content_store = ContentStore()
@@ -0,0 +1,270 @@
+"""
+Background dispatcher delivering outbox events to other services.
+"""
+import asyncio
+import logging
+import random
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from sqlalchemy import and_, delete, exists, or_, select, update
+from sqlalchemy.orm import aliased
+
+from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal
+from app.models.media import OutboxEvent
+from app.services.event_service import event_service
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Claims older than this are assumed abandoned by a crashed dispatcher
+CLAIM_TIMEOUT = timedelta(minutes=5)
+
+
+class OutboxDispatcher:
+    """
+    Delivers outbox events in batches.
+
+    Each cycle claims up to `event_batch_size` due events with a claim
+    token (so several service processes can run dispatchers against the
+    same table), delivers them over one pooled HTTP client per destination
+    and records the outcome in a single transaction. Different sessions are
+    delivered concurrently; the events of one session go to a destination
+    one at a time in the order they were written, and an event is not
+    claimed while an earlier one of its session is waiting for a retry or
+    claimed elsewhere. Failed deliveries are retried with exponential
+    backoff and jitter until `event_max_attempts` is reached.
+    """
+
+    def __init__(self):
+        self.interval = settings.event_dispatch_interval_seconds
+        self.batch_size = settings.event_batch_size
+        self.concurrency = settings.event_dispatch_concurrency
+        self.timeout = settings.event_delivery_timeout
+        self.max_attempts = settings.event_max_attempts
+        self.retry_base_delay = settings.event_retry_base_delay
+        self.retry_max_delay = settings.event_retry_max_delay
+
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self.stats = {
+            "delivered": 0,
+            "retried": 0,
+            "failed": 0,
+            "last_delivery_lag_seconds": 0.0,
+            "max_delivery_lag_seconds": 0.0,
+            "total_delivery_lag_seconds": 0.0,
+            "oldest_pending_age_seconds": 0.0
+        }
+
+    async def start(self) -> None:
+        """Start the dispatcher loop."""
+        if self._task is None:
+            self._stopping = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+            logger.info("Event outbox dispatcher started")
+
+    async def stop(self) -> None:
+        """Stop the dispatcher loop after the current batch and close pooled clients."""
+        if self._task is not None:
+            # Not cancelled: a batch interrupted mid-transaction would leave
+            # its connection holding locks
+            self._stopping.set()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients = {}
+        logger.info("Event outbox dispatcher stopped")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get delivery counters and lag."""
+        delivered = max(self.stats["delivered"], 1)
+        return {
+            **self.stats,
+            "average_delivery_lag_seconds": self.stats["total_delivery_lag_seconds"] / delivered
+        }
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                delivered = await self.dispatch_once()
+            except Exception as e:
+                logger.error(f"Event dispatch cycle failed: {e}")
+                delivered = 0
+            # Drain backlogs without waiting for the next poll
+            if delivered < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), self.interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def dispatch_once(self) -> int:
+        """Claim and deliver one batch of due events; returns the batch size."""
+        now = datetime.utcnow()
+        token = uuid.uuid4().hex
+
+        async with AsyncSessionLocal() as db:
+            # Release claims of dispatchers that died mid-batch
+            await db.execute(
+                update(OutboxEvent)
+                .where(and_(OutboxEvent.status == "dispatching", OutboxEvent.claimed_at < now - CLAIM_TIMEOUT))
+                .values(status="pending", claim_token=None)
+                .execution_options(synchronize_session=False)
+            )
+
+            # An earlier event of the same session that is not being claimed now
+            # (backing off, or held by another dispatcher) must be delivered first
+            earlier = aliased(OutboxEvent)
+            blocked = exists().where(
+                and_(
+                    earlier.session_id == OutboxEvent.session_id,
+                    earlier.destination == OutboxEvent.destination,
+                    earlier.id < OutboxEvent.id,
+                    or_(
+                        earlier.status == "dispatching",
+                        and_(earlier.status == "pending", earlier.next_attempt_at > now)
+                    )
+                )
+            )
+            due = (
+                select(OutboxEvent.id)
+                .where(and_(OutboxEvent.status == "pending", OutboxEvent.next_attempt_at <= now, ~blocked))
+                .order_by(OutboxEvent.id)
+                .limit(self.batch_size)
+                .scalar_subquery()
+            )
+            await db.execute(
+                update(OutboxEvent)
+                .where(and_(OutboxEvent.id.in_(due), OutboxEvent.status == "pending"))
+                .values(status="dispatching", claim_token=token, claimed_at=now)
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+
+            result = await db.execute(
+                select(OutboxEvent)
+                .where(OutboxEvent.claim_token == token)
+                .order_by(OutboxEvent.id)
+            )
+            events = result.scalars().all()
+            if not events:
+                self.stats["oldest_pending_age_seconds"] = 0.0
+                return 0
+            # Don't hold a transaction open across network calls
+            await db.commit()
+
+            self.stats["oldest_pending_age_seconds"] = (now - events[0].created_at).total_seconds()
+            semaphores = {destination: asyncio.Semaphore(self.concurrency) for destination in event_service.destinations}
+            outcomes: Dict[int, Optional[str]] = {}
+            await asyncio.gather(
+                *(
+                    self._deliver_in_order(group, semaphores[destination], outcomes)
+                    for (destination, _), group in self._group_by_session(events).items()
+                )
+            )
+
+            finished_at = datetime.utcnow()
+            for event in events:
+                event.claim_token = None
+                if event.id not in outcomes:
+                    # Held back behind a failed event of its session; not an attempt
+                    event.status = "pending"
+                    continue
+                error = outcomes[event.id]
+                event.attempts = (event.attempts or 0) + 1
+                if error is None:
+                    self._record_delivery(event, finished_at)
+                elif event.attempts >= self.max_attempts:
+                    event.status = "failed"
+                    event.last_error = error
+                    self.stats["failed"] += 1
+                    logger.error(
+                        f"Giving up on {event.event_type} event {event.id} to {event.destination} "
+                        f"after {event.attempts} attempts: {error}"
+                    )
+                else:
+                    delay = min(self.retry_max_delay, self.retry_base_delay * 2 ** (event.attempts - 1))
+                    event.status = "pending"
+                    event.last_error = error
+                    event.next_attempt_at = finished_at + timedelta(seconds=random.uniform(delay / 2, delay))
+                    self.stats["retried"] += 1
+            await db.commit()
+
+        return len(events)
+
+    async def purge_delivered(self, db) -> int:
+        """Delete delivered events older than the retention window."""
+        cutoff = datetime.utcnow() - timedelta(hours=settings.event_outbox_retention_hours)
+        result = await db.execute(
+            delete(OutboxEvent)
+            .where(and_(OutboxEvent.status == "delivered", OutboxEvent.delivered_at < cutoff))
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount or 0
+
+    @staticmethod
+    def _group_by_session(events: List[OutboxEvent]) -> Dict[Tuple[str, str], List[OutboxEvent]]:
+        """Events per destination and session, in id order; events without a session stand alone."""
+        groups: Dict[Tuple[str, str], List[OutboxEvent]] = {}
+        for event in events:
+            key = (event.destination, event.session_id or f"event:{event.id}")
+            groups.setdefault(key, []).append(event)
+        return groups
+
+    async def _deliver_in_order(
+        self,
+        events: List[OutboxEvent],
+        semaphore: asyncio.Semaphore,
+        outcomes: Dict[int, Optional[str]]
+    ) -> None:
+        """Deliver one session's events sequentially, stopping at the first failure."""
+        for event in events:
+            error = await self._deliver(event, semaphore)
+            outcomes[event.id] = error
+            if error is not None:
+                return
+
+    async def _deliver(self, event: OutboxEvent, semaphore: asyncio.Semaphore) -> Optional[str]:
+        """POST an event; returns an error message or None on success."""
+        async with semaphore:
+            try:
+                response = await self._client(event.destination).post(
+                    event_service.event_url(event.destination, event.event_type),
+                    content=event.payload,
+                    headers={"Content-Type": "application/json", "X-Event-Id": str(event.id)}
+                )
+                if response.status_code < 300:
+                    return None
+                return f"HTTP {response.status_code}: {response.text[:500]}"
+            except Exception as e:
+                return f"{type(e).__name__}: {e}"
+
+    def _client(self, destination: str) -> httpx.AsyncClient:
+        """Pooled HTTP client for a destination."""
+        client = self._clients.get(destination)
+        if client is None:
+            client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+            )
+            self._clients[destination] = client
+        return client
+
+    def _record_delivery(self, event: OutboxEvent, delivered_at: datetime) -> None:
+        event.status = "delivered"
+        event.delivered_at = delivered_at
+        event.last_error = None
+        lag = (delivered_at - event.created_at).total_seconds()
+        self.stats["delivered"] += 1
+        self.stats["last_delivery_lag_seconds"] = lag
+        self.stats["max_delivery_lag_seconds"] = max(self.stats["max_delivery_lag_seconds"], lag)
+        self.stats["total_delivery_lag_seconds"] += lag
+
+
+# Global event dispatcher instance
+event_dispatcher = OutboxDispatcher()
@@ -1,28 +1,49 @@
 """
 Event Service for inter-service communication.
+
+Events are written to the event_outbox table in the caller's transaction
+and delivered asynchronously by the outbox dispatcher, so uploads never
+wait on downstream services and events survive delivery failures.
 """
 import json
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
 
-import httpx
 from app.core.config import get_settings
+from app.models.media import OutboxEvent
 from app.schemas.media import ChunkUploadEvent, SessionCompleteEvent
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# Endpoint paths per event type
+EVENT_PATHS = {
+    "chunk_uploaded": "/api/v1/events/chunk-uploaded",
+    "session_completed": "/api/v1/events/session-completed"
+}
+
 
 class EventEmissionService:
     """Service for emitting events to other services."""
-    
+
     def __init__(self):
         self.transcription_service_url = settings.transcription_service_url
         self.interview_service_url = settings.interview_service_url
         self.resume_service_url = settings.resume_service_url
-        
+        self.destinations = {
+            "transcription": self.transcription_service_url,
+            "interview": self.interview_service_url
+        }
+
+    def event_url(self, destination: str, event_type: str) -> str:
+        """Delivery URL of an event type at a destination service."""
+        return f"{self.destinations[destination]}{EVENT_PATHS[event_type]}"
+
     async def emit_chunk_uploaded_event(
         self,
+        db: AsyncSession,
         session_id: str,
         chunk_id: int,
         sequence_index: int,
@@ -31,9 +52,11 @@ class EventEmissionService:
         overlap_seconds: float,
         question_id: Optional[str] = None,
         total_chunks: Optional[int] = None,
-        is_final_chunk: bool = False
+        is_final_chunk: bool = False,
+        silence_percentage: Optional[float] = None,
+        audio_quality_score: Optional[float] = None
     ) -> Dict[str, Any]:
-        """Emit chunk upload event to other services."""
+        """Queue chunk upload event for other services."""
         event = ChunkUploadEvent(
             session_id=session_id,
             chunk_id=chunk_id,
@@ -43,132 +66,55 @@ class EventEmissionService:
             overlap_seconds=overlap_seconds,
             question_id=question_id,
             total_chunks=total_chunks,
-            is_final_chunk=is_final_chunk
+            is_final_chunk=is_final_chunk,
+            silence_percentage=silence_percentage,
+            audio_quality_score=audio_quality_score
         )
-        
-        results = {}
-        
-        # Send to transcription service
-        transcription_result = await self._send_to_transcription_service(event)
-        results["transcription_service"] = transcription_result
-        
-        # Send to interview service
-        interview_result = await self._send_to_interview_service(event)
-        results["interview_service"] = interview_result
-        
-        logger.info(f"Emitted chunk upload event for session {session_id}, chunk {sequence_index}")
-        return results
-    
+
+        events = await self._enqueue(db, "chunk_uploaded", session_id, event.model_dump(mode="json"))
+        logger.info(f"Queued chunk upload event for session {session_id}, chunk {sequence_index}")
+        return {"status": "queued", "event_ids": [e.id for e in events]}
+
     async def emit_session_completed_event(
         self,
+        db: AsyncSession,
         session_id: str,
         total_chunks: int,
         total_duration_seconds: float
     ) -> Dict[str, Any]:
-        """Emit session completion event to other services."""
+        """Queue session completion event for other services."""
         event = SessionCompleteEvent(
             session_id=session_id,
             total_chunks=total_chunks,
             total_duration_seconds=total_duration_seconds
         )
-        
-        results = {}
-        
-        # Send to transcription service
-        transcription_result = await self._send_session_complete_to_transcription(event)
-        results["transcription_service"] = transcription_result
-        
-        # Send to interview service
-        interview_result = await self._send_session_complete_to_interview(event)
-        results["interview_service"] = interview_result
-        
-        logger.info(f"Emitted session completion event for session {session_id}")
-        return results
-    
-    async def _send_to_transcription_service(self, event: ChunkUploadEvent) -> Dict[str, Any]:
-        """Send chunk upload event to transcription service."""
-        try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.post(
-                    f"{self.transcription_service_url}/api/v1/events/chunk-uploaded",
-                    json=event.model_dump(),
-                    headers={"Content-Type": "application/json"}
-                )
-                
-                if response.status_code == 200:
-                    logger.info(f"Successfully sent chunk upload event to transcription service")
-                    return {"status": "success", "response": response.json()}
-                else:
-                    logger.warning(f"Transcription service returned {response.status_code}: {response.text}")
-                    return {"status": "error", "status_code": response.status_code, "response": response.text}
-                    
-        except Exception as e:
-            logger.error(f"Failed to send chunk upload event to transcription service: {e}")
-            return {"status": "error", "error": str(e)}
-    
-    async def _send_to_interview_service(self, event: ChunkUploadEvent) -> Dict[str, Any]:
-        """Send chunk upload event to interview service."""
-        try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.post(
-                    f"{self.interview_service_url}/api/v1/events/chunk-uploaded",
-                    json=event.model_dump(),
-                    headers={"Content-Type": "application/json"}
-                )
-                
-                if response.status_code == 200:
-                    logger.info(f"Successfully sent chunk upload event to interview service")
-                    return {"status": "success", "response": response.json()}
-                else:
-                    logger.warning(f"Interview service returned {response.status_code}: {response.text}")
-                    return {"status": "error", "status_code": response.status_code, "response": response.text}
-                    
-        except Exception as e:
-            logger.error(f"Failed to send chunk upload event to interview service: {e}")
-            return {"status": "error", "error": str(e)}
-    
-    async def _send_session_complete_to_transcription(self, event: SessionCompleteEvent) -> Dict[str, Any]:
-        """Send session completion event to transcription service."""
-        try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.post(
-                    f"{self.transcription_service_url}/api/v1/events/session-completed",
-                    json=event.model_dump(),
-                    headers={"Content-Type": "application/json"}
-                )
-                
-                if response.status_code == 200:
-                    logger.info(f"Successfully sent session completion event to transcription service")
-                    return {"status": "success", "response": response.json()}
-                else:
-                    logger.warning(f"Transcription service returned {response.status_code}: {response.text}")
-                    return {"status": "error", "status_code": response.status_code, "response": response.text}
-                    
-        except Exception as e:
-            logger.error(f"Failed to send session completion event to transcription service: {e}")
-            return {"status": "error", "error": str(e)}
-    
-    async def _send_session_complete_to_interview(self, event: SessionCompleteEvent) -> Dict[str, Any]:
-        """Send session completion event to interview service."""
-        try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.post(
-                    f"{self.interview_service_url}/api/v1/events/session-completed",
-                    json=event.model_dump(),
-                    headers={"Content-Type": "application/json"}
-                )
-                
-                if response.status_code == 200:
-                    logger.info(f"Successfully sent session completion event to interview service")
-                    return {"status": "success", "response": response.json()}
-                else:
-                    logger.warning(f"Interview service returned {response.status_code}: {response.text}")
-                    return {"status": "error", "status_code": response.status_code, "response": response.text}
-                    
-        except Exception as e:
-            logger.error(f"Failed to send session completion event to interview service: {e}")
-            return {"status": "error", "error": str(e)}
+
+        events = await self._enqueue(db, "session_completed", session_id, event.model_dump(mode="json"))
+        logger.info(f"Queued session completion event for session {session_id}")
+        return {"status": "queued", "event_ids": [e.id for e in events]}
+
+    async def _enqueue(
+        self,
+        db: AsyncSession,
+        event_type: str,
+        session_id: str,
+        payload: Dict[str, Any]
+    ) -> List[OutboxEvent]:
+        """Write one outbox row per destination in the current transaction."""
+        body = json.dumps(payload)
+        events = [
+            OutboxEvent(
+                event_type=event_type,
+                destination=destination,
+                session_id=session_id,
+                payload=body
+            )
+            for destination in self.destinations
+        ]
+        db.add_all(events)
+        await db.flush()
+        return events
 
 
 # Global event service instance
-event_service = EventEmissionService() 
\ No newline at end of file
+event_service = EventEmissionService()
@@ -1,23 +1,34 @@
 """
 Core Media Service for handling chunked audio uploads and processing.
 """
+import asyncio
+import hashlib
 import json
 import logging
 import os
+import posixpath
 import shutil
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
 
 import aiofiles
 from fastapi import HTTPException, UploadFile
-from sqlalchemy import and_, desc, func, select
+from sqlalchemy import and_, case, delete, desc, event, func, or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import get_settings
-from app.models.media import MediaChunk, MediaSession, MediaProcessingTask
+from app.models.media import ContentBlob, MediaChunk, MediaSession, MediaProcessingTask, MetricCounter
+from app.services.audio_analysis import AudioAnalysisResult, audio_analysis_service
+from app.services.content_store import content_store
+from app.services.monitoring import COUNTER_NAMES, metrics_service
 from app.schemas.media import (
     ChunkUploadResponse,
+    DirectUploadRequest,
+    DirectUploadResponse,
     MediaChunkCreate,
     MediaChunkUpdate,
     MediaSessionCreate,
@@ -37,6 +48,7 @@ class MediaService:
         self.upload_dir = settings.upload_dir
         self.max_file_size = settings.max_file_size
         self.allowed_extensions = settings.allowed_extensions
+        self.upload_block_size = settings.upload_block_size
         
     async def create_session(
         self,
@@ -60,6 +72,7 @@ class MediaService:
             db.add(session)
             await db.flush()
             await db.refresh(session)
+            await metrics_service.adjust_counters(db, metrics_service.session_counters(session))
             
             # Create session directory
             session_dir = self.upload_dir / session_data.session_id
@@ -85,26 +98,195 @@ class MediaService:
         """Upload and process a media chunk."""
         try:
             # Validate file
-            validation_result = await self._validate_file(file)
-            if not validation_result.is_valid:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Invalid file: {', '.join(validation_result.errors)}"
-                )
+            with metrics_service.time_stage("validation"):
+                validation_result = await self._validate_file(file)
+                if not validation_result.is_valid:
+                    raise HTTPException(
+                        status_code=400,
+                        detail=f"Invalid file: {', '.join(validation_result.errors)}"
+                    )
             
             # Ensure session exists
-            await self._ensure_session_exists(db, session_id)
+            with metrics_service.time_stage("db_flush"):
+                await self._ensure_session_exists(db, session_id)
             
-            # Generate file name and path
+            # Receive into the store's staging area, then file it by content
             file_extension = Path(file.filename).suffix.lower().lstrip('.')
-            file_name = f"chunk_{sequence_index:04d}.{file_extension}"
-            session_dir = self.upload_dir / session_id
-            session_dir.mkdir(parents=True, exist_ok=True)
-            file_path = session_dir / file_name
+            staged_path = content_store.staging_path(file_extension)
+            try:
+                with metrics_service.time_stage("disk_write"):
+                    file_size, content_hash = await self._save_file(file, staged_path)
+                
+                # Voice activity and audio metadata, from the local copy
+                with metrics_service.time_stage("audio_analysis"):
+                    analysis = await audio_analysis_service.analyze_file(staged_path)
+                
+                with metrics_service.time_stage("storage_write"):
+                    file_path = await self.store_chunk_file(
+                        db, session_id, sequence_index, staged_path, content_hash, file_size, file_extension
+                    )
+            except Exception:
+                staged_path.unlink(missing_ok=True)
+                raise
             
-            # Save file
-            file_size = await self._save_file(file, file_path)
+            return await self.register_chunk(
+                db, session_id, sequence_index, file_path, file_size, content_hash,
+                total_chunks, question_id, overlap_seconds, analysis
+            )
             
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error uploading chunk {sequence_index} for session {session_id}: {e}")
+            raise HTTPException(status_code=500, detail=f"Failed to upload chunk: {str(e)}")
+    
+    async def create_direct_upload(
+        self,
+        db: AsyncSession,
+        upload_data: DirectUploadRequest
+    ) -> DirectUploadResponse:
+        """
+        Presign an upload straight to object storage.
+        
+        The chunk bytes never pass through this service; the client PUTs
+        them to the returned URL and then calls complete_direct_upload.
+        """
+        if not content_store.backend.supports_presigned_uploads:
+            raise HTTPException(
+                status_code=400,
+                detail="Direct uploads require an object storage backend (STORAGE_BACKEND=s3)"
+            )
+        file_extension = self._check_direct_upload(upload_data)
+        
+        presigned = await content_store.presign_upload(db, upload_data.content_hash, file_extension)
+        if presigned is None:
+            return DirectUploadResponse(already_stored=True)
+        return DirectUploadResponse(
+            already_stored=False,
+            upload_url=presigned["url"],
+            method=presigned["method"],
+            headers=presigned["headers"],
+            expires_in=presigned["expires_in"]
+        )
+    
+    async def complete_direct_upload(
+        self,
+        db: AsyncSession,
+        upload_data: DirectUploadRequest
+    ) -> ChunkUploadResponse:
+        """Register a chunk the client uploaded directly to object storage."""
+        file_extension = self._check_direct_upload(upload_data)
+        await self._ensure_session_exists(db, upload_data.session_id)
+        
+        file_path = await content_store.add_uploaded(
+            db, upload_data.content_hash, upload_data.file_size_bytes, file_extension
+        )
+        # No local copy to analyse; audio metrics stay unset
+        return await self.register_chunk(
+            db,
+            session_id=upload_data.session_id,
+            sequence_index=upload_data.sequence_index,
+            file_path=file_path,
+            file_size=upload_data.file_size_bytes,
+            content_hash=upload_data.content_hash,
+            total_chunks=upload_data.total_chunks,
+            question_id=upload_data.question_id,
+            overlap_seconds=upload_data.overlap_seconds
+        )
+    
+    def _check_direct_upload(self, upload_data: DirectUploadRequest) -> str:
+        """Validate extension and size of a direct upload; returns the normalized extension."""
+        file_extension = upload_data.file_extension.lower().lstrip('.')
+        if file_extension not in self.allowed_extensions:
+            raise HTTPException(
+                status_code=400,
+                detail=f"File extension '{file_extension}' not allowed. Allowed: {', '.join(self.allowed_extensions)}"
+            )
+        if upload_data.file_size_bytes > self.max_file_size:
+            raise HTTPException(
+                status_code=413,
+                detail=f"File size {upload_data.file_size_bytes} exceeds maximum {self.max_file_size}"
+            )
+        return file_extension
+    
+    def chunk_file_path(self, session_id: str, sequence_index: int, file_extension: str) -> Path:
+        """Per-session storage path of a chunk, creating the session directory."""
+        session_dir = self.upload_dir / session_id
+        session_dir.mkdir(parents=True, exist_ok=True)
+        return session_dir / f"chunk_{sequence_index:04d}.{file_extension}"
+    
+    async def store_chunk_file(
+        self,
+        db: AsyncSession,
+        session_id: str,
+        sequence_index: int,
+        staged_path: Path,
+        content_hash: str,
+        file_size: int,
+        file_extension: str
+    ) -> str:
+        """
+        Move a fully received chunk file to its final location.
+        
+        With content-addressed storage the file is added to the object
+        store (and dropped if identical bytes are already stored);
+        otherwise it is renamed to the per-session chunk path. Returns the
+        stored location recorded as the chunk's file_path.
+        """
+        if content_store.enabled:
+            return await content_store.put(db, staged_path, content_hash, file_size, file_extension)
+        
+        file_path = self.chunk_file_path(session_id, sequence_index, file_extension)
+        try:
+            os.replace(staged_path, file_path)
+        except OSError:
+            # Staged on another filesystem (e.g. a separate partial upload volume)
+            await asyncio.to_thread(shutil.move, staged_path, file_path)
+        return str(file_path)
+    
+    async def release_chunk_files(self, db: AsyncSession, chunks) -> List[str]:
+        """
+        Drop the stored files of chunks being deleted or replaced.
+        
+        Object store references are released in the caller's transaction;
+        the paths of per-session (legacy layout) files are returned for the
+        caller to unlink once its transaction has committed.
+        """
+        released = []
+        legacy_paths = []
+        for chunk in chunks:
+            if chunk.content_hash and content_store.is_managed(chunk.file_path):
+                released.append(chunk.content_hash)
+            elif chunk.file_path:
+                legacy_paths.append(chunk.file_path)
+        await content_store.release(db, released)
+        return legacy_paths
+    
+    async def register_chunk(
+        self,
+        db: AsyncSession,
+        session_id: str,
+        sequence_index: int,
+        file_path: str,
+        file_size: int,
+        content_hash: Optional[str],
+        total_chunks: Optional[int] = None,
+        question_id: Optional[str] = None,
+        overlap_seconds: float = 2.0,
+        analysis: Optional[AudioAnalysisResult] = None
+    ) -> ChunkUploadResponse:
+        """
+        Record a chunk file that has been written to its final location.
+        
+        Creates or updates the MediaChunk, updates session statistics,
+        handles session completion and emits the chunk uploaded event.
+        file_path may be a local path or an object storage URI; audio
+        analysis is done by the caller while it still has a local copy.
+        """
+        file_name = posixpath.basename(file_path)
+        file_extension = posixpath.splitext(file_name)[1].lower().lstrip('.')
+        
+        with metrics_service.time_stage("db_flush"):
             # Check for existing chunk and handle overwrite
             result = await db.execute(
                 select(MediaChunk).where(
@@ -115,62 +297,81 @@ class MediaService:
                 )
             )
             existing_chunk = result.scalar_one_or_none()
+            previous_duration = (existing_chunk.duration_seconds or 0.0) if existing_chunk else 0.0
+            previous_size = (existing_chunk.file_size_bytes or 0) if existing_chunk else 0
+            previous_file = (
+                SimpleNamespace(file_path=existing_chunk.file_path, content_hash=existing_chunk.content_hash)
+                if existing_chunk else None
+            )
+            previous_counters = metrics_service.chunk_counters(existing_chunk)
             
             if existing_chunk:
                 # Update existing chunk
                 chunk = await self._update_existing_chunk(
-                    db, existing_chunk, file_path, file_size, file_name, file_extension
+                    db, existing_chunk, file_path, file_size, file_name, file_extension,
+                    analysis, content_hash
                 )
                 logger.info(f"Updated existing chunk {sequence_index} for session {session_id}")
+                
+                # Replaced file: release its blob, or remove it (after the commit)
+                # unless it was overwritten in place
+                legacy_paths = await self.release_chunk_files(db, [previous_file])
+                self._unlink_after_commit(db, [path for path in legacy_paths if path != file_path])
             else:
                 # Create new chunk
                 chunk = await self._create_new_chunk(
                     db, session_id, sequence_index, file_path, file_size,
-                    file_name, file_extension, question_id, overlap_seconds
+                    file_name, file_extension, question_id, overlap_seconds, analysis,
+                    content_hash
                 )
                 logger.info(f"Created new chunk {sequence_index} for session {session_id}")
-            
-            # Update session statistics
-            await self._update_session_stats(db, session_id, total_chunks)
+        
+        # Update session statistics and monitoring counters
+        is_final_chunk = bool(total_chunks) and sequence_index == total_chunks - 1
+        with metrics_service.time_stage("stats_update"):
+            await metrics_service.adjust_counters(
+                db, metrics_service.counter_delta(previous_counters, metrics_service.chunk_counters(chunk))
+            )
+            await self._update_session_stats(
+                db,
+                session_id,
+                total_chunks,
+                chunk_delta=0 if existing_chunk else 1,
+                duration_delta=(chunk.duration_seconds or 0.0) - previous_duration,
+                bytes_delta=file_size - previous_size
+            )
             
             # Check if this is the last chunk and trigger completion
-            is_final_chunk = total_chunks and sequence_index == total_chunks - 1
             if is_final_chunk:
                 await self._handle_session_completion(db, session_id)
-            
-            # Emit event to other services (import here to avoid circular imports)
-            try:
-                from app.services.event_service import event_service
-                await event_service.emit_chunk_uploaded_event(
-                    session_id=session_id,
-                    chunk_id=chunk.id,
-                    sequence_index=chunk.sequence_index,
-                    file_path=str(chunk.file_path),
-                    file_size_bytes=chunk.file_size_bytes or 0,
-                    overlap_seconds=chunk.overlap_seconds,
-                    question_id=question_id,
-                    total_chunks=total_chunks,
-                    is_final_chunk=is_final_chunk
-                )
-                logger.info(f"Emitted chunk upload event for session {session_id}, chunk {sequence_index}")
-            except Exception as e:
-                logger.warning(f"Failed to emit chunk upload event: {e}")
-                # Don't fail the upload if event emission fails
-            
-            return ChunkUploadResponse(
+        
+        # Queue event for other services in the upload's transaction
+        # (import here to avoid circular imports)
+        from app.services.event_service import event_service
+        with metrics_service.time_stage("event_emission"):
+            await event_service.emit_chunk_uploaded_event(
+                db,
+                session_id=session_id,
                 chunk_id=chunk.id,
                 sequence_index=chunk.sequence_index,
                 file_path=str(chunk.file_path),
-                session_id=chunk.session_id,
-                upload_status=chunk.upload_status,
-                message="Chunk uploaded successfully"
+                file_size_bytes=chunk.file_size_bytes or 0,
+                overlap_seconds=chunk.overlap_seconds,
+                question_id=question_id,
+                total_chunks=total_chunks,
+                is_final_chunk=is_final_chunk,
+                silence_percentage=chunk.silence_percentage,
+                audio_quality_score=chunk.audio_quality_score
             )
-            
-        except HTTPException:
-            raise
-        except Exception as e:
-            logger.error(f"Error uploading chunk {sequence_index} for session {session_id}: {e}")
-            raise HTTPException(status_code=500, detail=f"Failed to upload chunk: {str(e)}")
+        
+        return ChunkUploadResponse(
+            chunk_id=chunk.id,
+            sequence_index=chunk.sequence_index,
+            file_path=str(chunk.file_path),
+            session_id=chunk.session_id,
+            upload_status=chunk.upload_status,
+            message="Chunk uploaded successfully"
+        )
     
     async def get_session_summary(
         self,
@@ -251,89 +452,205 @@ class MediaService:
     async def cleanup_old_files(
         self,
         db: AsyncSession,
-        max_age_days: int = None
-    ) -> Dict[str, int]:
-        """Clean up old files and database records."""
+        max_age_days: int = None,
+        batch_size: Optional[int] = None,
+        max_batches: Optional[int] = None,
+        cursor: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Clean up old files and database records.
+        
+        Chunks older than the cutoff are processed in keyset-paginated
+        batches ordered by (uploaded_at, id). Each batch is removed with one
+        bulk DELETE and committed on its own, then its files are unlinked on
+        a thread pool, so memory and transaction length stay bounded by the
+        batch size. With max_batches set, the returned cursor can be passed
+        back to continue where the run stopped.
+        """
         try:
             max_age = max_age_days or settings.max_file_age_days
             cutoff_date = datetime.utcnow() - timedelta(days=max_age)
-            
-            # Find old chunks
-            result = await db.execute(
-                select(MediaChunk)
-                .where(MediaChunk.uploaded_at < cutoff_date)
-            )
-            old_chunks = result.scalars().all()
+            batch_size = batch_size or settings.cleanup_batch_size
             
             deleted_files = 0
             deleted_records = 0
+            batches = 0
+            touched_sessions = set()
+            loop = asyncio.get_running_loop()
+            
+            with ThreadPoolExecutor(max_workers=settings.cleanup_delete_workers) as executor:
+                while max_batches is None or batches < max_batches:
+                    query = (
+                        select(
+                            MediaChunk.id,
+                            MediaChunk.session_id,
+                            MediaChunk.file_path,
+                            MediaChunk.file_size_bytes,
+                            MediaChunk.content_hash,
+                            MediaChunk.upload_status,
+                            MediaChunk.transcription_status,
+                            MediaChunk.uploaded_at
+                        )
+                        .where(MediaChunk.uploaded_at < cutoff_date)
+                        .order_by(MediaChunk.uploaded_at, MediaChunk.id)
+                        .limit(batch_size)
+                    )
+                    if cursor:
+                        cursor_at = datetime.fromisoformat(cursor["uploaded_at"])
+                        query = query.where(
+                            or_(
+                                MediaChunk.uploaded_at > cursor_at,
+                                and_(MediaChunk.uploaded_at == cursor_at, MediaChunk.id > cursor["id"])
+                            )
+                        )
+                    
+                    rows = (await db.execute(query)).all()
+                    if not rows:
+                        cursor = None
+                        break
+                    
+                    counter_deltas: Dict[str, float] = {}
+                    session_bytes: Dict[str, int] = {}
+                    for row in rows:
+                        counter_deltas = metrics_service.counter_delta(
+                            metrics_service.chunk_counters(row), counter_deltas
+                        )
+                        session_bytes[row.session_id] = session_bytes.get(row.session_id, 0) + (row.file_size_bytes or 0)
+                    
+                    legacy_paths = await self.release_chunk_files(db, rows)
+                    await db.execute(
+                        delete(MediaChunk)
+                        .where(MediaChunk.id.in_([row.id for row in rows]))
+                        .execution_options(synchronize_session=False)
+                    )
+                    await metrics_service.adjust_counters(db, counter_deltas)
+                    await db.execute(
+                        update(MediaSession)
+                        .where(MediaSession.session_id.in_(list(session_bytes)))
+                        .values(storage_bytes=func.coalesce(MediaSession.storage_bytes, 0) - case(
+                            session_bytes, value=MediaSession.session_id, else_=0
+                        ))
+                        .execution_options(synchronize_session=False)
+                    )
+                    await db.commit()
+                    
+                    # Records are gone; a file that fails to unlink is only an orphan
+                    unlinked = await asyncio.gather(*(
+                        loop.run_in_executor(executor, self._unlink_file, file_path)
+                        for file_path in legacy_paths
+                    ))
+                    
+                    deleted_files += sum(unlinked)
+                    deleted_records += len(rows)
+                    batches += 1
+                    touched_sessions.update(row.session_id for row in rows)
+                    cursor = {"uploaded_at": rows[-1].uploaded_at.isoformat(), "id": rows[-1].id}
+                    logger.info(f"Cleanup batch {batches}: removed {len(rows)} chunks")
+                    
+                    if len(rows) < batch_size:
+                        cursor = None
+                        break
             
-            for chunk in old_chunks:
+            # Remove blobs no longer referenced by any chunk
+            collected_blobs = await content_store.collect_garbage(db, batch_size)
+            deleted_files += collected_blobs
+            
+            # Remove session directories emptied by this run
+            for session_id in touched_sessions:
                 try:
-                    # Delete file if it exists
-                    file_path = Path(chunk.file_path)
-                    if file_path.exists():
-                        file_path.unlink()
-                        deleted_files += 1
-                        logger.info(f"Deleted old file: {file_path}")
-                except Exception as e:
-                    logger.warning(f"Failed to delete file {chunk.file_path}: {e}")
-                
-                # Delete database record
-                await db.delete(chunk)
-                deleted_records += 1
-            
-            # Clean up empty session directories
-            for session_dir in self.upload_dir.iterdir():
-                if session_dir.is_dir() and not any(session_dir.iterdir()):
-                    try:
-                        session_dir.rmdir()
-                        logger.info(f"Removed empty session directory: {session_dir}")
-                    except Exception as e:
-                        logger.warning(f"Failed to remove directory {session_dir}: {e}")
+                    (self.upload_dir / session_id).rmdir()
+                    logger.info(f"Removed empty session directory: {session_id}")
+                except OSError:
+                    pass
+            
+            # Discard abandoned resumable uploads (import here to avoid circular imports)
+            from app.services.resumable_upload_service import resumable_upload_service
+            expired_uploads = await resumable_upload_service.expire_stale_uploads(db)
+            
+            # Drop delivered outbox events past retention
+            from app.services.event_dispatcher import event_dispatcher
+            purged_events = await event_dispatcher.purge_delivered(db)
             
             await db.commit()
             
             return {
                 "deleted_files": deleted_files,
                 "deleted_records": deleted_records,
-                "cutoff_date": cutoff_date.isoformat()
+                "batches": batches,
+                "collected_blobs": collected_blobs,
+                "expired_uploads": expired_uploads,
+                "purged_events": purged_events,
+                "cutoff_date": cutoff_date.isoformat(),
+                "cursor": cursor
             }
             
         except Exception as e:
             logger.error(f"Error during cleanup: {e}")
             raise HTTPException(status_code=500, detail=str(e))
     
+    def _unlink_after_commit(self, db: AsyncSession, file_paths: List[str]) -> None:
+        """Delete files once the session's transaction commits; a rollback keeps them."""
+        if not file_paths:
+            return
+        pending = list(file_paths)
+        
+        def on_commit(session):
+            while pending:
+                self._unlink_file(pending.pop())
+        
+        def on_rollback(session):
+            pending.clear()
+        
+        event.listen(db.sync_session, "after_commit", on_commit, once=True)
+        event.listen(db.sync_session, "after_rollback", on_rollback, once=True)
+    
+    @staticmethod
+    def _unlink_file(file_path: str) -> bool:
+        """Delete a chunk file; returns whether a file was removed."""
+        try:
+            os.unlink(file_path)
+            return True
+        except FileNotFoundError:
+            return False
+        except OSError as e:
+            logger.warning(f"Failed to delete file {file_path}: {e}")
+            return False
+    
     async def get_storage_statistics(self, db: AsyncSession) -> Dict[str, any]:
-        """Get storage statistics."""
+        """
+        Get storage statistics.
+        
+        Served from the counters table, which uploads and deletions keep
+        current; on-disk usage comes from the last reconciliation scan
+        (see reconcile_storage_usage) rather than walking the upload
+        directory per request.
+        """
         try:
-            # Count sessions and chunks
-            session_result = await db.execute(select(func.count(MediaSession.id)))
-            total_sessions = session_result.scalar()
-            
-            chunk_result = await db.execute(select(func.count(MediaChunk.id)))
-            total_chunks = chunk_result.scalar()
-            
-            # Calculate storage usage
-            total_size = 0
-            chunk_sizes = []
-            
-            for session_dir in self.upload_dir.iterdir():
-                if session_dir.is_dir():
-                    for file_path in session_dir.rglob("*"):
-                        if file_path.is_file():
-                            file_size = file_path.stat().st_size
-                            total_size += file_size
-                            chunk_sizes.append(file_size)
+            result = await db.execute(
+                select(MetricCounter.name, MetricCounter.value, MetricCounter.updated_at)
+            )
+            rows = {name: (value, updated_at) for name, value, updated_at in result.all()}
+            if any(name not in rows for name in COUNTER_NAMES):
+                counters = await metrics_service.refresh_counters(db)
+            else:
+                counters = {name: value for name, (value, _) in rows.items()}
             
-            avg_chunk_size = sum(chunk_sizes) / len(chunk_sizes) if chunk_sizes else 0
+            storage_used_bytes = int(counters["storage_used_bytes"])
+            sized_chunks = counters["sized_chunks"]
+            disk_used_bytes, disk_scanned_at = rows.get("disk_used_bytes", (None, None))
+            disk_files, _ = rows.get("disk_files", (None, None))
             
             return {
-                "total_sessions": total_sessions,
-                "total_chunks": total_chunks,
-                "storage_used_bytes": total_size,
-                "storage_used_mb": round(total_size / (1024 * 1024), 2),
-                "average_chunk_size_bytes": round(avg_chunk_size, 2),
+                "total_sessions": int(counters["total_sessions"]),
+                "total_chunks": int(counters["total_chunks"]),
+                "storage_used_bytes": storage_used_bytes,
+                "storage_used_mb": round(storage_used_bytes / (1024 * 1024), 2),
+                "average_chunk_size_bytes": round(storage_used_bytes / sized_chunks, 2) if sized_chunks else 0.0,
+                "stored_objects": int(counters["objects"]),
+                "stored_object_bytes": int(counters["object_bytes"]),
+                "disk_used_bytes": int(disk_used_bytes) if disk_used_bytes is not None else None,
+                "disk_files": int(disk_files) if disk_files is not None else None,
+                "disk_scanned_at": disk_scanned_at.isoformat() if disk_scanned_at else None,
                 "upload_directory": str(self.upload_dir),
                 "max_file_size_mb": round(self.max_file_size / (1024 * 1024), 2)
             }
@@ -342,6 +659,94 @@ class MediaService:
             logger.error(f"Error getting storage statistics: {e}")
             raise HTTPException(status_code=500, detail=str(e))
     
+    def scan_storage_usage(self) -> Tuple[int, int, Dict[str, int]]:
+        """
+        Bytes and file count on disk via os.scandir.
+        
+        Returns the totals and the bytes under each top-level entry of the
+        upload directory (session directories and the object store).
+        """
+        total_bytes = 0
+        total_files = 0
+        entry_bytes: Dict[str, int] = {}
+        
+        def walk(path: str) -> Tuple[int, int]:
+            size = files = 0
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        sub_size, sub_files = walk(entry.path)
+                        size += sub_size
+                        files += sub_files
+                    elif entry.is_file(follow_symlinks=False):
+                        size += entry.stat(follow_symlinks=False).st_size
+                        files += 1
+            return size, files
+        
+        if not self.upload_dir.exists():
+            return 0, 0, entry_bytes
+        with os.scandir(self.upload_dir) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    size, files = walk(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    size, files = entry.stat(follow_symlinks=False).st_size, 1
+                else:
+                    continue
+                entry_bytes[entry.name] = size
+                total_bytes += size
+                total_files += files
+        
+        return total_bytes, total_files, entry_bytes
+    
+    async def reconcile_storage_usage(self, db: AsyncSession) -> Dict[str, int]:
+        """
+        Scan the upload directory and record actual disk usage.
+        
+        Stores disk_used_bytes/disk_files counters for the stats endpoint
+        and logs where disk contents differ from the database: the object
+        store against the content_blobs sizes, and per-session directories
+        against the chunks still stored in the per-session layout.
+        """
+        disk_bytes, disk_files, entry_bytes = await asyncio.to_thread(self.scan_storage_usage)
+        mismatched = 0
+        
+        # The object store is only covered by the scan when it is local and inside the upload directory
+        object_root = content_store.root.resolve()
+        object_disk_bytes = entry_bytes.pop(object_root.name, None) if object_root.parent == self.upload_dir.resolve() else None
+        if content_store.backend.name != "local":
+            object_disk_bytes = None
+        result = await db.execute(select(func.coalesce(func.sum(ContentBlob.size_bytes), 0)))
+        object_bytes = result.scalar()
+        if object_disk_bytes is not None and object_disk_bytes < object_bytes:
+            mismatched += 1
+            logger.warning(f"Object store holds {object_disk_bytes} bytes on disk, {object_bytes} recorded")
+        
+        result = await db.execute(
+            select(MediaChunk.session_id, func.sum(MediaChunk.file_size_bytes))
+            .where(MediaChunk.file_path.notlike(f"{content_store.backend.uri('')}%"))
+            .group_by(MediaChunk.session_id)
+        )
+        for session_id, recorded_bytes in result.all():
+            on_disk = entry_bytes.pop(session_id, 0)
+            if on_disk != (recorded_bytes or 0):
+                mismatched += 1
+                logger.warning(
+                    f"Session {session_id} has {on_disk} bytes on disk, {recorded_bytes or 0} recorded"
+                )
+        untracked = {name: size for name, size in entry_bytes.items() if size}
+        if untracked:
+            logger.warning(f"{len(untracked)} entries on disk hold files not referenced by any chunk")
+        
+        await metrics_service.set_counters(db, {"disk_used_bytes": disk_bytes, "disk_files": disk_files})
+        return {
+            "disk_used_bytes": disk_bytes,
+            "disk_files": disk_files,
+            "object_store_bytes": object_disk_bytes,
+            "sessions_mismatched": mismatched,
+            "untracked_directories": len(untracked)
+        }
+    
     async def _validate_file(self, file: UploadFile) -> MediaValidationResponse:
         """Validate uploaded file."""
         errors = []
@@ -385,16 +790,47 @@ class MediaService:
                 file_info=file_info
             )
     
-    async def _save_file(self, file: UploadFile, file_path: Path) -> int:
-        """Save uploaded file to disk."""
+    async def _save_file(self, file: UploadFile, file_path: Path) -> Tuple[int, str]:
+        """
+        Stream an uploaded file to disk.
+        
+        The upload is copied in fixed-size blocks into a temporary file next
+        to the destination while its size and SHA-256 are computed, then
+        atomically renamed into place, so memory use per upload stays
+        constant and readers never see a partially written chunk.
+        
+        Returns:
+            Tuple of (file size in bytes, hex SHA-256 digest)
+        """
+        temp_path = file_path.with_name(f".{file_path.name}.{uuid.uuid4().hex}.part")
+        digest = hashlib.sha256()
+        size = 0
         try:
-            async with aiofiles.open(file_path, 'wb') as f:
-                content = await file.read()
-                await f.write(content)
-                return len(content)
+            async with aiofiles.open(temp_path, 'wb') as f:
+                while True:
+                    block = await file.read(self.upload_block_size)
+                    if not block:
+                        break
+                    size += len(block)
+                    if size > self.max_file_size:
+                        raise HTTPException(
+                            status_code=413,
+                            detail=f"File size exceeds maximum {self.max_file_size}"
+                        )
+                    digest.update(block)
+                    await f.write(block)
+            
+            os.replace(temp_path, file_path)
+            return size, digest.hexdigest()
+            
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error saving file {file_path}: {e}")
             raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
+        finally:
+            if temp_path.exists():
+                temp_path.unlink()
     
     async def _ensure_session_exists(self, db: AsyncSession, session_id: str) -> MediaSession:
         """Ensure session exists, create if it doesn't."""
@@ -415,12 +851,14 @@ class MediaService:
         db: AsyncSession,
         session_id: str,
         sequence_index: int,
-        file_path: Path,
+        file_path: str,
         file_size: int,
         file_name: str,
         file_extension: str,
         question_id: Optional[str],
-        overlap_seconds: float
+        overlap_seconds: float,
+        analysis: Optional[AudioAnalysisResult] = None,
+        content_hash: Optional[str] = None
     ) -> MediaChunk:
         """Create a new chunk record."""
         chunk_data = MediaChunkCreate(
@@ -436,8 +874,10 @@ class MediaService:
             **chunk_data.model_dump(),
             file_path=str(file_path),
             file_size_bytes=file_size,
+            content_hash=content_hash,
             upload_status="uploaded"
         )
+        self._apply_audio_analysis(chunk, analysis)
         
         db.add(chunk)
         await db.flush()
@@ -449,61 +889,139 @@ class MediaService:
         self,
         db: AsyncSession,
         chunk: MediaChunk,
-        file_path: Path,
+        file_path: str,
         file_size: int,
         file_name: str,
-        file_extension: str
+        file_extension: str,
+        analysis: Optional[AudioAnalysisResult] = None,
+        content_hash: Optional[str] = None
     ) -> MediaChunk:
         """Update an existing chunk record."""
         chunk.file_path = str(file_path)
         chunk.file_size_bytes = file_size
+        chunk.content_hash = content_hash
         chunk.file_name = file_name
         chunk.file_extension = file_extension
         chunk.upload_status = "uploaded"
         chunk.uploaded_at = datetime.utcnow()
+        self._apply_audio_analysis(chunk, analysis)
         
         await db.flush()
         await db.refresh(chunk)
         
         return chunk
     
+    def _apply_audio_analysis(
+        self,
+        chunk: MediaChunk,
+        analysis: Optional[AudioAnalysisResult]
+    ) -> None:
+        """Copy audio metadata and voice-activity metrics onto a chunk."""
+        if analysis is None:
+            return
+        
+        chunk.duration_seconds = analysis.duration_seconds
+        chunk.sample_rate = analysis.sample_rate
+        chunk.channels = analysis.channels
+        chunk.silence_percentage = analysis.silence_percentage
+        chunk.audio_quality_score = analysis.audio_quality_score
+        chunk.noise_level = analysis.noise_level
+    
     async def _update_session_stats(
         self,
         db: AsyncSession,
         session_id: str,
-        total_chunks: Optional[int]
+        total_chunks: Optional[int],
+        chunk_delta: int,
+        duration_delta: float,
+        bytes_delta: int = 0
     ) -> None:
-        """Update session statistics."""
+        """
+        Apply a chunk upload to the session counters in a single UPDATE.
+        
+        Counters are adjusted by deltas rather than recomputed from all
+        chunks of the session; reconcile_session_stats repairs any drift.
+        """
         try:
-            # Get current chunk count
-            result = await db.execute(
-                select(func.count(MediaChunk.id))
-                .where(MediaChunk.session_id == session_id)
+            values = {
+                "uploaded_chunks": MediaSession.uploaded_chunks + chunk_delta,
+                "total_chunks": total_chunks or MediaSession.uploaded_chunks + chunk_delta,
+                "total_duration_seconds": func.coalesce(MediaSession.total_duration_seconds, 0.0) + duration_delta,
+                "storage_bytes": func.coalesce(MediaSession.storage_bytes, 0) + bytes_delta,
+                "updated_at": datetime.utcnow()
+            }
+            await db.execute(
+                update(MediaSession)
+                .where(MediaSession.session_id == session_id)
+                .values(**values)
+                .execution_options(synchronize_session=False)
             )
-            current_chunks = result.scalar()
-            
-            # Get total duration
-            result = await db.execute(
-                select(func.sum(MediaChunk.duration_seconds))
-                .where(MediaChunk.session_id == session_id)
+                
+        except Exception as e:
+            logger.error(f"Error updating session stats for {session_id}: {e}")
+    
+    async def reconcile_session_stats(
+        self,
+        db: AsyncSession,
+        session_id: Optional[str] = None
+    ) -> Dict[str, int]:
+        """
+        Verify session counters against the chunk table and repair drift.
+        
+        Aggregates all sessions (or one) in a single GROUP BY query.
+        """
+        try:
+            chunk_stats = (
+                select(
+                    MediaChunk.session_id.label("session_id"),
+                    func.count(MediaChunk.id).label("chunk_count"),
+                    func.coalesce(func.sum(MediaChunk.duration_seconds), 0.0).label("duration"),
+                    func.coalesce(func.sum(MediaChunk.file_size_bytes), 0).label("storage_bytes")
+                )
+                .group_by(MediaChunk.session_id)
+                .subquery()
             )
-            total_duration = result.scalar() or 0.0
-            
-            # Update session
-            result = await db.execute(
-                select(MediaSession).where(MediaSession.session_id == session_id)
+            query = (
+                select(MediaSession, chunk_stats.c.chunk_count, chunk_stats.c.duration, chunk_stats.c.storage_bytes)
+                .outerjoin(chunk_stats, chunk_stats.c.session_id == MediaSession.session_id)
             )
-            session = result.scalar_one_or_none()
+            if session_id:
+                query = query.where(MediaSession.session_id == session_id)
+            
+            result = await db.execute(query)
+            
+            checked = 0
+            repaired = 0
+            for session, chunk_count, duration, storage_bytes in result.all():
+                checked += 1
+                chunk_count = chunk_count or 0
+                duration = duration or 0.0
+                storage_bytes = storage_bytes or 0
+                if (
+                    session.uploaded_chunks != chunk_count
+                    or abs((session.total_duration_seconds or 0.0) - duration) > 1e-6
+                    or (session.storage_bytes or 0) != storage_bytes
+                ):
+                    logger.warning(
+                        f"Session {session.session_id} counters drifted: "
+                        f"chunks {session.uploaded_chunks} -> {chunk_count}, "
+                        f"duration {session.total_duration_seconds} -> {duration}, "
+                        f"bytes {session.storage_bytes} -> {storage_bytes}"
+                    )
+                    if session.total_chunks == session.uploaded_chunks:
+                        session.total_chunks = chunk_count
+                    session.uploaded_chunks = chunk_count
+                    session.total_duration_seconds = duration
+                    session.storage_bytes = storage_bytes
+                    repaired += 1
+            
+            await db.flush()
+            
+            return {"sessions_checked": checked, "sessions_repaired": repaired}
             
-            if session:
-                session.total_chunks = total_chunks or current_chunks
-                session.total_duration_seconds = total_duration
-                session.updated_at = datetime.utcnow()
-                
-                await db.flush()
-                
         except Exception as e:
-            logger.error(f"Error updating session stats for {session_id}: {e}")
+            logger.error(f"Error reconciling session stats: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
     
     async def _handle_session_completion(
         self,
@@ -512,29 +1030,33 @@ class MediaService:
     ) -> None:
         """Handle session completion."""
         try:
+            # Counters were updated in SQL, so reload rather than reuse the identity map
             result = await db.execute(
-                select(MediaSession).where(MediaSession.session_id == session_id)
+                select(MediaSession)
+                .where(MediaSession.session_id == session_id)
+                .execution_options(populate_existing=True)
             )
             session = result.scalar_one_or_none()
             
             if session:
+                previous_counters = metrics_service.session_counters(session)
                 session.session_status = "completed"
                 session.completed_at = datetime.utcnow()
                 session.updated_at = datetime.utcnow()
                 
                 await db.flush()
+                await metrics_service.adjust_counters(
+                    db, metrics_service.counter_delta(previous_counters, metrics_service.session_counters(session))
+                )
                 
-                # Emit session completion event
-                try:
-                    from app.services.event_service import event_service
-                    await event_service.emit_session_completed_event(
-                        session_id=session_id,
-                        total_chunks=session.total_chunks,
-                        total_duration_seconds=session.total_duration_seconds
-                    )
-                    logger.info(f"Emitted session completion event for {session_id}")
-                except Exception as e:
-                    logger.warning(f"Failed to emit session completion event: {e}")
+                # Queue session completion event
+                from app.services.event_service import event_service
+                await event_service.emit_session_completed_event(
+                    db,
+                    session_id=session_id,
+                    total_chunks=session.total_chunks,
+                    total_duration_seconds=session.total_duration_seconds
+                )
                 
         except Exception as e:
             logger.error(f"Error handling session completion for {session_id}: {e}")
@@ -2,102 +2,112 @@
 Monitoring Service for health checks and metrics.
 """
 import logging
+import os
 import time
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import Dict, Any
+from typing import Dict, Any, Iterator, Optional
 
-from sqlalchemy import func, select
+from fastapi import HTTPException
+from prometheus_client import CollectorRegistry, Counter, Histogram, REGISTRY, generate_latest, multiprocess
+from sqlalchemy import case, func, select, true, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import get_settings
-from app.models.media import MediaChunk, MediaSession, MediaProcessingTask
+from app.models.media import ContentBlob, MediaChunk, MediaSession, MediaProcessingTask, MetricCounter
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
-# Global metrics storage
-_metrics = {
-    "chunk_uploads": {"success": 0, "failed": 0, "total_duration": 0.0},
-    "chunk_processing": {"success": 0, "failed": 0, "total_duration": 0.0},
-    "session_completions": {"count": 0, "total_duration": 0.0}
-}
+# Prometheus metrics; with PROMETHEUS_MULTIPROC_DIR set they are shared
+# across uvicorn/gunicorn workers through prometheus_client's mmap files
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CHUNK_UPLOADS = Counter(
+    "media_service_chunk_uploads",
+    "Total chunk uploads",
+    ["status"]
+)
+CHUNK_UPLOAD_DURATION = Histogram(
+    "media_service_chunk_upload_duration_seconds",
+    "End-to-end chunk upload latency",
+    ["status"],
+    buckets=LATENCY_BUCKETS
+)
+UPLOAD_STAGE_DURATION = Histogram(
+    "media_service_upload_stage_duration_seconds",
+    "Latency of each chunk upload stage",
+    ["stage", "outcome"],
+    buckets=LATENCY_BUCKETS
+)
+CHUNK_PROCESSING = Counter(
+    "media_service_chunk_processing",
+    "Total chunk processing operations",
+    ["status"]
+)
+CHUNK_PROCESSING_DURATION = Histogram(
+    "media_service_chunk_processing_duration_seconds",
+    "Chunk processing latency",
+    ["status"],
+    buckets=LATENCY_BUCKETS
+)
+SESSION_COMPLETIONS = Counter(
+    "media_service_session_completions",
+    "Total session completions"
+)
+SESSION_DURATION = Histogram(
+    "media_service_session_duration_seconds",
+    "Duration of completed sessions",
+    buckets=(30, 60, 300, 600, 1200, 1800, 3600, 7200)
+)
 
 _start_time = time.time()
 
+# Counters kept in the media_metric_counters table
+COUNTER_NAMES = (
+    "total_sessions",
+    "active_sessions",
+    "total_chunks",
+    "pending_chunks",
+    "processed_chunks",
+    "failed_chunks",
+    "storage_used_bytes",
+    "sized_chunks",
+    "processing_queue_size",
+    "objects",
+    "object_bytes"
+)
+
 
 class MetricsService:
     """Service for collecting and providing metrics."""
     
     def __init__(self):
         self.start_time = _start_time
+        self._snapshot = None
+        self._snapshot_at = 0.0
     
     async def collect_database_metrics(self, db: AsyncSession) -> Dict[str, Any]:
-        """Collect metrics from database."""
+        """
+        Collect metrics from database.
+        
+        Reads the materialized counters table (built from a full snapshot
+        on first use) and serves the result for `metrics_cache_seconds`,
+        so scrapes do not scan the chunk table.
+        """
+        now = time.monotonic()
+        if self._snapshot is not None and now - self._snapshot_at < settings.metrics_cache_seconds:
+            return dict(self._snapshot)
+        
         try:
-            # Session metrics
-            session_result = await db.execute(select(func.count(MediaSession.id)))
-            total_sessions = session_result.scalar()
-            
-            active_session_result = await db.execute(
-                select(func.count(MediaSession.id))
-                .where(MediaSession.session_status == "active")
-            )
-            active_sessions = active_session_result.scalar()
-            
-            # Chunk metrics
-            chunk_result = await db.execute(select(func.count(MediaChunk.id)))
-            total_chunks = chunk_result.scalar()
-            
-            pending_chunk_result = await db.execute(
-                select(func.count(MediaChunk.id))
-                .where(MediaChunk.upload_status == "pending")
-            )
-            pending_chunks = pending_chunk_result.scalar()
-            
-            processed_chunk_result = await db.execute(
-                select(func.count(MediaChunk.id))
-                .where(MediaChunk.transcription_status == "completed")
-            )
-            processed_chunks = processed_chunk_result.scalar()
-            
-            failed_chunk_result = await db.execute(
-                select(func.count(MediaChunk.id))
-                .where(MediaChunk.upload_status == "failed")
-            )
-            failed_chunks = failed_chunk_result.scalar()
+            result = await db.execute(select(MetricCounter.name, MetricCounter.value))
+            counters = dict(result.all())
+            if any(name not in counters for name in COUNTER_NAMES):
+                counters = await self.refresh_counters(db)
             
-            # Storage metrics
-            storage_result = await db.execute(
-                select(func.sum(MediaChunk.file_size_bytes))
-                .where(MediaChunk.file_size_bytes.isnot(None))
-            )
-            storage_used_bytes = storage_result.scalar() or 0
-            
-            # Average chunk size
-            avg_size_result = await db.execute(
-                select(func.avg(MediaChunk.file_size_bytes))
-                .where(MediaChunk.file_size_bytes.isnot(None))
-            )
-            average_chunk_size_bytes = avg_size_result.scalar() or 0.0
-            
-            # Processing queue size
-            queue_result = await db.execute(
-                select(func.count(MediaProcessingTask.id))
-                .where(MediaProcessingTask.task_status.in_(["pending", "running"]))
-            )
-            processing_queue_size = queue_result.scalar()
-            
-            return {
-                "total_sessions": total_sessions,
-                "active_sessions": active_sessions,
-                "total_chunks": total_chunks,
-                "pending_chunks": pending_chunks,
-                "processed_chunks": processed_chunks,
-                "failed_chunks": failed_chunks,
-                "storage_used_bytes": storage_used_bytes,
-                "average_chunk_size_bytes": round(average_chunk_size_bytes, 2),
-                "processing_queue_size": processing_queue_size
-            }
+            self._snapshot = self._format_metrics(counters)
+            self._snapshot_at = now
+            return dict(self._snapshot)
             
         except Exception as e:
             logger.error(f"Error collecting database metrics: {e}")
@@ -113,30 +123,202 @@ class MetricsService:
                 "processing_queue_size": 0
             }
     
+    async def query_database_snapshot(self, db: AsyncSession) -> Dict[str, float]:
+        """Compute all counters from the source tables in a single query."""
+        sessions = select(
+            func.count(MediaSession.id).label("total_sessions"),
+            func.count(MediaSession.id).filter(MediaSession.session_status == "active").label("active_sessions")
+        ).subquery()
+        chunks = select(
+            func.count(MediaChunk.id).label("total_chunks"),
+            func.count(MediaChunk.id).filter(MediaChunk.upload_status == "pending").label("pending_chunks"),
+            func.count(MediaChunk.id).filter(MediaChunk.transcription_status == "completed").label("processed_chunks"),
+            func.count(MediaChunk.id).filter(MediaChunk.upload_status == "failed").label("failed_chunks"),
+            func.coalesce(func.sum(MediaChunk.file_size_bytes), 0).label("storage_used_bytes"),
+            func.count(MediaChunk.file_size_bytes).label("sized_chunks")
+        ).subquery()
+        tasks = select(
+            func.count(MediaProcessingTask.id)
+            .filter(MediaProcessingTask.task_status.in_(["pending", "running"]))
+            .label("processing_queue_size")
+        ).subquery()
+        blobs = select(
+            func.count(ContentBlob.content_hash).label("objects"),
+            func.coalesce(func.sum(ContentBlob.size_bytes), 0).label("object_bytes")
+        ).subquery()
+        
+        # Single-row aggregates joined into one row
+        result = await db.execute(
+            select(sessions, chunks, tasks, blobs)
+            .select_from(sessions.join(chunks, true()).join(tasks, true()).join(blobs, true()))
+        )
+        row = result.mappings().one()
+        return {name: float(row[name] or 0) for name in COUNTER_NAMES}
+    
+    async def ensure_counters(self, db: AsyncSession) -> None:
+        """
+        Create the counter rows once at startup, filled from a snapshot.
+        
+        Uploads only apply deltas to existing rows, so they never race to
+        insert the same counter.
+        """
+        result = await db.execute(select(MetricCounter.name))
+        missing = set(COUNTER_NAMES) - set(result.scalars().all())
+        if not missing:
+            return
+        await self._upsert(db, {name: 0.0 for name in missing}, overwrite=False)
+        await self.refresh_counters(db)
+    
+    async def refresh_counters(self, db: AsyncSession) -> Dict[str, float]:
+        """
+        Rebuild the counters table from the source tables, logging any drift.
+        
+        The counter rows are locked (written) before the source tables are
+        read: uploads that adjusted them earlier have committed by then and
+        are part of the snapshot, later ones wait and apply their deltas on
+        top of it, so no increment is lost or counted twice.
+        """
+        await db.execute(
+            update(MetricCounter)
+            .where(MetricCounter.name.in_(COUNTER_NAMES))
+            .values(updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        result = await db.execute(select(MetricCounter.name, MetricCounter.value))
+        current = dict(result.all())
+        snapshot = await self.query_database_snapshot(db)
+        
+        drifted = {}
+        for name, value in snapshot.items():
+            if name in current and current[name] != value:
+                logger.warning(f"Metric counter {name} drifted: {current[name]} -> {value}")
+            if current.get(name) != value:
+                drifted[name] = value
+        await self._upsert(db, drifted)
+        
+        self._snapshot = None
+        return snapshot
+    
+    async def set_counters(self, db: AsyncSession, values: Dict[str, float]) -> None:
+        """Overwrite counters with measured values, creating missing rows."""
+        await self._upsert(db, values)
+    
+    async def _upsert(self, db: AsyncSession, values: Dict[str, float], overwrite: bool = True) -> None:
+        """Insert counters, replacing (or with overwrite=False keeping) existing values, in one statement."""
+        if not values:
+            return
+        dialect = db.get_bind().dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        now = datetime.utcnow()
+        statement = insert(MetricCounter).values(
+            [{"name": name, "value": value, "updated_at": now} for name, value in values.items()]
+        )
+        if overwrite:
+            statement = statement.on_conflict_do_update(
+                index_elements=[MetricCounter.name],
+                set_={"value": statement.excluded.value, "updated_at": statement.excluded.updated_at}
+            )
+        else:
+            statement = statement.on_conflict_do_nothing(index_elements=[MetricCounter.name])
+        await db.execute(statement)
+    
+    async def adjust_counters(self, db: AsyncSession, deltas: Dict[str, float]) -> None:
+        """Apply counter deltas in the caller's transaction with a single UPDATE."""
+        deltas = {name: delta for name, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        await db.execute(
+            update(MetricCounter)
+            .where(MetricCounter.name.in_(list(deltas)))
+            .values(value=MetricCounter.value + case(deltas, value=MetricCounter.name, else_=0))
+            .execution_options(synchronize_session=False)
+        )
+    
+    @staticmethod
+    def chunk_counters(chunk: Optional[MediaChunk]) -> Dict[str, float]:
+        """Counter contribution of a chunk in its current state."""
+        if chunk is None:
+            return {}
+        return {
+            "total_chunks": 1,
+            "pending_chunks": 1 if chunk.upload_status == "pending" else 0,
+            "processed_chunks": 1 if chunk.transcription_status == "completed" else 0,
+            "failed_chunks": 1 if chunk.upload_status == "failed" else 0,
+            "storage_used_bytes": chunk.file_size_bytes or 0,
+            "sized_chunks": 1 if chunk.file_size_bytes is not None else 0
+        }
+    
+    @staticmethod
+    def session_counters(session: Optional[MediaSession]) -> Dict[str, float]:
+        """Counter contribution of a session in its current state."""
+        if session is None:
+            return {}
+        return {
+            "total_sessions": 1,
+            "active_sessions": 1 if session.session_status == "active" else 0
+        }
+    
+    @staticmethod
+    def counter_delta(before: Dict[str, float], after: Dict[str, float]) -> Dict[str, float]:
+        """Difference between two counter contributions."""
+        return {name: after.get(name, 0) - before.get(name, 0) for name in set(before) | set(after)}
+    
+    def _format_metrics(self, counters: Dict[str, float]) -> Dict[str, Any]:
+        sized_chunks = counters["sized_chunks"]
+        return {
+            "total_sessions": int(counters["total_sessions"]),
+            "active_sessions": int(counters["active_sessions"]),
+            "total_chunks": int(counters["total_chunks"]),
+            "pending_chunks": int(counters["pending_chunks"]),
+            "processed_chunks": int(counters["processed_chunks"]),
+            "failed_chunks": int(counters["failed_chunks"]),
+            "storage_used_bytes": int(counters["storage_used_bytes"]),
+            "average_chunk_size_bytes": round(counters["storage_used_bytes"] / sized_chunks, 2) if sized_chunks else 0.0,
+            "processing_queue_size": int(counters["processing_queue_size"])
+        }
+    
     def record_chunk_upload(self, session_id: str, status: str, duration: float):
         """Record chunk upload metrics."""
-        if status == "success":
-            _metrics["chunk_uploads"]["success"] += 1
-        else:
-            _metrics["chunk_uploads"]["failed"] += 1
-        
-        _metrics["chunk_uploads"]["total_duration"] += duration
+        status = "success" if status == "success" else "failed"
+        CHUNK_UPLOADS.labels(status=status).inc()
+        CHUNK_UPLOAD_DURATION.labels(status=status).observe(duration)
         logger.debug(f"Recorded chunk upload: {status}, duration: {duration:.3f}s")
     
+    @contextmanager
+    def time_stage(self, stage: str) -> Iterator[None]:
+        """
+        Time an upload stage into the per-stage histogram.
+        
+        The outcome label is `success`, `rejected` for client errors
+        (4xx HTTPException) or `error` for anything else.
+        """
+        start = time.perf_counter()
+        outcome = "success"
+        try:
+            yield
+        except HTTPException as e:
+            outcome = "rejected" if e.status_code < 500 else "error"
+            raise
+        except BaseException:
+            outcome = "error"
+            raise
+        finally:
+            UPLOAD_STAGE_DURATION.labels(stage=stage, outcome=outcome).observe(time.perf_counter() - start)
+    
     def record_chunk_processing(self, duration: float, success: bool):
         """Record chunk processing metrics."""
-        if success:
-            _metrics["chunk_processing"]["success"] += 1
-        else:
-            _metrics["chunk_processing"]["failed"] += 1
-        
-        _metrics["chunk_processing"]["total_duration"] += duration
-        logger.debug(f"Recorded chunk processing: {'success' if success else 'failed'}, duration: {duration:.3f}s")
+        status = "success" if success else "failed"
+        CHUNK_PROCESSING.labels(status=status).inc()
+        CHUNK_PROCESSING_DURATION.labels(status=status).observe(duration)
+        logger.debug(f"Recorded chunk processing: {status}, duration: {duration:.3f}s")
     
     def record_session_completion(self, duration: float):
         """Record session completion metrics."""
-        _metrics["session_completions"]["count"] += 1
-        _metrics["session_completions"]["total_duration"] += duration
+        SESSION_COMPLETIONS.inc()
+        SESSION_DURATION.observe(duration)
         logger.debug(f"Recorded session completion, duration: {duration:.3f}s")
     
     async def get_health_status(self, db: AsyncSession) -> Dict[str, Any]:
@@ -209,28 +391,42 @@ class MetricsService:
         try:
             uptime_seconds = time.time() - self.start_time
             
+            # Import here to avoid circular imports
+            from app.services.event_dispatcher import event_dispatcher
+            dispatch_stats = event_dispatcher.get_stats()
+            
+            # Counters and histograms, aggregated across workers in multiprocess mode
+            registry = REGISTRY
+            if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+                registry = CollectorRegistry()
+                multiprocess.MultiProcessCollector(registry)
+            
+            # Gauges below describe this worker process
             metrics = [
+                generate_latest(registry).decode("utf-8"),
                 f"# HELP media_service_uptime_seconds Service uptime in seconds",
                 f"# TYPE media_service_uptime_seconds gauge",
                 f"media_service_uptime_seconds {uptime_seconds}",
                 "",
-                f"# HELP media_service_chunk_uploads_total Total chunk uploads",
-                f"# TYPE media_service_chunk_uploads_total counter",
-                f"media_service_chunk_uploads_total{{status=\"success\"}} {_metrics['chunk_uploads']['success']}",
-                f"media_service_chunk_uploads_total{{status=\"failed\"}} {_metrics['chunk_uploads']['failed']}",
+                f"# HELP media_service_memory_usage_bytes Memory usage in bytes",
+                f"# TYPE media_service_memory_usage_bytes gauge",
+                f"media_service_memory_usage_bytes {self._get_memory_usage() * 1024 * 1024}",
                 "",
-                f"# HELP media_service_chunk_processing_total Total chunk processing operations",
-                f"# TYPE media_service_chunk_processing_total counter",
-                f"media_service_chunk_processing_total{{status=\"success\"}} {_metrics['chunk_processing']['success']}",
-                f"media_service_chunk_processing_total{{status=\"failed\"}} {_metrics['chunk_processing']['failed']}",
+                f"# HELP media_service_events_total Outbox event deliveries by outcome",
+                f"# TYPE media_service_events_total counter",
+                f"media_service_events_total{{status=\"delivered\"}} {dispatch_stats['delivered']}",
+                f"media_service_events_total{{status=\"retried\"}} {dispatch_stats['retried']}",
+                f"media_service_events_total{{status=\"failed\"}} {dispatch_stats['failed']}",
                 "",
-                f"# HELP media_service_session_completions_total Total session completions",
-                f"# TYPE media_service_session_completions_total counter",
-                f"media_service_session_completions_total {_metrics['session_completions']['count']}",
+                f"# HELP media_service_event_delivery_lag_seconds Time from event creation to delivery",
+                f"# TYPE media_service_event_delivery_lag_seconds gauge",
+                f"media_service_event_delivery_lag_seconds{{stat=\"last\"}} {dispatch_stats['last_delivery_lag_seconds']}",
+                f"media_service_event_delivery_lag_seconds{{stat=\"max\"}} {dispatch_stats['max_delivery_lag_seconds']}",
+                f"media_service_event_delivery_lag_seconds{{stat=\"average\"}} {dispatch_stats['average_delivery_lag_seconds']}",
                 "",
-                f"# HELP media_service_memory_usage_bytes Memory usage in bytes",
-                f"# TYPE media_service_memory_usage_bytes gauge",
-                f"media_service_memory_usage_bytes {self._get_memory_usage() * 1024 * 1024}"
+                f"# HELP media_service_event_outbox_oldest_pending_seconds Age of the oldest event in the last dispatched batch",
+                f"# TYPE media_service_event_outbox_oldest_pending_seconds gauge",
+                f"media_service_event_outbox_oldest_pending_seconds {dispatch_stats['oldest_pending_age_seconds']}"
             ]
             
             return "\n".join(metrics)
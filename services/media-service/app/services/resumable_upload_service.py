@@ -0,0 +1,280 @@
+"""
+Resumable chunk uploads with byte-offset continuation.
+
+Protocol (modelled on tus):
+1. Create an upload with the chunk metadata and total size.
+2. PATCH bytes with the current offset; an interrupted PATCH is resumed
+   by asking for the offset and sending the remaining bytes.
+3. Finalize once all bytes are received, which moves the file into place
+   and hands it to the regular MediaChunk bookkeeping. The partial file is
+   kept until the chunk is registered, so a failed finalize can be retried.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import shutil
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import AsyncIterator, Dict, Tuple
+
+import aiofiles
+from fastapi import HTTPException
+from sqlalchemy import and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.models.media import ResumableUpload
+from app.schemas.media import ChunkUploadResponse, ResumableUploadCreate
+from app.services.audio_analysis import audio_analysis_service
+from app.services.content_store import content_store
+from app.services.media_service import media_service
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class ResumableUploadService:
+    """Service for resumable chunk uploads."""
+
+    def __init__(self):
+        self.partial_dir = settings.partial_upload_dir
+        self.max_file_size = settings.max_file_size
+        self.allowed_extensions = settings.allowed_extensions
+        self.block_size = settings.upload_block_size
+        self.expiry = timedelta(hours=settings.resumable_upload_expiry_hours)
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    async def create_upload(
+        self,
+        db: AsyncSession,
+        upload_data: ResumableUploadCreate
+    ) -> ResumableUpload:
+        """Start a resumable upload."""
+        file_extension = upload_data.file_extension.lower().lstrip('.')
+        if file_extension not in self.allowed_extensions:
+            raise HTTPException(
+                status_code=400,
+                detail=f"File extension '{file_extension}' not allowed. Allowed: {', '.join(self.allowed_extensions)}"
+            )
+        if upload_data.upload_length > self.max_file_size:
+            raise HTTPException(
+                status_code=413,
+                detail=f"File size {upload_data.upload_length} exceeds maximum {self.max_file_size}"
+            )
+
+        upload_id = uuid.uuid4().hex
+        self.partial_dir.mkdir(parents=True, exist_ok=True)
+        partial_path = self.partial_dir / f"{upload_id}.part"
+        partial_path.touch()
+
+        upload = ResumableUpload(
+            upload_id=upload_id,
+            session_id=upload_data.session_id,
+            question_id=upload_data.question_id,
+            sequence_index=upload_data.sequence_index,
+            total_chunks=upload_data.total_chunks,
+            overlap_seconds=upload_data.overlap_seconds,
+            file_extension=file_extension,
+            upload_length=upload_data.upload_length,
+            upload_offset=0,
+            partial_path=str(partial_path)
+        )
+        db.add(upload)
+        await db.flush()
+        await db.refresh(upload)
+
+        logger.info(
+            f"Created resumable upload {upload_id} for chunk {upload_data.sequence_index} "
+            f"of session {upload_data.session_id} ({upload_data.upload_length} bytes)"
+        )
+        return upload
+
+    async def get_upload(self, db: AsyncSession, upload_id: str) -> ResumableUpload:
+        """Get an upload by id."""
+        result = await db.execute(
+            select(ResumableUpload).where(ResumableUpload.upload_id == upload_id)
+        )
+        upload = result.scalar_one_or_none()
+        if not upload:
+            raise HTTPException(status_code=404, detail="Upload not found")
+        return upload
+
+    async def append(
+        self,
+        db: AsyncSession,
+        upload_id: str,
+        offset: int,
+        stream: AsyncIterator[bytes]
+    ) -> ResumableUpload:
+        """
+        Append bytes at the given offset.
+
+        The offset must equal the number of bytes already received (409
+        otherwise). Bytes written past the recorded offset by an
+        interrupted request are discarded before appending. The offset is
+        committed after the data has been written, so it never runs ahead of
+        the partial file; if the stream breaks mid-request the bytes that did
+        arrive are kept.
+        """
+        async with self._lock(upload_id):
+            upload = await self.get_upload(db, upload_id)
+            if upload.upload_status != "in_progress":
+                raise HTTPException(status_code=409, detail=f"Upload is {upload.upload_status}")
+            if offset != upload.upload_offset:
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"Offset mismatch: expected {upload.upload_offset}, got {offset}"
+                )
+
+            partial_path = Path(upload.partial_path)
+            if not partial_path.exists():
+                raise HTTPException(status_code=410, detail="Partial upload data is gone")
+            if partial_path.stat().st_size != offset:
+                os.truncate(partial_path, offset)
+
+            received = offset
+            try:
+                async with aiofiles.open(partial_path, 'ab') as f:
+                    async for block in stream:
+                        if not block:
+                            continue
+                        if received + len(block) > upload.upload_length:
+                            raise HTTPException(
+                                status_code=413,
+                                detail=f"Upload exceeds declared length {upload.upload_length}"
+                            )
+                        await f.write(block)
+                        received += len(block)
+            except HTTPException:
+                received = upload.upload_offset
+                os.truncate(partial_path, received)
+                raise
+            except Exception as e:
+                # Client disconnected: keep what was written
+                logger.warning(f"Upload {upload_id} interrupted at byte {received}: {e}")
+            finally:
+                upload.upload_offset = received
+                await db.commit()
+
+            return upload
+
+    async def finalize(self, db: AsyncSession, upload_id: str) -> ChunkUploadResponse:
+        """Move a complete upload into place and register the chunk."""
+        async with self._lock(upload_id):
+            upload = await self.get_upload(db, upload_id)
+            if upload.upload_status == "completed":
+                raise HTTPException(status_code=409, detail="Upload already finalized")
+            if upload.upload_status == "expired":
+                raise HTTPException(status_code=410, detail="Upload expired")
+            if upload.upload_offset != upload.upload_length:
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"Upload incomplete: {upload.upload_offset}/{upload.upload_length} bytes"
+                )
+
+            partial_path = Path(upload.partial_path)
+            if not partial_path.exists():
+                raise HTTPException(status_code=410, detail="Partial upload data is gone")
+            file_size, content_hash = await asyncio.to_thread(self._hash_file, partial_path)
+
+            await media_service._ensure_session_exists(db, upload.session_id)
+            analysis = await audio_analysis_service.analyze_file(partial_path)
+
+            # Store a link to the data rather than the partial file itself; if
+            # registering fails the request's transaction is rolled back and the
+            # stored file removed, leaving the upload ready to finalize again
+            staged_path = await asyncio.to_thread(self._stage, partial_path)
+            file_path = None
+            try:
+                file_path = await media_service.store_chunk_file(
+                    db, upload.session_id, upload.sequence_index, staged_path,
+                    content_hash, file_size, upload.file_extension
+                )
+
+                response = await media_service.register_chunk(
+                    db,
+                    session_id=upload.session_id,
+                    sequence_index=upload.sequence_index,
+                    file_path=file_path,
+                    file_size=file_size,
+                    content_hash=content_hash,
+                    total_chunks=upload.total_chunks,
+                    question_id=upload.question_id,
+                    overlap_seconds=upload.overlap_seconds,
+                    analysis=analysis
+                )
+
+                upload.upload_status = "completed"
+                upload.chunk_id = response.chunk_id
+                await db.flush()
+            except Exception:
+                staged_path.unlink(missing_ok=True)
+                # Blobs are content-addressed and rewritten by the retry; legacy files are ours to remove
+                if file_path and not content_store.is_managed(file_path):
+                    Path(file_path).unlink(missing_ok=True)
+                raise
+
+            partial_path.unlink(missing_ok=True)
+            self._locks.pop(upload_id, None)
+            logger.info(f"Finalized resumable upload {upload_id} as chunk {response.chunk_id}")
+            return response
+
+    async def expire_stale_uploads(self, db: AsyncSession) -> int:
+        """Discard incomplete uploads that have not progressed within the expiry window."""
+        cutoff = datetime.utcnow() - self.expiry
+        result = await db.execute(
+            select(ResumableUpload).where(
+                and_(
+                    ResumableUpload.upload_status == "in_progress",
+                    ResumableUpload.updated_at < cutoff
+                )
+            )
+        )
+        stale = result.scalars().all()
+
+        for upload in stale:
+            partial_path = Path(upload.partial_path)
+            if partial_path.exists():
+                partial_path.unlink()
+            upload.upload_status = "expired"
+            self._locks.pop(upload.upload_id, None)
+
+        await db.flush()
+        if stale:
+            logger.info(f"Expired {len(stale)} stale resumable uploads")
+        return len(stale)
+
+    def _lock(self, upload_id: str) -> asyncio.Lock:
+        lock = self._locks.get(upload_id)
+        if lock is None:
+            lock = self._locks[upload_id] = asyncio.Lock()
+        return lock
+
+    @staticmethod
+    def _stage(partial_path: Path) -> Path:
+        """Hard link (or, across filesystems, copy) of a partial file to hand to storage."""
+        staged_path = partial_path.with_name(f"{partial_path.stem}.{uuid.uuid4().hex}.staged")
+        try:
+            os.link(partial_path, staged_path)
+        except OSError:
+            shutil.copyfile(partial_path, staged_path)
+        return staged_path
+
+    def _hash_file(self, file_path: Path) -> Tuple[int, str]:
+        """Size and SHA-256 of a file, read in blocks."""
+        digest = hashlib.sha256()
+        size = 0
+        with open(file_path, 'rb') as f:
+            while True:
+                block = f.read(self.block_size)
+                if not block:
+                    break
+                size += len(block)
+                digest.update(block)
+        return size, digest.hexdigest()
+
+
+# Global resumable upload service instance
+resumable_upload_service = ResumableUploadService()
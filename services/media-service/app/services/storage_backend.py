@@ -0,0 +1,442 @@
+"""
+Object storage backends for media chunk files.
+
+The content store writes blobs through a StorageBackend, so chunk files
+can live on the local upload volume (a single node) or in an
+S3-compatible bucket (AWS S3, MinIO, ...) shared by every media-service
+instance. The S3 driver speaks the REST API directly over httpx with
+Signature V4, uploads large files as concurrent multipart uploads and
+can presign PUT URLs so clients upload chunks straight to the bucket.
+"""
+import asyncio
+import base64
+import hashlib
+import hmac
+import logging
+import os
+import shutil
+import uuid
+import xml.etree.ElementTree as ElementTree
+from datetime import datetime
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+from urllib.parse import quote, urlsplit
+
+import httpx
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+UNSIGNED_PAYLOAD = "UNSIGNED-PAYLOAD"
+EMPTY_PAYLOAD_HASH = hashlib.sha256(b"").hexdigest()
+
+
+class StorageBackendError(Exception):
+    """Raised when the storage backend rejects or fails a request."""
+
+
+class StorageBackend:
+    """
+    Interface of an object storage driver.
+    
+    Objects are addressed by '/'-separated keys; uri() gives the string
+    recorded as a chunk's file_path.
+    """
+    
+    name = "base"
+    supports_presigned_uploads = False
+    
+    def uri(self, key: str) -> str:
+        raise NotImplementedError
+    
+    def key_for(self, uri: Optional[str]) -> Optional[str]:
+        """Key of an object URI of this backend, or None for other paths."""
+        raise NotImplementedError
+    
+    async def put_file(self, source: Path, key: str, content_hash: Optional[str] = None) -> None:
+        """Store a local file under key; the source file is consumed."""
+        raise NotImplementedError
+    
+    async def head(self, key: str) -> Optional[int]:
+        """Size of a stored object, or None if it does not exist."""
+        raise NotImplementedError
+    
+    async def delete(
+        self,
+        key: str,
+        is_referenced: Optional[Callable[[], Awaitable[bool]]] = None
+    ) -> None:
+        """
+        Delete an object.
+        
+        is_referenced is checked once the object can no longer be read;
+        drivers that can undo the delete keep the object if it returns True.
+        """
+        raise NotImplementedError
+    
+    def presign_upload(self, key: str, content_hash: str, expires_in: int) -> Dict[str, object]:
+        """URL, method and required headers for a direct client upload."""
+        raise NotImplementedError
+    
+    async def close(self) -> None:
+        """Release connections."""
+
+
+class LocalStorageBackend(StorageBackend):
+    """Objects as files under a local directory."""
+    
+    name = "local"
+    
+    def __init__(self, root: Path):
+        self.root = Path(root)
+    
+    def uri(self, key: str) -> str:
+        return str(self.root / key)
+    
+    def key_for(self, uri: Optional[str]) -> Optional[str]:
+        if not uri or "://" in uri:
+            return None
+        try:
+            return Path(uri).resolve().relative_to(self.root.resolve()).as_posix()
+        except ValueError:
+            return None
+    
+    async def put_file(self, source: Path, key: str, content_hash: Optional[str] = None) -> None:
+        await asyncio.to_thread(self._move_into_place, source, self.root / key)
+    
+    async def head(self, key: str) -> Optional[int]:
+        try:
+            return (self.root / key).stat().st_size
+        except FileNotFoundError:
+            return None
+    
+    async def delete(
+        self,
+        key: str,
+        is_referenced: Optional[Callable[[], Awaitable[bool]]] = None
+    ) -> None:
+        # Renamed aside first so a blob re-added concurrently can be restored
+        object_path = self.root / key
+        trash_path = object_path.with_name(f".{object_path.name}.{uuid.uuid4().hex}.trash")
+        try:
+            os.replace(object_path, trash_path)
+        except FileNotFoundError:
+            return
+        
+        if is_referenced is not None and await is_referenced() and not object_path.exists():
+            os.replace(trash_path, object_path)
+            return
+        trash_path.unlink()
+    
+    @staticmethod
+    def _move_into_place(source: Path, object_path: Path) -> None:
+        object_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.replace(source, object_path)
+        except OSError:
+            # Staged on another filesystem (e.g. resumable partial uploads):
+            # copy next to the object first so the final rename stays atomic
+            temp_path = object_path.with_name(f".{object_path.name}.{uuid.uuid4().hex}.part")
+            shutil.copyfile(source, temp_path)
+            os.replace(temp_path, object_path)
+            source.unlink()
+
+
+class S3StorageBackend(StorageBackend):
+    """
+    Objects in an S3-compatible bucket, addressed path-style
+    ({endpoint}/{bucket}/{key}) so MinIO and other stand-ins work unchanged.
+    
+    Files up to part_size are sent in one PUT; larger files are streamed
+    from disk as a multipart upload with up to `concurrency` parts in
+    flight, so memory use is bounded by concurrency * part_size.
+    """
+    
+    name = "s3"
+    supports_presigned_uploads = True
+    
+    def __init__(
+        self,
+        endpoint_url: str,
+        bucket: str,
+        access_key_id: str,
+        secret_access_key: str,
+        region: str = "us-east-1",
+        key_prefix: str = "",
+        part_size: int = 8 * 1024 * 1024,
+        concurrency: int = 4,
+        timeout: float = 60.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.endpoint_url = endpoint_url.rstrip("/")
+        self.bucket = bucket
+        self.access_key_id = access_key_id
+        self.secret_access_key = secret_access_key
+        self.region = region
+        self.key_prefix = key_prefix
+        self.part_size = part_size
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+    
+    def uri(self, key: str) -> str:
+        return f"s3://{self.bucket}/{self.key_prefix}{key}"
+    
+    def key_for(self, uri: Optional[str]) -> Optional[str]:
+        prefix = self.uri("")
+        if uri and uri.startswith(prefix):
+            return uri[len(prefix):]
+        return None
+    
+    async def put_file(self, source: Path, key: str, content_hash: Optional[str] = None) -> None:
+        size = source.stat().st_size
+        if size <= self.part_size:
+            body = await asyncio.to_thread(source.read_bytes)
+            await self._request(
+                "PUT", key,
+                content=body,
+                payload_hash=content_hash or hashlib.sha256(body).hexdigest()
+            )
+        else:
+            await self._multipart_upload(source, key, size)
+        source.unlink()
+    
+    async def head(self, key: str) -> Optional[int]:
+        response = await self._request("HEAD", key, allowed_statuses=(404,))
+        if response.status_code == 404:
+            return None
+        return int(response.headers.get("content-length", 0))
+    
+    async def delete(
+        self,
+        key: str,
+        is_referenced: Optional[Callable[[], Awaitable[bool]]] = None
+    ) -> None:
+        await self._request("DELETE", key, allowed_statuses=(404,))
+        if is_referenced is not None and await is_referenced():
+            # Re-added by another process between collection and delete;
+            # the next upload of the same content restores the object
+            logger.error(f"Object {key} was deleted while referenced again")
+    
+    def presign_upload(self, key: str, content_hash: str, expires_in: int) -> Dict[str, object]:
+        """
+        Presigned PUT for a direct upload.
+        
+        The SHA-256 checksum header is part of the signature, so the
+        storage service rejects bodies that do not match content_hash.
+        """
+        checksum = base64.b64encode(bytes.fromhex(content_hash)).decode()
+        headers = {"x-amz-checksum-sha256": checksum}
+        url = self.presign_url("PUT", key, expires_in, headers)
+        return {"url": url, "method": "PUT", "headers": headers, "expires_in": expires_in}
+    
+    def presign_url(
+        self,
+        method: str,
+        key: str,
+        expires_in: int,
+        headers: Optional[Dict[str, str]] = None,
+        now: Optional[datetime] = None
+    ) -> str:
+        """Query-string (presigned) Signature V4 URL."""
+        url = self._object_url(key)
+        parts = urlsplit(url)
+        now = now or datetime.utcnow()
+        amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+        scope = f"{now.strftime('%Y%m%d')}/{self.region}/s3/aws4_request"
+        
+        signed_headers = {"host": parts.netloc, **{k.lower(): v for k, v in (headers or {}).items()}}
+        query = {
+            "X-Amz-Algorithm": "AWS4-HMAC-SHA256",
+            "X-Amz-Credential": f"{self.access_key_id}/{scope}",
+            "X-Amz-Date": amz_date,
+            "X-Amz-Expires": str(expires_in),
+            "X-Amz-SignedHeaders": ";".join(sorted(signed_headers))
+        }
+        signature = self._signature(method, parts.path, query, signed_headers, UNSIGNED_PAYLOAD, amz_date, scope)
+        query["X-Amz-Signature"] = signature
+        return f"{url}?{_canonical_query(query)}"
+    
+    def sign_headers(
+        self,
+        method: str,
+        url: str,
+        headers: Dict[str, str],
+        payload_hash: str,
+        now: Optional[datetime] = None
+    ) -> Dict[str, str]:
+        """Headers including the Signature V4 Authorization header."""
+        parts = urlsplit(url)
+        now = now or datetime.utcnow()
+        amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+        scope = f"{now.strftime('%Y%m%d')}/{self.region}/s3/aws4_request"
+        
+        signed = {
+            "host": parts.netloc,
+            "x-amz-content-sha256": payload_hash,
+            "x-amz-date": amz_date,
+            **{k.lower(): v for k, v in headers.items()}
+        }
+        query = {}
+        for pair in filter(None, parts.query.split("&")):
+            name, _, value = pair.partition("=")
+            query[name] = value
+        signature = self._signature(method, parts.path, query, signed, payload_hash, amz_date, scope)
+        signed["authorization"] = (
+            f"AWS4-HMAC-SHA256 Credential={self.access_key_id}/{scope},"
+            f"SignedHeaders={';'.join(sorted(signed))},Signature={signature}"
+        )
+        del signed["host"]
+        return signed
+    
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    async def _multipart_upload(self, source: Path, key: str, size: int) -> None:
+        response = await self._request("POST", key, query="uploads=")
+        upload_id = _xml_text(response.content, "UploadId")
+        upload_query = f"uploadId={quote(upload_id, safe='')}"
+        semaphore = asyncio.Semaphore(self.concurrency)
+        
+        async def upload_part(number: int, offset: int) -> str:
+            async with semaphore:
+                body = await asyncio.to_thread(_read_range, source, offset, self.part_size)
+                part = await self._request(
+                    "PUT", key,
+                    query=f"partNumber={number}&{upload_query}",
+                    content=body,
+                    payload_hash=hashlib.sha256(body).hexdigest()
+                )
+                return part.headers["etag"]
+        
+        try:
+            etags = await asyncio.gather(*(
+                upload_part(number, offset)
+                for number, offset in enumerate(range(0, size, self.part_size), start=1)
+            ))
+            body = _complete_multipart_body(etags)
+            response = await self._request(
+                "POST", key,
+                query=upload_query,
+                content=body,
+                payload_hash=hashlib.sha256(body).hexdigest()
+            )
+            # Completion errors can arrive inside a 200 response
+            if b"<Error>" in response.content:
+                raise StorageBackendError(f"Multipart upload of {key} failed: {response.text[:500]}")
+        except BaseException:
+            await self._request("DELETE", key, query=upload_query, allowed_statuses=(404,))
+            raise
+        logger.debug(f"Uploaded {key} in {len(etags)} parts")
+    
+    async def _request(
+        self,
+        method: str,
+        key: str,
+        query: str = "",
+        content: bytes = b"",
+        payload_hash: str = EMPTY_PAYLOAD_HASH,
+        allowed_statuses=()
+    ) -> httpx.Response:
+        url = self._object_url(key) + (f"?{query}" if query else "")
+        headers = self.sign_headers(method, url, {}, payload_hash)
+        response = await self._http().request(method, url, content=content, headers=headers)
+        if response.status_code >= 300 and response.status_code not in allowed_statuses:
+            raise StorageBackendError(
+                f"{method} {key} failed with HTTP {response.status_code}: {response.text[:500]}"
+            )
+        return response
+    
+    def _object_url(self, key: str) -> str:
+        return f"{self.endpoint_url}/{self.bucket}/{quote(self.key_prefix + key, safe='/-_.~')}"
+    
+    def _signature(
+        self,
+        method: str,
+        path: str,
+        query: Dict[str, str],
+        headers: Dict[str, str],
+        payload_hash: str,
+        amz_date: str,
+        scope: str
+    ) -> str:
+        names = sorted(headers)
+        canonical_request = "\n".join([
+            method,
+            path or "/",
+            _canonical_query(query),
+            "".join(f"{name}:{str(headers[name]).strip()}\n" for name in names),
+            ";".join(names),
+            payload_hash
+        ])
+        string_to_sign = "\n".join([
+            "AWS4-HMAC-SHA256",
+            amz_date,
+            scope,
+            hashlib.sha256(canonical_request.encode()).hexdigest()
+        ])
+        
+        signing_key = f"AWS4{self.secret_access_key}".encode()
+        for part in scope.split("/"):
+            signing_key = hmac.new(signing_key, part.encode(), hashlib.sha256).digest()
+        return hmac.new(signing_key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+    
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                transport=self.transport,
+                limits=httpx.Limits(max_connections=self.concurrency * 4)
+            )
+        return self._client
+
+
+def _canonical_query(query: Dict[str, str]) -> str:
+    """Sorted, RFC 3986 encoded query string (values already encoded are kept)."""
+    def encode(value: str) -> str:
+        return quote(value, safe="-_.~%")
+    return "&".join(f"{encode(name)}={encode(value)}" for name, value in sorted(query.items()))
+
+
+def _read_range(path: Path, offset: int, length: int) -> bytes:
+    with open(path, "rb") as f:
+        f.seek(offset)
+        return f.read(length)
+
+
+def _xml_text(document: bytes, tag: str) -> str:
+    element = ElementTree.fromstring(document).find(f"{{*}}{tag}")
+    if element is None or not element.text:
+        raise StorageBackendError(f"Missing {tag} in storage response")
+    return element.text
+
+
+def _complete_multipart_body(etags: List[str]) -> bytes:
+    parts = "".join(
+        f"<Part><PartNumber>{number}</PartNumber><ETag>{etag}</ETag></Part>"
+        for number, etag in enumerate(etags, start=1)
+    )
+    return f"<CompleteMultipartUpload>{parts}</CompleteMultipartUpload>".encode()
+
+
+def create_storage_backend() -> StorageBackend:
+    """Backend selected by the STORAGE_BACKEND setting."""
+    if settings.storage_backend == "s3":
+        if not settings.s3_endpoint_url or not settings.s3_access_key_id:
+            raise ValueError("STORAGE_BACKEND=s3 requires S3_ENDPOINT_URL and S3 credentials")
+        return S3StorageBackend(
+            endpoint_url=settings.s3_endpoint_url,
+            bucket=settings.s3_bucket,
+            access_key_id=settings.s3_access_key_id,
+            secret_access_key=settings.s3_secret_access_key or "",
+            region=settings.s3_region,
+            key_prefix=settings.s3_key_prefix,
+            part_size=settings.s3_multipart_part_size,
+            concurrency=settings.s3_multipart_concurrency
+        )
+    return LocalStorageBackend(settings.object_store_dir)
@@ -0,0 +1,65 @@
+"""
+Old media cleanup worker.
+
+Removes chunks older than MAX_FILE_AGE_DAYS in batches, along with
+expired resumable uploads and delivered outbox events.
+
+Usage:
+    python -m app.workers.cleanup [--max-age-days N] [--batch-size N] [--max-batches N]
+"""
+import argparse
+import asyncio
+import json
+import logging
+from typing import Any, Dict, Optional
+
+from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal, close_db, init_db
+from app.services.media_service import media_service
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+async def cleanup_once(
+    max_age_days: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    max_batches: Optional[int] = None,
+    cursor: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Run a single cleanup pass."""
+    async with AsyncSessionLocal() as db:
+        result = await media_service.cleanup_old_files(
+            db,
+            max_age_days=max_age_days,
+            batch_size=batch_size,
+            max_batches=max_batches,
+            cursor=cursor
+        )
+    logger.info(
+        f"Cleanup: {result['deleted_records']} chunks in {result['batches']} batches, "
+        f"{result['deleted_files']} files deleted"
+    )
+    return result
+
+
+async def main() -> None:
+    """Run cleanup from the command line."""
+    parser = argparse.ArgumentParser(description="Remove old media chunks")
+    parser.add_argument("--max-age-days", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--max-batches", type=int, default=None, help="Stop after N batches and print the resume cursor")
+    parser.add_argument("--cursor", type=json.loads, default=None, help="Cursor printed by a previous bounded run")
+    args = parser.parse_args()
+    
+    await init_db()
+    try:
+        result = await cleanup_once(args.max_age_days, args.batch_size, args.max_batches, args.cursor)
+        print(json.dumps(result, indent=2))
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=settings.log_level, format=settings.log_format)
+    asyncio.run(main())
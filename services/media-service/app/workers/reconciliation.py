@@ -0,0 +1,72 @@
+"""
+Session statistics reconciliation worker.
+
+Session counters and the monitoring counters table are maintained
+incrementally on upload; this worker periodically recomputes them from
+the source tables and repairs drift, and scans the upload directory to
+record actual disk usage.
+
+Usage:
+    python -m app.workers.reconciliation
+"""
+import asyncio
+import logging
+from typing import Any, Dict
+
+from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal, close_db, init_db
+from app.services.media_service import media_service
+from app.services.monitoring import metrics_service
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+async def reconcile_once() -> Dict[str, Any]:
+    """Run a single reconciliation pass over all sessions."""
+    async with AsyncSessionLocal() as db:
+        result = await media_service.reconcile_session_stats(db)
+        await metrics_service.refresh_counters(db)
+        await db.commit()
+        # Committed first so no locks are held during the directory scan
+        result.update(await media_service.reconcile_storage_usage(db))
+        await db.commit()
+    logger.info(
+        f"Session stats reconciliation: {result['sessions_checked']} checked, "
+        f"{result['sessions_repaired']} repaired, {result['disk_used_bytes']} bytes on disk"
+    )
+    return result
+
+
+async def run_periodic_reconciliation(interval_minutes: int, stop: asyncio.Event) -> None:
+    """
+    Reconcile at start-up, then every interval_minutes until stop is set.
+    
+    Stopping waits for a running pass to finish instead of cancelling it
+    mid-transaction.
+    """
+    while not stop.is_set():
+        try:
+            await reconcile_once()
+        except Exception as e:
+            logger.error(f"Session stats reconciliation failed: {e}")
+        try:
+            await asyncio.wait_for(stop.wait(), interval_minutes * 60)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def main() -> None:
+    """Run one reconciliation pass from the command line."""
+    await init_db()
+    try:
+        result = await reconcile_once()
+        print(f"Sessions checked: {result['sessions_checked']}, repaired: {result['sessions_repaired']}")
+        print(f"Disk usage: {result['disk_used_bytes']} bytes in {result['disk_files']} files")
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=settings.log_level, format=settings.log_format)
+    asyncio.run(main())
@@ -4,11 +4,22 @@ Basic test to verify the media service works correctly.
 import asyncio
 import tempfile
 import os
+import uuid
+from datetime import datetime, timedelta
 from pathlib import Path
 
 import pytest
 from fastapi.testclient import TestClient
 
+# Isolated database and storage; the periodic reconciliation is disabled so
+# it cannot rewrite counters while a test is uploading
+_TEST_DIR = Path(tempfile.mkdtemp(prefix="media-service-test-"))
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_TEST_DIR / 'media_service.db'}"
+os.environ["UPLOAD_DIR"] = str(_TEST_DIR / "uploads")
+os.environ["PARTIAL_UPLOAD_DIR"] = str(_TEST_DIR / "uploads_partial")
+os.environ["OBJECT_STORE_DIR"] = str(_TEST_DIR / "uploads" / "objects")
+os.environ["STATS_RECONCILIATION_INTERVAL_MINUTES"] = "0"
+
 from app.main import app
 from app.core.database import init_db, close_db
 from app.core.config import get_settings
@@ -18,8 +29,9 @@ settings = get_settings()
 
 @pytest.fixture
 def client():
-    """Create a test client."""
-    return TestClient(app)
+    """Create a test client with the application started."""
+    with TestClient(app) as client:
+        yield client
 
 
 @pytest.fixture
@@ -77,12 +89,595 @@ def test_monitoring_health(client):
     assert "timestamp" in data
 
 
+def test_audio_analysis_detects_silence():
+    """Test voice-activity metrics on synthetic audio."""
+    import numpy as np
+    from app.services.audio_analysis import analyze_samples
+    
+    sample_rate = 16000
+    silence = np.zeros(sample_rate * 3, dtype=np.float32)
+    t = np.arange(sample_rate) / sample_rate
+    tone = (0.5 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+    
+    silent = analyze_samples(silence, sample_rate, 1, -40.0)
+    assert silent.is_silent
+    assert silent.silence_percentage == 100.0
+    
+    mixed = analyze_samples(np.concatenate([silence, tone]), sample_rate, 1, -40.0)
+    assert not mixed.is_silent
+    assert 65.0 < mixed.silence_percentage < 80.0
+    assert mixed.duration_seconds == 4.0
+
+
+def test_save_file_streams_and_enforces_size_limit(tmp_path):
+    """Test streaming upload hashing and the mid-stream size limit."""
+    import hashlib
+    import io
+    from fastapi import HTTPException, UploadFile
+    from app.services.media_service import MediaService
+    
+    service = MediaService()
+    service.upload_block_size = 1024
+    content = os.urandom(10_000)
+    
+    target = tmp_path / "chunk_0000.webm"
+    size, content_hash = asyncio.run(service._save_file(UploadFile(io.BytesIO(content), filename="a.webm"), target))
+    assert size == len(content)
+    assert content_hash == hashlib.sha256(content).hexdigest()
+    assert target.read_bytes() == content
+    
+    service.max_file_size = 4096
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(service._save_file(UploadFile(io.BytesIO(content), filename="a.webm"), tmp_path / "big.webm"))
+    assert exc_info.value.status_code == 413
+    assert list(tmp_path.iterdir()) == [target]
+
+
+def test_resumable_upload_flow():
+    """Test create -> interrupted PATCH -> resume -> finalize."""
+    content = os.urandom(3000)
+    
+    with TestClient(app) as client:
+        response = client.post("/api/v1/media/uploads", json={
+            "session_id": "resumable-test",
+            "sequence_index": 0,
+            "upload_length": len(content),
+            "file_extension": "webm"
+        })
+        assert response.status_code == 201
+        upload_id = response.json()["upload_id"]
+        upload_url = f"/api/v1/media/uploads/{upload_id}"
+        
+        response = client.patch(upload_url, content=content[:1000], headers={"Upload-Offset": "0"})
+        assert response.json()["upload_offset"] == 1000
+        
+        # Wrong offset is rejected, finalize before completion is rejected
+        response = client.patch(upload_url, content=content[500:], headers={"Upload-Offset": "500"})
+        assert response.status_code == 409
+        assert client.post(f"{upload_url}/finalize").status_code == 409
+        
+        response = client.head(upload_url)
+        assert response.headers["Upload-Offset"] == "1000"
+        
+        response = client.patch(upload_url, content=content[1000:], headers={"Upload-Offset": "1000"})
+        assert response.json()["upload_offset"] == len(content)
+        
+        response = client.post(f"{upload_url}/finalize")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["sequence_index"] == 0
+        assert Path(data["file_path"]).read_bytes() == content
+
+
+def test_resumable_finalize_retry_and_expiry(monkeypatch):
+    """Test a failed finalize can be retried and expired uploads are rejected."""
+    from sqlalchemy import update
+    from app.core.database import AsyncSessionLocal
+    from app.models.media import ResumableUpload
+    from app.services.media_service import media_service
+    
+    content = os.urandom(2000)
+    
+    def create_upload(client, sequence_index):
+        response = client.post("/api/v1/media/uploads", json={
+            "session_id": "resumable-retry-test",
+            "sequence_index": sequence_index,
+            "upload_length": len(content),
+            "file_extension": "webm"
+        })
+        upload_url = f"/api/v1/media/uploads/{response.json()['upload_id']}"
+        client.patch(upload_url, content=content, headers={"Upload-Offset": "0"})
+        return upload_url
+    
+    register_chunk = media_service.register_chunk
+    
+    async def failing_register_chunk(*args, **kwargs):
+        raise RuntimeError("database unavailable")
+    
+    with TestClient(app) as client:
+        upload_url = create_upload(client, 0)
+        monkeypatch.setattr(media_service, "register_chunk", failing_register_chunk)
+        assert client.post(f"{upload_url}/finalize").status_code == 500
+        
+        monkeypatch.setattr(media_service, "register_chunk", register_chunk)
+        response = client.post(f"{upload_url}/finalize")
+        assert response.status_code == 200
+        assert Path(response.json()["file_path"]).read_bytes() == content
+        
+        upload_url = create_upload(client, 1)
+        
+        async def expire():
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    update(ResumableUpload)
+                    .where(ResumableUpload.upload_id == upload_url.rsplit("/", 1)[1])
+                    .values(upload_status="expired")
+                )
+                await db.commit()
+        
+        asyncio.run(expire())
+        assert client.post(f"{upload_url}/finalize").status_code == 410
+
+
+def test_session_stats_are_incremental_and_reconciled():
+    """Test counters across new and overwritten chunks, then reconciliation."""
+    from sqlalchemy import update
+    from app.core.database import AsyncSessionLocal
+    from app.models.media import MediaSession
+    from app.services.media_service import media_service
+    
+    session_id = "stats-test"
+    with TestClient(app) as client:
+        for sequence_index in (0, 1, 1):
+            response = client.post(
+                "/api/v1/media/chunk-upload",
+                data={"session_id": session_id, "sequence_index": sequence_index},
+                files={"file": ("chunk.webm", os.urandom(512), "audio/webm")}
+            )
+            assert response.status_code == 200
+        
+        summary = client.get(f"/api/v1/media/session/{session_id}/summary").json()
+        assert summary["total_chunks"] == 2
+        
+        async def drift_and_reconcile():
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    update(MediaSession)
+                    .where(MediaSession.session_id == session_id)
+                    .values(uploaded_chunks=7, total_chunks=7)
+                )
+                result = await media_service.reconcile_session_stats(db, session_id)
+                await db.commit()
+                return result
+        
+        result = client.portal.call(drift_and_reconcile)
+        assert result == {"sessions_checked": 1, "sessions_repaired": 1}
+        
+        summary = client.get(f"/api/v1/media/session/{session_id}/summary").json()
+        assert summary["total_chunks"] == 2
+
+
+def test_events_are_queued_and_dispatched_from_outbox():
+    """Test outbox rows are written with the upload and retried until delivered."""
+    import httpx
+    from sqlalchemy import select, update
+    from app.core.database import AsyncSessionLocal
+    from app.models.media import OutboxEvent
+    from app.services.event_dispatcher import event_dispatcher
+    from app.services.event_service import event_service
+    
+    session_id = f"outbox-test-{uuid.uuid4().hex[:8]}"
+    failures = {"transcription": 1}
+    
+    def handler(request):
+        # First delivery to the transcription service fails
+        if session_id in request.content.decode() and str(request.url).startswith(event_service.transcription_service_url) and failures["transcription"]:
+            failures["transcription"] -= 1
+            return httpx.Response(503)
+        return httpx.Response(200)
+    
+    with TestClient(app) as client:
+        client.portal.call(event_dispatcher.stop)
+        
+        response = client.post(
+            "/api/v1/media/chunk-upload",
+            data={"session_id": session_id, "sequence_index": 0},
+            files={"file": ("chunk.webm", os.urandom(512), "audio/webm")}
+        )
+        assert response.status_code == 200
+        
+        async def load_events():
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    select(OutboxEvent)
+                    .where(OutboxEvent.session_id == session_id)
+                    .order_by(OutboxEvent.id)
+                )
+                return result.scalars().all()
+        
+        events = client.portal.call(load_events)
+        assert [e.destination for e in events] == ["transcription", "interview"]
+        assert all(e.status == "pending" for e in events)
+        
+        async def dispatch(retry_now=False):
+            if retry_now:
+                async with AsyncSessionLocal() as db:
+                    await db.execute(
+                        update(OutboxEvent)
+                        .where(OutboxEvent.session_id == session_id)
+                        .values(next_attempt_at=OutboxEvent.created_at)
+                    )
+                    await db.commit()
+            for destination in ("transcription", "interview"):
+                event_dispatcher._clients[destination] = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            return await event_dispatcher.dispatch_once()
+        
+        client.portal.call(dispatch)
+        events = client.portal.call(load_events)
+        assert sorted(e.status for e in events) == ["delivered", "pending"]
+        
+        client.portal.call(dispatch, True)
+        events = client.portal.call(load_events)
+        assert all(e.status == "delivered" for e in events)
+        assert max(e.attempts for e in events) == 2
+
+
+def test_session_events_are_delivered_in_order():
+    """Test a session's later events wait for an earlier failed delivery."""
+    import json
+    import httpx
+    from sqlalchemy import select, update
+    from app.core.database import AsyncSessionLocal
+    from app.models.media import OutboxEvent
+    from app.services.event_dispatcher import event_dispatcher
+    from app.services.event_service import event_service
+    
+    session_id = f"order-test-{uuid.uuid4().hex[:8]}"
+    delivered = []
+    failures = {"count": 1}
+    
+    def handler(request):
+        body = json.loads(request.content)
+        if body.get("session_id") != session_id or not str(request.url).startswith(event_service.transcription_service_url):
+            return httpx.Response(200)
+        if failures["count"]:
+            failures["count"] -= 1
+            return httpx.Response(503)
+        delivered.append(body["sequence_index"])
+        return httpx.Response(200)
+    
+    async def dispatch(retry_now=False):
+        if retry_now:
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    update(OutboxEvent)
+                    .where(OutboxEvent.session_id == session_id)
+                    .values(next_attempt_at=OutboxEvent.created_at)
+                )
+                await db.commit()
+        for destination in ("transcription", "interview"):
+            event_dispatcher._clients[destination] = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        return await event_dispatcher.dispatch_once()
+    
+    async def pending_transcription_events():
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(OutboxEvent.status)
+                .where(OutboxEvent.session_id == session_id, OutboxEvent.destination == "transcription")
+                .order_by(OutboxEvent.id)
+            )
+            return result.scalars().all()
+    
+    with TestClient(app) as client:
+        client.portal.call(event_dispatcher.stop)
+        for sequence_index in (0, 1, 2):
+            response = client.post(
+                "/api/v1/media/chunk-upload",
+                data={"session_id": session_id, "sequence_index": sequence_index},
+                files={"file": ("chunk.webm", os.urandom(512), "audio/webm")}
+            )
+            assert response.status_code == 200
+        
+        # The first event fails; the later ones are held back, not delivered ahead of it
+        client.portal.call(dispatch)
+        assert delivered == []
+        assert client.portal.call(pending_transcription_events) == ["pending"] * 3
+        
+        # While the first event backs off, the others are not claimed
+        client.portal.call(dispatch)
+        assert delivered == []
+        
+        client.portal.call(dispatch, True)
+        assert delivered == [0, 1, 2]
+        assert client.portal.call(pending_transcription_events) == ["delivered"] * 3
+
+
+def test_database_metrics_counters_match_snapshot():
+    """Test incrementally maintained counters against the aggregate snapshot query."""
+    from app.core.database import AsyncSessionLocal
+    from app.services.monitoring import COUNTER_NAMES, metrics_service
+    
+    session_id = f"metrics-test-{uuid.uuid4().hex[:8]}"
+    
+    async def counters_and_snapshot():
+        async with AsyncSessionLocal() as db:
+            from sqlalchemy import select
+            from app.models.media import MetricCounter
+            result = await db.execute(select(MetricCounter.name, MetricCounter.value))
+            return dict(result.all()), await metrics_service.query_database_snapshot(db)
+    
+    with TestClient(app) as client:
+        # Counter rows are created at startup
+        counters, snapshot = client.portal.call(counters_and_snapshot)
+        assert set(COUNTER_NAMES) <= set(counters)
+        assert client.get("/api/v1/monitoring/metrics").status_code == 200
+        
+        for sequence_index, size in ((0, 512), (1, 256), (1, 1024)):
+            response = client.post(
+                "/api/v1/media/chunk-upload",
+                data={"session_id": session_id, "sequence_index": sequence_index, "total_chunks": 2},
+                files={"file": ("chunk.webm", os.urandom(size), "audio/webm")}
+            )
+            assert response.status_code == 200
+        
+        counters, snapshot = client.portal.call(counters_and_snapshot)
+        assert {name: counters[name] for name in COUNTER_NAMES} == snapshot
+        
+        metrics_service._snapshot = None
+        metrics = client.get("/api/v1/monitoring/metrics").json()
+        assert metrics["total_chunks"] == snapshot["total_chunks"]
+        assert metrics["storage_used_bytes"] == snapshot["storage_used_bytes"]
+        
+        assert client.delete(f"/api/v1/media/session/{session_id}").status_code == 200
+        counters, snapshot = client.portal.call(counters_and_snapshot)
+        assert {name: counters[name] for name in COUNTER_NAMES} == snapshot
+
+
+def test_upload_stage_histograms():
+    """Test per-stage upload latency histograms labeled by outcome."""
+    session_id = f"histogram-test-{uuid.uuid4().hex[:8]}"
+    
+    with TestClient(app) as client:
+        response = client.post(
+            "/api/v1/media/chunk-upload",
+            data={"session_id": session_id, "sequence_index": 0},
+            files={"file": ("chunk.webm", os.urandom(512), "audio/webm")}
+        )
+        assert response.status_code == 200
+        response = client.post(
+            "/api/v1/media/chunk-upload",
+            data={"session_id": session_id, "sequence_index": 1},
+            files={"file": ("chunk.exe", os.urandom(512), "application/octet-stream")}
+        )
+        assert response.status_code == 400
+        
+        content = client.get("/api/v1/monitoring/metrics/prometheus").text
+    
+    assert 'media_service_chunk_uploads_total{status="success"}' in content
+    for stage in ("validation", "disk_write", "audio_analysis", "storage_write", "db_flush", "stats_update", "event_emission"):
+        assert f'media_service_upload_stage_duration_seconds_count{{outcome="success",stage="{stage}"}}' in content
+    assert 'media_service_upload_stage_duration_seconds_count{outcome="rejected",stage="validation"}' in content
+
+
+def test_cleanup_runs_in_resumable_batches():
+    """Test batched cleanup of old chunks with a resume cursor."""
+    from sqlalchemy import select, update
+    from app.core.database import AsyncSessionLocal
+    from app.models.media import MediaChunk
+    from app.services.media_service import media_service
+    from app.services.monitoring import metrics_service
+    
+    session_id = f"cleanup-test-{uuid.uuid4().hex[:8]}"
+    
+    with TestClient(app) as client:
+        paths = []
+        for sequence_index in range(4):
+            response = client.post(
+                "/api/v1/media/chunk-upload",
+                data={"session_id": session_id, "sequence_index": sequence_index},
+                files={"file": ("chunk.webm", os.urandom(256), "audio/webm")}
+            )
+            paths.append(Path(response.json()["file_path"]))
+        
+        async def age_chunks():
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    update(MediaChunk)
+                    .where(MediaChunk.session_id == session_id, MediaChunk.sequence_index < 3)
+                    .values(uploaded_at=datetime.utcnow() - timedelta(days=400))
+                )
+                await db.commit()
+        
+        async def cleanup(cursor=None):
+            async with AsyncSessionLocal() as db:
+                return await media_service.cleanup_old_files(
+                    db, max_age_days=365, batch_size=2, max_batches=1, cursor=cursor
+                )
+        
+        async def remaining():
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    select(MediaChunk.sequence_index).where(MediaChunk.session_id == session_id)
+                )
+                counters = await metrics_service.query_database_snapshot(db)
+                metrics_service._snapshot = None
+                return sorted(result.scalars().all()), counters
+        
+        client.portal.call(age_chunks)
+        
+        first = client.portal.call(cleanup)
+        assert first["deleted_records"] == 2 and first["cursor"] is not None
+        second = client.portal.call(cleanup, first["cursor"])
+        assert second["deleted_records"] == 1 and second["cursor"] is None
+        
+        indexes, snapshot = client.portal.call(remaining)
+        assert indexes == [3]
+        assert [path.exists() for path in paths] == [False, False, False, True]
+        
+        metrics = client.get("/api/v1/monitoring/metrics").json()
+        assert metrics["total_chunks"] == snapshot["total_chunks"]
+
+
+def test_storage_stats_are_incremental_and_scanned():
+    """Test storage counters per session and the os.scandir reconciliation."""
+    from sqlalchemy import select
+    from app.core.database import AsyncSessionLocal
+    from app.models.media import MediaSession
+    from app.services.media_service import media_service
+    
+    session_id = f"storage-test-{uuid.uuid4().hex[:8]}"
+    
+    with TestClient(app) as client:
+        before = client.get("/api/v1/media/storage/stats").json()
+        for sequence_index, size in ((0, 300), (1, 200), (1, 700)):
+            response = client.post(
+                "/api/v1/media/chunk-upload",
+                data={"session_id": session_id, "sequence_index": sequence_index},
+                files={"file": ("chunk.webm", os.urandom(size), "audio/webm")}
+            )
+            assert response.status_code == 200
+        
+        after = client.get("/api/v1/media/storage/stats").json()
+        assert after["storage_used_bytes"] - before["storage_used_bytes"] == 1000
+        assert after["total_chunks"] - before["total_chunks"] == 2
+        
+        async def scan():
+            async with AsyncSessionLocal() as db:
+                result = await media_service.reconcile_storage_usage(db)
+                await db.commit()
+                session = await db.execute(
+                    select(MediaSession.storage_bytes).where(MediaSession.session_id == session_id)
+                )
+                return result, session.scalar_one()
+        
+        result, session_bytes = client.portal.call(scan)
+        assert session_bytes == 1000
+        assert result["disk_used_bytes"] == media_service.scan_storage_usage()[0]
+        
+        stats = client.get("/api/v1/media/storage/stats").json()
+        assert stats["disk_used_bytes"] == result["disk_used_bytes"]
+        assert stats["disk_scanned_at"] is not None
+
+
+def test_identical_chunks_share_one_blob():
+    """Test content-addressed storage deduplicates and collects unreferenced blobs."""
+    from sqlalchemy import select
+    from app.core.database import AsyncSessionLocal
+    from app.models.media import ContentBlob, MediaChunk
+
+    session_id = f"dedup-test-{uuid.uuid4().hex[:8]}"
+    content = os.urandom(512)
+
+    with TestClient(app) as client:
+        for sequence_index in (0, 1):
+            response = client.post(
+                "/api/v1/media/chunk-upload",
+                data={"session_id": session_id, "sequence_index": sequence_index},
+                files={"file": ("chunk.webm", content, "audio/webm")}
+            )
+            assert response.status_code == 200
+
+        async def load():
+            async with AsyncSessionLocal() as db:
+                chunks = await db.execute(
+                    select(MediaChunk.file_path, MediaChunk.content_hash)
+                    .where(MediaChunk.session_id == session_id)
+                )
+                rows = chunks.all()
+                blob = await db.execute(
+                    select(ContentBlob).where(ContentBlob.content_hash == rows[0].content_hash)
+                )
+                return rows, blob.scalar_one_or_none()
+
+        rows, blob = client.portal.call(load)
+        assert len(rows) == 2
+        assert rows[0].file_path == rows[1].file_path == blob.storage_path
+        assert blob.ref_count == 2
+        assert os.path.getsize(blob.storage_path) == 512
+
+        response = client.delete(f"/api/v1/media/session/{session_id}")
+        assert response.status_code == 200
+
+        async def blob_row():
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    select(ContentBlob).where(ContentBlob.content_hash == rows[0].content_hash)
+                )
+                return result.scalar_one_or_none()
+
+        assert client.portal.call(blob_row) is None
+        assert not os.path.exists(blob.storage_path)
+
+
+
+def test_blob_added_by_another_process_gets_a_reference():
+    """Test inserting a blob another process has just added references it instead of failing."""
+    from sqlalchemy import select
+    from app.core.database import AsyncSessionLocal
+    from app.models.media import ContentBlob
+    from app.services.content_store import content_store
+
+    content_hash = uuid.uuid4().hex * 2
+    blob_key = content_store.object_key(content_hash, "webm")
+
+    async def add_blob():
+        # Both writers missed the existing row, so each goes straight to the insert
+        async with AsyncSessionLocal() as db:
+            storage_path = await content_store._add_blob(db, content_hash, blob_key, 512)
+            await db.commit()
+            return storage_path
+
+    async def ref_count():
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(ContentBlob.ref_count).where(ContentBlob.content_hash == content_hash)
+            )
+            return result.scalar_one()
+
+    with TestClient(app) as client:
+        first = client.portal.call(add_blob)
+        second = client.portal.call(add_blob)
+        assert first == second
+        assert client.portal.call(ref_count) == 2
+
+
+def test_replaced_legacy_file_is_removed_only_after_commit():
+    """Test a replaced per-session chunk file survives a rolled back replacement."""
+    from app.core.database import AsyncSessionLocal
+    from app.services.media_service import media_service
+
+    session_id = f"replace-test-{uuid.uuid4().hex[:8]}"
+    legacy_dir = _TEST_DIR / "legacy" / session_id
+    legacy_dir.mkdir(parents=True)
+    old_file, new_file = legacy_dir / "chunk_0_a.webm", legacy_dir / "chunk_0_b.webm"
+    old_file.write_bytes(b"old")
+    new_file.write_bytes(b"new")
+
+    async def register(file_path, commit):
+        async with AsyncSessionLocal() as db:
+            await media_service._ensure_session_exists(db, session_id)
+            await media_service.register_chunk(db, session_id, 0, str(file_path), 3, None)
+            if commit:
+                await db.commit()
+            else:
+                await db.rollback()
+
+    with TestClient(app) as client:
+        client.portal.call(register, old_file, True)
+        client.portal.call(register, new_file, False)
+        assert old_file.exists()
+
+        client.portal.call(register, new_file, True)
+        assert not old_file.exists()
+        assert new_file.exists()
+
 def test_prometheus_metrics(client):
     """Test the Prometheus metrics endpoint."""
     response = client.get("/api/v1/monitoring/metrics/prometheus")
     assert response.status_code == 200
     content = response.text
     assert "media_service_uptime_seconds" in content
+    assert "media_service_event_delivery_lag_seconds" in content
 
 
 if __name__ == "__main__":
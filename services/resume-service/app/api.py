@@ -5,16 +5,20 @@ REST API for the unified resume processing pipeline.
 import logging
 import os
 import json
+import uuid
 import aiofiles
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 
-from fastapi import FastAPI, File, UploadFile, HTTPException, Form
+from fastapi import FastAPI, File, UploadFile, HTTPException, Form, Query
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
+from .job_queue import JobQueue, JobWorkers
+from .resume_index import ResumeIndex
 from .resume_processor import ResumeProcessor
 from .schema import ResumeJSON, ProcessingResult
 
@@ -22,10 +26,29 @@ from .schema import ResumeJSON, ProcessingResult
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Initialize processor, job queue and resume index
+processor = ResumeProcessor()
+job_queue = JobQueue()
+resume_index = ResumeIndex()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop the extraction worker processes and job workers."""
+    if await resume_index.count() == 0:
+        await resume_index.backfill(DATA_DIR)
+    processor.processing_pool.start()
+    await job_workers.start()
+    yield
+    await job_workers.stop()
+    processor.processing_pool.shutdown()
+
+
 app = FastAPI(
     title="Resume Processing Service",
     description="Unified text-to-JSON resume parsing pipeline",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -37,9 +60,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize processor
-processor = ResumeProcessor(use_llm=False)  # Set to True to enable LLM features
-
 # Storage directories
 UPLOADS_DIR = Path("uploads")
 DATA_DIR = Path("data")
@@ -59,10 +79,101 @@ class ResumeUploadResponse(BaseModel):
     storage_path: Optional[str] = None
 
 
+class JobSubmitResponse(BaseModel):
+    """Response for job submission endpoint."""
+    job_id: str
+    resume_id: str
+    status: str
+    status_url: str
+
+
+class JobStatusResponse(BaseModel):
+    """Response for job status endpoint."""
+    job_id: str
+    resume_id: str
+    user_id: str
+    status: str
+    filename: Optional[str] = None
+    attempts: int
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    error: Optional[str] = None
+    callback_url: Optional[str] = None
+    callback_status: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+
+
 class ResumeListResponse(BaseModel):
     """Response for listing resumes."""
     resumes: List[dict]
     total: int
+    next_cursor: Optional[str] = None
+
+
+async def read_upload(file: UploadFile) -> bytes:
+    """Validate an uploaded resume's type and size and return its content."""
+    allowed_extensions = {'.pdf', '.docx', '.doc', '.txt'}
+    file_ext = Path(file.filename).suffix.lower()
+    
+    if file_ext not in allowed_extensions:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported file type: {file_ext}. Allowed: {allowed_extensions}"
+        )
+    
+    # Validate file size (10MB limit)
+    max_size = 10 * 1024 * 1024  # 10MB
+    content = await file.read()
+    if len(content) > max_size:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File too large. Maximum size: 10MB"
+        )
+    return content
+
+
+async def save_resume_json(
+    resume_id: str,
+    result: ProcessingResult,
+    user_id: str,
+    filename: Optional[str] = None
+) -> Optional[Path]:
+    """Save and index the processed resume JSON if processing succeeded."""
+    if not (result.success and result.data):
+        return None
+    
+    json_path = DATA_DIR / f"{resume_id}.json"
+    resume_data = result.data.model_dump()
+    content = json.dumps(resume_data, indent=2, default=str)
+    
+    async with aiofiles.open(json_path, 'w') as f:
+        await f.write(content)
+    
+    await resume_index.upsert(resume_id, user_id, resume_data, filename=filename, file_size=len(content.encode()))
+    
+    logger.info(f"Saved processed JSON: {json_path}")
+    return json_path
+
+
+async def run_job(job: Dict[str, Any], input_text: Optional[str]) -> Dict[str, Any]:
+    """Process one queued resume job (called by the job workers)."""
+    if job["input_path"]:
+        result = await processor.process_resume_async(job["input_path"])
+    else:
+        result = await processor.process_text_async(input_text or "")
+    
+    json_path = await save_resume_json(job["resume_id"], result, job["user_id"], job["filename"])
+    return {
+        "success": result.success,
+        "error_message": result.error_message,
+        "processing_time": result.processing_time,
+        "stages_completed": result.stages_completed,
+        "storage_path": str(json_path) if json_path else None
+    }
+
+
+job_workers = JobWorkers(job_queue, run_job)
 
 
 @app.get("/")
@@ -103,24 +214,8 @@ async def upload_resume(
         Processing results and storage information
     """
     try:
-        # Validate file type
-        allowed_extensions = {'.pdf', '.docx', '.doc', '.txt'}
-        file_ext = Path(file.filename).suffix.lower()
-        
-        if file_ext not in allowed_extensions:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Unsupported file type: {file_ext}. Allowed: {allowed_extensions}"
-            )
-        
-        # Validate file size (10MB limit)
-        max_size = 10 * 1024 * 1024  # 10MB
-        content = await file.read()
-        if len(content) > max_size:
-            raise HTTPException(
-                status_code=413,
-                detail=f"File too large. Maximum size: 10MB"
-            )
+        # Validate file type and size
+        content = await read_upload(file)
         
         # Generate unique resume ID
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -135,20 +230,10 @@ async def upload_resume(
         logger.info(f"Saved uploaded file: {upload_path} ({file_size} bytes)")
         
         # Process the resume
-        result = processor.process_resume(str(upload_path))
+        result = await processor.process_resume_async(str(upload_path))
         
         # Save JSON result if processing succeeded
-        json_path = None
-        if result.success and result.data:
-            json_path = DATA_DIR / f"{resume_id}.json"
-            
-            # Convert to dict for JSON serialization
-            resume_data = result.data.model_dump()
-            
-            async with aiofiles.open(json_path, 'w') as f:
-                await f.write(json.dumps(resume_data, indent=2, default=str))
-            
-            logger.info(f"Saved processed JSON: {json_path}")
+        json_path = await save_resume_json(resume_id, result, user_id, file.filename)
         
         return ResumeUploadResponse(
             success=result.success,
@@ -166,6 +251,86 @@ async def upload_resume(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/jobs", response_model=JobSubmitResponse, status_code=202)
+async def submit_job(
+    file: Optional[UploadFile] = File(default=None),
+    text: Optional[str] = Form(default=None),
+    user_id: str = Form(default="anonymous"),
+    callback_url: Optional[str] = Form(default=None)
+):
+    """
+    Queue a resume for background processing.
+    
+    Returns as soon as the input is stored; poll GET /jobs/{job_id} or
+    pass callback_url to be notified with a POST when the job finishes.
+    
+    Args:
+        file: Resume file (PDF, DOCX, TXT), or
+        text: Raw resume text
+        user_id: User identifier for organization
+        callback_url: Optional http(s) URL to notify on completion
+        
+    Returns:
+        Job id and status URL
+    """
+    if (file is None) == (text is None):
+        raise HTTPException(status_code=400, detail="Provide exactly one of file or text")
+    if callback_url and not callback_url.startswith(("http://", "https://")):
+        raise HTTPException(status_code=400, detail="callback_url must be an http(s) URL")
+    
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    resume_id = f"{user_id}_{timestamp}_{uuid.uuid4().hex[:8]}"
+    
+    try:
+        upload_path = None
+        if file is not None:
+            content = await read_upload(file)
+            upload_path = UPLOADS_DIR / f"{resume_id}_{file.filename}"
+            async with aiofiles.open(upload_path, 'wb') as f:
+                await f.write(content)
+        
+        job = await job_queue.enqueue(
+            user_id=user_id,
+            resume_id=resume_id,
+            filename=file.filename if file is not None else None,
+            input_path=str(upload_path) if upload_path else None,
+            input_text=text,
+            callback_url=callback_url
+        )
+        job_workers.notify()
+        
+        logger.info(f"Queued job {job['job_id']} for resume {resume_id}")
+        return JobSubmitResponse(
+            job_id=job["job_id"],
+            resume_id=resume_id,
+            status=job["status"],
+            status_url=f"/jobs/{job['job_id']}"
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Job submission failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job(job_id: str):
+    """
+    Get the status of a processing job.
+    
+    Args:
+        job_id: Job identifier
+        
+    Returns:
+        Job status, and the processing summary once finished
+    """
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JobStatusResponse(**job)
+
+
 @app.post("/process-text")
 async def process_text(
     text: str = Form(...),
@@ -183,18 +348,11 @@ async def process_text(
     """
     try:
         # Process the text
-        result = processor.process_text(text)
+        result = await processor.process_text_async(text)
         
         # Save result if processing succeeded
-        if result.success and result.data:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            resume_id = f"{user_id}_text_{timestamp}"
-            json_path = DATA_DIR / f"{resume_id}.json"
-            
-            resume_data = result.data.model_dump()
-            
-            async with aiofiles.open(json_path, 'w') as f:
-                await f.write(json.dumps(resume_data, indent=2, default=str))
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        await save_resume_json(f"{user_id}_text_{timestamp}", result, user_id)
         
         return result
         
@@ -232,63 +390,65 @@ async def get_resume(resume_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/resume/{resume_id}/interview-profile")
+async def get_interview_profile(resume_id: str):
+    """
+    Get the precomputed interview profile of a processed resume.
+    
+    Args:
+        resume_id: Resume identifier
+        
+    Returns:
+        Primary domain, domain scores, experience level, top skills and
+        skill embedding, for choosing persona and starting questions
+    """
+    try:
+        # Missing or outdated profiles are rebuilt from the stored JSON
+        profile = await resume_index.get_profile(resume_id, DATA_DIR)
+        if profile is None:
+            raise HTTPException(status_code=404, detail="Resume not found")
+        
+        return {"resume_id": resume_id, **profile}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to get interview profile for {resume_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.get("/resumes", response_model=ResumeListResponse)
-async def list_resumes(user_id: Optional[str] = None, limit: int = 50):
+async def list_resumes(
+    user_id: Optional[str] = None,
+    domain: Optional[str] = None,
+    limit: int = Query(default=50, ge=1, le=500),
+    cursor: Optional[str] = None
+):
     """
-    List processed resumes.
+    List processed resumes, newest first.
     
     Args:
         user_id: Filter by user ID (optional)
+        domain: Filter by domain, case-insensitive (optional)
         limit: Maximum number of results
+        cursor: next_cursor from the previous page (optional)
         
     Returns:
-        List of resume metadata
+        One page of resume metadata and the cursor for the next page
     """
     try:
-        resumes = []
-        
-        # Get all JSON files in data directory
-        json_files = list(DATA_DIR.glob("*.json"))
-        
-        for json_file in json_files[:limit]:
-            try:
-                # Parse resume ID and user from filename
-                resume_id = json_file.stem
-                file_user_id = resume_id.split('_')[0] if '_' in resume_id else "unknown"
-                
-                # Filter by user if specified
-                if user_id and file_user_id != user_id:
-                    continue
-                
-                # Get file metadata
-                stat = json_file.stat()
-                
-                # Load basic resume info
-                async with aiofiles.open(json_file, 'r') as f:
-                    data = json.loads(await f.read())
-                
-                resume_info = {
-                    "resume_id": resume_id,
-                    "user_id": file_user_id,
-                    "filename": data.get("contact", {}).get("name", "Unknown") + ".json",
-                    "processing_confidence": data.get("parsing_confidence", 0.0),
-                    "sections_detected": data.get("sections_detected", []),
-                    "domains": data.get("domains", []),
-                    "created_at": datetime.fromtimestamp(stat.st_ctime).isoformat(),
-                    "file_size": stat.st_size
-                }
-                
-                resumes.append(resume_info)
-                
-            except Exception as e:
-                logger.warning(f"Failed to process resume file {json_file}: {e}")
-                continue
+        resumes, next_cursor = await resume_index.list_resumes(
+            user_id=user_id, domain=domain, limit=limit, cursor=cursor
+        )
         
         return ResumeListResponse(
             resumes=resumes,
-            total=len(resumes)
+            total=len(resumes),
+            next_cursor=next_cursor
         )
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Failed to list resumes: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -311,8 +471,9 @@ async def delete_resume(resume_id: str):
         if not json_path.exists():
             raise HTTPException(status_code=404, detail="Resume not found")
         
-        # Remove JSON file
+        # Remove JSON file and index entry
         json_path.unlink()
+        await resume_index.delete(resume_id)
         
         # Try to remove associated upload file
         upload_files = list(UPLOADS_DIR.glob(f"{resume_id}_*"))
@@ -334,6 +495,14 @@ async def get_pipeline_info():
     return processor.get_pipeline_info()
 
 
+@app.get("/pipeline/workers")
+async def get_worker_stats():
+    """Get extraction pool queue depth, LLM concurrency and job queue status."""
+    stats = processor.get_worker_stats()
+    stats["jobs"] = {**job_workers.get_stats(), "queue": await job_queue.counts()}
+    return stats
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8004)
@@ -0,0 +1,368 @@
+"""
+Bulk Resume Ingestion
+Imports a directory of resume files or a JSONL manifest through the
+processing pipeline with bounded parallelism.
+
+Every item is keyed by its content hash in a ledger, so re-running skips
+what was already ingested and an interrupted run carries on where it
+stopped. Throughput and latency stats are printed (and optionally
+written to a file) at the end.
+
+Manifest lines are either {"path": "resumes/a.pdf", "user_id": "u1"} or
+{"text": "...", "user_id": "u1", "name": "a"}; relative paths are resolved
+against the manifest's directory.
+
+Usage:
+    python -m app.ingest <directory | manifest.jsonl> [--user-id ID] [--concurrency N]
+        [--extraction-workers N] [--skip-failed] [--stats-file PATH]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from app.pipeline.extraction_cache import hash_file, hash_text
+from app.processing_pool import ProcessingPool
+from app.resume_index import ResumeIndex
+from app.resume_processor import ResumeProcessor
+from app.sqlite_store import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXTENSIONS = {".pdf", ".docx", ".doc", ".txt"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ingested (
+    content_hash TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    source TEXT NOT NULL,
+    resume_id TEXT,
+    status TEXT NOT NULL,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 1,
+    processing_time REAL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (content_hash, user_id)
+);
+"""
+
+
+@dataclass
+class IngestItem:
+    """One resume to ingest: a file path or raw text."""
+    source: str
+    user_id: str
+    path: Optional[str] = None
+    text: Optional[str] = None
+    name: Optional[str] = None
+    error: Optional[str] = None
+
+
+def iter_directory(directory: Path, user_id: str) -> Iterator[IngestItem]:
+    """Supported resume files under a directory, in a stable order, without listing it all up front."""
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for filename in sorted(files):
+            path = Path(root) / filename
+            if path.suffix.lower() in SUPPORTED_EXTENSIONS:
+                yield IngestItem(source=str(path), user_id=user_id, path=str(path), name=path.name)
+
+
+def iter_manifest(manifest: Path, user_id: str) -> Iterator[IngestItem]:
+    """Items of a JSONL manifest, read line by line; malformed lines become failed items."""
+    with open(manifest) as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            source = f"{manifest}:{line_number}"
+            try:
+                entry = json.loads(line)
+                if not isinstance(entry, dict) or not (entry.get("path") or entry.get("text")):
+                    raise ValueError("expected an object with 'path' or 'text'")
+            except ValueError as e:
+                yield IngestItem(source=source, user_id=user_id, error=f"Invalid manifest line: {e}")
+                continue
+            
+            item_user_id = str(entry.get("user_id") or user_id)
+            if entry.get("path"):
+                path = Path(entry["path"])
+                if not path.is_absolute():
+                    path = manifest.parent / path
+                yield IngestItem(source=str(path), user_id=item_user_id, path=str(path), name=entry.get("name") or path.name)
+            else:
+                yield IngestItem(source=source, user_id=item_user_id, text=str(entry["text"]), name=entry.get("name"))
+
+
+def iter_items(source: Path, user_id: str) -> Iterator[IngestItem]:
+    """Items from a directory or a JSONL manifest."""
+    if source.is_dir():
+        return iter_directory(source, user_id)
+    if source.is_file():
+        return iter_manifest(source, user_id)
+    raise FileNotFoundError(f"No such directory or manifest: {source}")
+
+
+class IngestLedger(SQLiteStore):
+    """
+    SQLite record of every ingested item, keyed by (content hash, user).
+    
+    Only finished items are recorded, so anything in flight when a run is
+    interrupted has no entry and is picked up by the next run.
+    """
+    
+    def __init__(self, db_path: str):
+        super().__init__(db_path, _SCHEMA)
+    
+    async def get_status(self, content_hash: str, user_id: str) -> Optional[str]:
+        """'done', 'failed', or None if the item was never finished."""
+        def select(conn):
+            row = conn.execute(
+                "SELECT status FROM ingested WHERE content_hash = ? AND user_id = ?",
+                (content_hash, user_id)
+            ).fetchone()
+            return row["status"] if row else None
+        return await self._run(select)
+    
+    async def record(
+        self,
+        content_hash: str,
+        user_id: str,
+        source: str,
+        status: str,
+        resume_id: Optional[str] = None,
+        error: Optional[str] = None,
+        processing_time: Optional[float] = None
+    ) -> None:
+        """Record the outcome of an item, counting attempts."""
+        def upsert(conn):
+            conn.execute(
+                "INSERT INTO ingested (content_hash, user_id, source, resume_id, status, error, processing_time, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (content_hash, user_id) DO UPDATE SET source = excluded.source, "
+                "resume_id = excluded.resume_id, status = excluded.status, error = excluded.error, "
+                "processing_time = excluded.processing_time, updated_at = excluded.updated_at, "
+                "attempts = attempts + 1",
+                (content_hash, user_id, source, resume_id, status, error, processing_time, datetime.now().isoformat())
+            )
+        await self._run(upsert)
+    
+    async def counts(self) -> Dict[str, int]:
+        """Number of recorded items per status."""
+        def select(conn):
+            rows = conn.execute("SELECT status, COUNT(*) FROM ingested GROUP BY status").fetchall()
+            return {row[0]: row[1] for row in rows}
+        return await self._run(select)
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+class BulkIngester:
+    """
+    Streams items through the resume processor, `concurrency` at a time.
+    
+    Text extraction runs in the processor's worker pool and LLM calls share
+    its rate limiter, so concurrency mostly decides how many documents
+    overlap between the two stages. Results are stored like uploads: JSON
+    in data_dir and an entry in the resume index. The resume id is derived
+    from the content hash, so re-ingesting a file replaces its resume.
+    """
+    
+    def __init__(
+        self,
+        processor: ResumeProcessor,
+        ledger: IngestLedger,
+        index: ResumeIndex,
+        data_dir: Path,
+        concurrency: int = 4,
+        retry_failed: bool = True
+    ):
+        self.processor = processor
+        self.ledger = ledger
+        self.index = index
+        self.data_dir = Path(data_dir)
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        self.concurrency = max(concurrency, 1)
+        self.retry_failed = retry_failed
+        self._in_progress: set = set()
+        self._latencies: List[float] = []
+        self._failures: List[Dict[str, str]] = []
+        self._started_at: Optional[float] = None
+        self._finished_at: Optional[float] = None
+        self.stats = {
+            "seen": 0,
+            "processed": 0,
+            "skipped": 0,
+            "failed": 0
+        }
+    
+    async def run(self, items: Iterable[IngestItem]) -> Dict[str, Any]:
+        """Ingest all items and return the run statistics."""
+        self._started_at = time.perf_counter()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        workers = [asyncio.create_task(self._worker(queue)) for _ in range(self.concurrency)]
+        try:
+            for item in items:
+                # Blocks while the workers are busy, so huge sources are never held in memory
+                await queue.put(item)
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        finally:
+            for worker in workers:
+                worker.cancel()
+            self._finished_at = time.perf_counter()
+        return self.get_stats()
+    
+    async def _worker(self, queue: asyncio.Queue):
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            self.stats["seen"] += 1
+            try:
+                await self._ingest(item)
+            except Exception as e:
+                logger.error(f"Unexpected error ingesting {item.source}: {e}")
+                self._fail(item, str(e))
+    
+    async def _ingest(self, item: IngestItem):
+        if item.error:
+            self._fail(item, item.error)
+            return
+        
+        try:
+            content_hash = await asyncio.to_thread(hash_file, item.path) if item.path else hash_text(item.text)
+        except OSError as e:
+            self._fail(item, f"Cannot read file: {e}")
+            return
+        
+        key = (content_hash, item.user_id)
+        status = await self.ledger.get_status(*key)
+        if status == "done" or (status == "failed" and not self.retry_failed) or key in self._in_progress:
+            self.stats["skipped"] += 1
+            logger.debug(f"Skipping {item.source} ({status or 'duplicate'})")
+            return
+        
+        self._in_progress.add(key)
+        try:
+            resume_id = f"{item.user_id}_{content_hash[:16]}"
+            started = time.perf_counter()
+            if item.path:
+                result = await self.processor.process_resume_async(item.path)
+            else:
+                result = await self.processor.process_text_async(item.text)
+            latency = time.perf_counter() - started
+            
+            error = None
+            if not (result.success and result.data):
+                error = result.error_message or "Processing failed"
+            elif not result.data.sections_detected and not result.data.parsing_confidence:
+                # The LLM extraction failed and returned an empty result; retry it next run
+                error = "No resume data extracted"
+            if error:
+                await self.ledger.record(*key, item.source, "failed", error=error, processing_time=latency)
+                self._fail(item, error)
+                return
+            
+            await self._store(resume_id, item, result.data.model_dump())
+            await self.ledger.record(*key, item.source, "done", resume_id=resume_id, processing_time=latency)
+            self._latencies.append(latency)
+            self.stats["processed"] += 1
+            logger.info(f"[{self.stats['seen']}] Ingested {item.source} as {resume_id} in {latency:.1f}s")
+        finally:
+            self._in_progress.discard(key)
+    
+    async def _store(self, resume_id: str, item: IngestItem, resume_data: Dict[str, Any]):
+        content = json.dumps(resume_data, indent=2, default=str)
+        json_path = self.data_dir / f"{resume_id}.json"
+        await asyncio.to_thread(json_path.write_text, content)
+        await self.index.upsert(
+            resume_id, item.user_id, resume_data,
+            filename=item.name, file_size=len(content.encode())
+        )
+    
+    def _fail(self, item: IngestItem, error: str):
+        self.stats["failed"] += 1
+        self._failures.append({"source": item.source, "error": error})
+        logger.warning(f"Failed to ingest {item.source}: {error}")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Counts, throughput and per-document latency of the run so far."""
+        if self._started_at is None:
+            elapsed = 0.0
+        else:
+            elapsed = (self._finished_at or time.perf_counter()) - self._started_at
+        latencies = self._latencies
+        return {
+            **self.stats,
+            "elapsed_seconds": round(elapsed, 3),
+            "documents_per_minute": round(self.stats["processed"] / elapsed * 60, 2) if elapsed else 0.0,
+            "latency_seconds": {
+                "mean": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+                "p50": round(_percentile(latencies, 0.5), 3),
+                "p95": round(_percentile(latencies, 0.95), 3),
+                "max": round(max(latencies, default=0.0), 3)
+            },
+            "failures": self._failures[:50],
+            "pipeline": self.processor.get_worker_stats()
+        }
+
+
+async def main() -> int:
+    """Run bulk ingestion from the command line."""
+    parser = argparse.ArgumentParser(description="Bulk-ingest resumes from a directory or JSONL manifest")
+    parser.add_argument("source", type=Path, help="Directory of resume files or JSONL manifest")
+    parser.add_argument("--user-id", default="bulk", help="User id for items without one (default: bulk)")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("INGEST_CONCURRENCY", "4")))
+    parser.add_argument("--extraction-workers", type=int, default=None, help="Text extraction processes")
+    parser.add_argument("--data-dir", type=Path, default=Path(os.getenv("DATA_DIR", "data")))
+    parser.add_argument("--ledger", default=None, help="Ingestion ledger (default: <data-dir>/ingest.db)")
+    parser.add_argument("--skip-failed", action="store_true", help="Do not retry items that failed in earlier runs")
+    parser.add_argument("--stats-file", type=Path, default=None, help="Also write the final stats JSON here")
+    args = parser.parse_args()
+    
+    items = iter_items(args.source, args.user_id)
+    processor = ResumeProcessor()
+    if args.extraction_workers:
+        processor.processing_pool = ProcessingPool(max_workers=args.extraction_workers)
+    ledger = IngestLedger(args.ledger or os.getenv("INGEST_DB_PATH") or str(args.data_dir / "ingest.db"))
+    index = ResumeIndex(os.getenv("RESUME_INDEX_PATH") or str(args.data_dir / "resumes.db"))
+    ingester = BulkIngester(
+        processor, ledger, index, args.data_dir,
+        concurrency=args.concurrency,
+        retry_failed=not args.skip_failed
+    )
+    
+    processor.processing_pool.start()
+    try:
+        await ingester.run(items)
+    finally:
+        # Also reached on Ctrl-C: report what was done; the ledger lets the next run resume
+        processor.processing_pool.shutdown()
+        stats = ingester.get_stats()
+        stats["ledger"] = await ledger.counts()
+        output = json.dumps(stats, indent=2, default=str)
+        print(output)
+        if args.stats_file:
+            args.stats_file.write_text(output)
+    return 1 if stats["failed"] else 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    try:
+        sys.exit(asyncio.run(main()))
+    except KeyboardInterrupt:
+        sys.exit(130)
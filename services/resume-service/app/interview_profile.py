@@ -0,0 +1,236 @@
+"""
+Interview Profile
+Compact summary of a processed resume for starting an interview: a skill
+embedding, per-domain scores, experience level and the skills to open
+with. It is computed once when the resume is indexed, so the interview
+side picks persona, domain and first questions with a single lookup.
+"""
+import hashlib
+import math
+import re
+from collections import Counter
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Bump when the profile format or scoring changes
+PROFILE_VERSION = "3"
+EMBEDDING_DIMENSIONS = 64
+# End dates of roles the candidate still holds
+ONGOING_DATES = ("present", "current", "now", "ongoing")
+# Below this the resume is interviewed generically ("resume-based")
+MIN_DOMAIN_SCORE = 0.15
+TOP_SKILLS = 10
+
+# Interview domains; ids match the persona folders of the transcription service
+DOMAIN_SKILLS = {
+    "dsa": [
+        "algorithms", "data structures", "leetcode", "competitive programming", "dynamic programming",
+        "graph algorithms", "c++", "problem solving"
+    ],
+    "devops": [
+        "docker", "kubernetes", "aws", "azure", "gcp", "terraform", "ci/cd", "jenkins", "ansible",
+        "github actions", "helm", "prometheus", "grafana", "linux"
+    ],
+    "ai-engineering": [
+        "deep learning", "neural networks", "tensorflow", "pytorch", "llm", "langchain", "transformers",
+        "hugging face", "nlp", "computer vision", "rag", "openai", "generative ai"
+    ],
+    "machine-learning": [
+        "machine learning", "ml", "scikit-learn", "pandas", "numpy", "xgboost", "feature engineering",
+        "mlops", "model deployment", "statistics"
+    ],
+    "data-analyst": [
+        "sql", "tableau", "power bi", "excel", "statistics", "data visualization", "data analysis",
+        "looker", "r", "a/b testing"
+    ],
+    "software-engineering": [
+        "react", "angular", "node.js", "java", "python", "javascript", "typescript", "full stack",
+        "django", "fastapi", "spring boot", "rest api", "microservices", "react native"
+    ],
+}
+
+
+def normalize_skill(skill: str) -> str:
+    """Lower-case, trimmed skill with internal whitespace collapsed."""
+    return re.sub(r"\s+", " ", skill.strip().lower()).strip(" .,;")
+
+
+def _features(term: str) -> Iterable[Tuple[str, float]]:
+    # The whole term carries most of the weight; character trigrams make near-variants
+    # ("pytorch lightning", "react.js") land close to their base skill
+    yield f"term:{term}", 1.0
+    padded = f" {term} "
+    trigrams = [padded[i:i + 3] for i in range(len(padded) - 2)]
+    for trigram in trigrams:
+        yield f"tri:{trigram}", 0.5 / len(trigrams)
+
+
+def embed_skills(skills: Iterable[str], dimensions: int = EMBEDDING_DIMENSIONS) -> List[float]:
+    """
+    L2-normalized feature-hashing embedding of a set of skills.
+    
+    Deterministic and computed locally, so every resume and domain is
+    embedded the same way without an embedding API call.
+    """
+    vector = [0.0] * dimensions
+    for skill in skills:
+        term = normalize_skill(skill)
+        if not term:
+            continue
+        for feature, weight in _features(term):
+            digest = int.from_bytes(hashlib.md5(feature.encode()).digest()[:8], "big")
+            vector[digest % dimensions] += weight if digest & (1 << 63) else -weight
+    norm = math.sqrt(sum(value * value for value in vector))
+    return [value / norm for value in vector] if norm else vector
+
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    return sum(x * y for x, y in zip(a, b))
+
+
+_DOMAIN_EMBEDDINGS = {domain: embed_skills(skills) for domain, skills in DOMAIN_SKILLS.items()}
+_DOMAIN_TERMS = {domain: {normalize_skill(skill) for skill in skills} for domain, skills in DOMAIN_SKILLS.items()}
+
+
+def score_domains(skills: List[str], embedding: Optional[List[float]] = None) -> Dict[str, float]:
+    """
+    Score each interview domain 0-1 for a candidate's skills.
+    
+    Half the score is the share of the domain's core skills the candidate
+    lists exactly, half the embedding similarity (for related skills).
+    """
+    terms = {normalize_skill(skill) for skill in skills}
+    embedding = embedding or embed_skills(skills)
+    scores = {}
+    for domain, domain_terms in _DOMAIN_TERMS.items():
+        # Listing half of a domain's core skills already counts as full coverage
+        coverage = min(len(terms & domain_terms) / (len(domain_terms) / 2), 1.0)
+        similarity = max(_cosine(embedding, _DOMAIN_EMBEDDINGS[domain]), 0.0)
+        scores[domain] = round(0.5 * coverage + 0.5 * similarity, 3)
+    return scores
+
+
+def _parse_month(value: Optional[str]) -> Optional[date]:
+    if not value:
+        return None
+    if value.strip().lower() in ONGOING_DATES:
+        return date.today()
+    # A month must not be the start of a longer number ("2019-2021" is a year range)
+    match = re.match(r"^(\d{4})(?:-(\d{1,2}))?(?!\d)", value.strip())
+    if not match:
+        return None
+    month = int(match.group(2) or 1)
+    if not 1 <= month <= 12:
+        return None
+    try:
+        return date(int(match.group(1)), month, 1)
+    except ValueError:
+        return None
+
+
+def experience_periods(experience: List[Dict[str, Any]]) -> List[Tuple[str, Optional[str]]]:
+    """(start, end) ISO dates of the dated experience entries; end is None for ongoing roles."""
+    periods = []
+    for entry in experience:
+        start, end_value = _parse_month(entry.get("start_date")), entry.get("end_date")
+        if (end_value or "").strip().lower() in ONGOING_DATES:
+            if start:
+                periods.append((start.isoformat(), None))
+            continue
+        end = _parse_month(end_value)
+        if start and end and end >= start:
+            periods.append((start.isoformat(), end.isoformat()))
+    return periods
+
+
+def years_in_periods(periods: Iterable[Tuple[str, Optional[str]]]) -> float:
+    """Total years across (start, end) periods, counting overlaps once and ongoing ones up to today."""
+    today = date.today()
+    spans = []
+    for start, end in periods:
+        start, end = date.fromisoformat(start), date.fromisoformat(end) if end else today
+        if end >= start:
+            spans.append((start, end))
+    
+    total_days = 0
+    current_start, current_end = None, None
+    for start, end in sorted(spans):
+        if current_end and start <= current_end:
+            current_end = max(current_end, end)
+            continue
+        if current_end:
+            total_days += (current_end - current_start).days
+        current_start, current_end = start, end
+    if current_end:
+        total_days += (current_end - current_start).days
+    return round(total_days / 365.25, 1)
+
+
+def years_of_experience(experience: List[Dict[str, Any]]) -> float:
+    """Total years across experience entries, counting overlapping roles once."""
+    return years_in_periods(experience_periods(experience))
+
+
+def experience_level(years: float) -> str:
+    """junior (up to 2 years), mid-level (up to 5) or senior."""
+    if years <= 2:
+        return "junior"
+    if years <= 5:
+        return "mid-level"
+    return "senior"
+
+
+def collect_skills(resume_data: Dict[str, Any]) -> List[str]:
+    """Skills from the skills section and the technologies of experience and projects, most frequent first."""
+    counts: Counter = Counter()
+    names: Dict[str, str] = {}
+    mentions = [skill for category in resume_data.get("skills") or [] for skill in category.get("skills") or []]
+    for section in ("experience", "projects"):
+        mentions += [tech for entry in resume_data.get(section) or [] for tech in entry.get("technologies") or []]
+    for mention in mentions:
+        term = normalize_skill(mention)
+        if term:
+            counts[term] += 1
+            names.setdefault(term, mention.strip())
+    return [names[term] for term, _ in counts.most_common()]
+
+
+def build_profile(resume_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the interview profile of a resume (ResumeJSON as a dict).
+    
+    Returns:
+        Dict with primary_domain, domain_scores, experience_level,
+        years_of_experience, experience_periods, top_skills and
+        skill_embedding
+    """
+    skills = collect_skills(resume_data)
+    embedding = embed_skills(skills)
+    domain_scores = score_domains(skills, embedding) if skills else {domain: 0.0 for domain in DOMAIN_SKILLS}
+    best_domain = max(domain_scores, key=domain_scores.get)
+    periods = experience_periods(resume_data.get("experience") or [])
+    years = years_in_periods(periods)
+    return {
+        "version": PROFILE_VERSION,
+        "primary_domain": best_domain if domain_scores[best_domain] >= MIN_DOMAIN_SCORE else "resume-based",
+        "domain_scores": domain_scores,
+        "experience_level": experience_level(years),
+        "years_of_experience": years,
+        "experience_periods": [list(period) for period in periods],
+        "top_skills": skills[:TOP_SKILLS],
+        "skill_embedding": [round(value, 4) for value in embedding]
+    }
+
+
+def profile_is_current(profile: Dict[str, Any]) -> bool:
+    """Whether a stored profile has the current format."""
+    return profile.get("version") == PROFILE_VERSION
+
+
+def refresh_experience(profile: Dict[str, Any]) -> Dict[str, Any]:
+    """Recompute years of experience and level of a stored profile, as ongoing roles keep growing."""
+    if "experience_periods" in profile:
+        years = years_in_periods(tuple(period) for period in profile["experience_periods"])
+        profile["years_of_experience"] = years
+        profile["experience_level"] = experience_level(years)
+    return profile
@@ -0,0 +1,329 @@
+"""
+Resume Job Queue
+Durable SQLite-backed queue of resume processing jobs, drained by a fixed
+number of async workers.
+"""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from app.sqlite_store import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+JOB_STATUSES = ("queued", "running", "succeeded", "failed")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    resume_id TEXT NOT NULL,
+    filename TEXT,
+    input_path TEXT,
+    input_text TEXT,
+    callback_url TEXT,
+    callback_status TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    created_at TEXT NOT NULL,
+    started_at TEXT,
+    finished_at TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_jobs_status_created ON jobs (status, created_at);
+"""
+
+
+class JobQueue(SQLiteStore):
+    """
+    Persistent job store.
+    
+    Jobs are rows in a local SQLite database (WAL mode), so queued work
+    survives restarts; jobs left running by a crashed process are queued
+    again on start-up. Each call opens its own connection and runs in a
+    thread, so the event loop never waits on disk.
+    """
+    
+    def __init__(self, db_path: Optional[str] = None):
+        super().__init__(db_path or os.getenv("JOBS_DB_PATH", "data/jobs.db"), _SCHEMA)
+    
+    async def enqueue(
+        self,
+        user_id: str,
+        resume_id: str,
+        filename: Optional[str] = None,
+        input_path: Optional[str] = None,
+        input_text: Optional[str] = None,
+        callback_url: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Add a job; returns the stored job."""
+        job_id = uuid.uuid4().hex
+        
+        def insert(conn):
+            conn.execute(
+                "INSERT INTO jobs (job_id, status, user_id, resume_id, filename, input_path, input_text, "
+                "callback_url, created_at) VALUES (?, 'queued', ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, user_id, resume_id, filename, input_path, input_text, callback_url, datetime.now().isoformat())
+            )
+        
+        await self._run(insert)
+        return await self.get(job_id)
+    
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a job by id."""
+        def select(conn):
+            row = conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            return self._to_dict(row) if row else None
+        return await self._run(select)
+    
+    async def claim(self) -> Optional[Dict[str, Any]]:
+        """Atomically move the oldest queued job to running; None if the queue is empty."""
+        def claim_next(conn):
+            row = conn.execute(
+                "UPDATE jobs SET status = 'running', started_at = ?, attempts = attempts + 1 "
+                "WHERE job_id = (SELECT job_id FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1) "
+                "AND status = 'queued' RETURNING *",
+                (datetime.now().isoformat(),)
+            ).fetchone()
+            return self._to_dict(row) if row else None
+        return await self._run(claim_next)
+    
+    async def get_input_text(self, job_id: str) -> Optional[str]:
+        """Raw text of a text job (kept until the job finishes)."""
+        def select(conn):
+            row = conn.execute("SELECT input_text FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            return row["input_text"] if row else None
+        return await self._run(select)
+    
+    async def finish(
+        self,
+        job_id: str,
+        status: str,
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None
+    ) -> None:
+        """Record the outcome of a running job."""
+        def update(conn):
+            conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, "
+                "input_text = NULL WHERE job_id = ?",
+                (status, json.dumps(result, default=str) if result is not None else None,
+                 error, datetime.now().isoformat(), job_id)
+            )
+        await self._run(update)
+    
+    async def set_callback_status(self, job_id: str, callback_status: str) -> None:
+        """Record whether the completion callback was delivered."""
+        def update(conn):
+            conn.execute("UPDATE jobs SET callback_status = ? WHERE job_id = ?", (callback_status, job_id))
+        await self._run(update)
+    
+    async def pending_callbacks(self) -> List[Dict[str, Any]]:
+        """Finished jobs whose callback was never attempted (e.g. the process stopped first)."""
+        def select(conn):
+            rows = conn.execute(
+                "SELECT * FROM jobs WHERE status IN ('succeeded', 'failed') AND callback_url IS NOT NULL "
+                "AND callback_status IS NULL ORDER BY finished_at"
+            ).fetchall()
+            return [self._to_dict(row) for row in rows]
+        return await self._run(select)
+    
+    async def requeue_interrupted(self) -> int:
+        """Queue jobs left running by a previous process again."""
+        def update(conn):
+            return conn.execute(
+                "UPDATE jobs SET status = 'queued', started_at = NULL WHERE status = 'running'"
+            ).rowcount
+        return await self._run(update)
+    
+    async def counts(self) -> Dict[str, int]:
+        """Number of jobs per status."""
+        def select(conn):
+            rows = conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+            counts = {status: 0 for status in JOB_STATUSES}
+            counts.update({status: count for status, count in rows})
+            return counts
+        return await self._run(select)
+    
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job.pop("input_text", None)
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+
+class JobWorkers:
+    """
+    Fixed set of async workers draining the job queue.
+    
+    Throughput is bounded by the number of workers (and, below them, by
+    the extraction pool and LLM concurrency). Finished jobs with a
+    callback URL are reported with a POST, retried with backoff.
+    """
+    
+    def __init__(
+        self,
+        queue: JobQueue,
+        handler: Callable[[Dict[str, Any], Optional[str]], Awaitable[Dict[str, Any]]],
+        workers: Optional[int] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.queue = queue
+        self.handler = handler
+        self.workers = workers or int(os.getenv("JOB_WORKERS", "4"))
+        self.poll_interval = float(os.getenv("JOB_POLL_INTERVAL", "2.0"))
+        self.callback_timeout = float(os.getenv("JOB_CALLBACK_TIMEOUT", "10"))
+        self.callback_attempts = int(os.getenv("JOB_CALLBACK_ATTEMPTS", "3"))
+        self.shutdown_timeout = float(os.getenv("JOB_SHUTDOWN_TIMEOUT", "30"))
+        
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self.stats = {
+            "processed": 0,
+            "failed": 0,
+            "busy_workers": 0,
+            "callbacks_delivered": 0,
+            "callbacks_failed": 0
+        }
+    
+    async def start(self):
+        """Requeue interrupted jobs, start the workers and resend undelivered callbacks."""
+        if self._tasks:
+            return
+        requeued = await self.queue.requeue_interrupted()
+        if requeued:
+            logger.info(f"Requeued {requeued} interrupted jobs")
+        
+        self._wakeup = asyncio.Event()
+        self._stopping = asyncio.Event()
+        self._client = httpx.AsyncClient(timeout=self.callback_timeout, transport=self._transport)
+        self._tasks = [asyncio.create_task(self._work(i)) for i in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._resend_callbacks()))
+        logger.info(f"Started {self.workers} job workers")
+    
+    async def stop(self):
+        """Let running jobs finish (up to the shutdown timeout), then stop."""
+        if not self._tasks:
+            return
+        self._stopping.set()
+        self._wakeup.set()
+        done, pending = await asyncio.wait(self._tasks, timeout=self.shutdown_timeout)
+        for task in pending:
+            # Left as running; requeued on next start-up
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        self._tasks = []
+        await self._client.aclose()
+        logger.info("Job workers stopped")
+    
+    def notify(self):
+        """Wake idle workers after a job was enqueued."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get worker and callback statistics."""
+        return {"workers": self.workers, **self.stats}
+    
+    async def _work(self, worker_id: int):
+        while not self._stopping.is_set():
+            try:
+                job = await self.queue.claim()
+            except Exception as e:
+                logger.error(f"Job worker {worker_id} could not claim a job: {e}")
+                job = None
+            
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            
+            try:
+                await self._process(job)
+            except Exception as e:
+                logger.error(f"Job worker {worker_id} failed on job {job['job_id']}: {e}")
+    
+    async def _resend_callbacks(self):
+        """Deliver callbacks of jobs that finished just before the last shutdown."""
+        try:
+            jobs = await self.queue.pending_callbacks()
+        except Exception as e:
+            logger.error(f"Could not load pending job callbacks: {e}")
+            return
+        if jobs:
+            logger.info(f"Resending {len(jobs)} pending job callbacks")
+        for job in jobs:
+            try:
+                await self._send_callback(job["job_id"], job["callback_url"])
+            except Exception as e:
+                logger.error(f"Callback for job {job['job_id']} could not be resent: {e}")
+    
+    async def _process(self, job: Dict[str, Any]):
+        started = time.time()
+        self.stats["busy_workers"] += 1
+        try:
+            input_text = await self.queue.get_input_text(job["job_id"])
+            result = await self.handler(job, input_text)
+            status = "succeeded" if result.get("success") else "failed"
+            await self.queue.finish(job["job_id"], status, result=result, error=result.get("error_message"))
+        except Exception as e:
+            logger.error(f"Job {job['job_id']} failed: {e}")
+            status = "failed"
+            try:
+                await self.queue.finish(job["job_id"], status, error=str(e))
+            except Exception as finish_error:
+                # Left as running; requeued on next start-up
+                logger.error(f"Could not record failure of job {job['job_id']}: {finish_error}")
+                return
+        finally:
+            self.stats["busy_workers"] -= 1
+        
+        self.stats["processed" if status == "succeeded" else "failed"] += 1
+        logger.info(f"Job {job['job_id']} {status} in {time.time() - started:.2f}s")
+        
+        if job.get("callback_url"):
+            await self._send_callback(job["job_id"], job["callback_url"])
+    
+    async def _send_callback(self, job_id: str, callback_url: str):
+        """POST the finished job to its callback URL."""
+        job = await self.queue.get(job_id)
+        payload = {
+            "job_id": job_id,
+            "status": job["status"],
+            "error": job["error"],
+            "resume_id": job["resume_id"],
+            "storage_path": (job["result"] or {}).get("storage_path"),
+            "finished_at": job["finished_at"]
+        }
+        for attempt in range(1, self.callback_attempts + 1):
+            try:
+                response = await self._client.post(callback_url, json=payload)
+                if response.status_code < 300:
+                    self.stats["callbacks_delivered"] += 1
+                    await self.queue.set_callback_status(job_id, "delivered")
+                    return
+                error = f"HTTP {response.status_code}"
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            logger.warning(f"Callback for job {job_id} failed (attempt {attempt}): {error}")
+            if attempt < self.callback_attempts:
+                await asyncio.sleep(2 ** attempt)
+        
+        self.stats["callbacks_failed"] += 1
+        await self.queue.set_callback_status(job_id, "failed")
@@ -0,0 +1,155 @@
+"""
+Token-Aware Chunker
+Splits resume text for the LLM by token budget rather than characters.
+Whole sections are packed into chunks; only a section too large for one
+chunk is split (between lines, or between words for a single huge line),
+and its pieces repeat just the section header instead of overlapping text.
+"""
+import logging
+import math
+import re
+from functools import lru_cache
+from typing import Callable, List, Tuple
+
+from app.pipeline.rule_extractor import section_of
+
+logger = logging.getLogger(__name__)
+
+TokenCounter = Callable[[str], int]
+
+_PIECES = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Conservative token estimate for when no tokenizer is available.
+    
+    Counts each punctuation mark as a token and each word as one token per
+    four characters, so digit runs, URLs and symbols (which BPE tokenizers
+    split finely) are not underestimated the way len(text) / 4 would.
+    """
+    return sum(max(math.ceil(len(piece) / 4), 1) for piece in _PIECES.findall(text))
+
+
+@lru_cache(maxsize=None)
+def get_token_counter(model: str) -> TokenCounter:
+    """The model's tokenizer (tiktoken) as a counting function, or estimate_tokens."""
+    try:
+        import tiktoken
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            encoding = tiktoken.get_encoding("o200k_base")
+        return lambda text: len(encoding.encode(text, disallowed_special=()))
+    except ImportError:
+        logger.warning("tiktoken not available, estimating token counts. Install with: pip install tiktoken")
+    except Exception as e:
+        logger.warning(f"Could not load tokenizer for {model}, estimating token counts: {e}")
+    return estimate_tokens
+
+
+def _segment(text: str) -> List[List[str]]:
+    """Lines grouped into sections; each section after the first starts with its header line."""
+    sections: List[List[str]] = [[]]
+    for line in text.splitlines():
+        if section_of(line) and sections[-1]:
+            sections.append([])
+        sections[-1].append(line)
+    return [section for section in sections if any(line.strip() for line in section)]
+
+
+def _split_line(line: str, max_tokens: int, count_tokens: TokenCounter) -> List[Tuple[str, int]]:
+    """Split a line over the budget between words (or characters, for a run without spaces)."""
+    pieces: List[Tuple[str, int]] = []
+    current: List[str] = []
+    current_tokens = 0
+    for word in re.findall(r"\S+\s*", line):
+        word_tokens = count_tokens(word)
+        if word_tokens > max_tokens:
+            # Token-dense run with no spaces: cut it into fixed-size slices
+            if current:
+                pieces.append(("".join(current), current_tokens))
+                current, current_tokens = [], 0
+            step = max(len(word) * max_tokens // word_tokens, 1)
+            for start in range(0, len(word), step):
+                piece = word[start:start + step]
+                pieces.append((piece, count_tokens(piece)))
+            continue
+        if current and current_tokens + word_tokens > max_tokens:
+            pieces.append(("".join(current), current_tokens))
+            current, current_tokens = [], 0
+        current.append(word)
+        current_tokens += word_tokens
+    if current:
+        pieces.append(("".join(current), current_tokens))
+    return pieces
+
+
+def chunk_text(text: str, max_tokens: int, count_tokens: TokenCounter = estimate_tokens) -> List[str]:
+    """
+    Split text into chunks of at most max_tokens tokens.
+    
+    Each line is tokenized once and chunks are packed greedily in a single
+    pass, so the cost is linear in the text length. Sections are kept whole
+    where they fit; a split section's later pieces start with its header.
+    Chunk sizes are the sum of their lines' token counts plus one per line
+    break, which does not undercount BPE tokenizers in practice.
+    
+    Args:
+        text: Text to split
+        max_tokens: Token budget per chunk
+        count_tokens: Tokenizer-backed counter (see get_token_counter)
+    
+    Returns:
+        List of chunks; [text] if it fits in one
+    """
+    if not text.strip():
+        return []
+    
+    sections = [[(line, count_tokens(line) + 1) for line in section] for section in _segment(text)]
+    if sum(tokens for section in sections for _, tokens in section) <= max_tokens:
+        return [text]
+    
+    chunks: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+    
+    def flush():
+        nonlocal current, current_tokens
+        if current:
+            chunks.append("\n".join(current))
+        current, current_tokens = [], 0
+    
+    for lines in sections:
+        section_tokens = sum(tokens for _, tokens in lines)
+        
+        if current and current_tokens + section_tokens <= max_tokens:
+            current.extend(line for line, _ in lines)
+            current_tokens += section_tokens
+            continue
+        
+        if section_tokens <= max_tokens:
+            flush()
+            current = [line for line, _ in lines]
+            current_tokens = section_tokens
+            continue
+        
+        # Section larger than a chunk: fill up with its lines, repeating the header on each new chunk
+        header, header_tokens = lines[0] if section_of(lines[0][0]) else ("", 0)
+        if header_tokens * 2 > max_tokens:
+            header, header_tokens = "", 0
+        for position, (line, line_tokens) in enumerate(lines):
+            pieces = [(line, line_tokens)]
+            if line_tokens > max_tokens - header_tokens:
+                budget = max_tokens - header_tokens - 1
+                pieces = [(piece, tokens + 1) for piece, tokens in _split_line(line, budget, count_tokens)]
+            for piece, piece_tokens in pieces:
+                if current and current_tokens + piece_tokens > max_tokens:
+                    flush()
+                if not current and header and position > 0:
+                    current, current_tokens = [header], header_tokens
+                current.append(piece)
+                current_tokens += piece_tokens
+    
+    flush()
+    return chunks
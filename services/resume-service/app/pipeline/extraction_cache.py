@@ -0,0 +1,209 @@
+"""
+Extraction Cache
+Persistent, size-bounded cache of extracted text (by file hash) and parsed
+ResumeJSON (by normalized text hash), shared by all workers on the host.
+"""
+import hashlib
+import logging
+import os
+import re
+import threading
+import unicodedata
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from app.schema import ResumeJSON
+from app.sqlite_store import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS file_text (
+    file_hash TEXT PRIMARY KEY,
+    version TEXT NOT NULL,
+    text TEXT NOT NULL,
+    extraction_method TEXT,
+    size_bytes INTEGER NOT NULL,
+    last_used_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS resume_json (
+    text_hash TEXT PRIMARY KEY,
+    version TEXT NOT NULL,
+    data TEXT NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    last_used_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_file_text_last_used ON file_text (last_used_at);
+CREATE INDEX IF NOT EXISTS ix_resume_json_last_used ON resume_json (last_used_at);
+"""
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def hash_file(file_path: str) -> str:
+    """SHA-256 of a file's bytes."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def hash_text(text: str) -> str:
+    """SHA-256 of the normalized text, so whitespace/Unicode variants share an entry."""
+    normalized = _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class ExtractionCache(SQLiteStore):
+    """
+    Two-level cache in a local SQLite database.
+    
+    - file_text: raw file hash -> extracted text (skips text extraction)
+    - resume_json: normalized text hash -> ResumeJSON (skips the LLM)
+    
+    Every entry is tagged with the version of the stage that produced it;
+    entries with another version are misses, so a prompt, model or schema
+    change invalidates old results. When the total size exceeds max_bytes
+    the least recently used entries are evicted.
+    """
+    
+    def __init__(self, db_path: str, max_bytes: Optional[int] = None):
+        super().__init__(db_path, _SCHEMA)
+        self.max_bytes = max_bytes or int(os.getenv("EXTRACTION_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+        self._lock = threading.Lock()
+        self.stats = {
+            "text_hits": 0,
+            "text_misses": 0,
+            "json_hits": 0,
+            "json_misses": 0,
+            "evictions": 0
+        }
+    
+    def get_text(self, file_hash: str, version: str) -> Optional[Tuple[str, str]]:
+        """Cached (text, extraction_method) for a file, or None."""
+        def select(conn):
+            row = conn.execute(
+                "SELECT text, extraction_method FROM file_text WHERE file_hash = ? AND version = ?",
+                (file_hash, version)
+            ).fetchone()
+            if row:
+                conn.execute(
+                    "UPDATE file_text SET last_used_at = ? WHERE file_hash = ?",
+                    (datetime.now().isoformat(), file_hash)
+                )
+            return row
+        
+        row = self._execute(select)
+        self.stats["text_hits" if row else "text_misses"] += 1
+        return (row[0], row[1]) if row else None
+    
+    def put_text(self, file_hash: str, version: str, text: str, extraction_method: str) -> None:
+        """Store the extracted text of a file."""
+        def insert(conn):
+            conn.execute(
+                "INSERT OR REPLACE INTO file_text (file_hash, version, text, extraction_method, size_bytes, last_used_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (file_hash, version, text, extraction_method, len(text.encode("utf-8")), datetime.now().isoformat())
+            )
+        self._execute(insert)
+        self._evict()
+    
+    def get_resume(self, text_hash: str, version: str) -> Optional[ResumeJSON]:
+        """Cached ResumeJSON for a text, or None."""
+        def select(conn):
+            row = conn.execute(
+                "SELECT data FROM resume_json WHERE text_hash = ? AND version = ?",
+                (text_hash, version)
+            ).fetchone()
+            if row:
+                conn.execute(
+                    "UPDATE resume_json SET last_used_at = ? WHERE text_hash = ?",
+                    (datetime.now().isoformat(), text_hash)
+                )
+            return row
+        
+        row = self._execute(select)
+        if row:
+            try:
+                resume = ResumeJSON.model_validate_json(row[0])
+                self.stats["json_hits"] += 1
+                return resume
+            except ValueError as e:
+                logger.warning(f"Discarding unreadable cache entry {text_hash}: {e}")
+        self.stats["json_misses"] += 1
+        return None
+    
+    def put_resume(self, text_hash: str, version: str, resume: ResumeJSON) -> None:
+        """Store the parsed ResumeJSON for a text."""
+        data = resume.model_dump_json()
+        
+        def insert(conn):
+            conn.execute(
+                "INSERT OR REPLACE INTO resume_json (text_hash, version, data, size_bytes, last_used_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (text_hash, version, data, len(data.encode("utf-8")), datetime.now().isoformat())
+            )
+        self._execute(insert)
+        self._evict()
+    
+    def total_bytes(self) -> int:
+        """Size of all cached text and JSON."""
+        def select(conn):
+            return conn.execute(
+                "SELECT (SELECT COALESCE(SUM(size_bytes), 0) FROM file_text) + "
+                "(SELECT COALESCE(SUM(size_bytes), 0) FROM resume_json)"
+            ).fetchone()[0]
+        return self._execute(select)
+    
+    def _evict(self) -> None:
+        """Drop least recently used entries until the cache is back under 90% of max_bytes."""
+        with self._lock:
+            excess = self.total_bytes() - self.max_bytes
+            if excess <= 0:
+                return
+            excess += self.max_bytes // 10
+            
+            def evict(conn):
+                rows = conn.execute(
+                    "SELECT 'file_text', file_hash, size_bytes, last_used_at FROM file_text "
+                    "UNION ALL SELECT 'resume_json', text_hash, size_bytes, last_used_at FROM resume_json "
+                    "ORDER BY last_used_at"
+                )
+                victims, freed = [], 0
+                for table, key, size, _ in rows:
+                    if freed >= excess:
+                        break
+                    victims.append((table, key))
+                    freed += size
+                for table, key in victims:
+                    column = "file_hash" if table == "file_text" else "text_hash"
+                    conn.execute(f"DELETE FROM {table} WHERE {column} = ?", (key,))
+                return len(victims)
+            
+            evicted = self._execute(evict)
+            self.stats["evictions"] += evicted
+            logger.info(f"Evicted {evicted} extraction cache entries")
+    
+    def clear(self) -> None:
+        """Remove every entry."""
+        def delete(conn):
+            conn.execute("DELETE FROM file_text")
+            conn.execute("DELETE FROM resume_json")
+        self._execute(delete)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache hit/miss counts and size."""
+        def select(conn):
+            return (
+                conn.execute("SELECT COUNT(*) FROM file_text").fetchone()[0],
+                conn.execute("SELECT COUNT(*) FROM resume_json").fetchone()[0]
+            )
+        text_entries, json_entries = self._execute(select)
+        return {
+            **self.stats,
+            "text_entries": text_entries,
+            "json_entries": json_entries,
+            "size_bytes": self.total_bytes(),
+            "max_bytes": self.max_bytes
+        }
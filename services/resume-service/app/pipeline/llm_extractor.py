@@ -6,35 +6,96 @@ Industry-grade implementation with efficient API calling practices.
 
 import os
 import json
+import asyncio
 import hashlib
 import time
 import logging
-from typing import Dict, Any, List, Optional
+import threading
+from typing import Dict, Any, List, Optional, Sequence, Tuple
 from datetime import datetime, timedelta
 import openai
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
-from ratelimit import limits, sleep_and_retry
+from app.pipeline.chunker import chunk_text, get_token_counter
+from app.pipeline.extraction_cache import ExtractionCache, hash_text
+from app.pipeline.rule_extractor import RULES_VERSION, PreExtraction, apply_pre_extraction, pre_extract
 from app.schema import ResumeJSON, ContactInfo, ExperienceEntry, ProjectEntry, EducationEntry, SkillCategory, CertificationEntry
 
 logger = logging.getLogger(__name__)
 
+
+class TokenBucket:
+    """
+    Token bucket shared by every OpenAI call of an extractor, sync or async.
+
+    Refills at `rate` tokens per second up to `capacity`. Each call reserves
+    a token (the balance may go negative) and waits until its token is due,
+    so callers are served in arrival order without holding a lock while
+    they wait.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take a token and return how long to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return max(-self._tokens / self.rate, 0.0)
+
+    def acquire(self) -> float:
+        """Block until a call is allowed; returns the time waited."""
+        delay = self._reserve()
+        if delay:
+            time.sleep(delay)
+        return delay
+
+    async def acquire_async(self) -> float:
+        """Wait without blocking the event loop; returns the time waited."""
+        delay = self._reserve()
+        if delay:
+            await asyncio.sleep(delay)
+        return delay
+
+
 class LLMExtractor:
     """
     LLM-based resume extractor with industry-grade practices.
     Handles large files with chunking and extended timeouts.
     """
-    
-    def __init__(self, openai_api_key: Optional[str] = None):
+
+    def __init__(self, openai_api_key: Optional[str] = None, cache: Optional[ExtractionCache] = None):
         self.api_key = openai_api_key or os.getenv("OPENAI_API_KEY")
         if not self.api_key:
             raise ValueError("OpenAI API key is required")
         
         self.client = openai.OpenAI(api_key=self.api_key)
+        self.async_client = openai.AsyncOpenAI(api_key=self.api_key)
         self.model = "gpt-4o-mini"  # Using o1-mini for better performance
         self.cache = {}
         self.cache_ttl = 3600  # 1 hour cache
-        self.max_text_length = 15000  # Maximum text length before chunking
-        self.chunk_overlap = 1000  # Overlap between chunks
+        self.persistent_cache = cache
+        # Regex pre-extraction of contact details, skills lists etc.; only the rest goes to the LLM
+        self.use_rule_extraction = os.getenv("RULE_PREEXTRACTION", "true").lower() == "true"
+        # Token budget per chunk of resume text (the prompt and response come on top)
+        self.max_chunk_tokens = int(os.getenv("LLM_MAX_CHUNK_TOKENS", "4000"))
+        self.count_tokens = get_token_counter(self.model)
+        self.cache_version = self._compute_cache_version()
+        
+        # One rate budget for all calls (default 50/min), plus a cap on concurrent async calls
+        calls_per_minute = float(os.getenv("LLM_RATE_LIMIT_PER_MINUTE", "50"))
+        self.rate_limiter = TokenBucket(
+            rate=calls_per_minute / 60,
+            capacity=float(os.getenv("LLM_RATE_LIMIT_BURST", "10"))
+        )
+        self.max_concurrency = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+        self._async_semaphore = None
         
         # Statistics
         self.stats = {
@@ -42,7 +103,16 @@ class LLMExtractor:
             "cache_hits": 0,
             "successful_extractions": 0,
             "failed_extractions": 0,
-            "average_processing_time": 0.0
+            "average_processing_time": 0.0,
+            "llm_input_chars": 0,
+            "llm_input_chars_saved": 0,
+            "llm_calls_in_flight": 0,
+            "llm_calls_waiting": 0,
+            "rate_limit_wait_time": 0.0,
+            "chunks_processed": 0,
+            "total_chunk_latency": 0.0,
+            "max_chunk_latency": 0.0,
+            "last_chunk_latencies": []
         }
 
     @retry(
@@ -50,10 +120,9 @@ class LLMExtractor:
         wait=wait_exponential(multiplier=1, min=4, max=10),
         retry=retry_if_exception_type((openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError))
     )
-    @sleep_and_retry
-    @limits(calls=50, period=60)  # 50 calls per minute
     def _call_openai_api(self, messages: List[Dict[str, str]], max_tokens: int = 4000) -> Dict[str, Any]:
         """Call OpenAI API with extended timeout for large files."""
+        self.stats["rate_limit_wait_time"] += self.rate_limiter.acquire()
         try:
             response = self.client.chat.completions.create(
                 model=self.model,
@@ -72,9 +141,49 @@ class LLMExtractor:
             self.stats["failed_extractions"] += 1
             raise
 
-    def _create_extraction_prompt(self, text: str) -> str:
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=4, max=10),
+        retry=retry_if_exception_type((openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError))
+    )
+    async def _call_openai_api_async(self, messages: List[Dict[str, str]], max_tokens: int = 4000) -> str:
+        """Call OpenAI API without blocking the event loop, at most max_concurrency at a time."""
+        if self._async_semaphore is None:
+            self._async_semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        self.stats["llm_calls_waiting"] += 1
+        try:
+            await self._async_semaphore.acquire()
+        finally:
+            self.stats["llm_calls_waiting"] -= 1
+        
+        self.stats["llm_calls_in_flight"] += 1
+        try:
+            return await self._request_completion_async(messages, max_tokens)
+        finally:
+            self.stats["llm_calls_in_flight"] -= 1
+            self._async_semaphore.release()
+
+    async def _request_completion_async(self, messages: List[Dict[str, str]], max_tokens: int) -> str:
+        self.stats["rate_limit_wait_time"] += await self.rate_limiter.acquire_async()
+        try:
+            response = await self.async_client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=0.1,  # Low temperature for consistent extraction
+                timeout=120  # Extended timeout for large files
+            )
+            return response.choices[0].message.content
+        except openai.APITimeoutError:
+            # If timeout occurs, try with smaller max_tokens
+            if max_tokens > 2000:
+                return await self._request_completion_async(messages, max_tokens=max_tokens // 2)
+            raise
+
+    def _create_extraction_prompt(self, text: str, prefilled_fields: Sequence[str] = ()) -> str:
         """Create a comprehensive extraction prompt for resume parsing."""
-        return f"""
+        prompt = f"""
 You are an expert resume parser. Extract structured information from the following resume text and return it as a valid JSON object.
 
 RESUME TEXT:
@@ -164,36 +273,14 @@ IMPORTANT:
 7. For domains, identify the primary technical domains from the resume
 8. Ensure all arrays are properly formatted even if empty
 """
+        if prefilled_fields:
+            fields = ", ".join(prefilled_fields)
+            prompt += f"9. {fields} were extracted separately: return empty arrays for {fields}\n"
+        return prompt
 
     def _chunk_text(self, text: str) -> List[str]:
-        """Split large text into manageable chunks with overlap."""
-        if len(text) <= self.max_text_length:
-            return [text]
-        
-        chunks = []
-        start = 0
-        
-        while start < len(text):
-            end = start + self.max_text_length
-            
-            # Try to break at a sentence boundary
-            if end < len(text):
-                # Look for sentence endings
-                for i in range(end, max(start + self.max_text_length - 500, start), -1):
-                    if text[i] in '.!?':
-                        end = i + 1
-                        break
-            
-            chunk = text[start:end]
-            chunks.append(chunk)
-            
-            # Move start position with overlap
-            start = end - self.chunk_overlap
-            
-            if start >= len(text):
-                break
-        
-        return chunks
+        """Split large text into section-aligned chunks within the token budget."""
+        return chunk_text(text, self.max_chunk_tokens, self.count_tokens)
 
     def _merge_chunk_results(self, chunk_results: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Merge results from multiple chunks into a single comprehensive result."""
@@ -232,8 +319,8 @@ IMPORTANT:
         
         return merged
 
-    def _parse_llm_response(self, response: str) -> Dict[str, Any]:
-        """Parse LLM response and handle JSON parsing errors."""
+    def _parse_llm_response(self, response: str) -> Optional[Dict[str, Any]]:
+        """Parse LLM response; None if it holds no JSON object."""
         try:
             # Clean the response to extract JSON
             response = response.strip()
@@ -243,31 +330,39 @@ IMPORTANT:
                 response = response[:-3]
             response = response.strip()
             
-            return json.loads(response)
-        except json.JSONDecodeError as e:
+            data = json.loads(response)
+        except json.JSONDecodeError:
             # Try to extract JSON from the response
+            data = None
             try:
                 # Find JSON-like content
                 start = response.find('{')
                 end = response.rfind('}') + 1
                 if start != -1 and end > start:
                     json_str = response[start:end]
-                    return json.loads(json_str)
+                    data = json.loads(json_str)
             except:
                 pass
             
-            # Return a basic structure if parsing fails
-            return {
-                "contact": {},
-                "summary": None,
-                "experience": [],
-                "projects": [],
-                "education": [],
-                "skills": [],
-                "certifications": [],
-                "achievements": [],
-                "domains": []
-            }
+        if not isinstance(data, dict):
+            logger.warning(f"LLM response is not a JSON object: {response[:200]!r}")
+            return None
+        return data
+
+    @staticmethod
+    def _empty_result() -> Dict[str, Any]:
+        """Basic structure standing in for a chunk whose response could not be parsed."""
+        return {
+            "contact": {},
+            "summary": None,
+            "experience": [],
+            "projects": [],
+            "education": [],
+            "skills": [],
+            "certifications": [],
+            "achievements": [],
+            "domains": []
+        }
 
     def _calculate_confidence(self, extracted_data: Dict[str, Any]) -> float:
         """Calculate confidence score based on extraction completeness."""
@@ -339,27 +434,23 @@ IMPORTANT:
         """
         start_time = time.time()
         
-        # Generate cache key
-        text_hash = hashlib.md5(text.encode()).hexdigest()
-        cache_key = f"resume_{text_hash}"
-        
         # Check cache
-        if cache_key in self.cache:
-            cache_entry = self.cache[cache_key]
-            if datetime.now() - cache_entry["timestamp"] < timedelta(seconds=self.cache_ttl):
-                self.stats["cache_hits"] += 1
-                return cache_entry["data"]
+        cache_key = self._cache_key(text)
+        cached = self._get_cached(cache_key)
+        if cached is not None:
+            return cached
         
         try:
-            # Chunk text if it's too large
-            text_chunks = self._chunk_text(text)
+            # Rule-based fields first, then chunk what is left if it's too large
+            pre, llm_text = self._pre_extract(text)
+            text_chunks = self._chunk_text(llm_text) if llm_text.strip() else []
             chunk_results = []
             
             for i, chunk in enumerate(text_chunks):
                 print(f"Processing chunk {i+1}/{len(text_chunks)} ({len(chunk)} characters)")
                 
                 # Create prompt for this chunk
-                prompt = self._create_extraction_prompt(chunk)
+                prompt = self._create_extraction_prompt(chunk, pre.prefilled_fields if pre else ())
                 messages = [{"role": "user", "content": prompt}]
                 
                 # Call API with retry logic
@@ -367,60 +458,183 @@ IMPORTANT:
                 chunk_data = self._parse_llm_response(response)
                 chunk_results.append(chunk_data)
                 
-                # Small delay between chunks to avoid rate limits
-                if i < len(text_chunks) - 1:
-                    time.sleep(0.5)
+            return self._finish_extraction(text, cache_key, chunk_results, start_time, pre)
             
-            # Merge results from all chunks
-            merged_data = self._merge_chunk_results(chunk_results)
+        except Exception as e:
+            return self._failed_extraction(text, e)
+
+    async def extract_resume_async(self, text: str) -> ResumeJSON:
+        """
+        Async variant of extract_resume using the AsyncOpenAI client.
+        All chunks are sent concurrently (within the shared rate limit and
+        concurrency cap), so a long resume takes about one LLM round trip.
+        """
+        start_time = time.time()
+        
+        cache_key = self._cache_key(text)
+        cached = await asyncio.to_thread(self._get_cached, cache_key)
+        if cached is not None:
+            return cached
+        
+        try:
+            pre, llm_text = self._pre_extract(text)
+            text_chunks = self._chunk_text(llm_text) if llm_text.strip() else []
+            prefilled_fields = pre.prefilled_fields if pre else ()
+            tasks = [
+                asyncio.create_task(self._extract_chunk_async(i, len(text_chunks), chunk, prefilled_fields))
+                for i, chunk in enumerate(text_chunks)
+            ]
+            try:
+                chunk_outputs = await asyncio.gather(*tasks)
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                raise
             
-            # Convert to ResumeJSON
-            resume_json = ResumeJSON(
-                contact=ContactInfo(**merged_data.get("contact", {})),
-                summary=merged_data.get("summary"),
-                experience=[ExperienceEntry(**exp) for exp in merged_data.get("experience", [])],
-                projects=[ProjectEntry(**proj) for proj in merged_data.get("projects", [])],
-                education=[EducationEntry(**edu) for edu in merged_data.get("education", [])],
-                skills=[SkillCategory(**skill) for skill in merged_data.get("skills", [])],
-                certifications=[CertificationEntry(**cert) for cert in merged_data.get("certifications", [])],
-                achievements=merged_data.get("achievements", []),
-                domains=merged_data.get("domains", []),
-                raw_text_length=len(text),
-                parsing_confidence=self._calculate_confidence(merged_data),
-                sections_detected=self._detect_sections(merged_data),
-                text_extraction_method="llm",
-                llm_enhanced=True
+            latencies = [latency for _, latency in chunk_outputs]
+            self.stats["last_chunk_latencies"] = latencies
+            logger.info(
+                f"Extracted {len(text_chunks)} chunks in {time.time() - start_time:.2f}s "
+                f"(chunk latencies: {', '.join(f'{latency:.2f}s' for latency in latencies)})"
             )
-            
-            # Cache the result
+                
+            chunk_results = [data for data, _ in chunk_outputs]
+            return await asyncio.to_thread(self._finish_extraction, text, cache_key, chunk_results, start_time, pre)
+        
+        except Exception as e:
+            return self._failed_extraction(text, e)
+
+    async def _extract_chunk_async(
+        self,
+        index: int,
+        total: int,
+        chunk: str,
+        prefilled_fields: Sequence[str] = ()
+    ) -> tuple:
+        """Extract one chunk; returns (parsed data or None, latency in seconds)."""
+        logger.info(f"Processing chunk {index+1}/{total} ({len(chunk)} characters)")
+        chunk_start = time.time()
+        
+        messages = [{"role": "user", "content": self._create_extraction_prompt(chunk, prefilled_fields)}]
+        response = await self._call_openai_api_async(messages, max_tokens=4000)
+        latency = time.time() - chunk_start
+        
+        self.stats["chunks_processed"] += 1
+        self.stats["total_chunk_latency"] += latency
+        self.stats["max_chunk_latency"] = max(self.stats["max_chunk_latency"], latency)
+        return self._parse_llm_response(response), latency
+
+    def _compute_cache_version(self) -> str:
+        """Fingerprint of the model, prompt and output schema; cached results from another version are ignored."""
+        fingerprint = json.dumps({
+            "model": self.model,
+            "prompt": self._create_extraction_prompt(""),
+            "rules": RULES_VERSION if self.use_rule_extraction else None,
+            "max_chunk_tokens": self.max_chunk_tokens,
+            "schema": ResumeJSON.model_json_schema()
+        }, sort_keys=True)
+        return hashlib.sha256(fingerprint.encode()).hexdigest()[:16]
+
+    def _pre_extract(self, text: str) -> Tuple[Optional[PreExtraction], str]:
+        """Run the rule-based stage; returns (pre-extraction or None, text still needing the LLM)."""
+        if not self.use_rule_extraction:
+            self.stats["llm_input_chars"] += len(text)
+            return None, text
+        
+        pre = pre_extract(text)
+        self.stats["llm_input_chars"] += len(pre.llm_text)
+        self.stats["llm_input_chars_saved"] += max(len(text) - len(pre.llm_text), 0)
+        return pre, pre.llm_text
+
+    def _cache_key(self, text: str) -> str:
+        return hash_text(text)
+
+    def _get_cached(self, cache_key: str) -> Optional[ResumeJSON]:
+        """Return a cached result: in-memory if not expired, else from the persistent cache."""
+        if cache_key in self.cache:
+            cache_entry = self.cache[cache_key]
+            if datetime.now() - cache_entry["timestamp"] < timedelta(seconds=self.cache_ttl):
+                self.stats["cache_hits"] += 1
+                return cache_entry["data"]
+        
+        if self.persistent_cache is not None:
+            resume_json = self.persistent_cache.get_resume(cache_key, self.cache_version)
+            if resume_json is not None:
+                self.cache[cache_key] = {"data": resume_json, "timestamp": datetime.now()}
+                self.stats["cache_hits"] += 1
+                return resume_json
+        return None
+
+    def _finish_extraction(
+        self,
+        text: str,
+        cache_key: str,
+        chunk_results: List[Optional[Dict[str, Any]]],
+        start_time: float,
+        pre: Optional[PreExtraction] = None
+    ) -> ResumeJSON:
+        """Merge chunk results (and rule-based fields) into a ResumeJSON, cache it and update statistics."""
+        # A chunk whose response was not JSON contributes nothing, and the
+        # partial result is not cached so the next request tries the LLM again
+        complete = all(data is not None for data in chunk_results)
+        chunk_results = [data if data is not None else self._empty_result() for data in chunk_results]
+        
+        # Merge results from all chunks
+        merged_data = self._merge_chunk_results(chunk_results)
+        if pre is not None:
+            merged_data = apply_pre_extraction(merged_data, pre)
+        
+        # Convert to ResumeJSON
+        resume_json = ResumeJSON(
+            contact=ContactInfo(**merged_data.get("contact", {})),
+            summary=merged_data.get("summary"),
+            experience=[ExperienceEntry(**exp) for exp in merged_data.get("experience", [])],
+            projects=[ProjectEntry(**proj) for proj in merged_data.get("projects", [])],
+            education=[EducationEntry(**edu) for edu in merged_data.get("education", [])],
+            skills=[SkillCategory(**skill) for skill in merged_data.get("skills", [])],
+            certifications=[CertificationEntry(**cert) for cert in merged_data.get("certifications", [])],
+            achievements=merged_data.get("achievements", []),
+            domains=merged_data.get("domains", []),
+            raw_text_length=len(text),
+            parsing_confidence=self._calculate_confidence(merged_data),
+            sections_detected=self._detect_sections(merged_data),
+            text_extraction_method="llm",
+            llm_enhanced=True
+        )
+        
+        # Cache the result (persist only if every chunk parsed and something was extracted)
+        if complete:
             self.cache[cache_key] = {
                 "data": resume_json,
                 "timestamp": datetime.now()
             }
-            
-            # Update statistics
-            processing_time = time.time() - start_time
-            self.stats["total_calls"] += 1
-            self.stats["successful_extractions"] += 1
-            self.stats["average_processing_time"] = (
-                (self.stats["average_processing_time"] * (self.stats["successful_extractions"] - 1) + processing_time) /
-                self.stats["successful_extractions"]
-            )
-            
-            return resume_json
-            
-        except Exception as e:
-            self.stats["failed_extractions"] += 1
-            print(f"Error in LLM extraction: {str(e)}")
-            
-            # Return a basic ResumeJSON with error information
-            return ResumeJSON(
-                raw_text_length=len(text),
-                parsing_confidence=0.0,
-                sections_detected=[],
-                text_extraction_method="llm",
-                llm_enhanced=True
-            )
+            if self.persistent_cache is not None and resume_json.sections_detected:
+                self.persistent_cache.put_resume(cache_key, self.cache_version, resume_json)
+        
+        # Update statistics
+        processing_time = time.time() - start_time
+        self.stats["total_calls"] += 1
+        self.stats["successful_extractions"] += 1
+        self.stats["average_processing_time"] = (
+            (self.stats["average_processing_time"] * (self.stats["successful_extractions"] - 1) + processing_time) /
+            self.stats["successful_extractions"]
+        )
+        
+        return resume_json
+
+    def _failed_extraction(self, text: str, error: Exception) -> ResumeJSON:
+        """Record a failed extraction and return an empty result."""
+        self.stats["failed_extractions"] += 1
+        print(f"Error in LLM extraction: {str(error)}")
+        
+        # Return a basic ResumeJSON with error information
+        return ResumeJSON(
+            raw_text_length=len(text),
+            parsing_confidence=0.0,
+            sections_detected=[],
+            text_extraction_method="llm",
+            llm_enhanced=True
+        )
 
     def get_extraction_stats(self) -> Dict[str, Any]:
         """Get extraction statistics and performance metrics."""
@@ -431,6 +645,19 @@ IMPORTANT:
             "failed_extractions": self.stats["failed_extractions"],
             "average_processing_time": self.stats["average_processing_time"],
             "cache_size": len(self.cache),
+            "cache_version": self.cache_version,
+            "rule_extraction": self.use_rule_extraction,
+            "llm_input_chars": self.stats["llm_input_chars"],
+            "llm_input_chars_saved": self.stats["llm_input_chars_saved"],
+            "llm_calls_in_flight": self.stats["llm_calls_in_flight"],
+            "llm_calls_waiting": self.stats["llm_calls_waiting"],
+            "llm_max_concurrency": self.max_concurrency,
+            "llm_rate_limit_per_minute": self.rate_limiter.rate * 60,
+            "rate_limit_wait_time": self.stats["rate_limit_wait_time"],
+            "chunks_processed": self.stats["chunks_processed"],
+            "average_chunk_latency": self.stats["total_chunk_latency"] / max(self.stats["chunks_processed"], 1),
+            "max_chunk_latency": self.stats["max_chunk_latency"],
+            "last_chunk_latencies": self.stats["last_chunk_latencies"],
             "cache_hit_rate": self.stats["cache_hits"] / max(self.stats["total_calls"], 1)
         }
 
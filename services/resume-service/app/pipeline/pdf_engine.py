@@ -0,0 +1,166 @@
+"""
+PDF Extraction Engine
+Page-level PDF text extraction: the document is opened once per worker,
+every page is scored for quality, and only poor pages fall back to pypdf.
+"""
+import asyncio
+import logging
+import math
+import os
+import string
+from dataclasses import dataclass, field
+from typing import List, Tuple
+
+import pypdf
+
+logger = logging.getLogger(__name__)
+
+# Pages scoring below this are re-extracted with the fallback extractor
+MIN_PAGE_QUALITY = float(os.getenv("PDF_MIN_PAGE_QUALITY", "0.5"))
+# Documents with more pages than this are split across the processing pool
+PARALLEL_PAGE_THRESHOLD = int(os.getenv("PDF_PARALLEL_PAGE_THRESHOLD", "8"))
+# Characters a page needs before its length stops lowering the score
+FULL_PAGE_CHARS = 200
+
+_READABLE = set(string.ascii_letters + string.digits + string.punctuation + string.whitespace + "•–—’‘“”")
+
+
+@dataclass
+class PageText:
+    """Extracted text of one page and how good it looks."""
+    number: int
+    text: str
+    method: str
+    quality: float
+    links: List[str] = field(default_factory=list)
+
+
+def score_page_text(text: str) -> float:
+    """
+    Heuristic quality of extracted page text, 0.0 (unusable) to 1.0.
+    
+    Penalizes short pages, unreadable glyphs (replacement characters,
+    "(cid:N)" markers), letter-per-word spacing ("E x p e r i e n c e")
+    and run-together words with no spaces.
+    """
+    stripped = text.strip()
+    if not stripped:
+        return 0.0
+    
+    unreadable = stripped.count("\ufffd") + 5 * stripped.count("(cid:")
+    readable = sum(1 for ch in stripped if ch in _READABLE or ch.isalpha())
+    readable_ratio = max(readable - unreadable, 0) / len(stripped)
+    
+    words = stripped.split()
+    single_letters = sum(1 for word in words if len(word) == 1 and word.isalpha()) / len(words)
+    run_together = sum(1 for word in words if len(word) > 30) / len(words)
+    word_penalty = max(single_letters - 0.25, 0.0) * 2 + run_together * 4
+    
+    length_score = min(len(stripped) / FULL_PAGE_CHARS, 1.0)
+    return round(readable_ratio * length_score * max(1.0 - word_penalty, 0.0), 3)
+
+
+def pdf_page_count(file_path: str) -> int:
+    """Number of pages, without extracting any text."""
+    try:
+        import pymupdf
+        with pymupdf.open(file_path) as doc:
+            return len(doc)
+    except ImportError:
+        return len(pypdf.PdfReader(file_path).pages)
+
+
+def extract_page_range(file_path: str, start: int = 0, stop: int = -1) -> List[PageText]:
+    """
+    Extract pages [start, stop) of a PDF (stop=-1 for all pages).
+    
+    PyMuPDF is the primary extractor (including link targets and text
+    annotations); pages that score below MIN_PAGE_QUALITY are re-extracted
+    with pypdf and the better result is kept. Module-level so it can run
+    in a process pool.
+    """
+    try:
+        import pymupdf
+    except ImportError:
+        logger.warning("PyMuPDF not available, extracting with pypdf only. Install with: pip install PyMuPDF")
+        return _extract_range_with_pypdf(file_path, start, stop)
+    
+    pages = []
+    fallback_reader = None
+    with pymupdf.open(file_path) as doc:
+        stop = len(doc) if stop < 0 else min(stop, len(doc))
+        for number in range(start, stop):
+            page = doc[number]
+            parts = [page.get_text("text")]
+            for annot in page.annots():
+                if annot.type[0] == 1:  # Text annotation
+                    parts.append(f"Note: {annot.info.get('content', '')}")
+            text = "\n".join(parts)
+            links = [link["uri"] for link in page.get_links() if link.get("uri")]
+            result = PageText(number, text, "pymupdf", score_page_text(text), links)
+            
+            if result.quality < MIN_PAGE_QUALITY:
+                if fallback_reader is None:
+                    fallback_reader = pypdf.PdfReader(file_path)
+                try:
+                    fallback_text = fallback_reader.pages[number].extract_text() or ""
+                except Exception as e:
+                    logger.warning(f"pypdf fallback failed on page {number + 1}: {e}")
+                    fallback_text = ""
+                fallback_quality = score_page_text(fallback_text)
+                if fallback_quality > result.quality:
+                    result.text, result.method, result.quality = fallback_text, "pypdf", fallback_quality
+            
+            pages.append(result)
+    return pages
+
+
+def _extract_range_with_pypdf(file_path: str, start: int, stop: int) -> List[PageText]:
+    reader = pypdf.PdfReader(file_path)
+    stop = len(reader.pages) if stop < 0 else min(stop, len(reader.pages))
+    pages = []
+    for number in range(start, stop):
+        text = reader.pages[number].extract_text() or ""
+        pages.append(PageText(number, text, "pypdf", score_page_text(text)))
+    return pages
+
+
+def assemble_pages(pages: List[PageText]) -> Tuple[str, str]:
+    """
+    Join page texts in page order and append the document's links.
+    
+    Returns:
+        Tuple of (text, method), method naming every extractor used, e.g. "pymupdf+pypdf"
+    """
+    pages = sorted(pages, key=lambda page: page.number)
+    parts = [page.text.strip() for page in pages if page.text.strip()]
+    
+    links = list(dict.fromkeys(link for page in pages for link in page.links))
+    if links:
+        parts.append("Extracted Links:\n" + "\n".join(links))
+    
+    methods = list(dict.fromkeys(page.method for page in pages)) or ["pymupdf"]
+    poor_pages = [page.number + 1 for page in pages if page.quality < MIN_PAGE_QUALITY]
+    if poor_pages:
+        logger.info(f"Low-quality text on pages {poor_pages} after fallback")
+    return "\n\n".join(parts), "+".join(methods)
+
+
+def extract_pdf(file_path: str) -> Tuple[str, str]:
+    """Extract a whole PDF in the current process, opening it once."""
+    return assemble_pages(extract_page_range(str(file_path)))
+
+
+async def extract_pdf_in_pool(file_path: str, pool, page_count: int) -> Tuple[str, str]:
+    """
+    Extract a long PDF by splitting its pages across a ProcessingPool.
+    
+    Each worker opens the document once and extracts a contiguous range.
+    """
+    ranges = max(min(pool.max_workers, math.ceil(page_count / PARALLEL_PAGE_THRESHOLD)), 1)
+    size = math.ceil(page_count / ranges)
+    results = await asyncio.gather(*(
+        pool.run(extract_page_range, file_path, start, min(start + size, page_count))
+        for start in range(0, page_count, size)
+    ))
+    return assemble_pages([page for pages in results for page in pages])
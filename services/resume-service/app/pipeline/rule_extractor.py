@@ -0,0 +1,296 @@
+"""
+Rule-Based Pre-Extraction
+Pulls fields that need no LLM (contact details, links, skills lists,
+achievement bullets, date ranges) out of resume text with regular
+expressions, segments the text into sections, and builds the smaller text
+that still needs the LLM.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+# Bump when rule output changes, to invalidate cached results
+RULES_VERSION = "1"
+
+SECTION_ALIASES = {
+    "summary": ["summary", "professional summary", "objective", "career objective", "profile", "about", "about me"],
+    "experience": [
+        "experience", "work experience", "professional experience", "employment", "employment history",
+        "work history", "internships", "internship experience"
+    ],
+    "education": ["education", "academic background", "academics", "education and training"],
+    "skills": [
+        "skills", "technical skills", "core skills", "key skills", "skills and tools", "technologies",
+        "technical proficiencies", "tech stack", "core competencies"
+    ],
+    "projects": ["projects", "personal projects", "academic projects", "key projects", "selected projects"],
+    "certifications": [
+        "certifications", "certificates", "licenses and certifications", "certifications and achievements",
+        "certifications and awards"
+    ],
+    "achievements": ["achievements", "awards", "honors", "honors and awards", "accomplishments", "awards and achievements"],
+}
+
+EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+URL_RE = re.compile(r"(?:https?://|www\.)[^\s,;()<>]+|(?:linkedin\.com|github\.com)/[^\s,;()<>]+", re.IGNORECASE)
+PHONE_RE = re.compile(r"(?<![\w.])(?:\+\d{1,3}[\s.-]?)?(?:\(\d{2,5}\)[\s.-]?)?\d[\d\s.-]{6,16}\d(?![\w.])")
+BULLET_RE = re.compile(r"^\s*[•●▪◦\-*–]\s+")
+SKILL_LINE_RE = re.compile(r"^([A-Za-z][^:]{1,40}):\s*(.+)$")
+NAME_RE = re.compile(r"^[A-Za-z][A-Za-z.'\-]*(?:\s+[A-Za-z][A-Za-z.'\-]*){1,4}$")
+
+MONTHS = {
+    "jan": "01", "feb": "02", "mar": "03", "apr": "04", "may": "05", "jun": "06",
+    "jul": "07", "aug": "08", "sep": "09", "oct": "10", "nov": "11", "dec": "12"
+}
+_DATE = r"(?:(?:[A-Za-z]{3,9}\.?\s+\d{4})|(?:\d{1,2}/\d{4})|(?:\d{4}))"
+DATE_RANGE_RE = re.compile(
+    rf"({_DATE})\s*(?:–|—|-|to)\s*({_DATE}|present|current|now|ongoing)",
+    re.IGNORECASE
+)
+LINKEDIN_PROFILE_RE = re.compile(r"linkedin\.com/in/[^/\s]+/?$", re.IGNORECASE)
+GITHUB_PROFILE_RE = re.compile(r"github\.com/[^/\s]+/?$", re.IGNORECASE)
+
+
+@dataclass
+class PreExtraction:
+    """Result of the rule-based stage."""
+    contact: Dict[str, Optional[str]] = field(default_factory=dict)
+    links: List[str] = field(default_factory=list)
+    sections: Dict[str, str] = field(default_factory=dict)
+    skills: List[Dict[str, Any]] = field(default_factory=list)
+    achievements: List[str] = field(default_factory=list)
+    date_ranges: Dict[str, List[Tuple[str, str]]] = field(default_factory=dict)
+    llm_text: str = ""
+    
+    @property
+    def prefilled_fields(self) -> List[str]:
+        """Top-level ResumeJSON fields the rules already produced."""
+        return [name for name in ("skills", "achievements") if getattr(self, name)]
+
+
+def _normalize_header(line: str) -> str:
+    text = line.strip().lower().replace("&", " and ")
+    text = re.sub(r"[^a-z ]", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+_HEADER_LOOKUP = {
+    _normalize_header(alias): section
+    for section, aliases in SECTION_ALIASES.items()
+    for alias in aliases
+}
+
+
+def section_of(line: str) -> Optional[str]:
+    """Canonical section name if the line is a section header."""
+    if not line.strip() or len(line.strip()) > 45:
+        return None
+    return _HEADER_LOOKUP.get(_normalize_header(line))
+
+
+def segment_sections(text: str) -> Tuple[str, List[Tuple[str, str, str]]]:
+    """
+    Split resume text at section headers.
+    
+    Returns:
+        Tuple of (header text before the first section, [(section, header line, body)])
+    """
+    header_lines: List[str] = []
+    sections: List[Tuple[str, str, List[str]]] = []
+    for line in text.splitlines():
+        section = section_of(line)
+        if section:
+            sections.append((section, line.strip(), []))
+        elif sections:
+            sections[-1][2].append(line)
+        else:
+            header_lines.append(line)
+    return "\n".join(header_lines).strip(), [(name, header, "\n".join(body).strip()) for name, header, body in sections]
+
+
+def normalize_date(value: str) -> str:
+    """'March 2025' -> '2025-03', '03/2025' -> '2025-03', 'Current' -> 'Present'."""
+    value = value.strip().rstrip(".")
+    if value.lower() in ("present", "current", "now", "ongoing"):
+        return "Present"
+    match = re.match(r"^(\d{1,2})/(\d{4})$", value)
+    if match:
+        return f"{match.group(2)}-{int(match.group(1)):02d}"
+    match = re.match(r"^([A-Za-z]{3,9})\.?\s+(\d{4})$", value)
+    if match and match.group(1)[:3].lower() in MONTHS:
+        return f"{match.group(2)}-{MONTHS[match.group(1)[:3].lower()]}"
+    return value
+
+
+def _join_wrapped_bullets(body: str) -> List[str]:
+    """Bullet items, with wrapped continuation lines joined to their bullet."""
+    items: List[str] = []
+    for line in body.splitlines():
+        if not line.strip():
+            continue
+        if BULLET_RE.match(line) or not items:
+            items.append(BULLET_RE.sub("", line).strip())
+        else:
+            items[-1] = f"{items[-1]} {line.strip()}"
+    return items
+
+
+def _split_skills(items: str) -> List[str]:
+    """Split on commas outside parentheses."""
+    skills, depth, current = [], 0, []
+    for ch in items:
+        if ch in "([":
+            depth += 1
+        elif ch in ")]":
+            depth = max(depth - 1, 0)
+        if ch == "," and depth == 0:
+            skills.append("".join(current))
+            current = []
+        else:
+            current.append(ch)
+    skills.append("".join(current))
+    return [skill.strip().rstrip(".") for skill in skills if skill.strip()]
+
+
+def parse_skills(body: str) -> List[Dict[str, Any]]:
+    """
+    Parse 'Category: a, b, c' lines (wrapped lines joined).
+    
+    Returns [] when the section is not in that form, so it goes to the LLM.
+    """
+    entries: List[List[str]] = []
+    for line in body.splitlines():
+        line = BULLET_RE.sub("", line).strip()
+        if not line:
+            continue
+        match = SKILL_LINE_RE.match(line)
+        if match:
+            entries.append([match.group(1).strip(), match.group(2).strip()])
+        elif entries:
+            entries[-1][1] = f"{entries[-1][1]} {line}"
+        else:
+            return []
+    return [{"category": category, "skills": _split_skills(items)} for category, items in entries]
+
+
+def _extract_contact(header: str, links: List[str], text: str) -> Dict[str, Optional[str]]:
+    contact: Dict[str, Optional[str]] = {}
+    
+    email = EMAIL_RE.search(header) or EMAIL_RE.search(text)
+    contact["email"] = email.group(0) if email else None
+    
+    phone = None
+    for match in PHONE_RE.finditer(header):
+        digits = re.sub(r"\D", "", match.group(0))
+        if 10 <= len(digits) <= 15:
+            phone = match.group(0).strip()
+            break
+    contact["phone"] = phone
+    
+    contact["linkedin"] = next((link for link in links if LINKEDIN_PROFILE_RE.search(link)), None)
+    contact["github"] = next((link for link in links if GITHUB_PROFILE_RE.search(link)), None)
+    
+    contact["website"] = next(
+        (link for link in URL_RE.findall(header) if "linkedin.com" not in link.lower() and "github.com" not in link.lower()),
+        None
+    )
+    
+    first_line = next((line.strip() for line in header.splitlines() if line.strip()), "")
+    contact["name"] = first_line if NAME_RE.match(first_line) else None
+    return contact
+
+
+def _strip_contact(header: str) -> str:
+    """Header text without the contact details the rules already captured."""
+    lines = []
+    for line in header.splitlines():
+        stripped = PHONE_RE.sub("", URL_RE.sub("", EMAIL_RE.sub("", line)))
+        stripped = re.sub(r"\b(LinkedIn|GitHub|Portfolio|Website|Email|Phone)\b", "", stripped, flags=re.IGNORECASE)
+        if re.sub(r"[\s•|·,:/\-]+", "", stripped):
+            lines.append(stripped.strip(" •|·,"))
+    return "\n".join(lines)
+
+
+def pre_extract(text: str) -> PreExtraction:
+    """
+    Run the rule-based stage over resume text.
+    
+    Everything the rules cannot settle (summary, experience, education,
+    projects, certifications, unrecognized sections) is kept in llm_text,
+    with a one-line skills summary for domain inference.
+    """
+    body, _, link_block = text.partition("Extracted Links:")
+    links = [line.strip() for line in link_block.splitlines() if line.strip()]
+    links += [link for link in URL_RE.findall(body) if link not in links]
+    links = [link[len("mailto:"):] if link.startswith("mailto:") else link for link in links]
+    
+    header, sections = segment_sections(body)
+    result = PreExtraction(links=links)
+    result.contact = _extract_contact(header, links, body)
+    
+    llm_parts = [_strip_contact(header)]
+    for name, header_line, section_body in sections:
+        result.sections[name] = f"{result.sections[name]}\n{section_body}".strip() if name in result.sections else section_body
+        
+        if name in ("experience", "education"):
+            ranges = [(normalize_date(start), normalize_date(end)) for start, end in DATE_RANGE_RE.findall(section_body)]
+            result.date_ranges.setdefault(name, []).extend(ranges)
+        
+        if name == "skills":
+            skills = parse_skills(section_body)
+            if skills:
+                result.skills.extend(skills)
+                continue
+        elif name == "achievements":
+            result.achievements.extend(_join_wrapped_bullets(section_body))
+            continue
+        
+        llm_parts.append(f"{header_line}\n{section_body}")
+    
+    if result.skills:
+        all_skills = [skill for entry in result.skills for skill in entry["skills"]]
+        llm_parts.append("Skills (already extracted, for context): " + ", ".join(all_skills))
+    
+    contact_links = {result.contact.get("linkedin"), result.contact.get("github"), result.contact.get("email")}
+    other_links = [link for link in links if link not in contact_links]
+    if other_links:
+        llm_parts.append("Links:\n" + "\n".join(other_links))
+    
+    result.llm_text = "\n\n".join(part for part in llm_parts if part.strip())
+    return result
+
+
+def apply_pre_extraction(merged: Dict[str, Any], pre: PreExtraction) -> Dict[str, Any]:
+    """
+    Combine LLM output with the rule results, keeping the ResumeJSON shape.
+    
+    Exact fields (email, phone, profile URLs) come from the rules; name and
+    location from the LLM when it found them; rule-parsed skills replace
+    the LLM's; achievements are combined; missing experience/education
+    dates are filled from the section's date ranges when counts match.
+    """
+    merged = dict(merged)
+    contact = dict(merged.get("contact") or {})
+    for key in ("email", "phone", "linkedin", "github", "website"):
+        if pre.contact.get(key):
+            contact[key] = pre.contact[key]
+    for key in ("name", "location"):
+        if not contact.get(key) and pre.contact.get(key):
+            contact[key] = pre.contact[key]
+    merged["contact"] = contact
+    
+    if pre.skills:
+        merged["skills"] = pre.skills
+    if pre.achievements:
+        merged["achievements"] = list(dict.fromkeys(pre.achievements + (merged.get("achievements") or [])))
+    
+    for section in ("experience", "education"):
+        entries = merged.get(section) or []
+        ranges = pre.date_ranges.get(section, [])
+        if entries and len(entries) == len(ranges):
+            for entry, (start, end) in zip(entries, ranges):
+                entry.setdefault("start_date", None)
+                entry.setdefault("end_date", None)
+                entry["start_date"] = entry["start_date"] or start
+                entry["end_date"] = entry["end_date"] or end
+    return merged
@@ -0,0 +1,119 @@
+"""
+Processing Pool
+Runs CPU-bound text extraction in worker processes, off the event loop.
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _timed_call(func: Callable, *args) -> tuple:
+    """Run func in the worker and report when it started (for queue wait metrics)."""
+    started_at = time.time()
+    return started_at, func(*args)
+
+
+class ProcessingPool:
+    """
+    Process pool for CPU-bound pipeline stages.
+    
+    PDF/DOCX parsing holds the GIL for seconds on large files, so it runs
+    in separate processes; the event loop only awaits the result. Tracks
+    queue depth (jobs submitted but not yet started) and wait/run times.
+    """
+    
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or int(os.getenv("EXTRACTION_WORKERS", "0")) or os.cpu_count() or 1
+        self._executor: Optional[ProcessPoolExecutor] = None
+        
+        # Statistics
+        self.stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "in_flight": 0,
+            "max_queue_depth": 0,
+            "total_wait_time": 0.0,
+            "total_run_time": 0.0
+        }
+    
+    def start(self):
+        """Create the worker processes."""
+        if self._executor is None:
+            # spawn: forking a process with running event loop threads is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            logger.info(f"Processing pool started with {self.max_workers} workers")
+    
+    def shutdown(self, wait: bool = True):
+        """Stop the worker processes, by default after running jobs finish."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+            logger.info("Processing pool stopped")
+    
+    @property
+    def queue_depth(self) -> int:
+        """Jobs waiting for a free worker."""
+        return max(self.stats["in_flight"] - self.max_workers, 0)
+    
+    async def run(self, func: Callable, *args) -> Any:
+        """
+        Run a picklable, module-level function in a worker process.
+        
+        Args:
+            func: Function to call
+            *args: Picklable arguments
+        
+        Returns:
+            The function's result
+        """
+        self.start()
+        submitted_at = time.time()
+        self.stats["submitted"] += 1
+        self.stats["in_flight"] += 1
+        self.stats["max_queue_depth"] = max(self.stats["max_queue_depth"], self.queue_depth)
+        
+        loop = asyncio.get_running_loop()
+        try:
+            started_at, result = await loop.run_in_executor(self._executor, _timed_call, func, *args)
+            self.stats["completed"] += 1
+            self.stats["total_wait_time"] += max(started_at - submitted_at, 0.0)
+            self.stats["total_run_time"] += time.time() - started_at
+            return result
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); replace the pool for later jobs
+            # without blocking the event loop on the broken one's teardown
+            self.stats["failed"] += 1
+            self.shutdown(wait=False)
+            raise
+        except Exception:
+            self.stats["failed"] += 1
+            raise
+        finally:
+            self.stats["in_flight"] -= 1
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get worker pool statistics and queue depth."""
+        completed = max(self.stats["completed"], 1)
+        return {
+            "workers": self.max_workers,
+            "running": self._executor is not None,
+            "queue_depth": self.queue_depth,
+            "in_flight": self.stats["in_flight"],
+            "max_queue_depth": self.stats["max_queue_depth"],
+            "submitted": self.stats["submitted"],
+            "completed": self.stats["completed"],
+            "failed": self.stats["failed"],
+            "average_wait_time": self.stats["total_wait_time"] / completed,
+            "average_run_time": self.stats["total_run_time"] / completed
+        }
@@ -0,0 +1,251 @@
+"""
+Resume Index
+SQLite metadata index of processed resumes for filtered, keyset-paginated
+listing without reading the JSON files, plus each resume's interview profile.
+"""
+import asyncio
+import base64
+import json
+import logging
+import os
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.interview_profile import build_profile, profile_is_current, refresh_experience
+from app.sqlite_store import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS resumes (
+    resume_id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    filename TEXT,
+    processing_confidence REAL NOT NULL DEFAULT 0,
+    sections_detected TEXT NOT NULL DEFAULT '[]',
+    domains TEXT NOT NULL DEFAULT '[]',
+    created_at TEXT NOT NULL,
+    file_size INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS ix_resumes_created ON resumes (created_at DESC, resume_id DESC);
+CREATE INDEX IF NOT EXISTS ix_resumes_user_created ON resumes (user_id, created_at DESC, resume_id DESC);
+CREATE TABLE IF NOT EXISTS resume_domains (
+    domain TEXT NOT NULL,
+    resume_id TEXT NOT NULL REFERENCES resumes (resume_id) ON DELETE CASCADE,
+    created_at TEXT NOT NULL,
+    PRIMARY KEY (domain, resume_id)
+);
+CREATE INDEX IF NOT EXISTS ix_resume_domains_created ON resume_domains (domain, created_at DESC, resume_id DESC);
+CREATE INDEX IF NOT EXISTS ix_resume_domains_resume ON resume_domains (resume_id);
+CREATE TABLE IF NOT EXISTS interview_profiles (
+    resume_id TEXT PRIMARY KEY REFERENCES resumes (resume_id) ON DELETE CASCADE,
+    profile TEXT NOT NULL
+);
+"""
+
+
+def encode_cursor(created_at: str, resume_id: str) -> str:
+    """Opaque cursor for the position after (created_at, resume_id)."""
+    return base64.urlsafe_b64encode(json.dumps([created_at, resume_id]).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Inverse of encode_cursor; raises ValueError for a malformed cursor."""
+    try:
+        created_at, resume_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return str(created_at), str(resume_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+class ResumeIndex(SQLiteStore):
+    """
+    Metadata of every stored resume, kept in step with the JSON files.
+    
+    Listing is newest first and paginated by (created_at, resume_id)
+    keyset, so each page costs O(page size) however many resumes exist.
+    Domain filters go through a per-domain table (case-insensitive).
+    """
+    
+    def __init__(self, db_path: Optional[str] = None):
+        super().__init__(db_path or os.getenv("RESUME_INDEX_PATH", "data/resumes.db"), _SCHEMA)
+    
+    def _connect(self) -> sqlite3.Connection:
+        conn = super()._connect()
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+    
+    async def upsert(
+        self,
+        resume_id: str,
+        user_id: str,
+        resume_data: Dict[str, Any],
+        filename: Optional[str] = None,
+        file_size: int = 0,
+        created_at: Optional[str] = None
+    ) -> None:
+        """Add or replace a resume's metadata."""
+        await self._run(self._upsert, resume_id, user_id, resume_data, filename, file_size, created_at)
+    
+    @staticmethod
+    def _upsert(conn, resume_id, user_id, resume_data, filename, file_size, created_at):
+        created_at = created_at or datetime.now().isoformat()
+        domains = [domain for domain in resume_data.get("domains") or [] if domain]
+        if not filename:
+            filename = ((resume_data.get("contact") or {}).get("name") or "Unknown") + ".json"
+        
+        conn.execute("DELETE FROM resumes WHERE resume_id = ?", (resume_id,))
+        conn.execute(
+            "INSERT INTO resumes (resume_id, user_id, filename, processing_confidence, sections_detected, "
+            "domains, created_at, file_size) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                resume_id, user_id, filename,
+                resume_data.get("parsing_confidence") or 0.0,
+                json.dumps(resume_data.get("sections_detected") or []),
+                json.dumps(domains),
+                created_at, file_size
+            )
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO resume_domains (domain, resume_id, created_at) VALUES (?, ?, ?)",
+            [(domain.lower(), resume_id, created_at) for domain in domains]
+        )
+        try:
+            profile = build_profile(resume_data)
+        except Exception as e:
+            # The resume is still indexed; get_profile builds the profile on demand
+            logger.warning(f"Failed to build interview profile for {resume_id}: {e}")
+            return
+        conn.execute(
+            "INSERT INTO interview_profiles (resume_id, profile) VALUES (?, ?)",
+            (resume_id, json.dumps(profile))
+        )
+    
+    async def get_profile(self, resume_id: str, data_dir: Optional[Path] = None) -> Optional[Dict[str, Any]]:
+        """
+        The interview profile of a resume, or None.
+        
+        Years of experience are derived from the stored date spans on each
+        read, so ongoing roles keep counting. A profile that is missing or
+        has another PROFILE_VERSION is rebuilt from the resume's JSON file
+        in data_dir and stored again.
+        """
+        def select(conn):
+            return conn.execute(
+                "SELECT profile FROM interview_profiles WHERE resume_id = ?", (resume_id,)
+            ).fetchone()
+        row = await self._run(select)
+        profile = json.loads(row["profile"]) if row else None
+        if data_dir is None or (profile is not None and profile_is_current(profile)):
+            return refresh_experience(profile) if profile is not None else None
+        
+        json_path = Path(data_dir) / f"{resume_id}.json"
+        if not json_path.exists():
+            return refresh_experience(profile) if profile is not None else None
+        profile = build_profile(json.loads(await asyncio.to_thread(json_path.read_text)))
+        
+        def store(conn):
+            # Only for indexed resumes; the profile row references the resume
+            conn.execute(
+                "INSERT OR REPLACE INTO interview_profiles (resume_id, profile) "
+                "SELECT ?, ? WHERE EXISTS (SELECT 1 FROM resumes WHERE resume_id = ?)",
+                (resume_id, json.dumps(profile), resume_id)
+            )
+        await self._run(store)
+        return profile
+    
+    async def delete(self, resume_id: str) -> bool:
+        """Remove a resume; returns whether it was indexed."""
+        def delete_row(conn):
+            return conn.execute("DELETE FROM resumes WHERE resume_id = ?", (resume_id,)).rowcount > 0
+        return await self._run(delete_row)
+    
+    async def list_resumes(
+        self,
+        user_id: Optional[str] = None,
+        domain: Optional[str] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        One page of resumes, newest first.
+        
+        Args:
+            user_id: Only this user's resumes
+            domain: Only resumes with this domain (case-insensitive)
+            limit: Page size
+            cursor: next_cursor of the previous page
+        
+        Returns:
+            Tuple of (resumes, next_cursor); next_cursor is None on the last page
+        """
+        after = decode_cursor(cursor) if cursor else None
+        
+        def select(conn):
+            if domain:
+                sql = (
+                    "SELECT r.* FROM resume_domains d JOIN resumes r ON r.resume_id = d.resume_id "
+                    "WHERE d.domain = ?"
+                )
+                params: List[Any] = [domain.lower()]
+                order_table = "d"
+            else:
+                sql = "SELECT r.* FROM resumes r WHERE 1 = 1"
+                params = []
+                order_table = "r"
+            if user_id:
+                sql += " AND r.user_id = ?"
+                params.append(user_id)
+            if after:
+                sql += f" AND ({order_table}.created_at, {order_table}.resume_id) < (?, ?)"
+                params.extend(after)
+            sql += f" ORDER BY {order_table}.created_at DESC, {order_table}.resume_id DESC LIMIT ?"
+            params.append(limit + 1)
+            return conn.execute(sql, params).fetchall()
+        
+        rows = await self._run(select)
+        resumes = [self._to_dict(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = resumes[-1]
+            next_cursor = encode_cursor(last["created_at"], last["resume_id"])
+        return resumes, next_cursor
+    
+    async def count(self) -> int:
+        """Number of indexed resumes."""
+        def select(conn):
+            return conn.execute("SELECT COUNT(*) FROM resumes").fetchone()[0]
+        return await self._run(select)
+    
+    async def backfill(self, data_dir: Path) -> int:
+        """Index resume JSON files written before the index existed."""
+        def index_files(conn):
+            indexed = 0
+            for json_file in data_dir.glob("*.json"):
+                try:
+                    resume_data = json.loads(json_file.read_text())
+                    stat = json_file.stat()
+                    resume_id = json_file.stem
+                    file_user_id = resume_id.split('_')[0] if '_' in resume_id else "unknown"
+                    self._upsert(
+                        conn, resume_id, file_user_id, resume_data, None, stat.st_size,
+                        datetime.fromtimestamp(stat.st_ctime).isoformat()
+                    )
+                    indexed += 1
+                except Exception as e:
+                    logger.warning(f"Failed to index resume file {json_file}: {e}")
+            return indexed
+        
+        indexed = await self._run(index_files)
+        if indexed:
+            logger.info(f"Indexed {indexed} existing resume files")
+        return indexed
+    
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        resume = dict(row)
+        resume["sections_detected"] = json.loads(resume["sections_detected"])
+        resume["domains"] = json.loads(resume["domains"])
+        return resume
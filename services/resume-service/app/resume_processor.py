@@ -5,12 +5,16 @@ Coordinates the entire resume processing pipeline from file to JSON.
 
 import os
 import time
+import asyncio
 import logging
 from pathlib import Path
 from typing import Optional, Dict, Any
 from dotenv import load_dotenv
 
-from app.pipeline.text_extractor import TextExtractor
+from app.pipeline.text_extractor import TEXT_EXTRACTION_VERSION, TextExtractor, extract_text_in_worker
+from app.pipeline.extraction_cache import ExtractionCache, hash_file
+from app.pipeline.pdf_engine import PARALLEL_PAGE_THRESHOLD, extract_pdf_in_pool, pdf_page_count
+from app.processing_pool import ProcessingPool
 from app.pipeline.llm_extractor import LLMExtractor
 from app.schema import ProcessingResult, ResumeJSON
 
@@ -39,15 +43,19 @@ class ResumeProcessor:
         if not openai_api_key:
             raise ValueError("OpenAI API key is required for LLM-based extraction")
         
-        # Initialize pipeline components
-        self.text_extractor = TextExtractor()
-        self.llm_extractor = LLMExtractor(openai_api_key=openai_api_key)
-        
         # Configuration
         self.data_dir = Path(os.getenv('DATA_DIR', 'data'))
         self.output_dir = Path(os.getenv('OUTPUT_DIR', 'data/output'))
         self.test_files_dir = Path(os.getenv('TEST_FILES_DIR', 'data/test_files'))
         
+        # Initialize pipeline components
+        self.extraction_cache = ExtractionCache(
+            os.getenv('EXTRACTION_CACHE_PATH') or str(self.data_dir / 'extraction_cache.db')
+        )
+        self.text_extractor = TextExtractor()
+        self.llm_extractor = LLMExtractor(openai_api_key=openai_api_key, cache=self.extraction_cache)
+        self.processing_pool = ProcessingPool()
+        
         # Ensure directories exist
         self.data_dir.mkdir(exist_ok=True)
         self.output_dir.mkdir(exist_ok=True)
@@ -72,7 +80,13 @@ class ResumeProcessor:
             
             # Stage 1: Text Extraction
             logger.info("Starting text extraction...")
-            text, extraction_method = self.text_extractor.extract_text(source_file_path)
+            file_hash = hash_file(source_file_path)
+            cached_text = self.extraction_cache.get_text(file_hash, TEXT_EXTRACTION_VERSION)
+            if cached_text:
+                text, extraction_method = cached_text
+            else:
+                text, extraction_method = self.text_extractor.extract_text(source_file_path)
+                self._cache_text(file_hash, text, extraction_method)
             stages_completed.append("text_extraction")
             
             if not text or len(text.strip()) < 50:
@@ -197,6 +211,138 @@ class ResumeProcessor:
                 error_message=str(e)
             )
     
+    async def process_resume_async(self, file_path: str) -> ProcessingResult:
+        """
+        Process a resume file without blocking the event loop.
+        
+        Text extraction runs in the processing pool and LLM extraction uses
+        the async client, so concurrent requests keep being served.
+        
+        Args:
+            file_path: Path to the resume file
+        
+        Returns:
+            ProcessingResult with structured data
+        """
+        start_time = time.time()
+        stages_completed = []
+        
+        try:
+            if not os.path.exists(file_path):
+                return ProcessingResult(
+                    success=False,
+                    error_message=f"File not found: {file_path}"
+                )
+            
+            resume_name = Path(file_path).stem
+            
+            # Stage 1: Text Extraction (worker process, skipped for files seen before)
+            logger.info("Starting text extraction...")
+            file_hash = await asyncio.to_thread(hash_file, file_path)
+            cached_text = await asyncio.to_thread(self.extraction_cache.get_text, file_hash, TEXT_EXTRACTION_VERSION)
+            if cached_text:
+                logger.info(f"Using cached text for file {file_hash[:12]}")
+                text, extraction_method = cached_text
+            else:
+                text, extraction_method = await self._extract_text_async(file_path)
+                await asyncio.to_thread(self._cache_text, file_hash, text, extraction_method)
+            stages_completed.append("text_extraction")
+            
+            if not text or len(text.strip()) < 50:
+                return ProcessingResult(
+                    success=False,
+                    error_message="Failed to extract meaningful text from resume",
+                    processing_time=time.time() - start_time,
+                    stages_completed=stages_completed
+                )
+            
+            text_file_path = await asyncio.to_thread(self._save_text_file, text, resume_name)
+            
+            # Stage 2: LLM-based Extraction
+            logger.info("Starting LLM-based extraction...")
+            resume_json = await self.llm_extractor.extract_resume_async(text)
+            stages_completed.append("llm_extraction")
+            
+            json_file_path = await asyncio.to_thread(self._save_json_file, resume_json, resume_name)
+            
+            processing_time = time.time() - start_time
+            logger.info(f"Processing completed in {processing_time:.2f}s with confidence: {resume_json.parsing_confidence:.1%}")
+            
+            return ProcessingResult(
+                success=True,
+                data=resume_json,
+                processing_time=processing_time,
+                stages_completed=stages_completed,
+                text_file_path=str(text_file_path),
+                json_file_path=str(json_file_path)
+            )
+        
+        except Exception as e:
+            logger.error(f"Error in process_resume_async: {e}")
+            return ProcessingResult(
+                success=False,
+                error_message=str(e),
+                processing_time=time.time() - start_time,
+                stages_completed=stages_completed
+            )
+    
+    async def process_text_async(self, text: str) -> ProcessingResult:
+        """
+        Process raw text without blocking the event loop.
+        
+        Args:
+            text: Raw resume text
+        
+        Returns:
+            ProcessingResult with structured data
+        """
+        start_time = time.time()
+        
+        try:
+            if not text or len(text.strip()) < 50:
+                return ProcessingResult(
+                    success=False,
+                    error_message="Text too short to process meaningfully"
+                )
+            
+            logger.info("Starting LLM-based extraction from text...")
+            resume_json = await self.llm_extractor.extract_resume_async(text)
+            
+            timestamp = int(time.time())
+            text_file_path = await asyncio.to_thread(self._save_text_file, text, f"text_input_{timestamp}")
+            json_file_path = await asyncio.to_thread(self._save_json_file, resume_json, f"text_input_{timestamp}")
+            
+            processing_time = time.time() - start_time
+            logger.info(f"Text processing completed in {processing_time:.2f}s with confidence: {resume_json.parsing_confidence:.1%}")
+            
+            return ProcessingResult(
+                success=True,
+                data=resume_json,
+                processing_time=processing_time,
+                stages_completed=["llm_extraction"],
+                text_file_path=str(text_file_path),
+                json_file_path=str(json_file_path)
+            )
+        
+        except Exception as e:
+            logger.error(f"Error in process_text_async: {e}")
+            return ProcessingResult(
+                success=False,
+                error_message=str(e)
+            )
+    
+    def get_worker_stats(self) -> dict:
+        """Get processing pool and LLM concurrency statistics."""
+        llm_stats = self.llm_extractor.get_extraction_stats()
+        return {
+            "extraction_pool": self.processing_pool.get_stats(),
+            "llm": {
+                "max_concurrency": llm_stats["llm_max_concurrency"],
+                "in_flight": llm_stats["llm_calls_in_flight"],
+                "waiting": llm_stats["llm_calls_waiting"]
+            }
+        }
+    
     def get_pipeline_info(self) -> dict:
         """Get information about the processing pipeline."""
         return {
@@ -207,7 +353,7 @@ class ResumeProcessor:
             },
             "capabilities": {
                 "file_formats": ["PDF", "DOCX", "DOC", "TXT"],
-                "extraction_methods": ["pypdf", "tika", "docx", "txt"],
+                "extraction_methods": ["pymupdf", "pypdf", "tika", "docx", "txt"],
                 "llm_extraction": True,
                 "confidence_scoring": True,
                 "data_validation": True,
@@ -221,9 +367,26 @@ class ResumeProcessor:
                 "llm_extraction_time": "25-55 seconds",
                 "cache_hit_time": "< 1 second"
             },
-            "llm_stats": self.llm_extractor.get_extraction_stats()
+            "llm_stats": self.llm_extractor.get_extraction_stats(),
+            "extraction_cache": self.extraction_cache.get_stats(),
+            "workers": self.get_worker_stats()
         }
     
+    async def _extract_text_async(self, file_path: str):
+        """Extract text in the processing pool, splitting long PDFs across workers by page range."""
+        if Path(file_path).suffix.lower() == '.pdf' and self.processing_pool.max_workers > 1:
+            page_count = await asyncio.to_thread(pdf_page_count, file_path)
+            if page_count > PARALLEL_PAGE_THRESHOLD:
+                text, extraction_method = await extract_pdf_in_pool(file_path, self.processing_pool, page_count)
+                if len(text.strip()) >= 50:
+                    return text, extraction_method
+        return await self.processing_pool.run(extract_text_in_worker, file_path)
+    
+    def _cache_text(self, file_hash: str, text: str, extraction_method: str):
+        """Cache extracted text unless extraction came up (nearly) empty."""
+        if text and len(text.strip()) >= 50:
+            self.extraction_cache.put_text(file_hash, TEXT_EXTRACTION_VERSION, text, extraction_method)
+    
     def _save_text_file(self, text: str, name: Optional[str] = None) -> Path:
         """Save extracted text to file."""
         if not name:
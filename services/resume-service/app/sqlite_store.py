@@ -0,0 +1,48 @@
+"""
+SQLite Store
+Base class of the service's local SQLite databases (job queue, resume
+index, ingest ledger, extraction cache).
+"""
+import asyncio
+import sqlite3
+from pathlib import Path
+from typing import Any, Callable, Union
+
+
+class SQLiteStore:
+    """
+    Connection handling shared by the local SQLite stores.
+    
+    The database runs in WAL mode so readers don't block the writer. Each
+    call opens its own connection and runs in one transaction, so stores
+    are safe to use from several threads; async callers go through _run,
+    which does the work in a thread and never blocks the event loop.
+    """
+    
+    def __init__(self, db_path: Union[str, Path], schema: str):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(schema)
+        finally:
+            conn.close()
+    
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+    
+    def _execute(self, func: Callable, *args) -> Any:
+        """Call func(conn, *args) in a transaction on a new connection."""
+        conn = self._connect()
+        try:
+            with conn:
+                return func(conn, *args)
+        finally:
+            conn.close()
+    
+    async def _run(self, func: Callable, *args) -> Any:
+        """_execute in a worker thread."""
+        return await asyncio.to_thread(self._execute, func, *args)
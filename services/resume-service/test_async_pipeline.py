@@ -0,0 +1,150 @@
+"""
+Async Pipeline Test
+Text extraction in the processing pool and the async LLM path, with a stub
+OpenAI client so no API key or network access is needed.
+"""
+
+import os
+import json
+import time
+import asyncio
+from pathlib import Path
+from types import SimpleNamespace
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+from app.pipeline.llm_extractor import TokenBucket
+from app.resume_processor import ResumeProcessor
+
+SAMPLE_PDF = Path(__file__).parent / "data" / "Resume (1).pdf"
+
+
+class StubCompletions:
+    """Stands in for AsyncOpenAI().chat.completions."""
+    
+    def __init__(self, payload: dict, delay: float = 0.05):
+        self.payload = payload
+        self.delay = delay
+        self.calls = 0
+    
+    async def create(self, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        message = SimpleNamespace(content=json.dumps(self.payload))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def make_processor(tmp_path, payload: dict) -> ResumeProcessor:
+    os.environ["OUTPUT_DIR"] = str(tmp_path / "output")
+    os.environ["TEST_FILES_DIR"] = str(tmp_path / "text")
+    os.environ["DATA_DIR"] = str(tmp_path)
+    processor = ResumeProcessor()
+    processor.llm_extractor.async_client = SimpleNamespace(
+        chat=SimpleNamespace(completions=StubCompletions(payload))
+    )
+    return processor
+
+
+def test_pdf_is_processed_without_blocking_the_event_loop(tmp_path):
+    """Extraction runs in a worker process while the event loop keeps serving."""
+    processor = make_processor(tmp_path, {
+        "contact": {"name": "Test Candidate"},
+        "skills": [{"category": "Programming Languages", "skills": ["Python"]}],
+        "domains": ["AI Engineering"]
+    })
+    
+    async def run():
+        ticks = 0
+        
+        async def heartbeat():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+        
+        beat = asyncio.create_task(heartbeat())
+        try:
+            result = await processor.process_resume_async(str(SAMPLE_PDF))
+        finally:
+            beat.cancel()
+            processor.processing_pool.shutdown()
+        return result, ticks
+    
+    result, ticks = asyncio.run(run())
+    assert result.success, result.error_message
+    assert result.stages_completed == ["text_extraction", "llm_extraction"]
+    assert result.data.contact.name == "Test Candidate"
+    assert ticks > 5
+    
+    stats = processor.get_worker_stats()
+    assert stats["extraction_pool"]["completed"] == 1
+    assert stats["extraction_pool"]["in_flight"] == 0
+    assert stats["llm"]["in_flight"] == 0
+
+
+def test_async_llm_calls_respect_max_concurrency(tmp_path):
+    """Concurrent text requests share the LLM concurrency limit."""
+    processor = make_processor(tmp_path, {"contact": {"name": "A"}})
+    processor.llm_extractor.max_concurrency = 2
+    completions = processor.llm_extractor.async_client.chat.completions
+    peak = {"in_flight": 0}
+    
+    original_create = completions.create
+    
+    async def tracking_create(**kwargs):
+        peak["in_flight"] = max(peak["in_flight"], processor.llm_extractor.stats["llm_calls_in_flight"])
+        return await original_create(**kwargs)
+    
+    completions.create = tracking_create
+    
+    async def run():
+        texts = [f"Resume number {i} " + "experience " * 20 for i in range(6)]
+        return await asyncio.gather(*(processor.process_text_async(text) for text in texts))
+    
+    results = asyncio.run(run())
+    assert all(result.success for result in results)
+    assert completions.calls == 6
+    assert peak["in_flight"] == 2
+
+
+def test_chunks_are_extracted_concurrently(tmp_path):
+    """A multi-chunk resume takes about one LLM round trip, with per-chunk latency recorded."""
+    processor = make_processor(tmp_path, {"contact": {"name": "Long Resume"}, "domains": ["DevOps"]})
+    extractor = processor.llm_extractor
+    extractor.max_chunk_tokens = 500
+    completions = extractor.async_client.chat.completions
+    completions.delay = 0.3
+    
+    text = "Led platform migrations and on-call rotations. " * 160
+    chunk_count = len(extractor._chunk_text(text))
+    assert chunk_count >= 4
+    
+    async def run():
+        started = time.perf_counter()
+        resume = await extractor.extract_resume_async(text)
+        return resume, time.perf_counter() - started
+    
+    resume, elapsed = asyncio.run(run())
+    assert resume.contact.name == "Long Resume"
+    assert completions.calls == chunk_count
+    assert elapsed < completions.delay * 2
+    
+    stats = extractor.get_extraction_stats()
+    assert stats["chunks_processed"] == chunk_count
+    assert len(stats["last_chunk_latencies"]) == chunk_count
+    assert min(stats["last_chunk_latencies"]) >= completions.delay
+
+
+def test_token_bucket_paces_calls_after_burst():
+    """Calls beyond the burst capacity wait for the bucket to refill."""
+    bucket = TokenBucket(rate=20, capacity=2)
+    
+    async def run():
+        started = time.perf_counter()
+        waits = await asyncio.gather(*(bucket.acquire_async() for _ in range(4)))
+        return waits, time.perf_counter() - started
+    
+    waits, elapsed = asyncio.run(run())
+    assert waits[:2] == [0.0, 0.0]
+    assert 0.09 <= elapsed < 0.3
+    assert bucket.acquire() > 0
@@ -0,0 +1,87 @@
+"""
+Chunker Test
+Token-budgeted, section-aware chunking of long resumes.
+"""
+
+import math
+
+from app.pipeline.chunker import chunk_text, estimate_tokens
+
+SECTIONS = ["Summary", "Experience", "Projects", "Education", "Certifications", "Achievements"]
+
+
+def count_words(text: str) -> int:
+    return len(text.split())
+
+
+def long_resume(lines_per_section: int, words_per_line: int = 10) -> str:
+    parts = ["Jane Doe\njane@example.com"]
+    for section in SECTIONS:
+        lines = [
+            "- " + " ".join(f"{section.lower()}{line}w{word}" for word in range(words_per_line - 1))
+            for line in range(lines_per_section)
+        ]
+        parts.append(section + "\n" + "\n".join(lines))
+    return "\n".join(parts)
+
+
+def body_lines(chunks):
+    return [line for chunk in chunks for line in chunk.splitlines() if line not in SECTIONS]
+
+
+def test_short_resume_is_one_chunk():
+    text = long_resume(2)
+    assert chunk_text(text, 4000) == [text]
+    assert chunk_text("   ", 4000) == []
+
+
+def test_whole_sections_are_packed_up_to_the_budget():
+    """Six 112-token sections (plus the contact header) at a 250-token budget pack two per chunk, with no repeated text."""
+    text = long_resume(10)
+    chunks = chunk_text(text, 250, count_words)
+    
+    assert len(chunks) == 3
+    assert all(count_words(chunk) + chunk.count("\n") + 1 <= 250 for chunk in chunks)
+    assert sum(count_words(chunk) for chunk in chunks) == count_words(text)
+    assert [chunk.splitlines()[0] for chunk in chunks[1:]] == ["Projects", "Certifications"]
+
+
+def test_oversized_sections_repeat_only_their_header():
+    """Sections over the budget are split between lines; each piece starts with the section header."""
+    text = long_resume(60)
+    budget = 200
+    chunks = chunk_text(text, budget, count_words)
+    
+    total = count_words(text) + text.count("\n") + 1
+    assert all(count_words(chunk) + chunk.count("\n") + 1 <= budget for chunk in chunks)
+    assert len(chunks) <= math.ceil(total / (budget - 12)) + len(SECTIONS)
+    assert all(chunk.splitlines()[0] in SECTIONS for chunk in chunks[1:])
+    # Every line exactly once, in order: the only overlap is the repeated headers
+    assert body_lines(chunks) == [line for line in text.splitlines() if line not in SECTIONS]
+    repeated_headers = sum(chunk.count("\n" + section) + chunk.startswith(section) for chunk in chunks for section in SECTIONS)
+    assert sum(count_words(chunk) for chunk in chunks) - count_words(text) == repeated_headers - len(SECTIONS)
+
+
+def test_token_dense_text_stays_within_budget():
+    """Long runs without spaces or line breaks (e.g. pasted hashes, tables) are cut to fit."""
+    text = "Experience\n" + "9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08" * 400 + "\n" + "word " * 5000
+    budget = 1000
+    chunks = chunk_text(text, budget)
+    
+    assert all(estimate_tokens(chunk) <= budget for chunk in chunks)
+    assert "".join(chunk.replace("Experience\n", "").replace("\n", "") for chunk in chunks) == text.replace("Experience\n", "").replace("\n", "")
+    assert len(chunks) == math.ceil(estimate_tokens(text) / budget) + 1
+
+
+def test_each_line_is_tokenized_once():
+    """Linear time: the tokenizer sees every line once, not once per candidate split point."""
+    calls = []
+    
+    def counter(text):
+        calls.append(text)
+        return count_words(text)
+    
+    text = long_resume(500)
+    chunks = chunk_text(text, 300, counter)
+    assert len(chunks) > 10
+    assert len(calls) == len(text.splitlines())
@@ -0,0 +1,72 @@
+"""
+Extraction Cache Test
+Persistent text and ResumeJSON caching across processor restarts.
+"""
+
+import asyncio
+
+from app.pipeline.extraction_cache import ExtractionCache, hash_text
+from app.schema import ResumeJSON, ContactInfo
+from test_async_pipeline import SAMPLE_PDF, make_processor
+
+
+def test_repeat_upload_skips_text_and_llm_extraction(tmp_path):
+    """A second processor (e.g. after a restart) reuses the cached text and JSON."""
+    payload = {"contact": {"name": "Cached Candidate"}, "domains": ["Data Science"]}
+    first = make_processor(tmp_path, payload)
+    
+    async def process(processor):
+        try:
+            return await processor.process_resume_async(str(SAMPLE_PDF))
+        finally:
+            processor.processing_pool.shutdown()
+    
+    assert asyncio.run(process(first)).success
+    assert first.llm_extractor.async_client.chat.completions.calls == 1
+    
+    second = make_processor(tmp_path, payload)
+    result = asyncio.run(process(second))
+    assert result.success
+    assert result.data.contact.name == "Cached Candidate"
+    assert second.processing_pool.get_stats()["submitted"] == 0
+    assert second.llm_extractor.async_client.chat.completions.calls == 0
+    
+    stats = second.extraction_cache.get_stats()
+    assert (stats["text_hits"], stats["json_hits"]) == (1, 1)
+
+
+def test_text_key_is_normalized_and_versioned(tmp_path):
+    """Whitespace variants share an entry; another version is a miss."""
+    cache = ExtractionCache(str(tmp_path / "cache.db"))
+    resume = ResumeJSON(contact=ContactInfo(name="Ada"), sections_detected=["contact"])
+    cache.put_resume(hash_text("Ada Lovelace\n\nEngineer"), "v1", resume)
+    
+    assert cache.get_resume(hash_text("  Ada   Lovelace Engineer "), "v1").contact.name == "Ada"
+    assert cache.get_resume(hash_text("Ada Lovelace Engineer"), "v2") is None
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    """The cache stays under max_bytes by dropping the oldest entries."""
+    cache = ExtractionCache(str(tmp_path / "cache.db"), max_bytes=10_000)
+    for i in range(10):
+        cache.put_text(f"file-{i}", "1", f"{i}" * 2_000, "pypdf")
+    
+    assert cache.total_bytes() <= 10_000
+    assert cache.get_text("file-0", "1") is None
+    assert cache.get_text("file-9", "1") == ("9" * 2_000, "pypdf")
+    assert cache.get_stats()["evictions"] > 0
+
+
+def test_unparsable_llm_response_is_not_cached(tmp_path):
+    """A result degraded by a non-JSON LLM response is returned but not reused."""
+    processor = make_processor(tmp_path, {})
+    completions = processor.llm_extractor.async_client.chat.completions
+    completions.payload = "not json"
+    extractor = processor.llm_extractor
+    text = "Jane Doe\njane@example.com\n\nExperience\nBuilt data pipelines at Acme for three years"
+    
+    first = asyncio.run(extractor.extract_resume_async(text))
+    second = asyncio.run(extractor.extract_resume_async(text))
+    assert first.contact.email == second.contact.email == "jane@example.com"
+    assert completions.calls == 2
+    assert processor.extraction_cache.get_resume(hash_text(text), extractor.cache_version) is None
@@ -0,0 +1,103 @@
+"""
+Bulk Ingestion Test
+Directory and manifest ingestion, idempotency and resuming after a failure.
+"""
+
+import asyncio
+import json
+
+from app.ingest import BulkIngester, IngestLedger, iter_items
+from app.resume_index import ResumeIndex
+from test_async_pipeline import make_processor
+
+RESUME = "Candidate {n}\ncandidate{n}@example.com\n\nExperience\nBackend engineer " + "building services " * 10
+
+
+def make_ingester(tmp_path, processor, **kwargs) -> BulkIngester:
+    return BulkIngester(
+        processor,
+        IngestLedger(str(tmp_path / "ingest.db")),
+        ResumeIndex(str(tmp_path / "resumes.db")),
+        tmp_path / "store",
+        **kwargs
+    )
+
+
+def run(processor, ingester, items):
+    async def ingest():
+        try:
+            return await ingester.run(items)
+        finally:
+            processor.processing_pool.shutdown()
+    return asyncio.run(ingest())
+
+
+def test_directory_ingestion_is_idempotent(tmp_path):
+    """Duplicate content is ingested once and a second run skips everything."""
+    source = tmp_path / "resumes"
+    (source / "nested").mkdir(parents=True)
+    for n in range(3):
+        (source / f"resume_{n}.txt").write_text(RESUME.format(n=n))
+    (source / "nested" / "copy_of_0.txt").write_text(RESUME.format(n=0))
+    (source / "notes.md").write_text("not a resume")
+    
+    processor = make_processor(tmp_path, {"contact": {"name": "Bulk Candidate"}, "domains": ["Backend"]})
+    stats = run(processor, make_ingester(tmp_path, processor, concurrency=2), iter_items(source, "bulk"))
+    
+    assert (stats["seen"], stats["processed"], stats["skipped"], stats["failed"]) == (4, 3, 1, 0)
+    assert stats["latency_seconds"]["max"] > 0
+    assert len(list((tmp_path / "store").glob("*.json"))) == 3
+    
+    rerun = make_processor(tmp_path, {})
+    stats = run(rerun, make_ingester(tmp_path, rerun), iter_items(source, "bulk"))
+    assert (stats["processed"], stats["skipped"]) == (0, 4)
+    assert rerun.llm_extractor.async_client.chat.completions.calls == 0
+    
+    resumes, _ = asyncio.run(ResumeIndex(str(tmp_path / "resumes.db")).list_resumes(domain="backend"))
+    assert len(resumes) == 3
+
+
+def test_manifest_failures_are_retried_on_the_next_run(tmp_path):
+    """Bad lines and failed items are reported; only failed items are processed again."""
+    (tmp_path / "a.txt").write_text(RESUME.format(n="a"))
+    manifest = tmp_path / "manifest.jsonl"
+    manifest.write_text("\n".join([
+        json.dumps({"path": "a.txt", "user_id": "u1"}),
+        json.dumps({"text": RESUME.format(n="b"), "name": "b"}),
+        json.dumps({"text": "too short"}),
+        "{not json",
+    ]) + "\n")
+    
+    processor = make_processor(tmp_path, {"contact": {"name": "Manifest Candidate"}})
+    stats = run(processor, make_ingester(tmp_path, processor), iter_items(manifest, "bulk"))
+    assert (stats["processed"], stats["failed"]) == (2, 2)
+    assert {failure["source"] for failure in stats["failures"]} == {f"{manifest}:3", f"{manifest}:4"}
+    
+    rerun = make_processor(tmp_path, {})
+    ledger = IngestLedger(str(tmp_path / "ingest.db"))
+    stats = run(rerun, make_ingester(tmp_path, rerun), iter_items(manifest, "bulk"))
+    assert (stats["processed"], stats["skipped"], stats["failed"]) == (0, 2, 2)
+    assert asyncio.run(ledger.counts()) == {"done": 2, "failed": 1}
+    
+    skip = make_processor(tmp_path, {})
+    stats = run(skip, make_ingester(tmp_path, skip, retry_failed=False), iter_items(manifest, "bulk"))
+    assert (stats["skipped"], stats["failed"]) == (3, 1)
+
+
+def test_failed_llm_extraction_is_not_recorded_as_done(tmp_path):
+    """An extraction that came back empty because the LLM call failed is retried on the next run."""
+    (tmp_path / "resumes").mkdir()
+    (tmp_path / "resumes" / "a.txt").write_text(RESUME.format(n="a"))
+    
+    async def unavailable(**kwargs):
+        raise RuntimeError("LLM unavailable")
+    
+    processor = make_processor(tmp_path, {})
+    processor.llm_extractor.async_client.chat.completions.create = unavailable
+    stats = run(processor, make_ingester(tmp_path, processor), iter_items(tmp_path / "resumes", "bulk"))
+    assert (stats["processed"], stats["failed"]) == (0, 1)
+    assert asyncio.run(IngestLedger(str(tmp_path / "ingest.db")).counts()) == {"failed": 1}
+    
+    rerun = make_processor(tmp_path, {"contact": {"name": "Candidate A"}})
+    stats = run(rerun, make_ingester(tmp_path, rerun), iter_items(tmp_path / "resumes", "bulk"))
+    assert (stats["processed"], stats["failed"]) == (1, 0)
@@ -0,0 +1,101 @@
+"""
+Interview Profile Test
+Precomputed domain scores, experience level and skill embedding per resume.
+"""
+
+import asyncio
+import json
+import sqlite3
+
+from app.interview_profile import EMBEDDING_DIMENSIONS, PROFILE_VERSION, build_profile, years_of_experience
+from app.resume_index import ResumeIndex
+
+AI_RESUME = {
+    "contact": {"name": "Maya"},
+    "skills": [
+        {"category": "ML", "skills": ["PyTorch", "TensorFlow", "LangChain", "Hugging Face", "NLP"]},
+        {"category": "Languages", "skills": ["Python", "SQL"]}
+    ],
+    "experience": [
+        {"company": "A", "start_date": "2018-01", "end_date": "2021-01", "technologies": ["PyTorch"]},
+        {"company": "B", "start_date": "2020-01", "end_date": "2024-01", "technologies": ["Docker"]}
+    ],
+    "domains": ["AI Engineering"]
+}
+
+
+def test_profile_scores_domains_and_experience():
+    profile = build_profile(AI_RESUME)
+    
+    assert profile["primary_domain"] == "ai-engineering"
+    assert max(profile["domain_scores"], key=profile["domain_scores"].get) == "ai-engineering"
+    assert profile["top_skills"][0] == "PyTorch"
+    # 2018-01 to 2024-01 with the overlap counted once
+    assert profile["years_of_experience"] == 6.0
+    assert profile["experience_level"] == "senior"
+    assert len(profile["skill_embedding"]) == EMBEDDING_DIMENSIONS
+    assert abs(sum(value * value for value in profile["skill_embedding"]) - 1) < 0.01
+
+
+def test_unrecognized_skills_fall_back_to_resume_based():
+    profile = build_profile({"skills": [{"category": "Other", "skills": ["Cooking", "Gardening"]}]})
+    assert profile["primary_domain"] == "resume-based"
+    assert profile["experience_level"] == "junior"
+    assert years_of_experience([{"start_date": "2023-01", "end_date": None}]) == 0.0
+
+
+def test_profile_is_stored_with_the_index_entry(tmp_path):
+    index = ResumeIndex(str(tmp_path / "resumes.db"))
+    
+    async def run():
+        await index.upsert("maya_1", "maya", AI_RESUME)
+        stored = await index.get_profile("maya_1")
+        await index.delete("maya_1")
+        return stored, await index.get_profile("maya_1")
+    
+    stored, after_delete = asyncio.run(run())
+    assert stored == build_profile(AI_RESUME)
+    assert after_delete is None
+
+
+def test_malformed_dates_are_skipped():
+    experience = [
+        {"start_date": "2019-2021", "end_date": "2020-13"},
+        {"start_date": "2020-00", "end_date": "2021-01"},
+        {"start_date": "2016-01", "end_date": "2018-01"}
+    ]
+    assert years_of_experience(experience) == 2.0
+
+
+def test_outdated_profile_is_rebuilt_from_the_stored_json(tmp_path):
+    index = ResumeIndex(str(tmp_path / "resumes.db"))
+    (tmp_path / "maya_1.json").write_text(json.dumps(AI_RESUME))
+    
+    async def run():
+        await index.upsert("maya_1", "maya", AI_RESUME)
+        with sqlite3.connect(index.db_path) as conn:
+            conn.execute("UPDATE interview_profiles SET profile = ?", (json.dumps({"version": "0"}),))
+        return await index.get_profile("maya_1", tmp_path), await index.get_profile("maya_1")
+    
+    rebuilt, stored = asyncio.run(run())
+    assert rebuilt["version"] == PROFILE_VERSION
+    assert stored == rebuilt
+
+
+def test_ongoing_roles_are_counted_up_to_the_lookup(tmp_path):
+    index = ResumeIndex(str(tmp_path / "resumes.db"))
+    resume = {"experience": [{"company": "C", "start_date": "2015-01", "end_date": "Present"}]}
+    
+    async def run():
+        await index.upsert("lee_1", "lee", resume)
+        # As stored on an earlier day; no JSON file is needed to bring it up to date
+        with sqlite3.connect(index.db_path) as conn:
+            profile = json.loads(conn.execute("SELECT profile FROM interview_profiles").fetchone()[0])
+            profile.update(years_of_experience=1.0, experience_level="junior")
+            conn.execute("UPDATE interview_profiles SET profile = ?", (json.dumps(profile),))
+        return await index.get_profile("lee_1", tmp_path)
+    
+    profile = asyncio.run(run())
+    assert profile["experience_periods"] == [["2015-01-01", None]]
+    assert profile["years_of_experience"] == years_of_experience(resume["experience"]) > 10
+    assert profile["experience_level"] == "senior"
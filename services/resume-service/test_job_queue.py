@@ -0,0 +1,119 @@
+"""
+Job Queue Test
+Background resume jobs: durable queue, workers and completion callbacks.
+"""
+
+import asyncio
+import json
+
+import httpx
+
+from app.job_queue import JobQueue, JobWorkers
+from test_async_pipeline import make_processor
+
+
+def test_text_jobs_are_processed_and_reported(tmp_path):
+    """Queued jobs are drained by the workers and each callback is delivered."""
+    processor = make_processor(tmp_path, {"contact": {"name": "Queued Candidate"}})
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+    callbacks = []
+    
+    def receive(request: httpx.Request) -> httpx.Response:
+        callbacks.append(json.loads(request.read()))
+        return httpx.Response(204)
+    
+    async def handler(job, input_text):
+        result = await processor.process_text_async(input_text)
+        return {"success": result.success, "error_message": result.error_message}
+    
+    workers = JobWorkers(queue, handler, workers=2, transport=httpx.MockTransport(receive))
+    
+    async def run():
+        await workers.start()
+        jobs = [
+            await queue.enqueue(
+                user_id="bulk",
+                resume_id=f"bulk_{i}",
+                input_text=f"Resume number {i} " + "experience " * 20,
+                callback_url="http://client.local/done"
+            )
+            for i in range(4)
+        ]
+        workers.notify()
+        for _ in range(200):
+            if (await queue.counts())["succeeded"] == len(jobs):
+                break
+            await asyncio.sleep(0.05)
+        await workers.stop()
+        return [await queue.get(job["job_id"]) for job in jobs]
+    
+    finished = asyncio.run(run())
+    assert [job["status"] for job in finished] == ["succeeded"] * 4
+    assert all(job["callback_status"] == "delivered" for job in finished)
+    assert all(job["result"]["success"] for job in finished)
+    assert sorted(callback["resume_id"] for callback in callbacks) == [f"bulk_{i}" for i in range(4)]
+    assert workers.get_stats()["processed"] == 4
+
+
+def test_interrupted_jobs_are_requeued_on_start(tmp_path):
+    """A job left running by a stopped process runs again after a restart."""
+    db_path = str(tmp_path / "jobs.db")
+    handled = []
+    
+    async def handler(job, input_text):
+        handled.append((job["job_id"], input_text, job["attempts"]))
+        return {"success": True}
+    
+    async def run():
+        first = JobQueue(db_path)
+        job = await first.enqueue(user_id="u", resume_id="u_1", input_text="resume text")
+        assert (await first.claim())["job_id"] == job["job_id"]
+        
+        # Simulated restart: a new queue on the same database
+        workers = JobWorkers(JobQueue(db_path), handler, workers=1)
+        await workers.start()
+        for _ in range(100):
+            if handled:
+                break
+            await asyncio.sleep(0.05)
+        await workers.stop()
+        return job["job_id"], await workers.queue.get(job["job_id"])
+    
+    job_id, job = asyncio.run(run())
+    assert handled == [(job_id, "resume text", 2)]
+    assert job["status"] == "succeeded"
+    assert job["callback_status"] is None
+
+
+def test_pending_callbacks_are_resent_on_start(tmp_path):
+    """A job that finished before its callback was sent is reported after a restart."""
+    db_path = str(tmp_path / "jobs.db")
+    callbacks = []
+    
+    def receive(request: httpx.Request) -> httpx.Response:
+        callbacks.append(json.loads(request.read()))
+        return httpx.Response(200)
+    
+    async def handler(job, input_text):
+        return {"success": True}
+    
+    async def run():
+        first = JobQueue(db_path)
+        job = await first.enqueue(
+            user_id="u", resume_id="u_1", input_text="resume text", callback_url="http://client.local/done"
+        )
+        await first.claim()
+        await first.finish(job["job_id"], "succeeded", result={"success": True})
+        
+        workers = JobWorkers(JobQueue(db_path), handler, workers=1, transport=httpx.MockTransport(receive))
+        await workers.start()
+        for _ in range(100):
+            if callbacks:
+                break
+            await asyncio.sleep(0.05)
+        await workers.stop()
+        return await workers.queue.get(job["job_id"])
+    
+    job = asyncio.run(run())
+    assert [callback["resume_id"] for callback in callbacks] == ["u_1"]
+    assert job["callback_status"] == "delivered"
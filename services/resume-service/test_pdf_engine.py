@@ -0,0 +1,74 @@
+"""
+PDF Engine Test
+Page-level extraction, quality scoring and per-page fallback.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pymupdf
+
+from app.pipeline import pdf_engine
+from app.pipeline.pdf_engine import assemble_pages, extract_page_range, extract_pdf, extract_pdf_in_pool, score_page_text
+from app.processing_pool import ProcessingPool
+
+
+def make_pdf(path, pages: int, blank_pages=()):
+    doc = pymupdf.open()
+    for number in range(pages):
+        page = doc.new_page()
+        if number in blank_pages:
+            continue
+        for line in range(40):
+            page.insert_text((72, 72 + line * 16), f"Page {number + 1} line {line}: built data pipelines in Python")
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+def test_quality_score_flags_broken_text():
+    assert score_page_text("Led migration of the billing platform to Kubernetes. " * 10) == 1.0
+    assert score_page_text("E x p e r i e n c e S k i l l s " * 20) < 0.5
+    assert score_page_text("(cid:3)(cid:17)(cid:42) " * 40) < 0.5
+    assert score_page_text("") == 0.0
+
+
+def test_only_poor_pages_fall_back(tmp_path, monkeypatch):
+    """A page PyMuPDF reads badly is re-extracted alone; the others keep their text."""
+    path = make_pdf(tmp_path / "resume.pdf", pages=3, blank_pages={1})
+    fallback_pages = []
+    
+    class RecordingPage:
+        def extract_text(self):
+            return "Recovered education section with degree and university details. " * 5
+    
+    class RecordingPages:
+        def __getitem__(self, number):
+            fallback_pages.append(number)
+            return RecordingPage()
+    
+    monkeypatch.setattr(pdf_engine.pypdf, "PdfReader", lambda file_path: SimpleNamespace(pages=RecordingPages()))
+    
+    pages = extract_page_range(path)
+    assert [page.method for page in pages] == ["pymupdf", "pypdf", "pymupdf"]
+    assert fallback_pages == [1]
+    
+    text, method = assemble_pages(pages)
+    assert method == "pymupdf+pypdf"
+    assert text.index("Page 1 line 0") < text.index("Recovered education") < text.index("Page 3 line 0")
+
+
+def test_pool_extraction_matches_single_process(tmp_path, monkeypatch):
+    """Splitting a long document across workers gives the same text in page order."""
+    path = make_pdf(tmp_path / "long.pdf", pages=12)
+    monkeypatch.setattr(pdf_engine, "PARALLEL_PAGE_THRESHOLD", 4)
+    pool = ProcessingPool(max_workers=3)
+    
+    async def run():
+        try:
+            return await extract_pdf_in_pool(path, pool, page_count=12)
+        finally:
+            pool.shutdown()
+    
+    assert asyncio.run(run()) == extract_pdf(path)
+    assert pool.get_stats()["completed"] == 3
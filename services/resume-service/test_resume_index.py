@@ -0,0 +1,76 @@
+"""
+Resume Index Test
+Filtered, keyset-paginated resume listing from the SQLite metadata index.
+"""
+
+import asyncio
+
+import pytest
+
+from app.resume_index import ResumeIndex
+
+
+def make_index(tmp_path) -> ResumeIndex:
+    index = ResumeIndex(str(tmp_path / "resumes.db"))
+    
+    async def fill():
+        for i in range(25):
+            await index.upsert(
+                f"user{i % 2}_{i:03d}",
+                f"user{i % 2}",
+                {
+                    "contact": {"name": f"Candidate {i}"},
+                    "parsing_confidence": 0.8,
+                    "sections_detected": ["contact"],
+                    "domains": ["DevOps"] if i % 3 == 0 else ["AI Engineering"]
+                },
+                created_at=f"2026-01-01T00:00:{i:02d}"
+            )
+    
+    asyncio.run(fill())
+    return index
+
+
+def collect_pages(index: ResumeIndex, **filters) -> list:
+    async def run():
+        pages, cursor = [], None
+        while True:
+            resumes, cursor = await index.list_resumes(limit=4, cursor=cursor, **filters)
+            pages.append([resume["resume_id"] for resume in resumes])
+            if cursor is None:
+                return pages
+    return asyncio.run(run())
+
+
+def test_keyset_pages_cover_every_resume_once_newest_first(tmp_path):
+    """Pages are disjoint, ordered, and only the last has no cursor."""
+    pages = collect_pages(make_index(tmp_path))
+    ids = [resume_id for page in pages for resume_id in page]
+    
+    assert len(pages) == 7
+    assert all(len(page) == 4 for page in pages[:-1])
+    assert ids == [f"user{i % 2}_{i:03d}" for i in reversed(range(25))]
+
+
+def test_user_and_domain_filters_apply_before_the_limit(tmp_path):
+    """Filtering happens in the query, so pages stay full."""
+    index = make_index(tmp_path)
+    
+    user_ids = [resume_id for page in collect_pages(index, user_id="user1") for resume_id in page]
+    assert user_ids == [f"user1_{i:03d}" for i in reversed(range(1, 25, 2))]
+    
+    devops = [resume_id for page in collect_pages(index, domain="devops", user_id="user0") for resume_id in page]
+    assert devops == [f"user0_{i:03d}" for i in reversed(range(25)) if i % 6 == 0]
+    
+    async def delete_and_list():
+        assert await index.delete("user0_024")
+        return await index.list_resumes(domain="DevOps", limit=1)
+    
+    resumes, _ = asyncio.run(delete_and_list())
+    assert resumes[0]["resume_id"] == "user1_021"
+    assert resumes[0]["domains"] == ["DevOps"]
+
+
+def test_malformed_cursor_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        asyncio.run(make_index(tmp_path).list_resumes(cursor="not-a-cursor"))
@@ -0,0 +1,114 @@
+"""
+Rule Extractor Test
+Regex pre-extraction of contact details and skills, and the smaller LLM input.
+"""
+
+import asyncio
+
+from app.pipeline.rule_extractor import apply_pre_extraction, pre_extract
+from test_async_pipeline import StubCompletions, make_processor
+
+RESUME_TEXT = """Jane Doe
+Bengaluru, India | +91 98765 43210 | jane.doe@example.com
+linkedin.com/in/janedoe | github.com/janedoe
+
+Summary
+Backend engineer focused on data platforms.
+
+Work Experience
+Senior Engineer, Acme Corp
+Mar 2021 - Present
+- Built the ingestion pipeline
+
+Technical Skills
+Languages: Python, Go, SQL
+Frameworks: FastAPI, Django (REST Framework),
+Celery
+
+Achievements
+- Winner, National Hackathon 2022
+- Speaker at PyCon India
+"""
+
+
+class RecordingCompletions(StubCompletions):
+    """StubCompletions that keeps the prompts it was sent."""
+    
+    def __init__(self, payload: dict):
+        super().__init__(payload, delay=0)
+        self.prompts = []
+    
+    async def create(self, **kwargs):
+        self.prompts.append(kwargs["messages"][0]["content"])
+        return await super().create(**kwargs)
+
+
+def test_rules_extract_contact_skills_and_sections():
+    pre = pre_extract(RESUME_TEXT)
+    
+    assert pre.contact["email"] == "jane.doe@example.com"
+    assert pre.contact["phone"] == "+91 98765 43210"
+    assert pre.contact["linkedin"] == "linkedin.com/in/janedoe"
+    assert pre.contact["github"] == "github.com/janedoe"
+    assert pre.contact["name"] == "Jane Doe"
+    assert pre.skills == [
+        {"category": "Languages", "skills": ["Python", "Go", "SQL"]},
+        {"category": "Frameworks", "skills": ["FastAPI", "Django (REST Framework)", "Celery"]},
+    ]
+    assert pre.achievements == ["Winner, National Hackathon 2022", "Speaker at PyCon India"]
+    assert pre.date_ranges["experience"] == [("2021-03", "Present")]
+    assert set(pre.sections) == {"summary", "experience", "skills", "achievements"}
+    
+    # Only the ambiguous sections (plus a skills summary) are left for the LLM
+    assert "jane.doe@example.com" not in pre.llm_text
+    assert "Frameworks:" not in pre.llm_text
+    assert "Hackathon" not in pre.llm_text
+    assert "Built the ingestion pipeline" in pre.llm_text
+    assert len(pre.llm_text) < len(RESUME_TEXT)
+
+
+def test_rule_fields_override_llm_and_fill_missing_dates():
+    pre = pre_extract(RESUME_TEXT)
+    merged = apply_pre_extraction({
+        "contact": {"name": "Jane Doe", "email": "jane.doe@exmaple.com", "location": "Bengaluru"},
+        "skills": [],
+        "experience": [{"company": "Acme Corp", "position": "Senior Engineer"}],
+        "achievements": ["Speaker at PyCon India"]
+    }, pre)
+    
+    assert merged["contact"]["email"] == "jane.doe@example.com"
+    assert merged["contact"]["location"] == "Bengaluru"
+    assert merged["skills"] == pre.skills
+    assert merged["achievements"] == ["Winner, National Hackathon 2022", "Speaker at PyCon India"]
+    assert (merged["experience"][0]["start_date"], merged["experience"][0]["end_date"]) == ("2021-03", "Present")
+
+
+def test_processor_sends_only_ambiguous_sections_to_llm(tmp_path):
+    """The ResumeJSON keeps its shape; rule fields replace what the LLM would have returned."""
+    processor = make_processor(tmp_path, {})
+    completions = RecordingCompletions({
+        "contact": {"name": "Jane Doe", "location": "Bengaluru, India"},
+        "experience": [{"company": "Acme Corp", "position": "Senior Engineer", "responsibilities": []}],
+        "domains": ["Backend Engineering"]
+    })
+    processor.llm_extractor.async_client.chat.completions = completions
+    
+    async def run():
+        try:
+            return await processor.process_text_async(RESUME_TEXT)
+        finally:
+            processor.processing_pool.shutdown()
+    
+    result = asyncio.run(run())
+    assert result.success
+    assert completions.calls == 1
+    assert "jane.doe@example.com" not in completions.prompts[0]
+    assert "Frameworks: FastAPI" not in completions.prompts[0]
+    assert "skills, achievements were extracted separately" in completions.prompts[0]
+    
+    data = result.data
+    assert data.contact.email == "jane.doe@example.com"
+    assert data.contact.github == "github.com/janedoe"
+    assert [entry.category for entry in data.skills] == ["Languages", "Frameworks"]
+    assert data.experience[0].start_date == "2021-03"
+    assert processor.llm_extractor.stats["llm_input_chars_saved"] > 0
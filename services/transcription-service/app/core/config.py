@@ -72,7 +72,79 @@ class Settings(BaseSettings):
         default=300,  # 5 minutes
         description="Maximum chunk duration in seconds"
     )
-    
+
+    # Audio Pre-processing Configuration
+    audio_preprocessing_enabled: bool = Field(
+        default=True,
+        description="Normalize audio before uploading to Groq STT"
+    )
+    audio_target_sample_rate: int = Field(
+        default=16000,
+        description="Sample rate audio is resampled to before upload"
+    )
+    audio_output_codec: str = Field(
+        default="flac",
+        description="Upload codec (wav, flac, ogg); non-wav codecs require ffmpeg"
+    )
+    audio_trim_silence: bool = Field(
+        default=True,
+        description="Trim leading and trailing silence before upload"
+    )
+    audio_silence_threshold_db: float = Field(
+        default=-40.0,
+        description="Frame energy (dBFS) below which audio is treated as silence"
+    )
+    vad_enabled: bool = Field(
+        default=True,
+        description="Run voice-activity detection on uploaded chunks"
+    )
+    vad_skip_silence_percentage: float = Field(
+        default=98.0,
+        description="Chunks at or above this silence percentage are not transcribed"
+    )
+    ffmpeg_path: str = Field(
+        default="ffmpeg",
+        description="ffmpeg binary used to decode/encode compressed audio"
+    )
+
+    # Transcription Queue Configuration
+    transcription_workers: int = Field(
+        default=4,
+        description="Number of concurrent transcription workers"
+    )
+    transcription_queue_max_size: int = Field(
+        default=1000,
+        description="Maximum queued chunks before uploads are rejected with 503"
+    )
+    transcription_max_retries: int = Field(
+        default=3,
+        description="Retries for rate-limited or failed Groq STT requests"
+    )
+    transcription_retry_base_delay: float = Field(
+        default=1.0,
+        description="Base delay in seconds for exponential retry backoff"
+    )
+    transcription_retry_max_delay: float = Field(
+        default=30.0,
+        description="Maximum retry backoff delay in seconds"
+    )
+    transcription_queue_backend: str = Field(
+        default="memory",
+        description="Transcription queue backend (memory or redis)"
+    )
+    transcription_lease_seconds: int = Field(
+        default=300,
+        description="Lease on a session held by a worker; sessions of crashed workers are recovered after it expires"
+    )
+    redis_url: str = Field(
+        default="redis://localhost:6379/0",
+        description="Redis URL for the redis queue backend (local:// for an in-process stand-in)"
+    )
+    session_transcript_cache_size: int = Field(
+        default=1000,
+        description="Sessions whose materialized transcript is kept in memory"
+    )
+
     # Security
     secret_key: str = Field(
         default="your-secret-key-change-in-production",
@@ -97,6 +169,10 @@ class Settings(BaseSettings):
         default="http://localhost:8006",
         description="Feedback service URL"
     )
+    resume_service_url: str = Field(
+        default="http://localhost:8004",
+        description="Resume service URL (interview profiles)"
+    )
     
     # Monitoring
     enable_metrics: bool = Field(default=True, description="Enable Prometheus metrics")
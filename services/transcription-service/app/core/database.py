@@ -1,8 +1,12 @@
+import logging
 from typing import AsyncGenerator
+from sqlalchemy import inspect, text
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
 from .config import settings
 
+logger = logging.getLogger(__name__)
+
 
 class Base(DeclarativeBase):
     """Base class for all models."""
@@ -34,12 +38,34 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             await session.close()
 
 
+# Columns added to existing tables after their first release. create_all only
+# creates missing tables, so init_db adds these to databases created earlier.
+ADDED_COLUMNS = [
+    ("transcriptions", "overlap_seconds", "FLOAT"),
+    ("media_chunks", "silence_percentage", "FLOAT"),
+    ("media_chunks", "audio_quality_score", "FLOAT"),
+]
+
+
+def _add_missing_columns(sync_conn) -> None:
+    """Add ADDED_COLUMNS that an existing database does not have yet."""
+    inspector = inspect(sync_conn)
+    for table, column, ddl in ADDED_COLUMNS:
+        if not inspector.has_table(table):
+            continue
+        if column in {existing["name"] for existing in inspector.get_columns(table)}:
+            continue
+        sync_conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+        logger.info(f"Added column {table}.{column}")
+
+
 async def init_db() -> None:
     """Initialize database tables."""
     async with engine.begin() as conn:
         # Import all models to ensure they are registered
-        from ..models import Transcription, TTSCache, MediaChunk, ProcessingTask
+        from ..models import Transcription, TTSCache, MediaChunk, ProcessingTask, SessionTranscript
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_add_missing_columns)
 
 
 async def close_db() -> None:
@@ -10,6 +10,8 @@ from .core.config import settings
 from .core.database import init_db, close_db
 from .routers import transcribe, tts, interview, personas
 from .services.playai_tts import GroqTTSClient
+from .services.groq_stt import GroqSTTClient
+from .services.transcription_queue import transcription_queue
 groq_tts_client = GroqTTSClient()
 
 # Configure logging
@@ -41,10 +43,14 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     settings.tts_cache_dir.mkdir(parents=True, exist_ok=True)
     logger.info(f"Directories created: {settings.upload_dir}, {settings.tts_cache_dir}")
     
+    # Start transcription workers
+    await transcription_queue.start()
+    
     yield
     
     # Shutdown
     logger.info("Shutting down transcription service...")
+    await transcription_queue.stop()
     try:
         await close_db()
         logger.info("Database connections closed")
@@ -217,7 +223,9 @@ async def metrics_legacy():
             "tts": "/api/v1/tts",
             "interview": "/api/v1/interview",
             "health": "/health"
-        }
+        },
+        "stt_upload": GroqSTTClient.get_upload_stats(),
+        "transcription_queue": await transcription_queue.get_stats()
     }
 
 
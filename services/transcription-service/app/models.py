@@ -24,6 +24,7 @@ class Transcription(Base):
     segments = Column(Text, nullable=True)  # JSON string for detailed segments
     language = Column(String(10), nullable=True)  # Detected language
     duration_seconds = Column(Float, nullable=True)  # Audio duration
+    overlap_seconds = Column(Float, nullable=True)  # Overlap with the previous chunk
     
     # Timestamps
     created_at = Column(DateTime, default=func.now(), nullable=False)
@@ -33,6 +34,35 @@ class Transcription(Base):
         return f"<Transcription(id={self.id}, chunk_id='{self.chunk_id}', confidence={self.confidence})>"
 
 
+class SessionTranscript(Base):
+    """Model for the incrementally stitched transcript of a session."""
+    __tablename__ = "session_transcripts"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    session_id = Column(String(255), unique=True, index=True, nullable=False)
+    transcript_text = Column(Text, nullable=False, default="")
+    
+    # Stitching progress
+    next_sequence_index = Column(Integer, default=0)  # First chunk not yet stitched
+    version = Column(Integer, default=0)  # Incremented on every appended delta
+    
+    # Aggregates over transcribed chunks
+    total_chunks = Column(Integer, default=0)
+    confidence_sum = Column(Float, default=0.0)
+    duration_seconds = Column(Float, default=0.0)
+    
+    # Timestamps
+    created_at = Column(DateTime, default=func.now(), nullable=False)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
+    
+    @property
+    def confidence_score(self) -> float:
+        return self.confidence_sum / self.total_chunks if self.total_chunks else 0.0
+    
+    def __repr__(self) -> str:
+        return f"<SessionTranscript(session_id='{self.session_id}', version={self.version})>"
+
+
 class TTSCache(Base):
     """Model for caching TTS generated audio files."""
     __tablename__ = "tts_cache"
@@ -67,8 +97,12 @@ class MediaChunk(Base):
     file_size_bytes = Column(Integer, nullable=True)
     duration_seconds = Column(Float, nullable=True)
     
+    # Voice activity metrics
+    silence_percentage = Column(Float, nullable=True)  # 0.0 to 100.0
+    audio_quality_score = Column(Float, nullable=True)  # 0.0 to 1.0
+    
     # Processing status
-    transcription_status = Column(String(50), default="pending")  # pending, processing, completed, failed
+    transcription_status = Column(String(50), default="pending")  # pending, queued, processing, completed, skipped, failed, dead_letter
     transcription_id = Column(Integer, nullable=True)  # Reference to Transcription
     
     # Timestamps
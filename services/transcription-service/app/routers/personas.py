@@ -3,11 +3,13 @@ Persona Router for TalentSync Transcription Service
 Handles persona selection and management for interviews
 """
 
+import httpx
 from fastapi import APIRouter, HTTPException, Depends
 from typing import Dict, List, Optional, Any
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.core.database import get_db
 from app.services.persona_service import persona_service, Persona
 
@@ -25,11 +27,14 @@ class PersonaResponse(BaseModel):
     technical_domains: List[str]
     voice: str
     voice_description: str
+    experience_level: Optional[str] = None
+    starting_questions: List[str] = []
 
 class PersonaSelectionRequest(BaseModel):
     """Request model for persona selection."""
     domain: Optional[str] = None
     persona_name: Optional[str] = None
+    resume_id: Optional[str] = None  # Uses the resume service's precomputed interview profile
     resume_data: Optional[Dict[str, Any]] = None
 
 class PersonaSummaryResponse(BaseModel):
@@ -171,14 +176,36 @@ async def get_voice_summary():
         logger.error(f"Error getting voice summary: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+async def fetch_interview_profile(resume_id: str) -> Dict[str, Any]:
+    """Fetch a resume's interview profile (domain scores, experience level, top skills) from the resume service."""
+    url = f"{settings.resume_service_url}/resume/{resume_id}/interview-profile"
+    try:
+        async with httpx.AsyncClient(timeout=10.0) as client:
+            response = await client.get(url)
+    except httpx.RequestError as e:
+        raise HTTPException(status_code=502, detail=f"Resume service unavailable: {str(e)}")
+    
+    if response.status_code == 404:
+        raise HTTPException(status_code=404, detail=f"Resume {resume_id} not found")
+    if response.status_code != 200:
+        raise HTTPException(status_code=502, detail=f"Resume service error: HTTP {response.status_code}")
+    return response.json()
+
 @router.post("/select", response_model=PersonaResponse)
 async def select_persona(request: PersonaSelectionRequest):
-    """Select a persona based on domain, name, or resume data."""
+    """Select a persona based on domain, name, resume ID or resume data."""
     try:
         persona = None
+        profile = None
+        
+        # A processed resume: one lookup of its precomputed interview profile
+        if request.resume_id:
+            profile = await fetch_interview_profile(request.resume_id)
+            persona = persona_service.get_persona_for_profile(profile)
         
         # If resume data is provided, use it to select persona
-        if request.resume_data:
+        elif request.resume_data:
+            profile = request.resume_data.get("interview_profile")
             persona = persona_service.get_persona_for_resume(request.resume_data)
         
         # If domain and persona name are provided, get specific persona
@@ -203,7 +230,11 @@ async def select_persona(request: PersonaSelectionRequest):
             interview_approach=persona.interview_approach,
             evaluation_criteria=persona.evaluation_criteria,
             success_indicators=persona.success_indicators,
-            technical_domains=persona.technical_domains
+            technical_domains=persona.technical_domains,
+            voice=persona.voice,
+            voice_description=persona_service.voice_mapping.get(persona.voice, ""),
+            experience_level=profile.get("experience_level") if profile else None,
+            starting_questions=persona_service.get_starting_questions(persona, profile) if profile else []
         )
     except HTTPException:
         raise
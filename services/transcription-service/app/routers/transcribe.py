@@ -1,8 +1,10 @@
+import asyncio
 import base64
 import json
 import logging
-from typing import List, Dict, Any
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, BackgroundTasks
+from typing import Dict, Any
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 from ..core.database import get_db
@@ -11,7 +13,10 @@ from ..schemas.transcription import (
     TranscriptionResponse, TTSRequest, TTSResponse, TTSCacheInfo,
     ChunkUploadRequest, ChunkUploadResponse, SessionCompleteRequest, SessionCompleteResponse
 )
+from ..services.audio_processing import VoiceActivityResult
 from ..services.groq_stt import GroqSTTClient
+from ..services.session_transcripts import session_transcript_service
+from ..services.transcription_queue import TranscriptionJob, transcription_queue
 from ..services.playai_tts import GroqTTSClient
 from ..core.config import settings
 
@@ -22,6 +27,11 @@ router = APIRouter(prefix="/api/v1/transcribe", tags=["transcription"])
 groq_client = GroqSTTClient()
 groq_tts_client = GroqTTSClient()
 
+SSE_KEEPALIVE_SECONDS = 15.0
+
+# Chunk statuses that accept a new upload of the same chunk
+RESUBMITTABLE_STATUSES = ("dead_letter", "failed")
+
 
 @router.post("/", response_model=TranscriptionResponse)
 async def transcribe_chunk(
@@ -73,12 +83,14 @@ async def transcribe_chunk(
             confidence=transcription_result.get("confidence"),
             segments=json.dumps(transcription_result.get("segments", [])),
             language=transcription_result.get("language"),
-            duration_seconds=transcription_result.get("duration")
+            duration_seconds=transcription_result.get("duration"),
+            overlap_seconds=overlap_seconds
         )
         
         db.add(transcription)
         await db.commit()
         await db.refresh(transcription)
+        await session_transcript_service.add_transcription(transcription)
         
         logger.info(f"Transcription completed for chunk {chunk_id}")
         
@@ -98,14 +110,15 @@ async def transcribe_chunk(
 @router.post("/chunk", response_model=ChunkUploadResponse)
 async def process_chunk(
     request: ChunkUploadRequest,
-    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db)
 ):
     """
     Process an audio chunk with base64 encoded data.
     
     This endpoint is designed for real-time chunked processing
-    with 2-second overlap between chunks.
+    with 2-second overlap between chunks. Chunks are handed to the
+    bounded transcription worker pool; when the queue is full the
+    request is rejected with 503 so clients can back off.
     """
     try:
         # Decode base64 audio data
@@ -127,7 +140,8 @@ async def process_chunk(
         )
         existing_chunk = existing_chunk.scalar_one_or_none()
         
-        if existing_chunk:
+        # Dead-lettered chunks may be submitted again; anything else is a duplicate
+        if existing_chunk and existing_chunk.transcription_status not in RESUBMITTABLE_STATUSES:
             return ChunkUploadResponse(
                 chunk_id=request.chunk_id,
                 session_id=request.session_id,
@@ -137,32 +151,70 @@ async def process_chunk(
                 message="Chunk already processed"
             )
         
-        # Create media chunk record
-        media_chunk = MediaChunk(
-            session_id=request.session_id,
-            chunk_id=request.chunk_id,
-            sequence_index=request.sequence_index
-        )
+        # Take the queue slot atomically before anything is committed, so
+        # concurrent requests cannot all pass a capacity check and overfill it
+        if not await transcription_queue.reserve():
+            raise HTTPException(
+                status_code=503,
+                detail="Transcription queue is full, retry later",
+                headers={"Retry-After": str(int(settings.transcription_retry_max_delay))}
+            )
         
-        db.add(media_chunk)
-        await db.commit()
-        await db.refresh(media_chunk)
+        committed = slot_handed_over = False
+        try:
+            # Voice activity lets silent chunks skip transcription; the media service's
+            # upload event already carries it, so only measure chunks sent without it
+            vad_result = None
+            if settings.vad_enabled:
+                if request.silence_percentage is not None and request.audio_quality_score is not None:
+                    vad_result = VoiceActivityResult.from_metrics(
+                        request.silence_percentage,
+                        request.audio_quality_score,
+                        request.duration_seconds
+                    )
+                else:
+                    vad_result = await groq_client.preprocessor.analyze(audio_bytes)
         
-        # Process transcription in background
-        background_tasks.add_task(
-            _process_chunk_transcription,
-            request.chunk_id,
-            request.session_id,
-            request.sequence_index,
-            audio_bytes,
-            request.overlap_seconds
-        )
+            # Create the media chunk record, or reset the dead-lettered one
+            media_chunk = existing_chunk or MediaChunk(
+                session_id=request.session_id,
+                chunk_id=request.chunk_id
+            )
+            media_chunk.sequence_index = request.sequence_index
+            media_chunk.duration_seconds = vad_result.duration_seconds if vad_result else request.duration_seconds
+            media_chunk.silence_percentage = vad_result.silence_percentage if vad_result else None
+            media_chunk.audio_quality_score = vad_result.audio_quality_score if vad_result else None
+            media_chunk.transcription_status = "queued"
+            media_chunk.processed_at = None
+        
+            db.add(media_chunk)
+            await db.commit()
+            committed = True
+            await db.refresh(media_chunk)
+        
+            # From here enqueue() either uses the slot or gives it back
+            slot_handed_over = True
+            await transcription_queue.enqueue(TranscriptionJob(
+                chunk_id=request.chunk_id,
+                session_id=request.session_id,
+                sequence_index=request.sequence_index,
+                audio_bytes=audio_bytes,
+                overlap_seconds=request.overlap_seconds,
+                vad_result=vad_result
+            ), reserved=True)
+        except BaseException:
+            if not slot_handed_over:
+                await transcription_queue.cancel_reservation()
+            if committed:
+                # No worker will pick up this chunk; failed chunks can be resubmitted
+                await _set_chunk_failed(db, media_chunk)
+            raise
         
         return ChunkUploadResponse(
             chunk_id=request.chunk_id,
             session_id=request.session_id,
             sequence_index=request.sequence_index,
-            status="processing",
+            status="queued",
             message="Chunk uploaded and queued for transcription"
         )
         
@@ -173,113 +225,37 @@ async def process_chunk(
         raise HTTPException(status_code=500, detail=f"Chunk processing failed: {str(e)}")
 
 
-async def _process_chunk_transcription(
-    chunk_id: str,
-    session_id: str,
-    sequence_index: int,
-    audio_bytes: bytes,
-    overlap_seconds: float
-):
-    """Background task to process chunk transcription."""
-    try:
-        # Transcribe using Groq
-        transcription_result = await groq_client.transcribe(
-            audio_bytes=audio_bytes,
-            response_format="verbose_json"
-        )
-        
-        # Save to database (using new session)
-        from ..core.database import AsyncSessionLocal
-        async with AsyncSessionLocal() as db:
-            transcription = Transcription(
-                chunk_id=chunk_id,
-                session_id=session_id,
-                sequence_index=sequence_index,
-                transcript_text=transcription_result["text"],
-                confidence=transcription_result.get("confidence"),
-                segments=json.dumps(transcription_result.get("segments", [])),
-                language=transcription_result.get("language"),
-                duration_seconds=transcription_result.get("duration")
-            )
-            
-            db.add(transcription)
-            await db.commit()
-            await db.refresh(transcription)
-            
-            # Update media chunk status
-            media_chunk = await db.execute(
-                select(MediaChunk).where(MediaChunk.chunk_id == chunk_id)
-            )
-            media_chunk = media_chunk.scalar_one_or_none()
-            
-            if media_chunk:
-                media_chunk.transcription_status = "completed"
-                media_chunk.transcription_id = transcription.id
-                media_chunk.processed_at = func.now()
-                await db.commit()
-        
-        logger.info(f"Background transcription completed for chunk {chunk_id}")
-        
-    except Exception as e:
-        logger.error(f"Background transcription failed for chunk {chunk_id}: {str(e)}")
-        # Update chunk status to failed
-        try:
-            from ..core.database import AsyncSessionLocal
-            async with AsyncSessionLocal() as db:
-                media_chunk = await db.execute(
-                    select(MediaChunk).where(MediaChunk.chunk_id == chunk_id)
-                )
-                media_chunk = media_chunk.scalar_one_or_none()
-                
-                if media_chunk:
-                    media_chunk.transcription_status = "failed"
-                    await db.commit()
-        except Exception as update_error:
-            logger.error(f"Failed to update chunk status: {str(update_error)}")
+@router.get("/queue/stats")
+async def get_queue_stats():
+    """Get transcription queue depth and worker statistics."""
+    return await transcription_queue.get_stats()
 
 
 @router.post("/session-complete", response_model=SessionCompleteResponse)
-async def complete_session(
-    request: SessionCompleteRequest,
-    db: AsyncSession = Depends(get_db)
-):
+async def complete_session(request: SessionCompleteRequest):
     """
     Complete a session and return the full transcript.
     
-    This endpoint aggregates all chunks for a session and returns
-    the complete transcript with deduplication of overlapping segments.
+    The transcript is materialized incrementally as chunks finish, with
+    overlapping segments de-duplicated, so this is a single lookup. Chunks
+    still waiting for an earlier one are included; indices that never
+    arrived are treated as gaps.
     """
     try:
-        # Get all transcriptions for the session
-        transcriptions = await db.execute(
-            select(Transcription)
-            .where(Transcription.session_id == request.session_id)
-            .order_by(Transcription.sequence_index)
-        )
-        transcriptions = transcriptions.scalars().all()
+        transcript = await session_transcript_service.get_transcript(request.session_id, flush=True)
         
-        if not transcriptions:
+        if not transcript or not transcript["total_chunks"]:
             raise HTTPException(
                 status_code=404, 
                 detail=f"No transcriptions found for session {request.session_id}"
             )
         
-        # Aggregate transcript with overlap handling
-        full_transcript = _aggregate_transcript_with_overlap(transcriptions)
-        
-        # Calculate overall confidence
-        total_confidence = sum(t.confidence or 0.0 for t in transcriptions)
-        avg_confidence = total_confidence / len(transcriptions) if transcriptions else 0.0
-        
-        # Calculate total duration
-        total_duration = sum(t.duration_seconds or 0.0 for t in transcriptions)
-        
         return SessionCompleteResponse(
             session_id=request.session_id,
-            full_transcript=full_transcript,
-            total_chunks=len(transcriptions),
-            confidence_score=avg_confidence,
-            duration_seconds=total_duration
+            full_transcript=transcript["transcript"],
+            total_chunks=transcript["total_chunks"],
+            confidence_score=transcript["confidence_score"],
+            duration_seconds=transcript["duration_seconds"]
         )
         
     except HTTPException:
@@ -289,61 +265,35 @@ async def complete_session(
         raise HTTPException(status_code=500, detail=f"Session completion failed: {str(e)}")
 
 
-def _aggregate_transcript_with_overlap(transcriptions: List[Transcription]) -> str:
-    """Aggregate transcriptions with overlap handling."""
-    if not transcriptions:
-        return ""
-    
-    # Sort by sequence index
-    sorted_transcriptions = sorted(transcriptions, key=lambda t: t.sequence_index)
-    
-    # Simple aggregation - in production, you'd implement more sophisticated
-    # overlap detection and deduplication
-    aggregated_text = ""
-    
-    for i, transcription in enumerate(sorted_transcriptions):
-        text = transcription.transcript_text.strip()
-        
-        if i == 0:
-            aggregated_text = text
-        else:
-            # Simple overlap handling - remove potential duplicates
-            # This is a basic implementation; production would use more sophisticated algorithms
-            if aggregated_text.endswith(text[:50]):  # Check for overlap
-                aggregated_text += text[50:]
-            else:
-                aggregated_text += " " + text
-    
-    return aggregated_text.strip()
-
-
 @router.get("/session/{session_id}/transcript")
 async def get_session_transcript(
     session_id: str,
+    include_chunks: bool = False,
     db: AsyncSession = Depends(get_db)
 ):
-    """Get the complete transcript for a session."""
+    """
+    Get the complete transcript for a session.
+    
+    Per-chunk transcriptions are only loaded when include_chunks is set.
+    Chunks past a missing index are included, with the missing indices
+    listed in missing_chunks.
+    """
     try:
-        transcriptions = await db.execute(
-            select(Transcription)
-            .where(Transcription.session_id == session_id)
-            .order_by(Transcription.sequence_index)
-        )
-        transcriptions = transcriptions.scalars().all()
+        transcript = await session_transcript_service.get_transcript(session_id, flush=True)
         
-        if not transcriptions:
+        if not transcript or not transcript["total_chunks"]:
             raise HTTPException(
                 status_code=404, 
                 detail=f"No transcriptions found for session {session_id}"
             )
         
-        full_transcript = _aggregate_transcript_with_overlap(transcriptions)
-        
-        return {
-            "session_id": session_id,
-            "transcript": full_transcript,
-            "total_chunks": len(transcriptions),
-            "chunks": [
+        if include_chunks:
+            transcriptions = await db.execute(
+                select(Transcription)
+                .where(Transcription.session_id == session_id)
+                .order_by(Transcription.sequence_index)
+            )
+            transcript["chunks"] = [
                 {
                     "chunk_id": t.chunk_id,
                     "sequence_index": t.sequence_index,
@@ -351,12 +301,67 @@ async def get_session_transcript(
                     "confidence": t.confidence,
                     "duration_seconds": t.duration_seconds
                 }
-                for t in transcriptions
+                for t in transcriptions.scalars().all()
             ]
-        }
+        
+        return transcript
         
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Failed to get session transcript: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Failed to get session transcript: {str(e)}") 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to get session transcript: {str(e)}")
+
+
+@router.get("/session/{session_id}/live")
+async def stream_session_transcript(session_id: str, request: Request):
+    """
+    Stream a session transcript as server-sent events.
+    
+    Sends a `snapshot` event with the current transcript, then a `delta`
+    event with the appended text each time a chunk is stitched. A chunk
+    transcribed after its gap was passed over changes earlier text, so it
+    is sent as another `snapshot` event with the whole transcript.
+    """
+    deltas = session_transcript_service.subscribe(session_id)
+    snapshot = await session_transcript_service.get_transcript(session_id) or {
+        "session_id": session_id,
+        "transcript": "",
+        "version": 0
+    }
+    
+    async def event_stream():
+        try:
+            yield _sse_event("snapshot", snapshot)
+            while not await request.is_disconnected():
+                try:
+                    delta = await asyncio.wait_for(deltas.get(), timeout=SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if delta["version"] > snapshot["version"]:
+                    yield _sse_event("snapshot" if "transcript" in delta else "delta", delta)
+        finally:
+            session_transcript_service.unsubscribe(session_id, deltas)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+async def _set_chunk_failed(db: AsyncSession, media_chunk: MediaChunk) -> None:
+    """Mark a chunk that was recorded as queued but could not be enqueued."""
+    try:
+        await db.rollback()
+        media_chunk.transcription_status = "failed"
+        db.add(media_chunk)
+        await db.commit()
+    except Exception as e:
+        logger.error(f"Could not mark chunk {media_chunk.chunk_id} as failed: {str(e)}")
+
+
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format a server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
@@ -83,6 +83,9 @@ class ChunkUploadRequest(BaseModel):
     sequence_index: int = Field(..., ge=0, description="Sequence index")
     audio_data: str = Field(..., description="Base64 encoded audio data")
     overlap_seconds: float = Field(default=2.0, ge=0, description="Overlap duration")
+    silence_percentage: Optional[float] = Field(None, ge=0.0, le=100.0, description="Silence measured by the media service")
+    audio_quality_score: Optional[float] = Field(None, ge=0.0, le=1.0, description="Audio quality measured by the media service")
+    duration_seconds: Optional[float] = Field(None, ge=0, description="Chunk duration, if known")
 
 
 class ChunkUploadResponse(BaseModel):
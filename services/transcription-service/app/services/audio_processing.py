@@ -0,0 +1,417 @@
+import asyncio
+import io
+import logging
+import shutil
+import subprocess
+import time
+import wave
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Container signatures used to label uploads correctly
+MIME_TYPES = {
+    "wav": "audio/wav",
+    "webm": "audio/webm",
+    "ogg": "audio/ogg",
+    "flac": "audio/flac",
+    "mp3": "audio/mpeg",
+    "m4a": "audio/mp4",
+}
+
+# Analysis frame length used for silence trimming and VAD
+FRAME_MS = 20
+
+# Zero-crossing rate above which a loud frame is treated as broadband noise
+MAX_SPEECH_ZCR = 0.35
+
+# Frames of hangover applied around detected speech (~200 ms)
+VAD_HANGOVER_FRAMES = 10
+
+
+def detect_audio_format(audio_bytes: bytes) -> str:
+    """Detect the audio container from its magic bytes."""
+    header = audio_bytes[:12]
+    if header[:4] == b"RIFF" and header[8:12] == b"WAVE":
+        return "wav"
+    if header[:4] == b"\x1a\x45\xdf\xa3":
+        return "webm"
+    if header[:4] == b"OggS":
+        return "ogg"
+    if header[:4] == b"fLaC":
+        return "flac"
+    if header[4:8] == b"ftyp":
+        return "m4a"
+    if header[:3] == b"ID3" or (len(header) >= 2 and header[0] == 0xFF and (header[1] & 0xE0) == 0xE0):
+        return "mp3"
+    return "unknown"
+
+
+@dataclass
+class PreparedAudio:
+    """Audio payload ready for upload to the STT API."""
+    audio_bytes: bytes
+    format: str
+    original_format: str
+    original_size: int
+    duration_seconds: Optional[float] = None
+    trimmed_seconds: float = 0.0
+    start_offset_seconds: float = 0.0
+    processing_time: float = 0.0
+
+    @property
+    def filename(self) -> str:
+        return f"audio.{self.format}"
+
+    @property
+    def mime_type(self) -> str:
+        return MIME_TYPES.get(self.format, "application/octet-stream")
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.original_size - len(self.audio_bytes)
+
+
+@dataclass
+class VoiceActivityResult:
+    """Result of voice-activity detection over a chunk."""
+    silence_percentage: float
+    audio_quality_score: float
+    noise_level: float
+    speech_seconds: float
+    duration_seconds: float
+
+    @property
+    def is_silent(self) -> bool:
+        return self.silence_percentage >= 100.0
+
+    @classmethod
+    def from_metrics(
+        cls,
+        silence_percentage: float,
+        audio_quality_score: float,
+        duration_seconds: Optional[float] = None
+    ) -> "VoiceActivityResult":
+        """Result built from metrics measured upstream (the media service's upload event)."""
+        duration = duration_seconds or 0.0
+        return cls(
+            silence_percentage=silence_percentage,
+            audio_quality_score=audio_quality_score,
+            noise_level=0.0,
+            speech_seconds=round(duration * (1.0 - silence_percentage / 100.0), 3),
+            duration_seconds=duration
+        )
+
+
+class AudioPreprocessor:
+    """
+    Normalizes audio before STT upload.
+
+    Decodes the input (WAV natively, other containers via ffmpeg when it is
+    installed), downmixes to mono, resamples to the target rate, trims
+    leading/trailing silence and re-encodes to the configured codec. If the
+    result is not smaller than the input, the original bytes are sent.
+    """
+
+    def __init__(self):
+        self.enabled = settings.audio_preprocessing_enabled
+        self.target_sample_rate = settings.audio_target_sample_rate
+        self.output_codec = settings.audio_output_codec
+        self.trim_silence = settings.audio_trim_silence
+        self.silence_threshold_db = settings.audio_silence_threshold_db
+        self.ffmpeg_path = shutil.which(settings.ffmpeg_path)
+
+    async def prepare(self, audio_bytes: bytes) -> PreparedAudio:
+        """Prepare audio for upload without blocking the event loop."""
+        return await asyncio.to_thread(self.prepare_sync, audio_bytes)
+
+    def prepare_sync(self, audio_bytes: bytes) -> PreparedAudio:
+        """
+        Prepare audio for upload.
+
+        Args:
+            audio_bytes: Raw audio data in any supported container
+
+        Returns:
+            PreparedAudio with the bytes and labels to upload
+        """
+        start_time = time.perf_counter()
+        source_format = detect_audio_format(audio_bytes)
+        passthrough = PreparedAudio(
+            audio_bytes=audio_bytes,
+            format=source_format if source_format != "unknown" else "wav",
+            original_format=source_format,
+            original_size=len(audio_bytes)
+        )
+
+        if not self.enabled:
+            return passthrough
+
+        try:
+            decoded = self.decode_pcm(audio_bytes, source_format)
+            if decoded is None:
+                passthrough.processing_time = time.perf_counter() - start_time
+                return passthrough
+
+            samples, sample_rate = decoded
+            samples = resample(samples, sample_rate, self.target_sample_rate)
+            total_samples = len(samples)
+            start = 0
+
+            if self.trim_silence:
+                start, end = silence_bounds(samples, self.target_sample_rate, self.silence_threshold_db)
+                samples = samples[start:end]
+
+            encoded, codec = self._encode(samples)
+            elapsed = time.perf_counter() - start_time
+
+            if len(encoded) >= len(audio_bytes) and source_format in MIME_TYPES:
+                passthrough.processing_time = elapsed
+                return passthrough
+
+            return PreparedAudio(
+                audio_bytes=encoded,
+                format=codec,
+                original_format=source_format,
+                original_size=len(audio_bytes),
+                duration_seconds=len(samples) / self.target_sample_rate,
+                trimmed_seconds=(total_samples - len(samples)) / self.target_sample_rate,
+                start_offset_seconds=start / self.target_sample_rate,
+                processing_time=elapsed
+            )
+
+        except Exception as e:
+            logger.warning(f"Audio preprocessing failed, uploading original audio: {str(e)}")
+            passthrough.processing_time = time.perf_counter() - start_time
+            return passthrough
+
+    async def analyze(self, audio_bytes: bytes) -> Optional[VoiceActivityResult]:
+        """Run voice-activity detection without blocking the event loop."""
+        return await asyncio.to_thread(self.analyze_sync, audio_bytes)
+
+    def analyze_sync(self, audio_bytes: bytes) -> Optional[VoiceActivityResult]:
+        """
+        Run voice-activity detection over raw audio.
+
+        Returns:
+            VoiceActivityResult, or None if the audio could not be decoded
+        """
+        try:
+            decoded = self.decode_pcm(audio_bytes, detect_audio_format(audio_bytes))
+            if decoded is None:
+                return None
+            samples, sample_rate = decoded
+            return detect_voice_activity(samples, sample_rate, self.silence_threshold_db)
+        except Exception as e:
+            logger.warning(f"Voice activity detection failed: {str(e)}")
+            return None
+
+    def decode_pcm(self, audio_bytes: bytes, source_format: str) -> Optional[Tuple[np.ndarray, int]]:
+        """Decode audio into mono float32 samples in [-1, 1]."""
+        if source_format == "wav":
+            decoded = decode_wav(audio_bytes)
+            if decoded is not None:
+                return decoded
+
+        if not self.ffmpeg_path:
+            return None
+
+        # ffmpeg handles downmixing and resampling in a single pass
+        result = subprocess.run(
+            [
+                self.ffmpeg_path, "-hide_banner", "-loglevel", "error",
+                "-i", "pipe:0",
+                "-f", "s16le", "-ac", "1", "-ar", str(self.target_sample_rate),
+                "pipe:1"
+            ],
+            input=audio_bytes,
+            capture_output=True,
+            timeout=60
+        )
+        if result.returncode != 0:
+            logger.warning(f"ffmpeg decode failed: {result.stderr.decode(errors='ignore')[:200]}")
+            return None
+
+        samples = np.frombuffer(result.stdout, dtype="<i2").astype(np.float32) / 32768.0
+        return samples, self.target_sample_rate
+
+    def _encode(self, samples: np.ndarray) -> Tuple[bytes, str]:
+        """Encode samples with the configured codec, falling back to WAV."""
+        wav_bytes = encode_wav(samples, self.target_sample_rate)
+        if self.output_codec == "wav" or not self.ffmpeg_path:
+            return wav_bytes, "wav"
+
+        codec_args = {
+            "flac": ["-f", "flac", "-c:a", "flac"],
+            "ogg": ["-f", "ogg", "-c:a", "libopus", "-b:a", "24k"],
+        }.get(self.output_codec)
+        if codec_args is None:
+            return wav_bytes, "wav"
+
+        result = subprocess.run(
+            [self.ffmpeg_path, "-hide_banner", "-loglevel", "error", "-i", "pipe:0", *codec_args, "pipe:1"],
+            input=wav_bytes,
+            capture_output=True,
+            timeout=60
+        )
+        if result.returncode != 0 or not result.stdout:
+            logger.warning(f"ffmpeg {self.output_codec} encode failed, using WAV")
+            return wav_bytes, "wav"
+
+        return result.stdout, self.output_codec
+
+
+def decode_wav(audio_bytes: bytes) -> Optional[Tuple[np.ndarray, int]]:
+    """Decode PCM WAV data into mono float32 samples."""
+    try:
+        with wave.open(io.BytesIO(audio_bytes), "rb") as wav_file:
+            channels = wav_file.getnchannels()
+            sample_width = wav_file.getsampwidth()
+            sample_rate = wav_file.getframerate()
+            frames = wav_file.readframes(wav_file.getnframes())
+    except (wave.Error, EOFError):
+        return None
+
+    if sample_width == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif sample_width == 2:
+        samples = np.frombuffer(frames, dtype="<i2").astype(np.float32) / 32768.0
+    elif sample_width == 4:
+        samples = np.frombuffer(frames, dtype="<i4").astype(np.float32) / 2147483648.0
+    else:
+        return None
+
+    if channels > 1:
+        usable = len(samples) - len(samples) % channels
+        samples = samples[:usable].reshape(-1, channels).mean(axis=1)
+
+    return samples, sample_rate
+
+
+def encode_wav(samples: np.ndarray, sample_rate: int) -> bytes:
+    """Encode mono float32 samples as 16-bit PCM WAV."""
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767.0).astype("<i2")
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+
+def resample(samples: np.ndarray, source_rate: int, target_rate: int) -> np.ndarray:
+    """Resample using linear interpolation (sufficient for speech at 16 kHz)."""
+    if source_rate == target_rate or len(samples) == 0:
+        return samples
+
+    target_length = int(round(len(samples) * target_rate / source_rate))
+    source_positions = np.arange(len(samples), dtype=np.float64)
+    target_positions = np.linspace(0, len(samples) - 1, target_length)
+    return np.interp(target_positions, source_positions, samples).astype(np.float32)
+
+
+def frame_energy_db(samples: np.ndarray, sample_rate: int, frame_ms: int = FRAME_MS) -> np.ndarray:
+    """Compute per-frame RMS energy in dBFS."""
+    frame_length = max(1, sample_rate * frame_ms // 1000)
+    frame_count = len(samples) // frame_length
+    if frame_count == 0:
+        return np.empty(0, dtype=np.float32)
+
+    frames = samples[:frame_count * frame_length].reshape(frame_count, frame_length)
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float64), axis=1))
+    return 20.0 * np.log10(np.maximum(rms, 1e-10))
+
+
+def frame_zero_crossing_rate(samples: np.ndarray, sample_rate: int, frame_ms: int = FRAME_MS) -> np.ndarray:
+    """Compute the fraction of sign changes per frame."""
+    frame_length = max(2, sample_rate * frame_ms // 1000)
+    frame_count = len(samples) // frame_length
+    if frame_count == 0:
+        return np.empty(0, dtype=np.float32)
+
+    frames = np.signbit(samples[:frame_count * frame_length].reshape(frame_count, frame_length))
+    return np.count_nonzero(frames[:, 1:] != frames[:, :-1], axis=1) / (frame_length - 1)
+
+
+def detect_voice_activity(
+    samples: np.ndarray,
+    sample_rate: int,
+    threshold_db: float
+) -> VoiceActivityResult:
+    """
+    Energy/zero-crossing voice-activity detection.
+
+    A frame is voiced when its energy clears both the absolute threshold and
+    the estimated noise floor by 6 dB, and its zero-crossing rate is low
+    enough to rule out hiss. Voiced regions are dilated by a short hangover
+    so that pauses between words are not counted as silence.
+    """
+    duration = len(samples) / sample_rate if sample_rate else 0.0
+    energy = frame_energy_db(samples, sample_rate)
+    if len(energy) == 0:
+        return VoiceActivityResult(100.0, 0.0, 0.0, 0.0, duration)
+
+    zcr = frame_zero_crossing_rate(samples, sample_rate)
+    noise_floor_db, loud_db = (float(v) for v in np.percentile(energy, [10, 90]))
+    # Without dynamic range the chunk is uniform speech or uniform noise
+    gate_db = threshold_db if loud_db - noise_floor_db < 6.0 else max(threshold_db, noise_floor_db + 6.0)
+    voiced = (energy > gate_db) & (zcr < MAX_SPEECH_ZCR)
+
+    if voiced.any():
+        kernel = np.ones(2 * VAD_HANGOVER_FRAMES + 1)
+        voiced = np.convolve(voiced.astype(np.float32), kernel, mode="same") > 0
+
+    voiced_fraction = float(voiced.mean())
+    speech_seconds = voiced_fraction * duration
+
+    quality = 0.0
+    if voiced_fraction > 0:
+        # Map speech-to-noise ratio (0-30 dB) to 0-1, penalizing clipping
+        snr_db = float(np.mean(energy[voiced])) - min(noise_floor_db, threshold_db)
+        clipped_fraction = float(np.mean(np.abs(samples) >= 0.99))
+        quality = float(np.clip(snr_db / 30.0, 0.0, 1.0)) * (1.0 - min(clipped_fraction * 10.0, 1.0))
+
+    return VoiceActivityResult(
+        silence_percentage=round(100.0 * (1.0 - voiced_fraction), 2),
+        audio_quality_score=round(quality, 3),
+        noise_level=round(10 ** (noise_floor_db / 20.0), 6),
+        speech_seconds=round(speech_seconds, 3),
+        duration_seconds=round(duration, 3)
+    )
+
+
+def silence_bounds(
+    samples: np.ndarray,
+    sample_rate: int,
+    threshold_db: float,
+    padding_ms: int = 200
+) -> Tuple[int, int]:
+    """Sample range left after trimming frames quieter than threshold_db."""
+    energy = frame_energy_db(samples, sample_rate)
+    voiced = np.flatnonzero(energy > threshold_db)
+    if len(voiced) == 0:
+        # Leave fully silent audio untouched; callers decide whether to skip it
+        return 0, len(samples)
+
+    frame_length = max(1, sample_rate * FRAME_MS // 1000)
+    padding = sample_rate * padding_ms // 1000
+    start = max(0, voiced[0] * frame_length - padding)
+    end = min(len(samples), (voiced[-1] + 1) * frame_length + padding)
+    return int(start), int(end)
+
+
+def trim_silence(
+    samples: np.ndarray,
+    sample_rate: int,
+    threshold_db: float,
+    padding_ms: int = 200
+) -> np.ndarray:
+    """Trim leading and trailing frames quieter than threshold_db."""
+    start, end = silence_bounds(samples, sample_rate, threshold_db, padding_ms)
+    return samples[start:end]
@@ -1,12 +1,33 @@
 import json
 import logging
 import base64
+import time
 from typing import Dict, Any, Optional, List
 import httpx
 from ..core.config import settings
+from .audio_processing import AudioPreprocessor, PreparedAudio
 
 logger = logging.getLogger(__name__)
 
+# Upload statistics shared by all client instances
+_upload_stats = {
+    "requests": 0,
+    "original_bytes": 0,
+    "uploaded_bytes": 0,
+    "trimmed_seconds": 0.0,
+    "preprocessing_time": 0.0,
+    "upload_time": 0.0
+}
+
+
+class GroqSTTError(Exception):
+    """Error raised by the Groq STT client."""
+    
+    def __init__(self, message: str, status_code: Optional[int] = None, retryable: bool = False):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retryable = retryable
+
 
 class GroqSTTClient:
     """Client for Groq Speech-to-Text API using Whisper model."""
@@ -18,6 +39,7 @@ class GroqSTTClient:
         self.headers = {
             "Authorization": f"Bearer {self.api_key}"
         }
+        self.preprocessor = AudioPreprocessor()
     
     async def transcribe(
         self, 
@@ -39,11 +61,14 @@ class GroqSTTClient:
             Dictionary containing transcription results
         """
         try:
+            # Normalize, trim and compress audio before upload
+            prepared = await self.preprocessor.prepare(audio_bytes)
+            
             # Prepare request payload according to Groq API docs
             # Make API request to Groq transcriptions endpoint
             async with httpx.AsyncClient(timeout=60.0) as client:
                 # Prepare form data for file upload
-                files = {"file": ("audio.wav", audio_bytes, "audio/wav")}
+                files = {"file": (prepared.filename, prepared.audio_bytes, prepared.mime_type)}
                 data = {
                     "model": self.model,
                     "response_format": response_format,
@@ -53,12 +78,14 @@ class GroqSTTClient:
                 if prompt:
                     data["prompt"] = prompt
                 
+                upload_start = time.perf_counter()
                 response = await client.post(
                     f"{self.base_url}/audio/transcriptions",
                     headers=self.headers,
                     data=data,
                     files=files
                 )
+                self._record_upload(prepared, time.perf_counter() - upload_start)
                 
                 if response.status_code == 200:
                     result = response.json()
@@ -66,24 +93,62 @@ class GroqSTTClient:
                     
                     # Process response based on format
                     processed_result = self._process_response(result, response_format)
+                    if prepared.start_offset_seconds:
+                        # Keep segment timestamps relative to the original chunk
+                        for segment in processed_result["segments"]:
+                            segment["start"] = segment.get("start", 0.0) + prepared.start_offset_seconds
+                            segment["end"] = segment.get("end", 0.0) + prepared.start_offset_seconds
                     return processed_result
                 else:
                     error_msg = f"Groq API error: {response.status_code} - {response.text}"
                     logger.error(error_msg)
-                    raise Exception(error_msg)
+                    raise GroqSTTError(
+                        error_msg,
+                        status_code=response.status_code,
+                        retryable=response.status_code == 429 or response.status_code >= 500
+                    )
                     
+        except GroqSTTError:
+            raise
         except httpx.TimeoutException:
             error_msg = "Groq API request timed out"
             logger.error(error_msg)
-            raise Exception(error_msg)
+            raise GroqSTTError(error_msg, retryable=True)
         except httpx.RequestError as e:
             error_msg = f"Groq API request failed: {str(e)}"
             logger.error(error_msg)
-            raise Exception(error_msg)
+            raise GroqSTTError(error_msg, retryable=True)
         except Exception as e:
             error_msg = f"STT transcription failed: {str(e)}"
             logger.error(error_msg)
-            raise Exception(error_msg)
+            raise GroqSTTError(error_msg)
+    
+    def _record_upload(self, prepared: PreparedAudio, upload_time: float) -> None:
+        """Record byte savings and upload latency for a request."""
+        _upload_stats["requests"] += 1
+        _upload_stats["original_bytes"] += prepared.original_size
+        _upload_stats["uploaded_bytes"] += len(prepared.audio_bytes)
+        _upload_stats["trimmed_seconds"] += prepared.trimmed_seconds
+        _upload_stats["preprocessing_time"] += prepared.processing_time
+        _upload_stats["upload_time"] += upload_time
+        logger.debug(
+            f"STT upload: {prepared.original_format} {prepared.original_size}B -> "
+            f"{prepared.format} {len(prepared.audio_bytes)}B in {upload_time:.3f}s"
+        )
+    
+    @staticmethod
+    def get_upload_stats() -> Dict[str, Any]:
+        """Get aggregate audio pre-processing and upload statistics."""
+        requests = max(_upload_stats["requests"], 1)
+        original_bytes = _upload_stats["original_bytes"]
+        saved_bytes = original_bytes - _upload_stats["uploaded_bytes"]
+        return {
+            **_upload_stats,
+            "saved_bytes": saved_bytes,
+            "savings_ratio": saved_bytes / original_bytes if original_bytes else 0.0,
+            "average_preprocessing_time": _upload_stats["preprocessing_time"] / requests,
+            "average_upload_time": _upload_stats["upload_time"] / requests
+        }
     
     def _process_response(self, response: Dict[str, Any], response_format: str) -> Dict[str, Any]:
         """Process the API response based on format."""
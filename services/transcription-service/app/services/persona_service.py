@@ -4,6 +4,7 @@ Manages different interviewer personas based on domain and candidate background
 """
 
 import os
+import re
 import json
 from pathlib import Path
 from typing import Dict, List, Optional, Any
@@ -27,6 +28,16 @@ class Persona:
     file_path: str
     voice: str = "Briggs-PlayAI"  # Default voice
 
+# Keywords used when a resume arrives without a precomputed interview profile
+DOMAIN_KEYWORDS = {
+    "dsa": ["algorithm", "data structure", "leetcode", "competitive programming"],
+    "devops": ["docker", "kubernetes", "aws", "azure", "terraform", "ci/cd"],
+    "ai-engineering": ["machine learning", "deep learning", "neural network", "tensorflow", "pytorch"],
+    "machine-learning": ["ml", "machine learning", "scikit-learn", "pandas", "numpy"],
+    "data-analyst": ["sql", "tableau", "power bi", "excel", "statistics"],
+    "software-engineering": ["react", "angular", "node.js", "java", "python", "full stack"]
+}
+
 class PersonaService:
     """Service for managing and loading interviewer personas."""
     
@@ -77,6 +88,12 @@ class PersonaService:
             "taylor": "Quinn-PlayAI",  # Full-stack developer - energetic and motivating
         }
         
+        # Keyword patterns compiled once; whole-word matches so "ml" does not match "html"
+        self._domain_patterns = {
+            domain: [re.compile(rf"(?<![\w.]){re.escape(keyword)}(?![\w])") for keyword in keywords]
+            for domain, keywords in DOMAIN_KEYWORDS.items()
+        }
+        
         self._load_personas()
     
     def _load_personas(self):
@@ -154,7 +171,7 @@ class PersonaService:
             
             for line in lines:
                 line = line.strip()
-                if not line or line.startswith('#'):
+                if not line or line.startswith('# '):
                     # Extract name from first line with format "# Name - Title"
                     if not name and line.startswith('# ') and ' - ' in line:
                         name = line[2:].split(' - ')[0].strip()
@@ -167,6 +184,12 @@ class PersonaService:
                     logger.info(f"Found section: {current_section}")
                     continue
                 
+                # Question categories are sub-headings of the sample questions section
+                if line.startswith('### '):
+                    if current_section == "sample question categories":
+                        question_categories[line[4:]] = []
+                    continue
+                
                 # Parse content based on section
                 if current_section == "domain expertise":
                     personality += line + " "
@@ -185,23 +208,11 @@ class PersonaService:
                 elif current_section == "technical domains covered":
                     if line.startswith('- '):
                         technical_domains.append(line[2:])
-                elif current_section == "sample question categories":
-                    # This section contains question categories
-                    pass
-                elif line.startswith('### ') and current_section == "sample question categories":
-                    category = line[4:]
-                    question_categories[category] = []
                 elif current_section == "sample question categories" and line.startswith('- '):
-                    # Find the current category
-                    for category in question_categories.keys():
-                        if category in current_section:
-                            question_categories[category].append(line[2:])
-                            break
-                    else:
-                        # If no category found, add to the last category
-                        if question_categories:
-                            last_category = list(question_categories.keys())[-1]
-                            question_categories[last_category].append(line[2:])
+                    # Questions belong to the most recent category heading
+                    if question_categories:
+                        last_category = list(question_categories.keys())[-1]
+                        question_categories[last_category].append(line[2:].strip('"'))
             
             logger.info(f"Parsed persona - Name: {name}, Domain: {domain}, Expertise: {len(expertise)} items")
             
@@ -346,7 +357,17 @@ class PersonaService:
         return []
     
     def get_persona_for_resume(self, resume_data: Dict[str, Any]) -> Optional[Persona]:
-        """Select the most appropriate persona based on resume data."""
+        """
+        Select the most appropriate persona based on resume data.
+        
+        Uses the interview profile precomputed by the resume service when
+        resume_data is one (or carries one under "interview_profile");
+        otherwise derives domain and experience level from the resume.
+        """
+        profile = resume_data.get("interview_profile") or resume_data
+        if profile.get("primary_domain"):
+            return self.get_persona_for_profile(profile)
+        
         # Analyze resume to determine domain and experience level
         skills = resume_data.get('skills', [])
         experience = resume_data.get('experience', [])
@@ -357,6 +378,27 @@ class PersonaService:
         # Determine experience level
         experience_level = self._determine_experience_level(experience)
         
+        return self._select_persona(domain, experience_level)
+    
+    def get_persona_for_profile(self, profile: Dict[str, Any]) -> Optional[Persona]:
+        """Select a persona from a resume's interview profile (a dictionary lookup, no scoring)."""
+        return self._select_persona(
+            profile.get("primary_domain") or "resume-based",
+            profile.get("experience_level") or "junior"
+        )
+    
+    def get_starting_questions(self, persona: Persona, profile: Dict[str, Any], count: int = 3) -> List[str]:
+        """Opening questions for a candidate: the persona's questions about their top skills first."""
+        questions = self.get_persona_questions(persona)
+        top_skills = [skill.lower() for skill in profile.get("top_skills") or []]
+        
+        def rank(question: str) -> int:
+            text = question.lower()
+            return next((i for i, skill in enumerate(top_skills) if skill in text), len(top_skills))
+        
+        return sorted(questions, key=rank)[:count]
+    
+    def _select_persona(self, domain: str, experience_level: str) -> Optional[Persona]:
         # Select appropriate persona
         if domain == "resume-based":
             return self.get_persona("resume-based", "Olivia")
@@ -370,24 +412,25 @@ class PersonaService:
         
         return None
     
-    def _determine_domain_from_skills(self, skills: List[str]) -> str:
-        """Determine the primary domain based on skills."""
-        skill_text = ' '.join(skills).lower()
+    def _determine_domain_from_skills(self, skills: List[Any]) -> str:
+        """
+        Determine the primary domain based on skills.
         
-        # Define domain keywords
-        domain_keywords = {
-            "dsa": ["algorithm", "data structure", "leetcode", "competitive programming"],
-            "devops": ["docker", "kubernetes", "aws", "azure", "terraform", "ci/cd"],
-            "ai-engineering": ["machine learning", "deep learning", "neural network", "tensorflow", "pytorch"],
-            "machine-learning": ["ml", "machine learning", "scikit-learn", "pandas", "numpy"],
-            "data-analyst": ["sql", "tableau", "power bi", "excel", "statistics"],
-            "software-engineering": ["react", "angular", "node.js", "java", "python", "full stack"]
-        }
+        Accepts skill names or resume-service skill categories
+        ({"category": ..., "skills": [...]}).
+        """
+        names = []
+        for skill in skills:
+            if isinstance(skill, dict):
+                names.extend(skill.get('skills') or [])
+            else:
+                names.append(skill)
+        skill_text = ' | '.join(str(name) for name in names).lower()
         
         # Count matches for each domain
         domain_scores = {}
-        for domain, keywords in domain_keywords.items():
-            score = sum(1 for keyword in keywords if keyword in skill_text)
+        for domain, patterns in self._domain_patterns.items():
+            score = sum(1 for pattern in patterns if pattern.search(skill_text))
             domain_scores[domain] = score
         
         # Return domain with highest score, default to resume-based
@@ -0,0 +1,403 @@
+import asyncio
+import copy
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+
+from ..core.config import settings
+from ..core.database import AsyncSessionLocal
+from ..models import MediaChunk, SessionTranscript, Transcription
+from .transcript_stitcher import ChunkTranscript, TranscriptStitcher
+
+logger = logging.getLogger(__name__)
+
+# Chunk statuses that will never produce a transcription
+GAP_STATUSES = ("skipped", "dead_letter")
+
+# Reloads after another process advanced the same session before giving up
+MAX_STALE_RETRIES = 3
+
+
+class _StaleState(Exception):
+    """The stored transcript moved on since the cached state was loaded."""
+
+
+@dataclass
+class _ChunkUpdate:
+    """A finished chunk waiting to be stitched; chunk is None for gaps."""
+    chunk: Optional[ChunkTranscript]
+    confidence: float = 0.0
+    duration_seconds: float = 0.0
+
+
+@dataclass
+class _SessionState:
+    """Materialized transcript of a session plus chunks buffered out of order."""
+    stitcher: TranscriptStitcher
+    next_sequence_index: int = 0
+    version: int = 0
+    total_chunks: int = 0
+    confidence_sum: float = 0.0
+    duration_seconds: float = 0.0
+    buffered: Dict[int, _ChunkUpdate] = field(default_factory=dict)
+    # next_sequence_index of the stored row when it was last read or written; None without a row
+    stored_index: Optional[int] = None
+
+    def stitch_contiguous(self, session_id: str) -> List[Dict[str, Any]]:
+        """Stitch buffered chunks that continue the transcript; returns the appended deltas."""
+        deltas = []
+        while self.next_sequence_index in self.buffered:
+            update = self.buffered.pop(self.next_sequence_index)
+            if update.chunk is None:
+                self.stitcher.mark_gap()
+            else:
+                delta = self.stitcher.append(update.chunk)
+                self.total_chunks += 1
+                self.confidence_sum += update.confidence
+                self.duration_seconds += update.duration_seconds
+                if delta:
+                    self.version += 1
+                    deltas.append({
+                        "session_id": session_id,
+                        "sequence_index": self.next_sequence_index,
+                        "text": delta,
+                        "version": self.version
+                    })
+            self.next_sequence_index += 1
+        return deltas
+
+    def snapshot(self, session_id: str, flush: bool = False) -> Dict[str, Any]:
+        """
+        Current transcript of the session.
+
+        With flush, buffered chunks are stitched in index order as well and
+        indices nobody filled are treated as gaps (listed in missing_chunks).
+        The state itself is left untouched, so late chunks still land in order.
+        """
+        view, missing = self, []
+        if flush and self.buffered:
+            view = copy.deepcopy(self)
+            while view.buffered:
+                first_index = min(view.buffered)
+                missing.extend(range(view.next_sequence_index, first_index))
+                view.stitcher.mark_gap()
+                view.next_sequence_index = first_index
+                view.stitch_contiguous(session_id)
+        return {
+            "session_id": session_id,
+            "transcript": view.stitcher.text,
+            "version": self.version,
+            "next_sequence_index": self.next_sequence_index,
+            "buffered_chunks": len(self.buffered),
+            "missing_chunks": missing,
+            "total_chunks": view.total_chunks,
+            "confidence_score": view.confidence_sum / view.total_chunks if view.total_chunks else 0.0,
+            "duration_seconds": view.duration_seconds
+        }
+
+
+class SessionTranscriptService:
+    """
+    Incrementally materialized session transcripts.
+
+    Each finished chunk is stitched onto its session transcript as soon as
+    every earlier chunk has finished; chunks that complete out of order are
+    buffered until the gap fills, and skipped or dead-lettered chunks close
+    their gap without adding text (if such a chunk is resubmitted and
+    transcribed later, the transcript is re-stitched from the stored chunk
+    transcriptions). The result is stored in the session_transcripts
+    table, so fetching a transcript is a single row lookup, and every
+    appended delta is pushed to live subscribers.
+
+    Several processes may stitch the same session (redis queue backend): a
+    cached state is only used while the stored row is still at the index it
+    was loaded at, and writes are conditional on that index, so a stale
+    state is reloaded instead of overwriting newer progress.
+
+    Live deltas are delivered to subscribers in the process that stitched
+    the chunk; a re-stitch is delivered as a delta carrying the whole
+    transcript instead of the appended text.
+    """
+
+    def __init__(self, cache_size: int = 1000):
+        self.cache_size = cache_size
+        self._states: "OrderedDict[str, _SessionState]" = OrderedDict()
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+
+    async def add_transcription(self, transcription: Transcription) -> None:
+        """Stitch a saved chunk transcription onto its session transcript."""
+        if not transcription.session_id or transcription.sequence_index is None:
+            return
+        update = _ChunkUpdate(
+            chunk=ChunkTranscript.from_record(transcription),
+            confidence=transcription.confidence or 0.0,
+            duration_seconds=transcription.duration_seconds or 0.0
+        )
+        await self._add(transcription.session_id, transcription.sequence_index, update)
+
+    async def add_gap(self, session_id: str, sequence_index: int) -> None:
+        """Record a chunk that will not be transcribed."""
+        await self._add(session_id, sequence_index, _ChunkUpdate(chunk=None))
+
+    async def get_transcript(self, session_id: str, flush: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Get the materialized transcript of a session, or None if it has none.
+
+        Args:
+            session_id: Session identifier
+            flush: Include buffered chunks past a missing one (see _SessionState.snapshot)
+        """
+        async with self._lock(session_id):
+            state, deltas = await self._update(session_id)
+            if state is None:
+                return None
+            snapshot = state.snapshot(session_id, flush=flush)
+        self._publish(session_id, deltas)
+        return snapshot
+
+    def subscribe(self, session_id: str) -> asyncio.Queue:
+        """Register for transcript deltas of a session."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=256)
+        self._subscribers.setdefault(session_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, session_id: str, queue: asyncio.Queue) -> None:
+        """Stop receiving transcript deltas."""
+        subscribers = self._subscribers.get(session_id)
+        if subscribers:
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[session_id]
+
+    def _cached(self, session_id: str) -> Optional[_SessionState]:
+        state = self._states.get(session_id)
+        if state is not None:
+            self._states.move_to_end(session_id)
+        return state
+
+    def _lock(self, session_id: str) -> asyncio.Lock:
+        lock = self._locks.get(session_id)
+        if lock is None:
+            lock = self._locks[session_id] = asyncio.Lock()
+        return lock
+
+    async def _add(self, session_id: str, sequence_index: int, update: _ChunkUpdate) -> None:
+        try:
+            async with self._lock(session_id):
+                _, deltas = await self._update(session_id, sequence_index, update)
+            self._publish(session_id, deltas)
+        except Exception as e:
+            logger.error(f"Failed to update transcript for session {session_id}: {str(e)}")
+
+    async def _update(
+        self,
+        session_id: str,
+        sequence_index: Optional[int] = None,
+        update: Optional[_ChunkUpdate] = None
+    ) -> Tuple[Optional[_SessionState], List[Dict[str, Any]]]:
+        """Load the session state, buffer an update, stitch and persist; called under the session lock."""
+        for _ in range(MAX_STALE_RETRIES):
+            state = await self._current_state(session_id, create=update is not None)
+            if state is None:
+                return None, []
+            restitched = None
+            if update is not None and sequence_index >= state.next_sequence_index:
+                state.buffered[sequence_index] = update
+            elif update is not None and update.chunk is not None:
+                # A chunk already passed over as a gap (resubmitted after dead-lettering)
+                restitched = await self._restitch(session_id, state, sequence_index)
+            try:
+                deltas = await self._drain(session_id, state, changed=restitched is not None)
+                return state, ([restitched] if restitched else []) + deltas
+            except _StaleState:
+                # Another process advanced the session; reloading picks up its progress
+                self._states.pop(session_id, None)
+        raise RuntimeError(f"Transcript of session {session_id} kept changing while updating it")
+
+    async def _drain(self, session_id: str, state: _SessionState, changed: bool = False) -> List[Dict[str, Any]]:
+        """Stitch buffered chunks that are now contiguous and persist the result."""
+        start_index = state.next_sequence_index
+        deltas = state.stitch_contiguous(session_id)
+        if changed or state.next_sequence_index != start_index or state.stored_index is None:
+            await self._persist(session_id, state)
+        return deltas
+
+    async def _restitch(self, session_id: str, state: _SessionState, sequence_index: int) -> Optional[Dict[str, Any]]:
+        """
+        Rebuild the stitched part of a transcript from the stored chunk transcriptions.
+
+        Returns:
+            A delta with the whole transcript, or None if nothing changed
+        """
+        async with AsyncSessionLocal() as db:
+            transcriptions = await db.execute(
+                select(Transcription)
+                .where(
+                    Transcription.session_id == session_id,
+                    Transcription.sequence_index < state.next_sequence_index
+                )
+                .order_by(Transcription.sequence_index, Transcription.id)
+            )
+            # The latest transcription of each chunk wins
+            latest = {row.sequence_index: row for row in transcriptions.scalars().all()}
+
+        stitcher = TranscriptStitcher()
+        confidence_sum = duration_seconds = 0.0
+        for transcription in latest.values():
+            stitcher.append(ChunkTranscript.from_record(transcription))
+            confidence_sum += transcription.confidence or 0.0
+            duration_seconds += transcription.duration_seconds or 0.0
+        if stitcher.last_sequence_index != state.next_sequence_index - 1:
+            stitcher.mark_gap()
+
+        if stitcher.text == state.stitcher.text and len(latest) == state.total_chunks:
+            return None
+        state.stitcher = stitcher
+        state.total_chunks = len(latest)
+        state.confidence_sum = confidence_sum
+        state.duration_seconds = duration_seconds
+        state.version += 1
+        return {
+            "session_id": session_id,
+            "sequence_index": sequence_index,
+            "transcript": stitcher.text,
+            "version": state.version
+        }
+
+    async def _current_state(self, session_id: str, create: bool = False) -> Optional[_SessionState]:
+        """The cached state if the stored row has not moved since, else a fresh load."""
+        state = self._cached(session_id)
+        if state is not None:
+            async with AsyncSessionLocal() as db:
+                stored_index = await db.execute(
+                    select(SessionTranscript.next_sequence_index)
+                    .where(SessionTranscript.session_id == session_id)
+                )
+                if stored_index.scalar_one_or_none() == state.stored_index:
+                    return state
+            self._states.pop(session_id, None)
+        return await self._load_state(session_id, create=create)
+
+    async def _load_state(self, session_id: str, create: bool = False) -> Optional[_SessionState]:
+        """
+        Load a session from the session_transcripts table.
+
+        Finished chunks past the stitched position are re-read into the
+        buffer, which recovers buffered state after a restart and backfills
+        sessions transcribed before materialization existed.
+        """
+        async with AsyncSessionLocal() as db:
+            row = await db.execute(
+                select(SessionTranscript).where(SessionTranscript.session_id == session_id)
+            )
+            row = row.scalar_one_or_none()
+
+            next_index = row.next_sequence_index if row else 0
+            transcriptions = await db.execute(
+                select(Transcription)
+                .where(
+                    Transcription.session_id == session_id,
+                    Transcription.sequence_index >= next_index
+                )
+            )
+            transcriptions = transcriptions.scalars().all()
+            gaps = await db.execute(
+                select(MediaChunk.sequence_index)
+                .where(
+                    MediaChunk.session_id == session_id,
+                    MediaChunk.sequence_index >= next_index,
+                    MediaChunk.transcription_status.in_(GAP_STATUSES)
+                )
+            )
+            gaps = gaps.scalars().all()
+
+        if row is None and not transcriptions and not gaps and not create:
+            return None
+
+        if row:
+            state = _SessionState(
+                stitcher=TranscriptStitcher.resume(row.transcript_text, next_index - 1 if next_index else None),
+                next_sequence_index=next_index,
+                version=row.version,
+                total_chunks=row.total_chunks,
+                confidence_sum=row.confidence_sum,
+                duration_seconds=row.duration_seconds,
+                stored_index=next_index
+            )
+        else:
+            state = _SessionState(stitcher=TranscriptStitcher())
+
+        for sequence_index in gaps:
+            state.buffered[sequence_index] = _ChunkUpdate(chunk=None)
+        for transcription in transcriptions:
+            state.buffered[transcription.sequence_index] = _ChunkUpdate(
+                chunk=ChunkTranscript.from_record(transcription),
+                confidence=transcription.confidence or 0.0,
+                duration_seconds=transcription.duration_seconds or 0.0
+            )
+
+        self._states[session_id] = state
+        self._evict()
+        return state
+
+    async def _persist(self, session_id: str, state: _SessionState) -> None:
+        """
+        Write the materialized transcript to the database.
+
+        Raises:
+            _StaleState: If the stored row is no longer at state.stored_index
+        """
+        values = {
+            "transcript_text": state.stitcher.text,
+            "next_sequence_index": state.next_sequence_index,
+            "version": state.version,
+            "total_chunks": state.total_chunks,
+            "confidence_sum": state.confidence_sum,
+            "duration_seconds": state.duration_seconds
+        }
+        async with AsyncSessionLocal() as db:
+            if state.stored_index is None:
+                db.add(SessionTranscript(session_id=session_id, **values))
+                try:
+                    await db.commit()
+                except IntegrityError:
+                    raise _StaleState()
+            else:
+                result = await db.execute(
+                    update(SessionTranscript)
+                    .where(
+                        SessionTranscript.session_id == session_id,
+                        SessionTranscript.next_sequence_index == state.stored_index
+                    )
+                    .values(**values)
+                )
+                await db.commit()
+                if result.rowcount != 1:
+                    raise _StaleState()
+        state.stored_index = state.next_sequence_index
+
+    def _publish(self, session_id: str, deltas: List[Dict[str, Any]]) -> None:
+        """Push deltas to live subscribers."""
+        for queue in list(self._subscribers.get(session_id, ())):
+            for delta in deltas:
+                try:
+                    queue.put_nowait(delta)
+                except asyncio.QueueFull:
+                    logger.warning(f"Dropping transcript delta for slow subscriber of session {session_id}")
+
+    def _evict(self) -> None:
+        """Drop least recently used sessions from the in-memory cache."""
+        while len(self._states) > self.cache_size:
+            session_id, _ = self._states.popitem(last=False)
+            lock = self._locks.get(session_id)
+            if lock is not None and not lock.locked():
+                del self._locks[session_id]
+
+
+# Global session transcript service instance
+session_transcript_service = SessionTranscriptService(settings.session_transcript_cache_size)
@@ -0,0 +1,167 @@
+import json
+import re
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Sequence
+
+# Tolerance for Whisper's coarse segment timestamps
+TIMESTAMP_TOLERANCE = 0.1
+# Speech rate used to size the alignment window when no timestamps exist
+WORDS_PER_SECOND = 4.0
+MAX_ALIGNMENT_TOKENS = 64
+MIN_ALIGNMENT_TOKENS = 2
+# Leading tokens of a chunk that may be a word cut at the chunk boundary
+MAX_LEADING_FRAGMENTS = 2
+
+_NORMALIZE_PATTERN = re.compile(r"[^\w']+")
+
+
+@dataclass
+class ChunkTranscript:
+    """Transcript of one chunk, with segment timestamps relative to the chunk start."""
+    sequence_index: int
+    text: str
+    segments: List[Dict[str, Any]] = field(default_factory=list)
+    overlap_seconds: float = 0.0
+
+    @classmethod
+    def from_record(cls, transcription: Any) -> "ChunkTranscript":
+        """Build from a Transcription row."""
+        segments = []
+        if transcription.segments:
+            try:
+                segments = json.loads(transcription.segments)
+            except ValueError:
+                segments = []
+        return cls(
+            sequence_index=transcription.sequence_index or 0,
+            text=transcription.transcript_text or "",
+            segments=segments,
+            overlap_seconds=transcription.overlap_seconds or 0.0
+        )
+
+
+def _normalize(token: str) -> str:
+    return _NORMALIZE_PATTERN.sub("", token.lower())
+
+
+def _longest_suffix_prefix(tail: Sequence[str], head: Sequence[str]) -> int:
+    """
+    Length of the longest suffix of tail that equals a prefix of head.
+
+    Uses the KMP failure function over head + sentinel + tail, so the cost
+    is linear in the two window sizes.
+    """
+    if not tail or not head:
+        return 0
+
+    sequence: List[Optional[str]] = list(head) + [None] + list(tail)
+    failure = [0] * len(sequence)
+    for i in range(1, len(sequence)):
+        k = failure[i - 1]
+        while k > 0 and sequence[i] != sequence[k]:
+            k = failure[k - 1]
+        if sequence[i] == sequence[k]:
+            k += 1
+        failure[i] = k
+    return failure[-1]
+
+
+class TranscriptStitcher:
+    """
+    Stitches consecutive chunk transcripts into one session transcript.
+
+    Chunks overlap the previous chunk by `overlap_seconds`. When segment
+    timestamps are available, segments that end inside the overlap are
+    dropped; a segment straddling the overlap boundary, or a chunk without
+    timestamps, is de-duplicated by aligning its leading tokens with the
+    tail of the transcript (longest common suffix/prefix). Only a bounded
+    window of tokens is compared, so each chunk costs time linear in its
+    own length.
+    """
+
+    def __init__(self, max_alignment_tokens: int = MAX_ALIGNMENT_TOKENS):
+        self.max_alignment_tokens = max_alignment_tokens
+        self._pieces: List[str] = []
+        self._tail: Deque[str] = deque(maxlen=max_alignment_tokens)
+        self.last_sequence_index: Optional[int] = None
+
+    @classmethod
+    def resume(cls, text: str, last_sequence_index: Optional[int]) -> "TranscriptStitcher":
+        """Continue stitching a previously materialized transcript."""
+        stitcher = cls()
+        if text:
+            stitcher._pieces.append(text)
+            stitcher._tail.extend(_normalize(token) for token in text.split()[-stitcher.max_alignment_tokens:])
+        stitcher.last_sequence_index = last_sequence_index
+        return stitcher
+
+    @property
+    def text(self) -> str:
+        return " ".join(self._pieces)
+
+    def append(self, chunk: ChunkTranscript) -> str:
+        """
+        Append a chunk transcript.
+
+        Returns:
+            The text added to the transcript for this chunk
+        """
+        contiguous = (
+            self.last_sequence_index is not None
+            and chunk.sequence_index == self.last_sequence_index + 1
+        )
+        self.last_sequence_index = chunk.sequence_index
+
+        if contiguous and chunk.overlap_seconds > 0:
+            tokens = self._deduplicate(chunk)
+        else:
+            tokens = chunk.text.split()
+
+        delta = " ".join(tokens)
+        if delta:
+            self._pieces.append(delta)
+            self._tail.extend(_normalize(token) for token in tokens)
+        return delta
+
+    def mark_gap(self) -> None:
+        """Record a chunk with no transcript, so the next chunk is not de-duplicated."""
+        self.last_sequence_index = None
+
+    def _deduplicate(self, chunk: ChunkTranscript) -> List[str]:
+        """Tokens of a chunk with its overlap with the transcript removed."""
+        overlap = chunk.overlap_seconds
+        timed = [s for s in chunk.segments if "start" in s and "end" in s]
+
+        if timed:
+            kept = [s for s in timed if s["end"] > overlap + TIMESTAMP_TOLERANCE]
+            tokens = " ".join(s.get("text", "") for s in kept).split()
+            if not kept or kept[0]["start"] >= overlap - TIMESTAMP_TOLERANCE:
+                # Overlap falls on a segment boundary
+                return tokens
+            window = self.max_alignment_tokens
+        else:
+            tokens = chunk.text.split()
+            window = min(self.max_alignment_tokens, int(overlap * WORDS_PER_SECOND * 2) + MIN_ALIGNMENT_TOKENS)
+
+        return tokens[self._overlap_length(tokens, window):]
+
+    def _overlap_length(self, tokens: List[str], window: int) -> int:
+        """Number of leading tokens that repeat the transcript tail."""
+        tail = list(self._tail)[-window:]
+        head = [_normalize(token) for token in tokens[:window + MAX_LEADING_FRAGMENTS]]
+
+        best = 0
+        for skip in range(min(MAX_LEADING_FRAGMENTS, len(head)) + 1):
+            matched = _longest_suffix_prefix(tail, head[skip:skip + window])
+            if matched >= MIN_ALIGNMENT_TOKENS and skip + matched > best:
+                best = skip + matched
+        return best
+
+
+def stitch_transcripts(chunks: Sequence[ChunkTranscript]) -> str:
+    """Stitch chunk transcripts, ordered by sequence index, into one transcript."""
+    stitcher = TranscriptStitcher()
+    for chunk in sorted(chunks, key=lambda c: c.sequence_index):
+        stitcher.append(chunk)
+    return stitcher.text
@@ -0,0 +1,680 @@
+import asyncio
+import base64
+import json
+import logging
+import random
+import time
+import uuid
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Set
+
+from sqlalchemy import select, func
+
+from ..core.config import settings
+from ..core.database import AsyncSessionLocal
+from ..models import Transcription, MediaChunk, ProcessingTask
+from .audio_processing import VoiceActivityResult
+from .groq_stt import GroqSTTClient, GroqSTTError
+from .session_transcripts import session_transcript_service
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TranscriptionJob:
+    """A queued chunk transcription."""
+    chunk_id: str
+    session_id: str
+    sequence_index: int
+    audio_bytes: bytes
+    overlap_seconds: float
+    vad_result: Optional[VoiceActivityResult] = None
+    enqueued_at: float = field(default_factory=time.time)
+
+    def to_json(self) -> str:
+        """Serialize the job for an external queue."""
+        return json.dumps({
+            "chunk_id": self.chunk_id,
+            "session_id": self.session_id,
+            "sequence_index": self.sequence_index,
+            "audio_data": base64.b64encode(self.audio_bytes).decode("ascii"),
+            "overlap_seconds": self.overlap_seconds,
+            "vad_result": asdict(self.vad_result) if self.vad_result else None,
+            "enqueued_at": self.enqueued_at
+        })
+
+    @classmethod
+    def from_json(cls, payload: str) -> "TranscriptionJob":
+        """Deserialize a job produced by to_json."""
+        data = json.loads(payload)
+        vad_result = data.get("vad_result")
+        return cls(
+            chunk_id=data["chunk_id"],
+            session_id=data["session_id"],
+            sequence_index=data["sequence_index"],
+            audio_bytes=base64.b64decode(data["audio_data"]),
+            overlap_seconds=data["overlap_seconds"],
+            vad_result=VoiceActivityResult(**vad_result) if vad_result else None,
+            enqueued_at=data["enqueued_at"]
+        )
+
+
+class InMemoryJobStore:
+    """
+    In-process job store.
+
+    Jobs are kept in per-session FIFO lists; a shared ready queue holds the
+    ids of sessions that have pending work and are not held by a worker.
+    """
+
+    def __init__(self):
+        self._jobs: Dict[str, Deque[TranscriptionJob]] = {}
+        self._scheduled: Set[str] = set()
+        self._ready: asyncio.Queue = asyncio.Queue()
+        self._depth = 0
+
+    async def reserve(self, limit: int) -> bool:
+        """Take a queue slot for a job about to be pushed; False if the queue is full."""
+        if self._depth >= limit:
+            return False
+        self._depth += 1
+        return True
+
+    async def unreserve(self) -> None:
+        self._depth -= 1
+
+    async def push(self, job: TranscriptionJob, reserved: bool = False) -> None:
+        self._jobs.setdefault(job.session_id, deque()).append(job)
+        if not reserved:
+            self._depth += 1
+
+    async def push_front(self, job: TranscriptionJob) -> None:
+        self._jobs.setdefault(job.session_id, deque()).appendleft(job)
+        self._depth += 1
+
+    async def pop(self, session_id: str) -> Optional[TranscriptionJob]:
+        jobs = self._jobs.get(session_id)
+        if not jobs:
+            return None
+        job = jobs.popleft()
+        if not jobs:
+            del self._jobs[session_id]
+        self._depth -= 1
+        return job
+
+    async def pending(self, session_id: str) -> int:
+        return len(self._jobs.get(session_id, ()))
+
+    async def schedule(self, session_id: str) -> bool:
+        """Mark a session as scheduled; returns False if it already was."""
+        if session_id in self._scheduled:
+            return False
+        self._scheduled.add(session_id)
+        return True
+
+    async def unschedule(self, session_id: str) -> None:
+        self._scheduled.discard(session_id)
+
+    # A scheduled session is only ever in the ready queue once and all workers
+    # share this process, so claims always succeed and nothing is orphaned
+    async def claim(self, session_id: str) -> bool:
+        return True
+
+    async def renew(self, session_id: str) -> None:
+        pass
+
+    async def release(self, session_id: str) -> None:
+        pass
+
+    async def recover(self) -> int:
+        return 0
+
+    async def push_ready(self, session_id: str) -> None:
+        self._ready.put_nowait(session_id)
+
+    async def pop_ready(self, timeout: float) -> Optional[str]:
+        try:
+            return await asyncio.wait_for(self._ready.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def depth(self) -> int:
+        return self._depth
+
+
+class RedisJobStore:
+    """
+    Redis-backed job store shared by all service processes.
+
+    Uses the same layout as InMemoryJobStore: a list per session and a ready
+    list consumed with BLPOP. Scheduled and worker-held sessions are marked
+    with keys that expire after `lease_seconds` and are renewed while a
+    worker processes the session, so the sessions of a crashed worker are
+    picked up again by recover() instead of staying scheduled forever.
+    Recovery can put a session in the ready list twice; the held key
+    (claim) keeps it to one worker at a time.
+    """
+
+    def __init__(self, client: Any, prefix: str = "transcription", lease_seconds: int = 300):
+        self.client = client
+        self.prefix = prefix
+        self.lease_seconds = lease_seconds
+        self.token = uuid.uuid4().hex
+
+    def _key(self, *parts: str) -> str:
+        return ":".join((self.prefix, *parts))
+
+    async def reserve(self, limit: int) -> bool:
+        """Take a queue slot for a job about to be pushed; False if the queue is full."""
+        # INCRBY is atomic, so concurrent reservations cannot overshoot the limit
+        if await self.client.incrby(self._key("depth"), 1) <= limit:
+            return True
+        await self.unreserve()
+        return False
+
+    async def unreserve(self) -> None:
+        await self.client.incrby(self._key("depth"), -1)
+
+    async def push(self, job: TranscriptionJob, reserved: bool = False) -> None:
+        await self.client.rpush(self._key("session", job.session_id), job.to_json())
+        await self.client.sadd(self._key("sessions"), job.session_id)
+        if not reserved:
+            await self.client.incrby(self._key("depth"), 1)
+
+    async def push_front(self, job: TranscriptionJob) -> None:
+        await self.client.lpush(self._key("session", job.session_id), job.to_json())
+        await self.client.sadd(self._key("sessions"), job.session_id)
+        await self.client.incrby(self._key("depth"), 1)
+
+    async def pop(self, session_id: str) -> Optional[TranscriptionJob]:
+        payload = await self.client.lpop(self._key("session", session_id))
+        if payload is None:
+            return None
+        await self.client.incrby(self._key("depth"), -1)
+        if isinstance(payload, bytes):
+            payload = payload.decode("utf-8")
+        return TranscriptionJob.from_json(payload)
+
+    async def pending(self, session_id: str) -> int:
+        return await self.client.llen(self._key("session", session_id))
+
+    async def schedule(self, session_id: str) -> bool:
+        return bool(await self.client.set(
+            self._key("scheduled", session_id), self.token, nx=True, ex=self.lease_seconds
+        ))
+
+    async def unschedule(self, session_id: str) -> None:
+        await self.client.delete(self._key("scheduled", session_id))
+
+    async def claim(self, session_id: str) -> bool:
+        """Hold a session popped from the ready list; False if another worker holds it."""
+        if not await self.client.set(self._key("held", session_id), self.token, nx=True, ex=self.lease_seconds):
+            return False
+        await self.client.expire(self._key("scheduled", session_id), self.lease_seconds)
+        return True
+
+    async def renew(self, session_id: str) -> None:
+        await self.client.expire(self._key("held", session_id), self.lease_seconds)
+        await self.client.expire(self._key("scheduled", session_id), self.lease_seconds)
+
+    async def release(self, session_id: str) -> None:
+        await self.client.delete(self._key("held", session_id))
+
+    async def recover(self) -> int:
+        """Reschedule sessions with queued jobs whose lease has expired."""
+        recovered = 0
+        for session_id in await self.client.smembers(self._key("sessions")):
+            if isinstance(session_id, bytes):
+                session_id = session_id.decode("utf-8")
+            if await self.pending(session_id) == 0:
+                await self.client.srem(self._key("sessions"), session_id)
+                # A job pushed since the check re-adds the session on its own
+                if await self.pending(session_id) > 0:
+                    await self.client.sadd(self._key("sessions"), session_id)
+                continue
+            if await self.schedule(session_id):
+                await self.push_ready(session_id)
+                recovered += 1
+        return recovered
+
+    async def push_ready(self, session_id: str) -> None:
+        await self.client.rpush(self._key("ready"), session_id)
+
+    async def pop_ready(self, timeout: float) -> Optional[str]:
+        item = await self.client.blpop([self._key("ready")], timeout=max(1, int(timeout)))
+        if item is None:
+            return None
+        session_id = item[1]
+        return session_id.decode("utf-8") if isinstance(session_id, bytes) else session_id
+
+    async def depth(self) -> int:
+        return int(await self.client.get(self._key("depth")) or 0)
+
+
+class LocalRedis:
+    """
+    In-process stand-in for the subset of Redis commands used by
+    RedisJobStore. Selected with REDIS_URL=local:// for development and
+    tests when no Redis server is available.
+    """
+
+    def __init__(self):
+        self._lists: Dict[str, Deque[str]] = {}
+        self._sets: Dict[str, Set[str]] = {}
+        self._values: Dict[str, Any] = {}
+        self._expires: Dict[str, float] = {}
+        self._changed = asyncio.Condition()
+
+    def _value(self, key: str) -> Any:
+        if key in self._expires and self._expires[key] <= time.monotonic():
+            del self._expires[key]
+            self._values.pop(key, None)
+        return self._values.get(key)
+
+    async def rpush(self, key: str, value: str) -> int:
+        async with self._changed:
+            self._lists.setdefault(key, deque()).append(value)
+            self._changed.notify_all()
+            return len(self._lists[key])
+
+    async def lpush(self, key: str, value: str) -> int:
+        async with self._changed:
+            self._lists.setdefault(key, deque()).appendleft(value)
+            self._changed.notify_all()
+            return len(self._lists[key])
+
+    async def lpop(self, key: str) -> Optional[str]:
+        items = self._lists.get(key)
+        return items.popleft() if items else None
+
+    async def llen(self, key: str) -> int:
+        return len(self._lists.get(key, ()))
+
+    async def blpop(self, keys: List[str], timeout: int = 0) -> Optional[tuple]:
+        async def _wait() -> tuple:
+            async with self._changed:
+                while True:
+                    for key in keys:
+                        if self._lists.get(key):
+                            return key, self._lists[key].popleft()
+                    await self._changed.wait()
+        try:
+            return await asyncio.wait_for(_wait(), timeout=timeout or None)
+        except asyncio.TimeoutError:
+            return None
+
+    async def sadd(self, key: str, member: str) -> int:
+        members = self._sets.setdefault(key, set())
+        if member in members:
+            return 0
+        members.add(member)
+        return 1
+
+    async def srem(self, key: str, member: str) -> int:
+        members = self._sets.get(key, set())
+        if member not in members:
+            return 0
+        members.discard(member)
+        return 1
+
+    async def smembers(self, key: str) -> Set[str]:
+        return set(self._sets.get(key, set()))
+
+    async def incrby(self, key: str, amount: int) -> int:
+        self._values[key] = (self._value(key) or 0) + amount
+        return self._values[key]
+
+    async def get(self, key: str) -> Optional[Any]:
+        return self._value(key)
+
+    async def set(self, key: str, value: Any, nx: bool = False, ex: Optional[int] = None) -> Optional[bool]:
+        if nx and self._value(key) is not None:
+            return None
+        self._values[key] = value
+        self._expires.pop(key, None)
+        if ex:
+            self._expires[key] = time.monotonic() + ex
+        return True
+
+    async def expire(self, key: str, seconds: int) -> bool:
+        if self._value(key) is None:
+            return False
+        self._expires[key] = time.monotonic() + seconds
+        return True
+
+    async def delete(self, key: str) -> int:
+        self._expires.pop(key, None)
+        return 0 if self._values.pop(key, None) is None else 1
+
+
+def _create_job_store() -> Any:
+    """Create the job store selected in settings."""
+    if settings.transcription_queue_backend != "redis":
+        return InMemoryJobStore()
+
+    if settings.redis_url.startswith("local://"):
+        logger.info("Using local Redis stand-in for transcription queue")
+        return RedisJobStore(LocalRedis(), lease_seconds=settings.transcription_lease_seconds)
+
+    try:
+        import redis.asyncio as redis_asyncio
+    except ImportError:
+        logger.error("redis package not installed, falling back to in-memory transcription queue")
+        return InMemoryJobStore()
+
+    return RedisJobStore(
+        redis_asyncio.from_url(settings.redis_url),
+        lease_seconds=settings.transcription_lease_seconds
+    )
+
+
+class TranscriptionQueue:
+    """
+    Bounded worker pool for chunk transcription.
+
+    Chunks from one session are processed one at a time in arrival order,
+    while different sessions are processed in parallel by up to
+    `transcription_workers` workers. Retryable Groq errors (429, 5xx,
+    timeouts) are retried with exponential backoff and full jitter; chunks
+    that exhaust their retries are dead-lettered. Jobs interrupted by stop()
+    are put back at the front of their session's queue.
+    """
+
+    def __init__(self, store: Optional[Any] = None, stt_client: Optional[GroqSTTClient] = None):
+        self.store = store or _create_job_store()
+        self.stt_client = stt_client or GroqSTTClient()
+        self.worker_count = settings.transcription_workers
+        self.max_queue_size = settings.transcription_queue_max_size
+        self.max_retries = settings.transcription_max_retries
+        self.retry_base_delay = settings.transcription_retry_base_delay
+        self.retry_max_delay = settings.transcription_retry_max_delay
+        self.lease_seconds = settings.transcription_lease_seconds
+
+        self._workers: List[asyncio.Task] = []
+        self._running = False
+        self._in_flight = 0
+        self.stats = {
+            "enqueued": 0,
+            "completed": 0,
+            "skipped": 0,
+            "retries": 0,
+            "requeued": 0,
+            "recovered_sessions": 0,
+            "dead_lettered": 0,
+            "total_wait_time": 0.0,
+            "total_processing_time": 0.0
+        }
+
+    async def start(self) -> None:
+        """Start the worker tasks."""
+        if self._running:
+            return
+        self._running = True
+        self._workers = [
+            asyncio.create_task(self._worker(i), name=f"transcription-worker-{i}")
+            for i in range(self.worker_count)
+        ]
+        self._workers.append(asyncio.create_task(self._recovery_loop(), name="transcription-recovery"))
+        logger.info(f"Started {self.worker_count} transcription workers")
+
+    async def stop(self) -> None:
+        """Stop the worker tasks; in-flight jobs are cancelled and requeued."""
+        self._running = False
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        logger.info("Transcription workers stopped")
+
+    async def reserve(self) -> bool:
+        """
+        Atomically take a queue slot for a job; False if the queue is full.
+
+        The slot is used by enqueue(job, reserved=True) or given back with
+        cancel_reservation().
+        """
+        return await self.store.reserve(self.max_queue_size)
+
+    async def cancel_reservation(self) -> None:
+        """Give back a slot taken by reserve() that will not be used."""
+        await self.store.unreserve()
+
+    async def enqueue(self, job: TranscriptionJob, reserved: bool = False) -> None:
+        """
+        Add a job to its session's queue.
+
+        Raises:
+            Exception: If the job could not be queued; a reserved slot is given back
+        """
+        try:
+            await self.store.push(job, reserved=reserved)
+        except Exception:
+            if reserved:
+                await self.store.unreserve()
+            raise
+        self.stats["enqueued"] += 1
+        try:
+            if await self.store.schedule(job.session_id):
+                await self.store.push_ready(job.session_id)
+        except Exception as e:
+            # The job is queued; the recovery loop schedules its session once the lease expires
+            logger.error(f"Could not schedule session {job.session_id}: {e}")
+
+    async def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth and throughput statistics."""
+        finished = max(self.stats["completed"] + self.stats["skipped"] + self.stats["dead_lettered"], 1)
+        return {
+            **self.stats,
+            "queue_depth": await self.store.depth(),
+            "in_flight": self._in_flight,
+            "workers": len(self._workers),
+            "max_queue_size": self.max_queue_size,
+            "average_wait_time": self.stats["total_wait_time"] / finished,
+            "average_processing_time": self.stats["total_processing_time"] / finished
+        }
+
+    async def _worker(self, worker_id: int) -> None:
+        """Take sessions off the ready queue and process their next job."""
+        while self._running:
+            try:
+                session_id = await self.store.pop_ready(timeout=1.0)
+                if session_id is None:
+                    continue
+
+                # Recovery may have put the session in the ready list twice
+                if not await self.store.claim(session_id):
+                    continue
+
+                job = await self.store.pop(session_id)
+                if job is not None:
+                    self._in_flight += 1
+                    heartbeat = asyncio.create_task(self._hold(session_id))
+                    try:
+                        await self._run_job(job)
+                    except asyncio.CancelledError:
+                        await self._requeue(job)
+                        raise
+                    finally:
+                        heartbeat.cancel()
+                        self._in_flight -= 1
+
+                await self.store.release(session_id)
+                await self._reschedule(session_id)
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Transcription worker {worker_id} error: {str(e)}")
+
+    async def _hold(self, session_id: str) -> None:
+        """Renew the session lease while a worker processes it."""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await self.store.renew(session_id)
+            except Exception as e:
+                logger.warning(f"Failed to renew lease of session {session_id}: {str(e)}")
+
+    async def _requeue(self, job: TranscriptionJob) -> None:
+        """Put a job interrupted by shutdown back at the front of its session's queue."""
+        try:
+            await self.store.push_front(job)
+            await _set_chunk_status(job.chunk_id, "queued")
+            await self.store.release(job.session_id)
+            await self.store.push_ready(job.session_id)
+            self.stats["requeued"] += 1
+            logger.info(f"Requeued interrupted transcription of chunk {job.chunk_id}")
+        except Exception as e:
+            logger.error(f"Failed to requeue chunk {job.chunk_id}: {str(e)}")
+
+    async def _recovery_loop(self) -> None:
+        """Periodically reschedule sessions left behind by crashed workers."""
+        while self._running:
+            try:
+                recovered = await self.store.recover()
+                if recovered:
+                    self.stats["recovered_sessions"] += recovered
+                    logger.warning(f"Recovered {recovered} transcription sessions with expired leases")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Transcription session recovery failed: {str(e)}")
+            await asyncio.sleep(self.lease_seconds / 2)
+
+    async def _reschedule(self, session_id: str) -> None:
+        """Hand the session back to the ready queue if it has more work."""
+        if await self.store.pending(session_id) > 0:
+            await self.store.push_ready(session_id)
+            return
+
+        await self.store.unschedule(session_id)
+        # A job may have been enqueued between the check and unschedule
+        if await self.store.pending(session_id) > 0 and await self.store.schedule(session_id):
+            await self.store.push_ready(session_id)
+
+    async def _run_job(self, job: TranscriptionJob) -> None:
+        """Transcribe one chunk with retries."""
+        started_at = time.time()
+        self.stats["total_wait_time"] += started_at - job.enqueued_at
+
+        try:
+            vad = job.vad_result
+            if vad and (vad.is_silent or vad.silence_percentage >= settings.vad_skip_silence_percentage):
+                await _set_chunk_status(job.chunk_id, "skipped", processed=True)
+                await session_transcript_service.add_gap(job.session_id, job.sequence_index)
+                self.stats["skipped"] += 1
+                logger.info(
+                    f"Skipped transcription for silent chunk {job.chunk_id} "
+                    f"({vad.silence_percentage:.1f}% silence)"
+                )
+                return
+
+            await _set_chunk_status(job.chunk_id, "processing")
+
+            attempt = 0
+            while True:
+                try:
+                    transcription_result = await self.stt_client.transcribe(
+                        audio_bytes=job.audio_bytes,
+                        response_format="verbose_json"
+                    )
+                    break
+                except GroqSTTError as e:
+                    if not e.retryable or attempt >= self.max_retries:
+                        await self._dead_letter(job, str(e), attempt)
+                        return
+
+                    delay = random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** attempt))
+                    attempt += 1
+                    self.stats["retries"] += 1
+                    logger.warning(
+                        f"Retrying chunk {job.chunk_id} in {delay:.2f}s "
+                        f"(attempt {attempt}/{self.max_retries}): {str(e)}"
+                    )
+                    await asyncio.sleep(delay)
+
+            await _save_transcription(job, transcription_result)
+            self.stats["completed"] += 1
+            logger.info(f"Queued transcription completed for chunk {job.chunk_id}")
+
+        except Exception as e:
+            logger.error(f"Transcription failed for chunk {job.chunk_id}: {str(e)}")
+            await self._dead_letter(job, str(e), 0)
+        finally:
+            self.stats["total_processing_time"] += time.time() - started_at
+
+    async def _dead_letter(self, job: TranscriptionJob, error: str, retry_count: int) -> None:
+        """Record a chunk that could not be transcribed."""
+        self.stats["dead_lettered"] += 1
+        logger.error(f"Dead-lettered chunk {job.chunk_id} after {retry_count} retries: {error}")
+        try:
+            await _set_chunk_status(job.chunk_id, "dead_letter", processed=True)
+            await session_transcript_service.add_gap(job.session_id, job.sequence_index)
+            async with AsyncSessionLocal() as db:
+                db.add(ProcessingTask(
+                    task_id=f"transcription:{job.chunk_id}:{int(time.time())}",
+                    task_type="transcription",
+                    status="dead_letter",
+                    error_message=error,
+                    retry_count=retry_count,
+                    max_retries=self.max_retries,
+                    input_data=json.dumps({
+                        "chunk_id": job.chunk_id,
+                        "session_id": job.session_id,
+                        "sequence_index": job.sequence_index
+                    }),
+                    completed_at=func.now()
+                ))
+                await db.commit()
+        except Exception as update_error:
+            logger.error(f"Failed to record dead-lettered chunk: {str(update_error)}")
+
+
+async def _set_chunk_status(chunk_id: str, status: str, processed: bool = False, **fields: Any) -> None:
+    """Update the transcription status of a media chunk."""
+    async with AsyncSessionLocal() as db:
+        media_chunk = await db.execute(
+            select(MediaChunk).where(MediaChunk.chunk_id == chunk_id)
+        )
+        media_chunk = media_chunk.scalar_one_or_none()
+
+        if media_chunk:
+            media_chunk.transcription_status = status
+            for name, value in fields.items():
+                setattr(media_chunk, name, value)
+            if processed:
+                media_chunk.processed_at = func.now()
+            await db.commit()
+
+
+async def _save_transcription(job: TranscriptionJob, transcription_result: Dict[str, Any]) -> None:
+    """Persist a transcription, mark its chunk completed and stitch it onto the session transcript."""
+    async with AsyncSessionLocal() as db:
+        transcription = Transcription(
+            chunk_id=job.chunk_id,
+            session_id=job.session_id,
+            sequence_index=job.sequence_index,
+            transcript_text=transcription_result["text"],
+            confidence=transcription_result.get("confidence"),
+            segments=json.dumps(transcription_result.get("segments", [])),
+            language=transcription_result.get("language"),
+            duration_seconds=transcription_result.get("duration"),
+            overlap_seconds=job.overlap_seconds
+        )
+
+        db.add(transcription)
+        await db.commit()
+        await db.refresh(transcription)
+
+    await _set_chunk_status(
+        job.chunk_id,
+        "completed",
+        processed=True,
+        transcription_id=transcription.id
+    )
+    await session_transcript_service.add_transcription(transcription)
+
+
+# Global transcription queue instance
+transcription_queue = TranscriptionQueue()
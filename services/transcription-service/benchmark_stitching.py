@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark for transcript stitching over long synthetic sessions.
+
+Generates sessions of overlapping chunk transcripts (with and without
+segment timestamps), stitches them and reports throughput and accuracy
+against the ground-truth transcript.
+
+Usage:
+    python benchmark_stitching.py [--chunks 2000] [--chunk-seconds 30]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+os.environ.setdefault("GROQ_API_KEY", "benchmark-key")
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.services.transcript_stitcher import ChunkTranscript, stitch_transcripts
+
+VOCABULARY = (
+    "system design latency throughput database cache queue worker service "
+    "interview candidate experience project team customer deploy scale "
+    "python kubernetes storage pipeline metrics the a we I it and to of"
+).split()
+WORDS_PER_SECOND = 2.5
+
+
+def build_session(chunks: int, chunk_seconds: float, overlap: float, with_segments: bool, seed: int):
+    """Create overlapping chunk transcripts and the ground-truth text."""
+    rng = random.Random(seed)
+    step = chunk_seconds - overlap
+    total_seconds = step * chunks + overlap
+    words = []
+    t = 0.0
+    while t < total_seconds:
+        words.append((t, rng.choice(VOCABULARY)))
+        t += 1.0 / WORDS_PER_SECOND
+
+    transcripts = []
+    for index in range(chunks):
+        start = index * step
+        chunk_words = [(ts - start, w) for ts, w in words if start <= ts < start + chunk_seconds]
+        segments = []
+        if with_segments:
+            for i in range(0, len(chunk_words), 8):
+                group = chunk_words[i:i + 8]
+                segments.append({
+                    "start": group[0][0],
+                    "end": group[-1][0] + 1.0 / WORDS_PER_SECOND,
+                    "text": " " + " ".join(w for _, w in group)
+                })
+        transcripts.append(ChunkTranscript(
+            sequence_index=index,
+            text=" ".join(w for _, w in chunk_words),
+            segments=segments,
+            overlap_seconds=overlap if index else 0.0
+        ))
+
+    last_end = (chunks - 1) * step + chunk_seconds
+    truth = " ".join(w for ts, w in words if ts < last_end)
+    return transcripts, truth
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """Word-level edit distance divided by reference length."""
+    ref, hyp = reference.split(), hypothesis.split()
+    previous = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, h in enumerate(hyp, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (r != h))
+        previous = current
+    return previous[-1] / max(len(ref), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--chunk-seconds", type=float, default=30.0)
+    parser.add_argument("--overlap", type=float, default=2.0)
+    args = parser.parse_args()
+
+    for with_segments in (True, False):
+        transcripts, truth = build_session(args.chunks, args.chunk_seconds, args.overlap, with_segments, seed=42)
+        start = time.perf_counter()
+        stitched = stitch_transcripts(transcripts)
+        elapsed = time.perf_counter() - start
+
+        sample = min(len(truth.split()), 5000)
+        wer = word_error_rate(" ".join(truth.split()[:sample]), " ".join(stitched.split()[:sample]))
+        mode = "segments" if with_segments else "tokens"
+        print(
+            f"{mode:>8}: {args.chunks} chunks, {len(truth.split())} words in {elapsed * 1000:.1f} ms "
+            f"({args.chunks / elapsed:.0f} chunks/s), "
+            f"length ratio {len(stitched.split()) / len(truth.split()):.4f}, "
+            f"WER (first {sample} words) {wer:.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
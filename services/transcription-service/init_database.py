@@ -34,7 +34,7 @@ async def main():
         
         # Create engine and drop all tables first to ensure clean state
         from sqlalchemy.ext.asyncio import create_async_engine
-        from app.models import Base, Transcription, TTSCache, MediaChunk, ProcessingTask
+        from app.models import Base, Transcription, TTSCache, MediaChunk, ProcessingTask, SessionTranscript
         
         engine = create_async_engine(
             settings.database_url,
@@ -0,0 +1,121 @@
+"""
+Unit tests for the audio pre-processing stage used before Groq STT uploads.
+
+Usage:
+    pytest test_audio_processing.py
+"""
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+
+os.environ.setdefault("GROQ_API_KEY", "test-key")
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.services.audio_processing import (
+    AudioPreprocessor,
+    decode_wav,
+    detect_audio_format,
+    detect_voice_activity,
+    encode_wav,
+    trim_silence,
+    VoiceActivityResult,
+)
+
+
+def _tone(seconds: float, sample_rate: int, amplitude: float = 0.5) -> np.ndarray:
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    return (amplitude * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def _stereo_wav(samples: np.ndarray, sample_rate: int) -> bytes:
+    import io
+    import wave
+    pcm = (np.repeat(samples[:, None], 2, axis=1) * 32767).astype("<i2")
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(2)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+
+def test_detect_audio_format():
+    assert detect_audio_format(encode_wav(np.zeros(10, dtype=np.float32), 16000)) == "wav"
+    assert detect_audio_format(b"\x1a\x45\xdf\xa3" + b"\x00" * 8) == "webm"
+    assert detect_audio_format(b"OggS" + b"\x00" * 8) == "ogg"
+    assert detect_audio_format(b"ID3" + b"\x00" * 9) == "mp3"
+    assert detect_audio_format(b"\x00\x00\x00\x20ftypM4A ") == "m4a"
+    assert detect_audio_format(b"garbage") == "unknown"
+
+
+def test_trim_silence_keeps_speech():
+    sample_rate = 16000
+    silence = np.zeros(sample_rate * 2, dtype=np.float32)
+    samples = np.concatenate([silence, _tone(1.0, sample_rate), silence])
+
+    trimmed = trim_silence(samples, sample_rate, threshold_db=-40.0, padding_ms=0)
+
+    assert abs(len(trimmed) - sample_rate) <= sample_rate * 0.04
+
+
+def test_prepare_downmixes_resamples_and_shrinks_wav():
+    sample_rate = 44100
+    silence = np.zeros(sample_rate, dtype=np.float32)
+    audio = _stereo_wav(np.concatenate([silence, _tone(2.0, sample_rate), silence]), sample_rate)
+
+    preprocessor = AudioPreprocessor()
+    preprocessor.output_codec = "wav"
+    prepared = preprocessor.prepare_sync(audio)
+
+    assert prepared.format == "wav"
+    assert prepared.bytes_saved > 0
+    assert prepared.trimmed_seconds > 1.0
+
+    samples, rate = decode_wav(prepared.audio_bytes)
+    assert rate == 16000
+    assert abs(len(samples) / rate - 2.4) < 0.1
+
+
+def test_prepare_passes_through_undecodable_audio():
+    preprocessor = AudioPreprocessor()
+    preprocessor.ffmpeg_path = None
+    audio = b"\x1a\x45\xdf\xa3" + os.urandom(256)
+
+    prepared = preprocessor.prepare_sync(audio)
+
+    assert prepared.audio_bytes == audio
+    assert prepared.filename == "audio.webm"
+    assert prepared.mime_type == "audio/webm"
+
+
+def test_voice_activity_detection():
+    sample_rate = 16000
+    rng = np.random.default_rng(0)
+    noise = (0.001 * rng.standard_normal(sample_rate * 8)).astype(np.float32)
+    speech = noise.copy()
+    speech[sample_rate * 2:sample_rate * 4] += _tone(2.0, sample_rate)
+
+    silent = detect_voice_activity(noise, sample_rate, threshold_db=-40.0)
+    assert silent.is_silent
+    assert silent.silence_percentage == 100.0
+
+    active = detect_voice_activity(speech, sample_rate, threshold_db=-40.0)
+    assert not active.is_silent
+    assert 65.0 < active.silence_percentage < 75.0
+    assert active.audio_quality_score > 0.5
+
+    continuous = detect_voice_activity(_tone(3.0, sample_rate), sample_rate, threshold_db=-40.0)
+    assert continuous.silence_percentage == 0.0
+
+
+def test_voice_activity_from_upload_event_metrics():
+    silent = VoiceActivityResult.from_metrics(100.0, 0.0)
+    assert silent.is_silent
+    assert silent.duration_seconds == 0.0
+
+    active = VoiceActivityResult.from_metrics(25.0, 0.8, duration_seconds=4.0)
+    assert not active.is_silent
+    assert active.speech_seconds == 3.0
@@ -0,0 +1,73 @@
+"""
+Unit tests for selecting a persona from a resume's interview profile.
+
+Usage:
+    pytest test_persona_selection.py
+"""
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+os.environ.setdefault("GROQ_API_KEY", "test-key")
+sys.path.insert(0, str(Path(__file__).parent))
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from app.routers import personas as personas_router
+from app.routers.personas import PersonaSelectionRequest, select_persona
+from app.services.persona_service import PersonaService
+
+DEVOPS_PROFILE = {
+    "primary_domain": "devops",
+    "experience_level": "senior",
+    "top_skills": ["Kubernetes", "Terraform"],
+    "domain_scores": {"devops": 0.77, "software-engineering": 0.13},
+}
+
+
+def test_profile_selects_persona_and_skill_matched_questions():
+    service = PersonaService()
+    persona = service.get_persona_for_profile(DEVOPS_PROFILE)
+
+    assert persona.name == "Jordan"
+    assert service.get_persona_for_resume({"interview_profile": DEVOPS_PROFILE}) is persona
+    questions = service.get_starting_questions(persona, DEVOPS_PROFILE)
+    assert len(questions) == 3
+    assert "Kubernetes" in questions[0]
+
+
+def test_fallback_scoring_reads_resume_service_skill_categories():
+    """Without a profile, skills may be plain names or {"category", "skills"} dicts; keywords match whole words."""
+    service = PersonaService()
+
+    assert service._determine_domain_from_skills([{"category": "Cloud", "skills": ["Docker", "Kubernetes"]}]) == "devops"
+    assert service._determine_domain_from_skills(["HTML", "CSS"]) == "resume-based"
+    assert service.get_persona_for_resume({"skills": ["Tableau", "SQL"], "experience": []}).domain == "data-analyst"
+
+
+def test_select_by_resume_id_fetches_the_profile_once(monkeypatch):
+    requests = []
+
+    def resume_service(request: httpx.Request) -> httpx.Response:
+        requests.append(request.url.path)
+        if request.url.path.endswith("/missing/interview-profile"):
+            return httpx.Response(404, json={"detail": "Resume not found"})
+        return httpx.Response(200, json={"resume_id": "alice_1", **DEVOPS_PROFILE})
+
+    real_client = httpx.AsyncClient
+    monkeypatch.setattr(
+        personas_router.httpx, "AsyncClient",
+        lambda **kwargs: real_client(transport=httpx.MockTransport(resume_service), **kwargs)
+    )
+
+    response = asyncio.run(select_persona(PersonaSelectionRequest(resume_id="alice_1")))
+    assert (response.name, response.experience_level) == ("Jordan", "senior")
+    assert len(response.starting_questions) == 3
+    assert requests == ["/resume/alice_1/interview-profile"]
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(select_persona(PersonaSelectionRequest(resume_id="missing")))
+    assert error.value.status_code == 404
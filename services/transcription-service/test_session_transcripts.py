@@ -0,0 +1,197 @@
+"""
+Unit tests for incremental session transcript materialization.
+
+Usage:
+    pytest test_session_transcripts.py
+"""
+import asyncio
+import json
+import os
+import sys
+from pathlib import Path
+
+os.environ.setdefault("GROQ_API_KEY", "test-key")
+sys.path.insert(0, str(Path(__file__).parent))
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.models import Base, MediaChunk, Transcription
+from app.services import session_transcripts as session_module
+from app.services.session_transcripts import SessionTranscriptService
+
+
+def _transcription(sequence_index: int, text: str, overlap: float = 2.0) -> Transcription:
+    words = text.split()
+    return Transcription(
+        chunk_id=f"chunk-{sequence_index}",
+        session_id="session-1",
+        sequence_index=sequence_index,
+        transcript_text=text,
+        confidence=0.9,
+        segments=json.dumps([{"start": 0.0, "end": 1.0, "text": " " + " ".join(words[:2])},
+                             {"start": 2.5, "end": 6.0, "text": " " + " ".join(words[2:])}]),
+        duration_seconds=6.0,
+        overlap_seconds=overlap if sequence_index else 0.0
+    )
+
+
+def test_out_of_order_chunks_are_buffered_and_persisted(tmp_path, monkeypatch):
+    async def scenario():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        monkeypatch.setattr(session_module, "AsyncSessionLocal", session_factory)
+
+        chunks = [
+            _transcription(0, "hello there my name is Alex"),
+            _transcription(1, "is Alex and I build compilers"),
+            _transcription(3, "mostly for embedded targets today"),
+        ]
+        async with session_factory() as db:
+            db.add_all(chunks[1:])
+            await db.commit()
+
+        service = SessionTranscriptService()
+        live = service.subscribe("session-1")
+
+        await service.add_transcription(chunks[2])
+        await service.add_transcription(chunks[1])
+        snapshot = await service.get_transcript("session-1")
+        assert snapshot["transcript"] == ""
+        assert snapshot["buffered_chunks"] == 2
+
+        async with session_factory() as db:
+            db.add(chunks[0])
+            await db.commit()
+        await service.add_transcription(chunks[0])
+        snapshot = await service.get_transcript("session-1")
+        assert snapshot["transcript"] == "hello there my name is Alex and I build compilers"
+        assert snapshot["next_sequence_index"] == 2
+        assert [live.get_nowait()["text"] for _ in range(live.qsize())] == [
+            "hello there my name is Alex", "and I build compilers"
+        ]
+
+        # Skipped chunk closes the gap; the next chunk is not de-duplicated against chunk 1
+        async with session_factory() as db:
+            db.add(MediaChunk(session_id="session-1", chunk_id="chunk-2", sequence_index=2,
+                              file_path="", transcription_status="skipped"))
+            await db.commit()
+        await service.add_gap("session-1", 2)
+        expected = "hello there my name is Alex and I build compilers mostly for embedded targets today"
+        assert (await service.get_transcript("session-1"))["transcript"] == expected
+
+        # A fresh instance reads the materialized row
+        restarted = SessionTranscriptService()
+        snapshot = await restarted.get_transcript("session-1")
+        assert snapshot["transcript"] == expected
+        assert snapshot["total_chunks"] == 3
+        assert snapshot["version"] == 3
+        assert await restarted.get_transcript("unknown") is None
+
+        await engine.dispose()
+
+    asyncio.run(scenario())
+
+
+def test_reads_flush_chunks_past_missing_indices_and_detect_stale_cache(tmp_path, monkeypatch):
+    async def scenario():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        monkeypatch.setattr(session_module, "AsyncSessionLocal", session_factory)
+
+        # The session starts at index 1 and index 3 never arrives
+        chunks = [
+            _transcription(1, "hello there my name is Alex"),
+            _transcription(2, "is Alex and I build compilers"),
+            _transcription(4, "mostly for embedded targets today"),
+        ]
+        async with session_factory() as db:
+            db.add_all(chunks)
+            await db.commit()
+
+        first, second = SessionTranscriptService(), SessionTranscriptService()
+        for chunk in chunks:
+            await first.add_transcription(chunk)
+
+        assert (await first.get_transcript("session-1"))["transcript"] == ""
+        flushed = await first.get_transcript("session-1", flush=True)
+        assert flushed["transcript"] == (
+            "hello there my name is Alex and I build compilers mostly for embedded targets today"
+        )
+        assert flushed["missing_chunks"] == [0, 3]
+        assert flushed["total_chunks"] == 3
+        assert flushed["buffered_chunks"] == 3
+
+        # Another process closes gap 0 while the first still caches the old state
+        async with session_factory() as db:
+            db.add(MediaChunk(session_id="session-1", chunk_id="chunk-0", sequence_index=0,
+                              file_path="", transcription_status="skipped"))
+            await db.commit()
+        await second.add_gap("session-1", 0)
+        assert (await second.get_transcript("session-1"))["next_sequence_index"] == 3
+
+        async with session_factory() as db:
+            db.add(MediaChunk(session_id="session-1", chunk_id="chunk-3", sequence_index=3,
+                              file_path="", transcription_status="skipped"))
+            await db.commit()
+        await first.add_gap("session-1", 3)
+        snapshot = await second.get_transcript("session-1")
+        assert snapshot["next_sequence_index"] == 5
+        assert snapshot["total_chunks"] == 3
+        assert snapshot["transcript"] == flushed["transcript"]
+
+        await engine.dispose()
+
+    asyncio.run(scenario())
+
+
+def test_resubmitted_dead_letter_chunk_is_stitched_in(tmp_path, monkeypatch):
+    async def scenario():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        monkeypatch.setattr(session_module, "AsyncSessionLocal", session_factory)
+
+        chunks = [
+            _transcription(0, "hello there my name is Alex"),
+            _transcription(1, "is Alex and I build compilers"),
+            _transcription(2, "build compilers mostly for embedded targets today"),
+        ]
+        async with session_factory() as db:
+            db.add_all([chunks[0], chunks[2]])
+            db.add(MediaChunk(session_id="session-1", chunk_id="chunk-1", sequence_index=1,
+                              file_path="", transcription_status="dead_letter"))
+            await db.commit()
+
+        service = SessionTranscriptService()
+        live = service.subscribe("session-1")
+        await service.add_transcription(chunks[0])
+        await service.add_gap("session-1", 1)
+        await service.add_transcription(chunks[2])
+        snapshot = await service.get_transcript("session-1")
+        assert snapshot["transcript"] == "hello there my name is Alex build compilers mostly for embedded targets today"
+        assert snapshot["next_sequence_index"] == 3
+
+        # The dead-lettered chunk is resubmitted and transcribed after its gap was stitched
+        async with session_factory() as db:
+            db.add(chunks[1])
+            await db.commit()
+        await service.add_transcription(chunks[1])
+        expected = "hello there my name is Alex and I build compilers mostly for embedded targets today"
+        snapshot = await service.get_transcript("session-1")
+        assert snapshot["transcript"] == expected
+        assert snapshot["total_chunks"] == 3
+        deltas = [live.get_nowait() for _ in range(live.qsize())]
+        assert deltas[-1]["transcript"] == expected
+        assert deltas[-1]["version"] == snapshot["version"]
+
+        # The re-stitched transcript is what a restarted process reads
+        assert (await SessionTranscriptService().get_transcript("session-1"))["transcript"] == expected
+
+        await engine.dispose()
+
+    asyncio.run(scenario())
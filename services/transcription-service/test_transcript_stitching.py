@@ -0,0 +1,73 @@
+"""
+Unit tests for overlap-aware transcript stitching.
+
+Usage:
+    pytest test_transcript_stitching.py
+"""
+import os
+import sys
+from pathlib import Path
+
+os.environ.setdefault("GROQ_API_KEY", "test-key")
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.services.transcript_stitcher import ChunkTranscript, TranscriptStitcher, stitch_transcripts
+
+
+def _segment(start: float, end: float, text: str) -> dict:
+    return {"start": start, "end": end, "text": " " + text}
+
+
+def test_timestamps_drop_overlapped_segments():
+    chunks = [
+        ChunkTranscript(0, "Tell me about yourself. I work on distributed systems.", [
+            _segment(0.0, 3.0, "Tell me about yourself."),
+            _segment(3.0, 10.0, "I work on distributed systems."),
+        ], 0.0),
+        ChunkTranscript(1, "systems. Mostly storage engines.", [
+            _segment(0.0, 1.9, "systems."),
+            _segment(2.0, 6.0, "Mostly storage engines."),
+        ], 2.0),
+    ]
+
+    assert stitch_transcripts(chunks) == (
+        "Tell me about yourself. I work on distributed systems. Mostly storage engines."
+    )
+
+
+def test_straddling_segment_is_aligned_by_tokens():
+    chunks = [
+        ChunkTranscript(0, "we shipped the new billing pipeline last quarter", [
+            _segment(0.0, 10.0, "we shipped the new billing pipeline last quarter"),
+        ], 0.0),
+        ChunkTranscript(1, "pipeline last quarter and it cut costs", [
+            _segment(0.0, 4.0, "pipeline last quarter and it cut costs"),
+        ], 2.0),
+    ]
+
+    assert stitch_transcripts(chunks) == (
+        "we shipped the new billing pipeline last quarter and it cut costs"
+    )
+
+
+def test_token_alignment_without_timestamps():
+    chunks = [
+        ChunkTranscript(1, "Pipeline, last quarter. And it cut costs", [], 2.0),
+        ChunkTranscript(0, "We shipped the new billing pipeline last quarter.", [], 0.0),
+    ]
+
+    assert stitch_transcripts(chunks) == (
+        "We shipped the new billing pipeline last quarter. And it cut costs"
+    )
+
+
+def test_leading_fragment_and_gaps():
+    stitcher = TranscriptStitcher()
+    stitcher.append(ChunkTranscript(0, "I led the migration to kubernetes", [], 0.0))
+    assert stitcher.append(ChunkTranscript(1, "ion to kubernetes last year", [], 2.0)) == "last year"
+
+    # A missing chunk means there is nothing to de-duplicate against
+    assert stitcher.append(ChunkTranscript(3, "last year we grew", [], 2.0)) == "last year we grew"
+
+    # A single repeated word is not treated as overlap
+    assert stitcher.append(ChunkTranscript(4, "grew again", [], 2.0)) == "grew again"
@@ -0,0 +1,223 @@
+"""
+Unit tests for the bounded transcription worker pool.
+
+Usage:
+    pytest test_transcription_queue.py
+"""
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+os.environ.setdefault("GROQ_API_KEY", "test-key")
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.services import transcription_queue as queue_module
+from app.services.groq_stt import GroqSTTError
+from app.services.transcription_queue import (
+    InMemoryJobStore,
+    LocalRedis,
+    RedisJobStore,
+    TranscriptionJob,
+    TranscriptionQueue,
+)
+
+
+class FakeSTTClient:
+    """Records call order and fails the first `failures` calls per chunk."""
+
+    def __init__(self, failures: int = 0, status_code: int = 429):
+        self.failures = failures
+        self.status_code = status_code
+        self.calls = []
+        self.active_sessions = set()
+        self.overlapping = False
+
+    async def transcribe(self, audio_bytes: bytes, response_format: str = "json"):
+        chunk_id = audio_bytes.decode()
+        session_id = chunk_id.split("-")[0]
+        if session_id in self.active_sessions:
+            self.overlapping = True
+        self.active_sessions.add(session_id)
+        try:
+            await asyncio.sleep(0.01)
+            self.calls.append(chunk_id)
+            if self.calls.count(chunk_id) <= self.failures:
+                raise GroqSTTError("rate limited", self.status_code, retryable=self.status_code == 429)
+            return {"text": chunk_id}
+        finally:
+            self.active_sessions.discard(session_id)
+
+
+def _job(session_id: str, index: int) -> TranscriptionJob:
+    chunk_id = f"{session_id}-{index}"
+    return TranscriptionJob(chunk_id, session_id, index, chunk_id.encode(), 2.0)
+
+
+async def _run(queue: TranscriptionQueue, jobs, monkeypatch):
+    statuses = {}
+    saved = []
+
+    async def set_status(chunk_id, status, processed=False, **fields):
+        statuses[chunk_id] = status
+
+    async def save(job, result):
+        saved.append(result["text"])
+        statuses[job.chunk_id] = "completed"
+
+    async def dead_letter(job, error, retry_count):
+        queue.stats["dead_lettered"] += 1
+        statuses[job.chunk_id] = "dead_letter"
+
+    monkeypatch.setattr(queue_module, "_set_chunk_status", set_status)
+    monkeypatch.setattr(queue_module, "_save_transcription", save)
+    monkeypatch.setattr(queue, "_dead_letter", dead_letter)
+
+    await queue.start()
+    for job in jobs:
+        await queue.enqueue(job)
+    for _ in range(500):
+        if len(statuses) == len(jobs) and all(s in ("completed", "dead_letter") for s in statuses.values()):
+            break
+        await asyncio.sleep(0.01)
+    await queue.stop()
+    return statuses, saved
+
+
+def _make_queue(store, stt_client) -> TranscriptionQueue:
+    queue = TranscriptionQueue(store=store, stt_client=stt_client)
+    queue.worker_count = 3
+    queue.retry_base_delay = 0.001
+    queue.retry_max_delay = 0.01
+    return queue
+
+
+def test_sessions_are_processed_in_order_and_in_parallel(monkeypatch):
+    async def scenario():
+        stt = FakeSTTClient()
+        queue = _make_queue(InMemoryJobStore(), stt)
+        jobs = [_job(session, i) for i in range(4) for session in ("a", "b", "c")]
+        statuses, saved = await _run(queue, jobs, monkeypatch)
+
+        assert set(statuses.values()) == {"completed"}
+        for session in ("a", "b", "c"):
+            assert [c for c in saved if c.startswith(session)] == [f"{session}-{i}" for i in range(4)]
+        assert not stt.overlapping
+        assert (await queue.get_stats())["queue_depth"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_retryable_errors_are_retried_then_dead_lettered(monkeypatch):
+    async def scenario():
+        stt = FakeSTTClient(failures=2)
+        queue = _make_queue(InMemoryJobStore(), stt)
+        queue.max_retries = 3
+        statuses, _ = await _run(queue, [_job("a", 0)], monkeypatch)
+        assert statuses == {"a-0": "completed"}
+        assert queue.stats["retries"] == 2
+
+        stt = FakeSTTClient(failures=10)
+        queue = _make_queue(InMemoryJobStore(), stt)
+        queue.max_retries = 2
+        statuses, _ = await _run(queue, [_job("a", 0)], monkeypatch)
+        assert statuses == {"a-0": "dead_letter"}
+        assert stt.calls == ["a-0"] * 3
+
+        stt = FakeSTTClient(failures=1, status_code=400)
+        queue = _make_queue(InMemoryJobStore(), stt)
+        statuses, _ = await _run(queue, [_job("a", 0)], monkeypatch)
+        assert statuses == {"a-0": "dead_letter"}
+        assert stt.calls == ["a-0"]
+
+    asyncio.run(scenario())
+
+
+def test_redis_store_with_local_stand_in(monkeypatch):
+    async def scenario():
+        stt = FakeSTTClient()
+        queue = _make_queue(RedisJobStore(LocalRedis()), stt)
+        jobs = [_job(session, i) for i in range(3) for session in ("a", "b")]
+        statuses, saved = await _run(queue, jobs, monkeypatch)
+
+        assert set(statuses.values()) == {"completed"}
+        assert [c for c in saved if c.startswith("a")] == ["a-0", "a-1", "a-2"]
+        assert (await queue.get_stats())["queue_depth"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_stop_requeues_in_flight_jobs(monkeypatch):
+    async def scenario():
+        statuses = {}
+
+        async def set_status(chunk_id, status, processed=False, **fields):
+            statuses[chunk_id] = status
+
+        class BlockingSTTClient:
+            async def transcribe(self, audio_bytes: bytes, response_format: str = "json"):
+                await asyncio.sleep(60)
+
+        monkeypatch.setattr(queue_module, "_set_chunk_status", set_status)
+        store = InMemoryJobStore()
+        queue = _make_queue(store, BlockingSTTClient())
+        await queue.start()
+        await queue.enqueue(_job("a", 0))
+        await queue.enqueue(_job("a", 1))
+        while statuses.get("a-0") != "processing":
+            await asyncio.sleep(0.01)
+        await queue.stop()
+
+        assert statuses["a-0"] == "queued"
+        assert queue.stats["requeued"] == 1
+        assert [(await store.pop("a")).chunk_id for _ in range(2)] == ["a-0", "a-1"]
+
+    asyncio.run(scenario())
+
+
+def test_redis_sessions_of_crashed_workers_are_recovered(monkeypatch):
+    async def scenario():
+        store = RedisJobStore(LocalRedis(), lease_seconds=1)
+        await store.push(_job("a", 0))
+        assert await store.schedule("a")
+        await store.push_ready("a")
+        # A worker takes the session and dies without releasing it
+        assert await store.pop_ready(timeout=1) == "a"
+        assert await store.claim("a")
+        assert await store.recover() == 0
+
+        await asyncio.sleep(1.1)
+        assert await store.recover() == 1
+        assert await store.pop_ready(timeout=1) == "a"
+        assert await store.claim("a")
+        assert not await store.claim("a")
+
+    asyncio.run(scenario())
+
+
+def test_queue_slots_are_reserved_atomically():
+    async def scenario():
+        for store in (InMemoryJobStore(), RedisJobStore(LocalRedis())):
+            queue = _make_queue(store, FakeSTTClient())
+            queue.max_queue_size = 3
+
+            reserved = await asyncio.gather(*(queue.reserve() for _ in range(5)))
+            assert reserved.count(True) == 3
+            assert await store.depth() == 3
+
+            await queue.enqueue(_job("a", 0), reserved=True)
+            await queue.cancel_reservation()
+            assert await store.depth() == 2
+
+            # A failed push gives its slot back
+            async def broken_push(job, reserved=False):
+                raise ConnectionError("store unavailable")
+            store.push = broken_push
+            try:
+                await queue.enqueue(_job("a", 1), reserved=True)
+            except ConnectionError:
+                pass
+            assert await store.depth() == 1
+            assert await queue.reserve()
+
+    asyncio.run(scenario())